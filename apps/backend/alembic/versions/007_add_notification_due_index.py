@@ -0,0 +1,47 @@
+"""Add a partial index for the notification delivery queue.
+
+The delivery pipeline repeatedly claims the oldest due notifications
+(``status IN ('PENDING', 'QUEUED') AND "scheduledAt" <= now ORDER BY
+"scheduledAt" LIMIT n FOR UPDATE SKIP LOCKED``). The existing
+``Notification_scheduledAt_idx`` covers every notification ever sent, so each
+claim walked past delivered, read and dismissed rows; this index only holds
+the rows still waiting to go out and stays small however long the history
+grows.
+
+Built CONCURRENTLY so the table stays writable while it builds.
+
+Revision ID: 007_add_notification_due_index
+Revises: 006_add_exam_prep_type
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers
+revision = "007_add_notification_due_index"
+down_revision = "006_add_exam_prep_type"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "Notification_due_idx",
+            "Notification",
+            ["scheduledAt"],
+            postgresql_where=sa.text("status IN ('PENDING', 'QUEUED')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "Notification_due_idx",
+            table_name="Notification",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
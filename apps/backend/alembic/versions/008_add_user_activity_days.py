@@ -0,0 +1,54 @@
+"""Add the per-user activity-day bitsets.
+
+Streaks and "active days" numbers were recomputed from history on every
+read: the flashcard stats aggregated distinct review days, the activity feed
+re-read 30 days of entries after every recorded activity, and UserStreak was
+maintained separately from both. ``UserActivityDays`` keeps one bitset per
+learner and kind (ACTIVITY: any study, review or quiz event; REVIEW:
+flashcard reviews), bit n being the UTC day 2020-01-01 + n. A write sets one
+bit and reads are bit operations over a few hundred bytes.
+
+The table starts empty; run the ``progress.backfill_activity_days`` task
+once after upgrading to build the bitsets from existing history.
+
+Revision ID: 008_add_user_activity_days
+Revises: 007_add_notification_due_index
+Create Date: 2026-10-16
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers
+revision = "008_add_user_activity_days"
+down_revision = "007_add_notification_due_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "UserActivityDays",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "userId",
+            sa.String(),
+            sa.ForeignKey("User.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("bits", sa.LargeBinary(), nullable=False),
+        sa.Column("createdAt", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "UserActivityDays_userId_kind_key",
+        "UserActivityDays",
+        ["userId", "kind"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("UserActivityDays_userId_kind_key", table_name="UserActivityDays")
+    op.drop_table("UserActivityDays")
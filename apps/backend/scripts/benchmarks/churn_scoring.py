@@ -0,0 +1,245 @@
+"""Benchmark churn-risk scoring: per-subscriber queries vs. vectorised batches.
+
+Seeds throwaway PLUS subscribers with learning profiles and a few weeks of
+activity feed entries, then scores the whole cohort the way the retention
+check now does (keyset pages of ``SCORING_BATCH_SIZE``: three grouped
+queries per page, every signal computed with NumPy) and compares it with the
+previous implementation, which ran six queries per subscriber and scored in
+Python. The legacy path is timed on a sample and extrapolated to the cohort;
+both must produce the same signals for the sample.
+
+Also times ``score_churn_risk`` alone on synthetic inputs, i.e. the pure
+compute cost without the database.
+
+Needs a reachable Postgres (DATABASE_URL) with the app schema. Everything
+runs inside one transaction that is rolled back, so nothing is kept.
+
+Usage:
+    poetry run python scripts/benchmarks/churn_scoring.py
+    poetry run python scripts/benchmarks/churn_scoring.py --users 50000 --entries 8 --sample 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+
+async def legacy_signals(s, user_id: str, now: datetime) -> dict[str, float]:
+    """The per-subscriber implementation, kept here for comparison."""
+    from sqlalchemy import func, select
+
+    from src.domains.personal_learning.db_models import (
+        ActivityFeedEntry,
+        GeneratedDocument,
+        LearningProfile,
+    )
+
+    recent_start = now - timedelta(days=14)
+    previous_start = now - timedelta(days=28)
+
+    async def count(model, column, start, end=None) -> int:
+        stmt = select(func.count()).select_from(model).where(model.user_id == user_id)
+        stmt = stmt.where(column >= start)
+        if end is not None:
+            stmt = stmt.where(column < end)
+        return (await s.execute(stmt)).scalar_one() or 0
+
+    def decline(recent: int, previous: int, no_history: float) -> float:
+        if previous == 0:
+            return 0.0 if recent > 0 else no_history
+        return max(0.0, min(1.0, 1.0 - recent / previous))
+
+    occurred, created = ActivityFeedEntry.occurred_at, GeneratedDocument.created_at
+    signals = {
+        "login_frequency_decline": decline(
+            await count(ActivityFeedEntry, occurred, recent_start),
+            await count(ActivityFeedEntry, occurred, previous_start, recent_start),
+            0.5,
+        ),
+        "feature_usage_decline": decline(
+            await count(GeneratedDocument, created, recent_start),
+            await count(GeneratedDocument, created, previous_start, recent_start),
+            0.3,
+        ),
+    }
+
+    # The old path loaded the profile once per signal
+    for _ in range(2):
+        profile = (
+            await s.execute(select(LearningProfile).where(LearningProfile.user_id == user_id))
+        ).scalar_one_or_none()
+    if profile is None:
+        signals["plus_feature_absence"] = 0.5
+    else:
+        used = len(profile.plus_features_used_this_period or [])
+        signals["plus_feature_absence"] = 1.0 if used == 0 else 0.5 if used <= 1 else 0.0
+    risk = profile.dropout_risk if profile else None
+    signals["behaviour_dropout_risk"] = 0.3 if risk is None else max(0.0, min(1.0, risk))
+
+    last = (
+        await s.execute(select(func.max(occurred)).where(ActivityFeedEntry.user_id == user_id))
+    ).scalar_one_or_none()
+    if not last:
+        signals["days_since_activity"] = 0.8
+    else:
+        days = (now - last).days
+        bands = [(2, 0.0), (5, 0.2), (10, 0.5), (14, 0.7)]
+        signals["days_since_activity"] = next((v for d, v in bands if days <= d), 1.0)
+    return signals
+
+
+async def _seed(s, users: int, entries: int) -> list[str]:
+    from sqlalchemy import insert, text
+
+    from src.domains.identity.db_models import User
+    from src.domains.personal_learning.db_models import ActivityFeedEntry, LearningProfile
+
+    now = datetime.now(UTC)
+    rng = random.Random(7)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    user_rows, profile_rows, activity_rows = [], [], []
+    for user_id in user_ids:
+        user_rows.append(
+            {
+                "id": user_id,
+                "email": f"bench-{user_id[:18]}@example.invalid",
+                "name": "Benchmark",
+                "tier": "PREMIUM_MONTHLY",
+            }
+        )
+        if rng.random() < 0.9:
+            profile_rows.append(
+                {
+                    "user_id": user_id,
+                    "plus_features_used_this_period": rng.sample(
+                        ["ai_tutor", "exam_prep", "documents"], rng.randint(0, 3)
+                    ),
+                    "dropout_risk": rng.choice([None, round(rng.random(), 2)]),
+                }
+            )
+        # Activity skewed towards the past: plenty of declining subscribers
+        horizon = rng.choice([7, 28, 40])
+        for _ in range(rng.randint(0, entries)):
+            activity_rows.append(
+                {
+                    "user_id": user_id,
+                    "activity_type": "STUDY_SESSION",
+                    "title": "Studied",
+                    "occurred_at": now - timedelta(minutes=rng.randint(0, horizon * 1440)),
+                }
+            )
+    for model, rows in (
+        (User, user_rows),
+        (LearningProfile, profile_rows),
+        (ActivityFeedEntry, activity_rows),
+    ):
+        for start in range(0, len(rows), 5000):
+            await s.execute(insert(model), rows[start : start + 5000])
+    await s.execute(text('ANALYZE "User"'))
+    await s.execute(text('ANALYZE "ActivityFeedEntry"'))
+    return sorted(user_ids)
+
+
+def _synthetic(n: int):
+    import numpy as np
+
+    from src.domains.personal_learning.services.retention_service import ChurnInputs
+
+    rng = np.random.default_rng(7)
+    days = rng.integers(0, 40, n).astype(float)
+    days[rng.random(n) < 0.05] = np.nan
+    risk = rng.random(n)
+    risk[rng.random(n) < 0.3] = np.nan
+    return ChurnInputs(
+        user_ids=[str(i) for i in range(n)],
+        activity_recent=rng.integers(0, 20, n).astype(float),
+        activity_previous=rng.integers(0, 20, n).astype(float),
+        days_inactive=days,
+        docs_recent=rng.integers(0, 5, n).astype(float),
+        docs_previous=rng.integers(0, 5, n).astype(float),
+        plus_features_used=rng.integers(-1, 4, n).astype(float),
+        dropout_risk=risk,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--entries", type=int, default=8, help="max activity entries per user")
+    parser.add_argument("--sample", type=int, default=200, help="users scored the legacy way")
+    opts = parser.parse_args()
+
+    from src.domains.personal_learning.services.retention_service import (
+        SIGNAL_NAMES,
+        load_churn_inputs,
+        score_churn_risk,
+    )
+    from src.domains.personal_learning.tasks.retention_check import SCORING_BATCH_SIZE
+    from src.shared.database import connect_db, disconnect_db, get_session_factory
+
+    t0 = time.perf_counter()
+    score_churn_risk(_synthetic(opts.users))
+    compute_s = time.perf_counter() - t0
+
+    now = datetime.now(UTC)
+    await connect_db()
+    try:
+        async with get_session_factory()() as s:
+            try:
+                user_ids = await _seed(s, opts.users, opts.entries)
+
+                t0 = time.perf_counter()
+                signals: dict[str, list[float]] = {}
+                for start in range(0, len(user_ids), SCORING_BATCH_SIZE):
+                    page = user_ids[start : start + SCORING_BATCH_SIZE]
+                    scores = score_churn_risk(await load_churn_inputs(s, page, now=now))
+                    signals.update(zip(page, scores.signals.tolist()))
+                batch_s = time.perf_counter() - t0
+
+                sample = random.Random(7).sample(user_ids, min(opts.sample, len(user_ids)))
+                t0 = time.perf_counter()
+                legacy = {u: await legacy_signals(s, u, now) for u in sample}
+                legacy_s = (time.perf_counter() - t0) * len(user_ids) / len(sample)
+            finally:
+                await s.rollback()
+    finally:
+        await disconnect_db()
+
+    print(f"{opts.users} subscribers, up to {opts.entries} activity entries each")
+    print(f"{'per-subscriber (est.)':>22}: {legacy_s:.1f} s ({len(sample)} sampled)")
+    print(f"{'vectorised batches':>22}: {batch_s:.2f} s ({SCORING_BATCH_SIZE} per page)")
+    print(f"{'scoring only':>22}: {compute_s * 1000:.1f} ms")
+    print(f"speed-up: {legacy_s / batch_s:.1f}x")
+    mismatches = [
+        u
+        for u, expected in legacy.items()
+        if not all(
+            math.isclose(expected[name], value) for name, value in zip(SIGNAL_NAMES, signals[u])
+        )
+    ]
+    if mismatches:
+        u = mismatches[0]
+        print(f"MISMATCH for {len(mismatches)} user(s)")
+        print(f"  legacy: {legacy[u]}\n  batch:  {dict(zip(SIGNAL_NAMES, signals[u]))}")
+        sys.exit(1)
+    print(f"signals match for {len(sample)} sampled subscribers")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
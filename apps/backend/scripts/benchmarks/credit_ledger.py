@@ -0,0 +1,136 @@
+"""Load-test the Redis credit ledger for throughput and double-spend safety.
+
+Primes a set of users with a fixed subscription + purchased balance, then
+fires many concurrent charges per user from several ledger instances (one
+Redis connection each, standing in for app nodes). Reports charge latency
+and throughput, then checks that no user was charged beyond their balance
+and that the write-behind deltas add up to exactly what was charged.
+
+Needs a reachable Redis (REDIS_URL); write-behind deltas are applied to an
+in-memory table instead of Postgres. Keys live under a throwaway prefix and
+are deleted afterwards.
+
+Usage:
+    poetry run python scripts/benchmarks/credit_ledger.py
+    poetry run python scripts/benchmarks/credit_ledger.py --users 200 --charges 50 --nodes 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--charges", type=int, default=40, help="concurrent charges per user")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--credits", type=int, default=7, help="credits per charge")
+    parser.add_argument("--hard-cap", type=int, default=150)
+    parser.add_argument("--purchased", type=int, default=50)
+    opts = parser.parse_args()
+
+    import redis.asyncio as redis
+
+    from src.config import get_settings
+    from src.domains.billing.services.credit_ledger import CreditLedger
+
+    settings = get_settings()
+    prefix = f"bench:{uuid.uuid4().hex[:8]}:"
+    table: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    statements = 0
+
+    async def apply(deltas):
+        nonlocal statements
+        statements += 1
+        for d in deltas:
+            table[d.user_id][0] += d.used
+            table[d.user_id][1] += d.purchased
+
+    users = [f"user-{i}" for i in range(opts.users)]
+    clients = [redis.from_url(settings.REDIS_URL) for _ in range(opts.nodes)]
+    nodes = [CreditLedger(flush_interval=0.05, flush_batch=500) for _ in clients]
+
+    with patch("src.domains.billing.repository.billing_repo.apply_credit_deltas", apply):
+        for node, client in zip(nodes, clients):
+            await node.start(client, key_prefix=prefix)
+        period_end = datetime.now(UTC) + timedelta(days=30)
+        for user_id in users:
+            await nodes[0].prime(
+                user_id,
+                free=False,
+                credits_used=0,
+                hard_cap=opts.hard_cap,
+                soft_cap=0,
+                purchased_balance=opts.purchased,
+                daily_limit=0,
+                daily_bonus=0,
+                credits_used_today=0,
+                period_end=period_end,
+            )
+
+        latencies: list[float] = []
+
+        async def charge(i: int, user_id: str):
+            t0 = time.perf_counter()
+            result = await nodes[i % opts.nodes].consume(user_id, opts.credits)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            return user_id, result
+
+        jobs = [charge(i, u) for i in range(opts.charges) for u in users]
+        started = time.perf_counter()
+        results = await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - started
+
+        for node in nodes:
+            await node.stop()
+        async for key in clients[0].scan_iter(match=f"{prefix}*"):
+            await clients[0].delete(key)
+        for client in clients:
+            await client.aclose()
+
+    charged: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for user_id, result in results:
+        charged[user_id][0] += result.subscription_deducted
+        charged[user_id][1] += result.purchased_deducted
+
+    budget = opts.hard_cap + opts.purchased
+    expected = (budget // opts.credits) * opts.credits
+    overspent = [u for u in users if sum(charged[u]) > budget]
+    mismatched = [u for u in users if charged[u] != table[u]]
+    short = [u for u in users if sum(charged[u]) < min(expected, opts.charges * opts.credits)]
+
+    latencies.sort()
+    print(f"{len(jobs)} charges across {opts.nodes} nodes in {elapsed:.2f}s")
+    print(f"throughput {len(jobs) / elapsed:,.0f} charges/s")
+    print(
+        f"latency p50 {statistics.median(latencies):.2f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms, max {latencies[-1]:.2f} ms"
+    )
+    print(f"write-behind: {statements} UPDATE statements")
+    print(f"users over budget: {len(overspent)}")
+    print(f"users whose flushed deltas differ from charges: {len(mismatched)}")
+    print(f"users under-served while balance remained: {len(short)}")
+    if overspent or mismatched or short:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
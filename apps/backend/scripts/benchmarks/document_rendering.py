@@ -0,0 +1,161 @@
+"""Benchmark document rendering inline vs. through the render pool.
+
+Renders every document style (academic, report, minimal) and slide decks of
+several sizes, measuring per-job latency and the worst event-loop stall seen
+while the jobs run. Inline rendering (the old behaviour) blocks the loop for
+the whole render; the pool should keep the stall near zero.
+
+Requires the rendering stack (WeasyPrint or xhtml2pdf, python-docx/htmldocx,
+python-pptx); no database, Redis or storage is touched.
+
+Usage:
+    poetry run python scripts/benchmarks/document_rendering.py
+    poetry run python scripts/benchmarks/document_rendering.py --workers 4 --repeat 3
+    poetry run python scripts/benchmarks/document_rendering.py --formats pdf pptx
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+STYLES = ("academic", "report", "minimal")
+DECK_SIZES = (5, 20, 60)
+SECTION_COUNTS = (3, 15, 60)
+
+
+def _document_markdown(sections: int) -> str:
+    parts = ["# Benchmark document"]
+    for i in range(sections):
+        parts.append(f"## Section {i + 1}")
+        parts.append("Spaced repetition strengthens memory over time. " * 12)
+        parts.append("\n".join(f"- Key point {j + 1} for section {i + 1}" for j in range(5)))
+    return "\n\n".join(parts)
+
+
+def _deck_slides(count: int) -> list[dict]:
+    slides = [{"title": "Benchmark deck", "subtitle": "Rendering benchmark"}]
+    for i in range(1, count):
+        slides.append(
+            {
+                "title": f"Slide {i + 1}",
+                "bullets": [f"Point {j + 1} on slide {i + 1}" for j in range(5)],
+            }
+        )
+    return slides
+
+
+def _cases(formats: list[str]) -> list[tuple[str, str, dict]]:
+    """(label, kind, args) for every style/size combination requested."""
+    from src.domains.personal_learning.services import render_pool as rp
+    from src.domains.personal_learning.services.document_impl import (
+        document_generation_service as svc,
+    )
+
+    cases = []
+    for fmt in formats:
+        if fmt in ("pdf", "docx"):
+            kind = rp.PDF if fmt == "pdf" else rp.DOCX
+            for style in STYLES:
+                for sections in SECTION_COUNTS:
+                    content = svc._ensure_html(_document_markdown(sections))
+                    args = {"title": "Benchmark", "content": content, "style": style}
+                    cases.append((f"{fmt}/{style}/{sections} sections", kind, args))
+        elif fmt == "pptx":
+            for size in DECK_SIZES:
+                content = _document_markdown(size)
+                args = {"title": "Benchmark", "content": content, "style": "report"}
+                cases.append((f"pptx/report/{size} sections", rp.PPTX, args))
+        elif fmt == "slides":
+            for size in DECK_SIZES:
+                args = {"title": "Benchmark", "slides": _deck_slides(size), "theme": "indigo"}
+                cases.append((f"slides-pdf/indigo/{size} slides", rp.PRESENTATION_PDF, args))
+    return cases
+
+
+async def _loop_stall_monitor(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the longest gap (ms) between ticks that should be ``interval`` apart."""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, (now - last - interval) * 1000)
+        last = now
+    return worst
+
+
+async def _run(label: str, render, cases, repeat: int) -> None:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_loop_stall_monitor(stop))
+    print(f"\n== {label} ==")
+    print(f"{'case':<36} {'p50 ms':>9} {'max ms':>9} {'size KB':>9}")
+    started = time.perf_counter()
+    for case_label, kind, args in cases:
+        timings, size = [], 0
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            size = await render(kind, args)
+            timings.append((time.perf_counter() - t0) * 1000)
+        print(
+            f"{case_label:<36} {statistics.median(timings):>9.1f} "
+            f"{max(timings):>9.1f} {size / 1024:>9.1f}"
+        )
+    total = time.perf_counter() - started
+    stop.set()
+    stall = await monitor
+    print(f"total {total:.2f}s, worst event-loop stall {stall:.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["pdf", "docx", "pptx", "slides"],
+        choices=["pdf", "docx", "pptx", "slides"],
+    )
+    opts = parser.parse_args()
+
+    from src.domains.personal_learning.services import render_pool as rp
+
+    cases = _cases(opts.formats)
+
+    async def inline(kind, args):
+        return len(rp.render_bytes(kind, args))
+
+    await _run("inline (blocks the event loop)", inline, cases, opts.repeat)
+
+    pool = rp.RenderPool(workers=opts.workers)
+    t0 = time.perf_counter()
+    await pool.start()
+    print(f"\nrender pool warm-up: {(time.perf_counter() - t0):.2f}s ({opts.workers} workers)")
+
+    async def pooled(kind, args):
+        result = await pool.render(kind, **args)
+        result.cleanup()
+        return result.size
+
+    try:
+        await _run(f"render pool ({opts.workers} workers)", pooled, cases, opts.repeat)
+        print(pool.get_stats())
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""Benchmark flashcard statistics: five queries + Python vs. one aggregate.
+
+Seeds a throwaway user with many flashcards (review history spread over the
+past year, with an unbroken streak at the end) and times
+``get_flashcard_stats`` against the previous implementation, which ran
+separate count/avg statements and loaded every ``lastReviewedAt`` value to
+compute the week and streak numbers in Python. Both must return the same
+stats. The user's review-day bitset is built from the seeded cards with the
+activity-days backfill before timing, as it would be after migration 008.
+
+Needs a reachable Postgres (DATABASE_URL) with the app schema. Everything
+runs inside one transaction that is rolled back, so nothing is kept.
+
+Usage:
+    poetry run python scripts/benchmarks/flashcard_stats.py
+    poetry run python scripts/benchmarks/flashcard_stats.py --cards 50000 --streak 90 --repeat 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+
+async def legacy_stats(s, user_id: str) -> dict:
+    """The pre-aggregate implementation, kept here for comparison."""
+    from sqlalchemy import func, select
+
+    from src.domains.personal_learning.db_models import Flashcard
+
+    now = datetime.now(UTC)
+    today = now.date()
+    week_start_date = today - timedelta(days=today.weekday())
+    by_user = Flashcard.user_id == user_id
+
+    total = (await s.execute(select(func.count()).where(by_user))).scalar() or 0
+    due_today = (
+        await s.execute(select(func.count()).where(by_user, Flashcard.next_review_at <= now))
+    ).scalar() or 0
+    mastered_count = (
+        await s.execute(select(func.count()).where(by_user, Flashcard.interval_days > 21))
+    ).scalar() or 0
+    avg_ease_factor = (
+        await s.execute(select(func.avg(Flashcard.ease_factor)).where(by_user))
+    ).scalar() or 2.5
+    review_timestamps = (
+        await s.scalars(
+            select(Flashcard.last_reviewed_at).where(
+                by_user, Flashcard.last_reviewed_at.is_not(None)
+            )
+        )
+    ).all()
+    activity_dates = {value.date() for value in review_timestamps}
+
+    streak_cursor = today
+    if streak_cursor not in activity_dates:
+        yesterday = today - timedelta(days=1)
+        streak_cursor = yesterday if yesterday in activity_dates else today
+    current_streak = 0
+    while streak_cursor in activity_dates:
+        current_streak += 1
+        streak_cursor -= timedelta(days=1)
+
+    return {
+        "total": total,
+        "due_today": due_today,
+        "mastered_count": mastered_count,
+        "avg_ease_factor": round(float(avg_ease_factor), 2),
+        "reviewed_total": len(review_timestamps),
+        "reviewed_this_week": sum(1 for v in review_timestamps if v.date() >= week_start_date),
+        "active_days_this_week": sorted(
+            d.isoformat() for d in activity_dates if d >= week_start_date
+        ),
+        "current_streak": current_streak,
+    }
+
+
+async def _seed(s, cards: int, streak: int) -> str:
+    from sqlalchemy import insert, text
+
+    from src.domains.identity.db_models import User
+    from src.domains.personal_learning.db_models import Flashcard
+
+    user = User(email=f"bench-{uuid.uuid4().hex[:12]}@example.invalid", name="Benchmark")
+    s.add(user)
+    await s.flush()
+
+    now = datetime.now(UTC)
+    rng = random.Random(7)
+    rows = []
+    for i in range(cards):
+        if i < streak:
+            reviewed = now - timedelta(days=i, minutes=rng.randint(0, 60))
+        elif rng.random() < 0.8:
+            days_ago = rng.randint(streak + 1, 365)
+            reviewed = now - timedelta(days=days_ago, minutes=rng.randint(0, 1440))
+        else:
+            reviewed = None
+        interval = rng.choice([1, 3, 6, 14, 30, 60])
+        rows.append(
+            {
+                "id": uuid.uuid4().hex[:25],
+                "user_id": user.id,
+                "front": f"Question {i}",
+                "back": f"Answer {i}",
+                "interval_days": interval,
+                "repetition_count": rng.randint(0, 8),
+                "ease_factor": round(rng.uniform(1.3, 2.8), 2),
+                "next_review_at": now + timedelta(days=rng.randint(-10, interval)),
+                "last_reviewed_at": reviewed,
+            }
+        )
+    for start in range(0, len(rows), 5000):
+        await s.execute(insert(Flashcard), rows[start : start + 5000])
+    await s.execute(text('ANALYZE "Flashcard"'))
+    return user.id
+
+
+async def _time(fn, repeat: int) -> tuple[list[float], dict]:
+    result: dict = {}
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = await fn()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies, result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--streak", type=int, default=30, help="consecutive active days")
+    parser.add_argument("--repeat", type=int, default=20)
+    opts = parser.parse_args()
+
+    from src.domains.personal_learning.repository import personal_learning_repo
+    from src.domains.progress.services.activity_days import backfill_activity_days
+    from src.shared.database import connect_db, disconnect_db, get_session_factory
+
+    await connect_db()
+    try:
+        async with get_session_factory()() as s:
+            try:
+                user_id = await _seed(s, opts.cards, opts.streak)
+                now = datetime.now(UTC)
+                await backfill_activity_days(s, [SimpleNamespace(id=user_id)], now)
+
+                legacy, legacy_result = await _time(lambda: legacy_stats(s, user_id), opts.repeat)
+                current, current_result = await _time(
+                    lambda: personal_learning_repo.get_flashcard_stats(user_id, session=s),
+                    opts.repeat,
+                )
+            finally:
+                await s.rollback()
+    finally:
+        await disconnect_db()
+
+    print(f"{opts.cards} cards, {opts.streak}-day streak, {opts.repeat} runs each")
+    for name, latencies in (("five queries + Python", legacy), ("single aggregate", current)):
+        latencies.sort()
+        print(
+            f"{name:>22}: p50 {statistics.median(latencies):.2f} ms, " f"max {latencies[-1]:.2f} ms"
+        )
+    print(f"speed-up (p50): {statistics.median(legacy) / statistics.median(current):.1f}x")
+    if legacy_result != current_result:
+        print(f"MISMATCH\n  legacy:  {legacy_result}\n  current: {current_result}")
+        sys.exit(1)
+    print(f"results match (streak {current_result['current_streak']})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
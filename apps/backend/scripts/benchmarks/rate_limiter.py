@@ -0,0 +1,132 @@
+"""Benchmark Redis round trips per rate-limited request.
+
+Replays the same traffic through four limiters against an in-process fake
+Redis (``fakeredis`` + ``lupa`` for Lua) and counts the commands each one
+sends:
+
+- ``fixed window``: the original INCR, then EXPIRE on the first hit (two
+  round trips for a fresh key, one after that, 2x bursts at window edges);
+- ``gcra``: one atomic script call per request, no local pre-check;
+- ``gcra + precheck``: the default ``RateLimiter``;
+- ``log + precheck``: the sliding-log engine behind the pre-check.
+
+The traffic mixes well-behaved users (a few requests, under the limit) with
+abusive clients hammering far beyond it, which is where the in-process
+pre-check saves Redis calls. No real Redis or database is touched.
+
+Usage:
+    poetry run python scripts/benchmarks/rate_limiter.py
+    poetry run python scripts/benchmarks/rate_limiter.py --users 5000 --abusers 50 --abuse-requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+
+class FixedWindow:
+    """The pre-engine limiter: client-side INCR + EXPIRE."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def check(self, policy, identity, tier=None):
+        key = self.cache.make_key(["rl", "fixed", policy.name, identity])
+        current = await self.cache.redis.incr(key)
+        if current == 1:
+            await self.cache.redis.expire(key, int(policy.window_seconds))
+        return current <= policy.limit
+
+
+def _traffic(opts) -> list[str]:
+    rng = random.Random(7)
+    requests = [f"user-{i}" for i in range(opts.users) for _ in range(rng.randint(1, 3))]
+    requests += [f"abuser-{i}" for i in range(opts.abusers) for _ in range(opts.abuse_requests)]
+    rng.shuffle(requests)
+    return requests
+
+
+async def _run(label: str, make_limiter, policy, requests, cache) -> None:
+    await cache.redis.flushall()
+    sent = []
+    execute = cache.redis.execute_command
+
+    async def counting(*args, **kwargs):
+        sent.append(args[0])
+        return await execute(*args, **kwargs)
+
+    limiter = make_limiter()
+    await limiter.check(policy, "warm-up")  # Load any script outside the count
+
+    cache.redis.execute_command = counting
+    allowed = 0
+    started = time.perf_counter()
+    try:
+        for identity in requests:
+            result = await limiter.check(policy, identity)
+            allowed += bool(getattr(result, "allowed", result))
+    finally:
+        cache.redis.execute_command = execute
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{label:<16} redis ops/request {len(sent) / len(requests):5.3f}  "
+        f"allowed {allowed:>7}  {len(requests) / elapsed:9.0f} checks/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--abusers", type=int, default=20)
+    parser.add_argument("--abuse-requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--window", type=float, default=60)
+    opts = parser.parse_args()
+
+    import fakeredis
+
+    from src.config import get_settings
+    from src.shared.infrastructure import rate_limit
+    from src.shared.infrastructure.rate_limit import RateLimiter, RateLimitPolicy
+    from src.shared.infrastructure.redis import Cache
+
+    cache = Cache(get_settings())
+    cache.redis = fakeredis.aioredis.FakeRedis()
+    cache._connected = True
+    for engine in rate_limit.ENGINES.values():
+        cache.register_script(f"rate_limit_{engine.name}", engine.script)
+
+    requests = _traffic(opts)
+    gcra = RateLimitPolicy("bench", limit=opts.limit, window_seconds=opts.window)
+    log = RateLimitPolicy(
+        "bench", limit=opts.limit, window_seconds=opts.window, algorithm="sliding_log"
+    )
+    print(
+        f"{len(requests)} requests: {opts.users} users, {opts.abusers} abusers x "
+        f"{opts.abuse_requests}; limit {opts.limit} per {opts.window:g}s"
+    )
+    with patch.object(rate_limit, "cache", cache):
+        await _run("fixed window", lambda: FixedWindow(cache), gcra, requests, cache)
+        await _run("gcra", lambda: RateLimiter(local_precheck=False), gcra, requests, cache)
+        await _run("gcra + precheck", RateLimiter, gcra, requests, cache)
+        await _run("log + precheck", RateLimiter, log, requests, cache)
+    await cache.redis.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
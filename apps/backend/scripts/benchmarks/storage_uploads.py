@@ -0,0 +1,187 @@
+"""Benchmark storage uploads with a client per call vs. the pooled registry.
+
+Starts a local HTTPS stub of the BunnyCDN storage API (self-signed
+certificate, keep-alive HTTP/1.1) and uploads the same files through
+``BunnyStorageClient`` twice: once building a new ``httpx.AsyncClient`` per
+upload (the old behaviour: TCP + TLS handshake every time) and once through
+``http_clients`` (pooled keep-alive connections per origin). Reports
+per-upload latency and how many connections the stub accepted.
+
+Needs the ``cryptography`` package (installed with python-jose); no
+database, Redis or real storage is touched.
+
+Usage:
+    poetry run python scripts/benchmarks/storage_uploads.py
+    poetry run python scripts/benchmarks/storage_uploads.py --uploads 500 --size-kb 256 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import ipaddress
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+
+def _self_signed(directory: str) -> tuple[str, str]:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = dt.datetime.now(dt.UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(minutes=1))
+        .not_valid_after(now + dt.timedelta(hours=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = f"{directory}/cert.pem", f"{directory}/key.pem"
+    Path(cert_path).write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    Path(key_path).write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return cert_path, key_path
+
+
+class StubStorage:
+    """Accepts PUTs on keep-alive connections and answers 201."""
+
+    def __init__(self):
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                if length:
+                    await reader.readexactly(length)
+                writer.write(b"HTTP/1.1 201 Created\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+
+class ClientPerCall:
+    """Stands in for the registry but hands out a brand-new client per call."""
+
+    def __init__(self):
+        import httpx
+
+        self._httpx = httpx
+        self.clients = []
+
+    def get(self, url: str):
+        client = self._httpx.AsyncClient(timeout=60.0)
+        self.clients.append(client)
+        return client
+
+    async def stop(self) -> None:
+        for client in self.clients:
+            await client.aclose()
+
+
+async def _run(storage, registry, opts) -> list[float]:
+    content = os.urandom(opts.size_kb * 1024)
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(opts.concurrency)
+
+    async def upload(i: int) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            await storage.upload_bytes(content, f"bench/file-{i}.bin")
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    with patch("src.shared.infrastructure.storage.http_clients", registry):
+        await asyncio.gather(*(upload(i) for i in range(opts.uploads)))
+    await registry.stop()
+    return latencies
+
+
+def _report(label: str, latencies: list[float], elapsed: float, connections: int) -> None:
+    latencies.sort()
+    print(
+        f"{label:<16} p50 {statistics.median(latencies):6.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:6.2f} ms  "
+        f"total {elapsed:6.2f}s  connections {connections}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert_path, key_path = _self_signed(tmp)
+        os.environ["SSL_CERT_FILE"] = cert_path  # Trust the stub's certificate
+
+        from src.shared.infrastructure.http import HttpClientRegistry
+        from src.shared.infrastructure.storage import BunnyStorageClient
+
+        server_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_ctx.load_cert_chain(cert_path, key_path)
+        stub = StubStorage()
+        server = await asyncio.start_server(stub.handle, "127.0.0.1", 0, ssl=server_ctx)
+        port = server.sockets[0].getsockname()[1]
+
+        storage = BunnyStorageClient()
+        storage._initialized = True
+        storage.api_key, storage.storage_zone = "bench", "zone"
+        storage.cdn_hostname = "cdn.example.com"
+        storage.base_url = f"https://127.0.0.1:{port}/zone"
+
+        print(f"{opts.uploads} uploads of {opts.size_kb} KiB, concurrency {opts.concurrency}")
+        for label, registry in (
+            ("client per call", ClientPerCall()),
+            ("pooled", HttpClientRegistry()),
+        ):
+            stub.connections = 0
+            started = time.perf_counter()
+            latencies = await _run(storage, registry, opts)
+            _report(label, latencies, time.perf_counter() - started, stub.connections)
+
+        server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
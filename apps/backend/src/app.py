@@ -26,14 +26,21 @@ from sentry_sdk.utils import BadDsn
 from starlette.middleware.sessions import SessionMiddleware
 
 from src.config import get_settings
+from src.core.websocket import manager as ws_manager
+from src.domains.billing.services.credit_ledger import credit_ledger
+from src.domains.personal_learning.services.cache import cache_invalidations
+from src.domains.personal_learning.services.home_snapshot import home_snapshots
+from src.domains.personal_learning.services.render_pool import render_pool
+from src.shared.auth.last_seen import last_seen_tracker
 from src.shared.database import connect_db, disconnect_db
+from src.shared.events.streams import event_stream
 from src.shared.exceptions import (
     MaigieError,
     maigie_error_handler,
     unhandled_exception_handler,
     validation_error_handler,
 )
-from src.shared.infrastructure import cache
+from src.shared.infrastructure import cache, http_clients
 from src.shared.middleware import LoggingMiddleware, SecurityHeadersMiddleware
 
 logger = logging.getLogger(__name__)
@@ -61,10 +68,48 @@ async def lifespan(app: FastAPI):
     await cache.connect()
     logger.info("Cache connected")
 
+    # --- Outbound HTTP (pooled clients per origin) ---
+    await http_clients.start()
+
+    # --- WebSocket fan-out ---
+    if settings.WEBSOCKET_FANOUT_ENABLED and cache.is_connected:
+        await ws_manager.enable_fanout(
+            cache.redis,
+            key_prefix=settings.REDIS_KEY_PREFIX,
+            flush_interval=settings.WEBSOCKET_FANOUT_FLUSH_MS / 1000,
+            presence_ttl=settings.WEBSOCKET_PRESENCE_TTL,
+        )
+
+    # --- @cached invalidation broadcast ---
+    if cache.is_connected:
+        await cache_invalidations.start(cache.redis, key_prefix=settings.REDIS_KEY_PREFIX)
+
+    # --- Credit ledger (reconciles with Postgres, then starts the write-behind flusher) ---
+    if settings.CREDIT_LEDGER_ENABLED and cache.is_connected:
+        await credit_ledger.start(cache.redis, key_prefix=settings.REDIS_KEY_PREFIX)
+
+    # --- Domain events (durable delivery through Redis streams) ---
+    if settings.EVENT_BUS_STREAMS_ENABLED and cache.is_connected:
+        await event_stream.start(cache.redis, key_prefix=settings.REDIS_KEY_PREFIX)
+
+    # --- Last-seen write-behind ---
+    await last_seen_tracker.start()
+
+    # --- Document rendering pool (spawns and warms the workers) ---
+    await render_pool.start()
+
     yield  # Application runs
 
     # --- Shutdown ---
     logger.info("Shutting down...")
+    await ws_manager.disable_fanout()
+    await event_stream.stop()
+    await cache_invalidations.stop()
+    await home_snapshots.stop()
+    await render_pool.stop()
+    await credit_ledger.stop()
+    await last_seen_tracker.stop()
+    await http_clients.stop()
     await cache.disconnect()
     await disconnect_db()
     logger.info("Shutdown complete")
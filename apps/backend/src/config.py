@@ -85,6 +85,16 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200  # 30 days (monthly)
     REFRESH_TOKEN_EXPIRE_DAYS: int = 90  # 90 days for refresh tokens
+    # Authenticated-user cache: in-process TTL bounds how long other workers see
+    # a stale tier/is_active after a write; Redis TTL bounds idle entries.
+    AUTH_PRINCIPAL_LOCAL_TTL_SECONDS: float = 5.0
+    AUTH_PRINCIPAL_REDIS_TTL_SECONDS: int = 300
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # Last-seen tracking: at most one write per user per throttle window, batched
+    LAST_SEEN_THROTTLE_SECONDS: int = 300
+    LAST_SEEN_FLUSH_INTERVAL_SECONDS: float = 10.0
+    LAST_SEEN_MAX_PENDING: int = 50000
+    LAST_SEEN_MAX_TRACKED: int = 100000
 
     # --- Database ---
     DATABASE_URL: str = ""  # Loaded from .env
@@ -95,11 +105,37 @@ class Settings(BaseSettings):
     REDIS_KEY_PREFIX: str = "maigie:"
     REDIS_SOCKET_TIMEOUT: int = 5
     REDIS_SOCKET_CONNECT_TIMEOUT: int = 5
+    # One pool per process, shared by the cache, fan-out, ledger and pub/sub
+    REDIS_MAX_CONNECTIONS: int = 50
+    # Value codec: json | orjson | msgpack (falls back to json if not installed)
+    REDIS_CACHE_CODEC: str = "json"
+    # zlib-compress serialized values at least this large (0 disables)
+    REDIS_COMPRESS_THRESHOLD_BYTES: int = 0
+
+    # --- Rate limiting ---
+    # Remember "blocked until" answers in-process so over-limit clients are
+    # rejected without a Redis round trip
+    RATE_LIMIT_LOCAL_PRECHECK: bool = True
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000
+
+    # --- Outbound HTTP (pooled clients, one per origin) ---
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    # Used only when the optional h2 package is installed
+    HTTP_CLIENT_HTTP2: bool = True
 
     # --- WebSocket ---
     WEBSOCKET_HEARTBEAT_INTERVAL: int = 30
     WEBSOCKET_HEARTBEAT_TIMEOUT: int = 120
     WEBSOCKET_MAX_RECONNECT_ATTEMPTS: int = 5
+    # Cross-node fan-out over Redis pub/sub (needed with more than one worker)
+    WEBSOCKET_FANOUT_ENABLED: bool = True
+    WEBSOCKET_FANOUT_FLUSH_MS: int = 10
+    WEBSOCKET_PRESENCE_TTL: int = 90
+    # LLM token streaming: merge chunks into one frame per window or size bound
+    WEBSOCKET_STREAM_FLUSH_MS: int = 30
+    WEBSOCKET_STREAM_FLUSH_BYTES: int = 512
 
     # --- OAuth Providers ---
     OAUTH_GOOGLE_CLIENT_ID: str | None = None
@@ -227,6 +263,8 @@ class Settings(BaseSettings):
     BUNNY_PUBLIC_URL_BASE: str | None = None
     # BunnyCDN storage region code (de/uk/ny/la/sg/se/syd/br/jh). Default: uk.
     BUNNY_STORAGE_REGION: str = "uk"
+    # Per-process cap on bytes buffered by in-flight uploads/downloads
+    STORAGE_MAX_IN_FLIGHT_BYTES: int = 64 * 1024 * 1024
 
     # --- Auto Blog Pipeline ---
     BLOG_AUTOPILOT_ENABLED: bool = True
@@ -262,6 +300,26 @@ class Settings(BaseSettings):
     OPENAI_DEFAULT_MODEL: str = "gpt-4o-mini"
     ANTHROPIC_DEFAULT_MODEL: str = "claude-sonnet-4-20250514"
 
+    # Provider clients (one long-lived client and request lane per provider)
+    LLM_MAX_CONCURRENT_REQUESTS: int = 16
+    # Optional tokens-per-minute budgets, e.g. "gemini=4000000,openai=200000"
+    LLM_TOKENS_PER_MINUTE: str | None = None
+
+    # Provider health shared across workers via Redis (llm_resilient breaker)
+    LLM_HEALTH_FAILURE_THRESHOLD: int = 5
+    LLM_HEALTH_RECOVERY_SECONDS: float = 60.0
+    # Half-open probe lock; must cover one call with its retries
+    LLM_HEALTH_PROBE_TIMEOUT_SECONDS: float = 120.0
+    LLM_HEALTH_SAMPLE_SIZE: int = 200
+    LLM_HEALTH_SNAPSHOT_TTL_SECONDS: float = 5.0
+
+    # Response cache for repeatable tasks (per-task TTLs in reasoning.llm.response_cache)
+    LLM_RESPONSE_CACHE_ENABLED: bool = True
+    # Per task; least recently used entries are evicted beyond this
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    # Recent prompt embeddings compared for near-duplicate hits
+    LLM_RESPONSE_CACHE_SIMILARITY_CANDIDATES: int = 200
+
     # Circuit Breaker
     CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
     CIRCUIT_BREAKER_COOLDOWN_SECONDS: float = 30.0
@@ -317,6 +375,76 @@ class Settings(BaseSettings):
     # --- Background tasks (schedule AI batching) ---
     AI_SCHEDULE_REVIEW_MAX_USERS: int = 500
 
+    # --- Cohort jobs (nightly learner batch tasks) ---
+    # Learners per keyset page; each page costs a few grouped queries and bulk writes
+    COHORT_BATCH_SIZE: int = 500
+    # Above 1, each run fans out into this many Celery tasks split by user-id hash
+    COHORT_SHARDS: int = 1
+
+    # --- Notification delivery (claim / send / commit passes) ---
+    # Due notifications claimed per pass with FOR UPDATE SKIP LOCKED
+    NOTIFICATION_DELIVERY_BATCH_SIZE: int = 200
+    # Delivery tasks started per beat tick; they share the queue without double sends
+    NOTIFICATION_DELIVERY_WORKERS: int = 1
+    # How long each delivery task keeps delivering, and its pause while the queue is empty
+    NOTIFICATION_DELIVERY_RUN_SECONDS: float = 50.0
+    NOTIFICATION_DELIVERY_IDLE_SECONDS: float = 2.0
+    # Failed sends go back to the queue after this delay
+    NOTIFICATION_RETRY_DELAY_SECONDS: int = 60
+
+    # --- Document rendering (PDF/DOCX/PPTX process pool) ---
+    # 0 disables the pool; renders then run in a thread of the API process.
+    RENDER_POOL_WORKERS: int = 2
+    RENDER_JOB_TIMEOUT_SECONDS: int = 60
+    # Address-space cap per render worker (0 = unlimited)
+    RENDER_WORKER_MEMORY_LIMIT_MB: int = 1536
+    RENDER_QUEUE_MAX: int = 200
+    # Content-addressed cache of rendered documents (skips render + upload on a hit)
+    RENDER_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    RENDER_CACHE_MAX_ENTRIES: int = 2000
+
+    # --- Credit ledger (Redis balances, Postgres write-behind) ---
+    # Off, or Redis unavailable: consume_credits reads and writes Postgres directly.
+    CREDIT_LEDGER_ENABLED: bool = True
+    CREDIT_LEDGER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    CREDIT_LEDGER_FLUSH_BATCH: int = 500
+    # Idle time before a user's cached balances are dropped and re-read from Postgres
+    CREDIT_LEDGER_TTL_SECONDS: int = 6 * 3600
+
+    # --- Exam prep topic extraction (map-reduce over materials) ---
+    # Material text per LLM call; sections are packed up to this size
+    EXAM_PREP_CHUNK_CHARS: int = 6000
+    EXAM_PREP_EXTRACTION_CONCURRENCY: int = 4
+    EXAM_PREP_MAX_TOPICS: int = 60
+
+    # --- Home snapshot (precomputed GET /home, rebuilt on learner events) ---
+    HOME_SNAPSHOT_ENABLED: bool = True
+    # Older snapshots are still served, but rebuilt in the background
+    HOME_SNAPSHOT_REFRESH_SECONDS: int = 300
+    # Freshness bound: older snapshots are rebuilt before answering
+    HOME_SNAPSHOT_MAX_AGE_SECONDS: int = 3600
+    # Events this close together are folded into one rebuild
+    HOME_SNAPSHOT_DEBOUNCE_SECONDS: float = 2.0
+    HOME_SNAPSHOT_REBUILD_CONCURRENCY: int = 8
+
+    # --- Learning Space transfers (bulk import/export) ---
+    # Larger transfers are queued as a background job that reports progress
+    SPACE_TRANSFER_ASYNC_THRESHOLD: int = 500
+    # Ids per transaction in a queued transfer
+    SPACE_TRANSFER_BATCH_SIZE: int = 1000
+
+    # --- Domain event bus (Redis Streams; in-process dispatch when off or Redis is down) ---
+    EVENT_BUS_STREAMS_ENABLED: bool = True
+    # Events read per consumer group per poll (batch handlers get up to this many)
+    EVENT_BUS_BATCH_SIZE: int = 100
+    EVENT_BUS_POLL_INTERVAL_MS: int = 100
+    # Unacknowledged events idle this long are delivered again
+    EVENT_BUS_RETRY_AFTER_SECONDS: float = 30.0
+    # Attempts before an event moves to the dead-letter stream
+    EVENT_BUS_MAX_DELIVERIES: int = 5
+    # Approximate per-topic retention (XADD MAXLEN ~)
+    EVENT_BUS_STREAM_MAXLEN: int = 100_000
+
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).parent.parent / ".env"),
         env_file_encoding="utf-8",
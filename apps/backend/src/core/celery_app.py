@@ -114,6 +114,18 @@ def _install_sigchld_handler(**kwargs: Any) -> None:
         logger.debug("SIGCHLD set to SIG_IGN — zombies will be auto-reaped")
 
 
+@worker_process_init.connect
+def _reset_http_clients(**kwargs: Any) -> None:
+    """Start each worker process with an empty outbound HTTP client registry.
+
+    Pooled connections must not be shared with the parent across a fork;
+    the registry rebuilds its clients on the task's own event loop.
+    """
+    from src.shared.infrastructure.http import http_clients
+
+    http_clients.reset()
+
+
 # Global Celery app instance
 celery_app = create_celery_app()
 
@@ -126,6 +138,7 @@ try:
         progress_tasks,  # noqa: F401
         billing_tasks,  # noqa: F401
         personal_learning_tasks,  # noqa: F401
+        learning_spaces_tasks,  # noqa: F401
     )
 except Exception as e:
     # Avoid crashing the app if optional modules are unavailable at import time,
@@ -8,13 +8,18 @@ See LICENSE file in the repository root for details.
 """
 
 import asyncio
+import json
 import logging
 from datetime import datetime
 from typing import Any
 from uuid import uuid4
 
+import redis.asyncio as redis
 from fastapi import WebSocket
 
+from .websocket_fanout import BROADCAST, CHANNEL, USER, ClusterFanout
+from .websocket_stream import CLOSE, OutboundQueue, StreamMetrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +32,8 @@ class ConnectionManager:
     - Event broadcasting to users/channels
     - Heartbeat mechanism
     - Reconnection handling
+    - Optional cross-node fan-out over Redis (see ``enable_fanout``)
+    - Bounded per-connection outbound queues (slow clients never block senders)
     """
 
     def __init__(
@@ -35,6 +42,9 @@ class ConnectionManager:
         heartbeat_timeout: int = 60,
         max_reconnect_attempts: int = 5,
         max_connections: int = 500,
+        outbound_max_frames: int = 256,
+        outbound_max_bytes: int = 1_048_576,
+        outbound_overflow: str = CLOSE,
     ):
         """
         Initialize connection manager.
@@ -44,6 +54,9 @@ class ConnectionManager:
             heartbeat_timeout: Seconds before considering connection dead
             max_reconnect_attempts: Maximum reconnection attempts before giving up
             max_connections: Maximum concurrent WebSocket connections (prevents OOM)
+            outbound_max_frames: Frames a connection may have queued before overflow
+            outbound_max_bytes: Bytes a connection may have queued before overflow
+            outbound_overflow: "close" slow consumers or "drop" overflowing frames
         """
         # Active connections: {connection_id: WebSocket}
         self.active_connections: dict[str, WebSocket] = {}
@@ -57,6 +70,13 @@ class ConnectionManager:
         # Channel subscriptions: {channel: Set[connection_id]}
         self.channel_subscriptions: dict[str, set[str]] = {}
 
+        # Outbound frame queues: {connection_id: OutboundQueue}
+        self.outbound: dict[str, OutboundQueue] = {}
+        self.outbound_max_frames = outbound_max_frames
+        self.outbound_max_bytes = outbound_max_bytes
+        self.outbound_overflow = outbound_overflow
+        self.stream_metrics = StreamMetrics()
+
         # Heartbeat configuration
         self.heartbeat_interval = heartbeat_interval
         self.heartbeat_timeout = heartbeat_timeout
@@ -67,6 +87,36 @@ class ConnectionManager:
         self._heartbeat_task: asyncio.Task | None = None
         self._cleanup_task: asyncio.Task | None = None
 
+        # Cross-node fan-out (None when running single-node)
+        self.fanout: ClusterFanout | None = None
+
+    async def enable_fanout(self, client: redis.Redis, **options: Any) -> ClusterFanout:
+        """
+        Start delivering messages across nodes via Redis pub/sub.
+
+        Args:
+            client: Connected Redis client
+            **options: Extra ``ClusterFanout`` options (node_id, flush_interval, ...)
+
+        Returns:
+            The started fan-out bridge
+        """
+        if self.fanout is None:
+            self.fanout = ClusterFanout(client, self._deliver_local, self._local_count, **options)
+            # Publish presence for connections accepted before fan-out started
+            for user_id in self.user_connections:
+                self.fanout.track(USER, user_id)
+            for channel in self.channel_subscriptions:
+                self.fanout.track(CHANNEL, channel)
+            await self.fanout.start()
+        return self.fanout
+
+    async def disable_fanout(self):
+        """Stop cross-node delivery and withdraw this node's presence."""
+        if self.fanout is not None:
+            fanout, self.fanout = self.fanout, None
+            await fanout.stop()
+
     async def connect(self, websocket: WebSocket, user_id: str | None = None) -> str:
         """
         Accept a new WebSocket connection.
@@ -93,6 +143,16 @@ class ConnectionManager:
 
         connection_id = str(uuid4())
         self.active_connections[connection_id] = websocket
+        queue = OutboundQueue(
+            websocket,
+            self.stream_metrics,
+            lambda reason: self.disconnect(connection_id, reason=reason),
+            max_frames=self.outbound_max_frames,
+            max_bytes=self.outbound_max_bytes,
+            overflow=self.outbound_overflow,
+        )
+        self.outbound[connection_id] = queue
+        queue.start()
         self.connection_metadata[connection_id] = {
             "user_id": user_id,
             "last_ping": datetime.utcnow(),
@@ -104,6 +164,8 @@ class ConnectionManager:
             if user_id not in self.user_connections:
                 self.user_connections[user_id] = set()
             self.user_connections[user_id].add(connection_id)
+            if self.fanout:
+                self.fanout.track(USER, user_id)
 
         logger.info(f"WebSocket connected: {connection_id} (user: {user_id or 'anonymous'})")
 
@@ -132,6 +194,9 @@ class ConnectionManager:
             return
 
         websocket = self.active_connections.pop(connection_id)
+        queue = self.outbound.pop(connection_id, None)
+        if queue is not None:
+            await queue.aclose()
         metadata = self.connection_metadata.pop(connection_id, {})
         user_id = metadata.get("user_id")
 
@@ -140,12 +205,18 @@ class ConnectionManager:
             self.user_connections[user_id].discard(connection_id)
             if not self.user_connections[user_id]:
                 del self.user_connections[user_id]
+            if self.fanout:
+                self.fanout.track(USER, user_id)
 
         # Remove from all channels
         for channel in list(self.channel_subscriptions.keys()):
+            if connection_id not in self.channel_subscriptions[channel]:
+                continue
             self.channel_subscriptions[channel].discard(connection_id)
             if not self.channel_subscriptions[channel]:
                 del self.channel_subscriptions[channel]
+            if self.fanout:
+                self.fanout.track(CHANNEL, channel)
 
         try:
             await websocket.close()
@@ -164,60 +235,155 @@ class ConnectionManager:
             connection_id: Connection ID
             message: Message to send
         """
-        if connection_id not in self.active_connections:
+        await self.send_frame(connection_id, _encode(message))
+
+    async def send_frame(self, connection_id: str, frame: str):
+        """
+        Queue a pre-serialised text frame for a specific connection.
+
+        The frame is written by the connection's writer task; send errors and
+        queue overflow disconnect the connection there.
+
+        Args:
+            connection_id: Connection ID
+            frame: JSON text frame
+        """
+        queue = self.outbound.get(connection_id)
+        if queue is None:
             logger.warning(f"Connection {connection_id} not found")
             return
-
-        websocket = self.active_connections[connection_id]
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            logger.error(f"Error sending message to {connection_id}: {e}")
-            await self.disconnect(connection_id, reason="send_error")
+        queue.put(frame)
 
     async def send_to_user(self, user_id: str, message: dict[str, Any]):
         """
-        Send a message to all connections for a specific user.
+        Send a message to all connections for a specific user, on every node.
 
         Args:
             user_id: User ID
             message: Message to send
         """
-        if user_id not in self.user_connections:
-            return
-
-        connection_ids = list(self.user_connections[user_id])
-        for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+        if self.fanout:
+            self.fanout.publish(USER, user_id, message)
+        await self._deliver_local(USER, user_id, message)
 
     async def broadcast(self, message: dict[str, Any], exclude: set[str] | None = None):
         """
-        Broadcast a message to all active connections.
+        Broadcast a message to all active connections, on every node.
 
         Args:
             message: Message to broadcast
             exclude: Optional set of connection IDs to exclude
         """
-        exclude = exclude or set()
-        connection_ids = [cid for cid in self.active_connections.keys() if cid not in exclude]
-
-        for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+        if self.fanout:
+            self.fanout.publish(BROADCAST, None, message, exclude)
+        await self._deliver_local(BROADCAST, None, message, exclude)
 
     async def broadcast_to_channel(self, channel: str, message: dict[str, Any]):
         """
-        Broadcast a message to all connections subscribed to a channel.
+        Broadcast a message to all connections subscribed to a channel, on every node.
 
         Args:
             channel: Channel name
             message: Message to broadcast
         """
-        if channel not in self.channel_subscriptions:
-            return
+        if self.fanout:
+            self.fanout.publish(CHANNEL, channel, message)
+        await self._deliver_local(CHANNEL, channel, message)
+
+    async def send_json(self, message: dict[str, Any], user_id: str):
+        """
+        Send a message to all connections for a user, on every node.
+
+        Same as ``send_to_user`` with the chat handler's argument order.
+
+        Args:
+            message: Message to send
+            user_id: User ID
+        """
+        await self.send_to_user(user_id, message)
+
+    async def send_text(self, text: str, user_id: str):
+        """
+        Send a plain text frame to all connections for a user, on every node.
+
+        Args:
+            text: Text to send as-is
+            user_id: User ID
+        """
+        if self.fanout:
+            self.fanout.publish(USER, user_id, text)
+        await self._deliver_local(USER, user_id, text)
+
+    async def send_connection_json(self, message: dict[str, Any], connection_id: str):
+        """
+        Send a message to a specific connection.
 
-        connection_ids = list(self.channel_subscriptions[channel])
+        Args:
+            message: Message to send
+            connection_id: Connection ID
+        """
+        await self.send_personal_message(connection_id, message)
+
+    def join_room(self, connection_id: str, room_id: str):
+        """
+        Add a connection to a chat room (e.g. a circle session).
+
+        Args:
+            connection_id: Connection ID
+            room_id: Room (chat session) ID
+        """
+        self.subscribe_to_channel(connection_id, _room_channel(room_id))
+
+    def leave_room(self, connection_id: str, room_id: str):
+        """
+        Remove a connection from a chat room.
+
+        Args:
+            connection_id: Connection ID
+            room_id: Room (chat session) ID
+        """
+        self.unsubscribe_from_channel(connection_id, _room_channel(room_id))
+
+    async def send_room_json(self, message: dict[str, Any], room_id: str):
+        """
+        Send a message to every member of a chat room, on every node.
+
+        The message is serialised once; all local members share the frame.
+
+        Args:
+            message: Message to send
+            room_id: Room (chat session) ID
+        """
+        await self.broadcast_to_channel(_room_channel(room_id), message)
+
+    async def _deliver_local(
+        self,
+        kind: str,
+        target: str | None,
+        message: dict[str, Any] | str,
+        exclude: set[str] | None = None,
+    ):
+        """Deliver a message or text frame to the matching connections on this node only."""
+        if kind == USER:
+            connection_ids = list(self.user_connections.get(target, ()))
+        elif kind == CHANNEL:
+            connection_ids = list(self.channel_subscriptions.get(target, ()))
+        else:
+            exclude = exclude or set()
+            connection_ids = [cid for cid in self.active_connections if cid not in exclude]
+
+        if not connection_ids:
+            return
+        # Serialise once; every recipient shares the same frame
+        frame = message if isinstance(message, str) else _encode(message)
         for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+            await self.send_frame(connection_id, frame)
+
+    def _local_count(self, kind: str, target: str) -> int:
+        """Number of connections on this node for a user or channel."""
+        if kind == USER:
+            return len(self.user_connections.get(target, ()))
+        return len(self.channel_subscriptions.get(target, ()))
 
     def subscribe_to_channel(self, connection_id: str, channel: str):
         """
@@ -234,6 +400,8 @@ class ConnectionManager:
             self.channel_subscriptions[channel] = set()
 
         self.channel_subscriptions[channel].add(connection_id)
+        if self.fanout:
+            self.fanout.track(CHANNEL, channel)
         logger.debug(f"Connection {connection_id} subscribed to channel {channel}")
 
     def unsubscribe_from_channel(self, connection_id: str, channel: str):
@@ -248,6 +416,8 @@ class ConnectionManager:
             self.channel_subscriptions[channel].discard(connection_id)
             if not self.channel_subscriptions[channel]:
                 del self.channel_subscriptions[channel]
+            if self.fanout:
+                self.fanout.track(CHANNEL, channel)
 
         logger.debug(f"Connection {connection_id} unsubscribed from channel {channel}")
 
@@ -349,14 +519,38 @@ class ConnectionManager:
         """Get the number of active connections."""
         return len(self.active_connections)
 
-    def get_user_connection_count(self, user_id: str) -> int:
-        """Get the number of connections for a user."""
+    async def get_user_connection_count(self, user_id: str) -> int:
+        """Get the number of connections for a user across all nodes."""
+        if self.fanout:
+            try:
+                return await self.fanout.connection_count(USER, user_id)
+            except Exception as e:
+                logger.warning(f"Cluster connection count unavailable: {e}")
         return len(self.user_connections.get(user_id, set()))
 
     def get_channel_subscriber_count(self, channel: str) -> int:
         """Get the number of subscribers to a channel."""
         return len(self.channel_subscriptions.get(channel, set()))
 
+    def get_stream_metrics(self) -> dict[str, Any]:
+        """Outbound queue depth, drop counts and send latency."""
+        depths = [queue.depth for queue in self.outbound.values()]
+        return {
+            **self.stream_metrics.snapshot(),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queued_bytes": sum(queue.queued_bytes for queue in self.outbound.values()),
+        }
+
+
+def _room_channel(room_id: str) -> str:
+    return f"room:{room_id}"
+
+
+def _encode(message: dict[str, Any]) -> str:
+    """Serialise a message the same way ``WebSocket.send_json`` does."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -0,0 +1,444 @@
+"""
+Cross-node WebSocket fan-out over Redis pub/sub.
+
+Copyright (C) 2025 Maigie
+
+Licensed under the Business Source License 1.1 (BUSL-1.1).
+See LICENSE file in the repository root for details.
+
+``ConnectionManager`` only knows about sockets accepted by its own process.
+With more than one uvicorn worker, a ``send_to_user`` issued on worker A never
+reaches the user's socket on worker B. ``ClusterFanout`` closes that gap:
+
+- **Presence registry** — each node records how many local connections it
+  holds per user and per channel in a Redis hash
+  (``<prefix>ws:presence:<kind>:<target>`` → ``{node_id: count}``). Live nodes
+  heartbeat into a sorted set, so fields left behind by a crashed node are
+  ignored once its heartbeat lapses. The live node set is re-read in the
+  same round trip as every presence lookup.
+- **Routing** — outbound messages are only published to the nodes that
+  actually hold the target. When every holder is the local node, delivery
+  short-circuits and nothing is published.
+- **Batching** — messages are queued synchronously and flushed every
+  ``flush_interval`` seconds (or once ``max_batch`` are pending). A flush does
+  one pipelined round trip for presence lookups and one for publishes, with
+  every message for the same node coalesced into a single ``PUBLISH``. A
+  failed flush puts its work back for the next one (up to ``max_pending``
+  messages; the oldest are dropped beyond that), so a Redis blip delays
+  delivery instead of losing it.
+
+Usage:
+    ```python
+    from src.core.websocket import manager
+
+    await manager.enable_fanout(cache.redis)   # on startup
+    await manager.send_to_user(user_id, {...})  # reaches every node
+    await manager.get_user_connection_count(user_id)  # cluster-wide
+    await manager.disable_fanout()             # on shutdown
+    ```
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+from uuid import uuid4
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Target kinds carried in envelopes and presence keys.
+USER = "user"
+CHANNEL = "channel"
+BROADCAST = "all"
+
+DeliverFn = Callable[[str, str | None, dict[str, Any] | str, set[str] | None], Any]
+CountFn = Callable[[str, str], int]
+
+
+class ClusterFanout:
+    """Redis pub/sub bridge between the ``ConnectionManager`` of each node.
+
+    Attributes:
+        node_id: Unique id of this process in the cluster.
+        stats: Counters describing fan-out activity (see ``get_stats``).
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        deliver: DeliverFn,
+        local_count: CountFn,
+        *,
+        key_prefix: str = "maigie:",
+        node_id: str | None = None,
+        flush_interval: float = 0.01,
+        max_batch: int = 256,
+        max_pending: int = 10_000,
+        presence_ttl: int = 90,
+    ) -> None:
+        """
+        Initialize the fan-out bridge.
+
+        Args:
+            client: Redis client (a pub/sub connection is taken from its pool)
+            deliver: Callback ``(kind, target, message, exclude)`` delivering a
+                message to the matching *local* connections
+            local_count: Callback ``(kind, target)`` returning the number of
+                local connections for a user or channel
+            key_prefix: Prefix for presence keys and pub/sub channels
+            node_id: Identifier for this node (random by default)
+            flush_interval: Seconds between outbound flushes
+            max_batch: Pending messages that trigger an early flush
+            max_pending: Messages kept for retry while Redis is failing
+            presence_ttl: Seconds without a heartbeat before a node is
+                considered dead
+        """
+        self.redis = client
+        self.node_id = node_id or uuid4().hex
+        self.key_prefix = key_prefix
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.presence_ttl = presence_ttl
+
+        self._deliver = deliver
+        self._local_count = local_count
+
+        # Outbound envelopes awaiting the next flush.
+        self._pending: list[dict[str, Any]] = []
+        # Presence targets whose local count changed since the last flush.
+        self._dirty: set[tuple[str, str]] = set()
+        # Every target this node has published presence for.
+        self._tracked: set[tuple[str, str]] = set()
+        # Live node ids as of the last presence lookup.
+        self._live_nodes: set[str] = {self.node_id}
+
+        self._wakeup = asyncio.Event()
+        self._pubsub: Any = None
+        self._tasks: list[asyncio.Task] = []
+        self._running = False
+
+        self.stats: dict[str, int] = {
+            "enqueued": 0,
+            "local_only": 0,
+            "published_messages": 0,
+            "published_batches": 0,
+            "received_messages": 0,
+            "flush_errors": 0,
+            "dropped_messages": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @property
+    def nodes_key(self) -> str:
+        return f"{self.key_prefix}ws:nodes"
+
+    @property
+    def broadcast_channel(self) -> str:
+        return f"{self.key_prefix}ws:broadcast"
+
+    def node_channel(self, node_id: str) -> str:
+        return f"{self.key_prefix}ws:node:{node_id}"
+
+    def presence_key(self, kind: str, target: str) -> str:
+        return f"{self.key_prefix}ws:presence:{kind}:{target}"
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Subscribe to this node's channels and start the background loops."""
+        if self._running:
+            return
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.subscribe(self.node_channel(self.node_id), self.broadcast_channel)
+        await self._heartbeat()
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._listen_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+        ]
+        logger.info(f"WebSocket fan-out started (node: {self.node_id})")
+
+    async def stop(self) -> None:
+        """Flush pending work, withdraw this node's presence and unsubscribe."""
+        if not self._running:
+            return
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+        try:
+            await self.flush()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for kind, target in self._tracked:
+                    pipe.hdel(self.presence_key(kind, target), self.node_id)
+                pipe.zrem(self.nodes_key, self.node_id)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Error withdrawing WebSocket presence: {e}")
+        self._tracked.clear()
+
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe()
+                await self._pubsub.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing WebSocket fan-out subscription: {e}")
+            self._pubsub = None
+        logger.info(f"WebSocket fan-out stopped (node: {self.node_id})")
+
+    # ------------------------------------------------------------------
+    # Producer side (synchronous, never blocks on Redis)
+    # ------------------------------------------------------------------
+
+    def track(self, kind: str, target: str) -> None:
+        """Mark a user or channel whose local connection count changed."""
+        self._dirty.add((kind, target))
+        self._wakeup.set()
+
+    def publish(
+        self,
+        kind: str,
+        target: str | None,
+        message: dict[str, Any] | str,
+        exclude: set[str] | None = None,
+    ) -> None:
+        """Queue a message (or plain text frame) for the other nodes holding ``target``."""
+        envelope: dict[str, Any] = {"k": kind, "t": target, "m": message, "o": self.node_id}
+        if exclude:
+            envelope["x"] = sorted(exclude)
+        self._pending.append(envelope)
+        self.stats["enqueued"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Presence queries
+    # ------------------------------------------------------------------
+
+    async def connection_count(self, kind: str, target: str) -> int:
+        """Cluster-wide number of connections for a user or channel."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._read_live_nodes(pipe)
+            pipe.hgetall(self.presence_key(kind, target))
+            live, counts = await pipe.execute()
+        self._set_live_nodes(live)
+        total = 0
+        for node, count in counts.items():
+            node_id = _text(node)
+            if node_id == self.node_id:
+                continue  # Local count is authoritative (may not be flushed yet)
+            if node_id in self._live_nodes:
+                total += int(count)
+        return total + self._local_count(kind, target)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> None:
+        """Write dirty presence and publish pending messages (one batch each).
+
+        Raises:
+            RedisError: When a pipeline fails; the unsent work is re-queued.
+        """
+        # Swap the queues out so producers can keep appending while we await Redis.
+        dirty, self._dirty = self._dirty, set()
+        pending, self._pending = self._pending, []
+        if not dirty and not pending:
+            return
+
+        routed = [e for e in pending if e["k"] != BROADCAST]
+        targets = list(dict.fromkeys((e["k"], e["t"]) for e in routed))
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for kind, target in dirty:
+                    self._write_presence(pipe, kind, target)
+                if targets:
+                    self._read_live_nodes(pipe)
+                for kind, target in targets:
+                    pipe.hgetall(self.presence_key(kind, target))
+                results = await pipe.execute()
+        except RedisError:
+            self._requeue(pending, dirty)
+            raise
+
+        holders = {}
+        if targets:
+            lookups = results[len(results) - len(targets) - 1 :]
+            self._set_live_nodes(lookups[0])
+            holders = {
+                target: self._remote_holders(counts) for target, counts in zip(targets, lookups[1:])
+            }
+
+        batches: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for envelope in pending:
+            if envelope["k"] == BROADCAST:
+                batches[self.broadcast_channel].append(envelope)
+                continue
+            nodes = holders[(envelope["k"], envelope["t"])]
+            if not nodes:
+                self.stats["local_only"] += 1
+                continue
+            for node_id in nodes:
+                batches[self.node_channel(node_id)].append(envelope)
+
+        if not batches:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, envelopes in batches.items():
+                    pipe.publish(channel, json.dumps(envelopes, default=str))
+                await pipe.execute()
+        except RedisError:
+            # Presence was written; retry the messages (some may arrive twice).
+            self._requeue(pending)
+            raise
+        self.stats["published_batches"] += len(batches)
+        self.stats["published_messages"] += sum(len(b) for b in batches.values())
+
+    def _requeue(
+        self, pending: list[dict[str, Any]], dirty: set[tuple[str, str]] | None = None
+    ) -> None:
+        """Put a failed flush's work back ahead of anything queued since."""
+        if dirty:
+            self._dirty |= dirty
+        self._pending[:0] = pending
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.stats["dropped_messages"] += overflow
+            logger.warning(f"WebSocket fan-out backlog full; dropped {overflow} oldest messages")
+
+    def _write_presence(self, pipe: Any, kind: str, target: str) -> None:
+        key = self.presence_key(kind, target)
+        count = self._local_count(kind, target)
+        if count > 0:
+            pipe.hset(key, self.node_id, count)
+            pipe.expire(key, self.presence_ttl)
+            self._tracked.add((kind, target))
+        else:
+            pipe.hdel(key, self.node_id)
+            self._tracked.discard((kind, target))
+
+    def _read_live_nodes(self, pipe: Any) -> None:
+        pipe.zrangebyscore(self.nodes_key, time.time() - self.presence_ttl, "+inf")
+
+    def _set_live_nodes(self, nodes: list[Any]) -> None:
+        self._live_nodes = {_text(n) for n in nodes} | {self.node_id}
+
+    def _remote_holders(self, counts: dict[Any, Any]) -> list[str]:
+        nodes = []
+        for node, count in counts.items():
+            node_id = _text(node)
+            if node_id != self.node_id and node_id in self._live_nodes and int(count) > 0:
+                nodes.append(node_id)
+        return nodes
+
+    async def _flush_loop(self) -> None:
+        """Flush every ``flush_interval`` seconds, or sooner on a full batch."""
+        while self._running:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+                # Bound the flush rate even when producers keep signalling.
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                logger.error(f"Error flushing WebSocket fan-out: {e}")
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+
+    async def _listen_loop(self) -> None:
+        """Deliver batches published by other nodes to local connections."""
+        while self._running:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None or message.get("type") != "message":
+                    continue
+                await self.handle_batch(message["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in WebSocket fan-out listener: {e}")
+                await asyncio.sleep(1)
+
+    async def handle_batch(self, data: bytes | str) -> None:
+        """Deliver one published batch of envelopes to local connections."""
+        for envelope in json.loads(data):
+            if envelope.get("o") == self.node_id:
+                continue  # Our own broadcast; already delivered locally
+            self.stats["received_messages"] += 1
+            exclude = set(envelope["x"]) if envelope.get("x") else None
+            await self._deliver(envelope["k"], envelope.get("t"), envelope["m"], exclude)
+
+    # ------------------------------------------------------------------
+    # Heartbeat
+    # ------------------------------------------------------------------
+
+    async def _heartbeat(self) -> None:
+        """Refresh this node's liveness and presence; reload the live node set."""
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.nodes_key, {self.node_id: now})
+            pipe.zremrangebyscore(self.nodes_key, "-inf", now - self.presence_ttl)
+            self._read_live_nodes(pipe)
+            for kind, target in list(self._tracked):
+                self._write_presence(pipe, kind, target)
+            results = await pipe.execute()
+        self._set_live_nodes(results[2])
+
+    async def _heartbeat_loop(self) -> None:
+        interval = max(self.presence_ttl / 3, 1)
+        while self._running:
+            try:
+                await asyncio.sleep(interval)
+                await self._heartbeat()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in WebSocket fan-out heartbeat: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Fan-out counters plus the current queue depth and live node count."""
+        return {
+            **self.stats,
+            "node_id": self.node_id,
+            "pending": len(self._pending),
+            "live_nodes": len(self._live_nodes),
+        }
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
@@ -0,0 +1,281 @@
+"""
+Outbound WebSocket queues and token-stream coalescing.
+
+Copyright (C) 2025 Maigie
+
+Licensed under the Business Source License 1.1 (BUSL-1.1).
+See LICENSE file in the repository root for details.
+
+Two pieces keep streamed LLM replies cheap to deliver:
+
+- ``OutboundQueue`` — one per connection. Senders enqueue pre-serialised text
+  frames and return immediately; a single writer task drains the queue, so a
+  slow client never stalls the sender (or other room members). The queue is
+  bounded by frame count and bytes; on overflow the frame is dropped or the
+  connection is closed as a slow consumer.
+- ``StreamCoalescer`` — merges LLM chunks into one ``stream`` frame every
+  ``flush_interval`` seconds or ``flush_bytes`` bytes, whichever comes first,
+  instead of one frame per chunk.
+
+``StreamMetrics`` aggregates queue depth, drops and send latency for all
+connections of a ``ConnectionManager``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies for OutboundQueue
+DROP = "drop"
+CLOSE = "close"
+
+
+class StreamMetrics:
+    """Counters and recent send latencies shared by a manager's queues."""
+
+    __slots__ = (
+        "frames_enqueued",
+        "frames_sent",
+        "frames_dropped",
+        "slow_consumers_closed",
+        "_latencies_ms",
+    )
+
+    def __init__(self, latency_window: int = 1024) -> None:
+        self.frames_enqueued = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.slow_consumers_closed = 0
+        self._latencies_ms: deque[float] = deque(maxlen=latency_window)
+
+    def record_send(self, seconds: float) -> None:
+        self.frames_sent += 1
+        self._latencies_ms.append(seconds * 1000)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counters plus p50/p95/max send latency (ms) over the recent window."""
+        latencies = sorted(self._latencies_ms)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)], 2)
+
+        return {
+            "frames_enqueued": self.frames_enqueued,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "slow_consumers_closed": self.slow_consumers_closed,
+            "send_latency_ms_p50": percentile(0.50),
+            "send_latency_ms_p95": percentile(0.95),
+            "send_latency_ms_max": round(latencies[-1], 2) if latencies else 0.0,
+        }
+
+
+class OutboundQueue:
+    """Bounded per-connection frame queue drained by a single writer task."""
+
+    __slots__ = (
+        "websocket",
+        "max_frames",
+        "max_bytes",
+        "overflow",
+        "metrics",
+        "_on_failure",
+        "_frames",
+        "_bytes",
+        "_ready",
+        "_task",
+        "_failed",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        metrics: StreamMetrics,
+        on_failure: Callable[[str], Awaitable[Any]],
+        *,
+        max_frames: int = 256,
+        max_bytes: int = 1_048_576,
+        overflow: str = CLOSE,
+    ) -> None:
+        """
+        Args:
+            websocket: Connection to write to
+            metrics: Shared metrics sink
+            on_failure: Called with a reason when the connection must be
+                dropped ("send_error" or "slow_consumer")
+            max_frames: Maximum queued frames
+            max_bytes: Maximum queued bytes
+            overflow: ``"close"`` the connection or ``"drop"`` the new frame
+                when a bound is exceeded
+        """
+        self.websocket = websocket
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.overflow = overflow
+        self.metrics = metrics
+        self._on_failure = on_failure
+        self._frames: deque[str] = deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._failed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._bytes
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    def put(self, frame: str) -> bool:
+        """Enqueue a frame. Returns False if it was dropped."""
+        if self._failed:
+            return False
+        size = len(frame)
+        if len(self._frames) >= self.max_frames or self._bytes + size > self.max_bytes:
+            self.metrics.frames_dropped += 1
+            if self.overflow == CLOSE:
+                self.metrics.slow_consumers_closed += 1
+                self._fail("slow_consumer")
+            return False
+        self._frames.append(frame)
+        self._bytes += size
+        self.metrics.frames_enqueued += 1
+        self._ready.set()
+        return True
+
+    async def drain(self, timeout: float = 1.0) -> None:
+        """Wait (bounded) until every queued frame has been written."""
+        deadline = time.monotonic() + timeout
+        while self._frames and not self._failed and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+
+    async def aclose(self) -> None:
+        """Stop the writer; frames still queued are discarded."""
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._frames.clear()
+        self._bytes = 0
+
+    def _fail(self, reason: str) -> None:
+        if self._failed:
+            return
+        self._failed = True
+        # Run outside the writer/sender: the failure handler closes this queue.
+        asyncio.create_task(self._on_failure(reason))
+
+    async def _writer(self) -> None:
+        while True:
+            await self._ready.wait()
+            while self._frames:
+                frame = self._frames[0]
+                started = time.perf_counter()
+                try:
+                    await self.websocket.send_text(frame)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error writing WebSocket frame: {e}")
+                    self._fail("send_error")
+                    return
+                self.metrics.record_send(time.perf_counter() - started)
+                self._frames.popleft()
+                self._bytes -= len(frame)
+            self._ready.clear()
+
+
+class StreamCoalescer:
+    """Merge streamed text chunks into fewer frames (time- and size-bounded).
+
+    ``emit(text, is_final)`` is awaited for each merged frame, in order. The
+    final frame is always emitted, even when empty, so clients see
+    ``is_final``.
+    """
+
+    __slots__ = (
+        "_emit",
+        "flush_interval",
+        "flush_bytes",
+        "_parts",
+        "_size",
+        "_lock",
+        "_timer",
+        "chunks_in",
+        "frames_out",
+    )
+
+    def __init__(
+        self,
+        emit: Callable[[str, bool], Awaitable[None]],
+        *,
+        flush_interval: float = 0.03,
+        flush_bytes: int = 512,
+    ) -> None:
+        self._emit = emit
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self._parts: list[str] = []
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self.chunks_in = 0
+        self.frames_out = 0
+
+    async def push(self, chunk: str, is_final: bool = False) -> None:
+        """Buffer a chunk; flush if the size bound is reached or it is final."""
+        self.chunks_in += 1
+        if chunk:
+            self._parts.append(chunk)
+            self._size += len(chunk)
+        if is_final or self._size >= self.flush_bytes:
+            await self.flush(is_final=is_final)
+        elif self._parts and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self, is_final: bool = False) -> None:
+        """Emit whatever is buffered (and the final marker, if requested)."""
+        if self._timer is not None:
+            # Only ever a timer that is still sleeping (see _flush_later)
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._parts and not is_final:
+                return
+            text = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            self.frames_out += 1
+            await self._emit(text, is_final)
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            return
+        # Detach before flushing so a concurrent flush cannot cancel the emit.
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing coalesced stream: {e}")
@@ -7,9 +7,9 @@ referral rewards, ad claims, and billing-related user fields.
 
 import logging
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.shared.database import get_session_factory
@@ -23,6 +23,9 @@ from src.domains.billing.db_models import (
 )
 from src.domains.learning_spaces.db_models import SpaceSubscription, SpaceSeatAddon
 
+if TYPE_CHECKING:
+    from src.domains.billing.services.credit_ledger import CreditDelta
+
 logger = logging.getLogger(__name__)
 
 
@@ -112,6 +115,44 @@ class BillingRepository:
             await session.commit()
         return await self.get_user_billing(user_id)
 
+    async def apply_credit_deltas(self, deltas: list["CreditDelta"]) -> None:
+        """Apply a batch of credit ledger deltas in a single UPDATE.
+
+        Usage and purchased balance move by relative amounts; FREE-tier daily
+        usage is written as-is along with the day it belongs to.
+        """
+        if not deltas:
+            return
+        stmt = text(
+            """
+            UPDATE "User" AS u SET
+                "creditsUsed" = u."creditsUsed" + v.d_used,
+                "purchasedCreditsBalance" = GREATEST(0, u."purchasedCreditsBalance" - v.d_purchased),
+                "creditsUsedToday" = CASE WHEN v.free THEN v.used_today ELSE u."creditsUsedToday" END,
+                "lastDailyReset" = CASE WHEN v.free THEN v.day_start ELSE u."lastDailyReset" END
+            FROM unnest(
+                CAST(:ids AS text[]),
+                CAST(:d_used AS integer[]),
+                CAST(:d_purchased AS integer[]),
+                CAST(:used_today AS integer[]),
+                CAST(:day_start AS timestamptz[]),
+                CAST(:free AS boolean[])
+            ) AS v(id, d_used, d_purchased, used_today, day_start, free)
+            WHERE u.id = v.id
+            """
+        )
+        params = {
+            "ids": [d.user_id for d in deltas],
+            "d_used": [d.used for d in deltas],
+            "d_purchased": [d.purchased for d in deltas],
+            "used_today": [d.used_today for d in deltas],
+            "day_start": [d.day_start for d in deltas],
+            "free": [d.free for d in deltas],
+        }
+        async with await self._session() as session:
+            await session.execute(stmt, params)
+            await session.commit()
+
     # -----------------------------------------------------------------------
     # Credit Purchase Transactions
     # -----------------------------------------------------------------------
@@ -15,6 +15,7 @@ from src.domains.identity.db_models import User
 from src.config import Settings, get_settings
 from src.shared.auth import CurrentUser, StaffUser
 from src.shared.exceptions import NotFoundError, ValidationError
+from src.shared.infrastructure.rate_limit import RateLimitPolicy, enforce_policy
 
 from . import models
 from .services import credit_service, referral_service, subscription_service
@@ -23,6 +24,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["billing"])
 
+PURCHASE_RATE_LIMIT = RateLimitPolicy(name="credit_pack_purchase", limit=5, window_seconds=60)
+
 
 # ===========================================================================
 # Plans (Public)
@@ -213,15 +216,7 @@ async def get_credit_packs(current_user: CurrentUser):
 @router.post("/credit-packs/purchase", response_model=models.PurchaseSessionResponse)
 async def purchase_credit_pack(body: models.PurchaseInitiateRequest, current_user: CurrentUser):
     """Initiate a credit pack purchase."""
-    from src.shared.infrastructure.redis import cache
-    from src.shared.infrastructure.rate_limit import enforce_rate_limit
-
-    await enforce_rate_limit(
-        user_id=current_user.id,
-        endpoint="credit_pack_purchase",
-        max_requests=5,
-        window_seconds=60,
-    )
+    await enforce_policy(PURCHASE_RATE_LIMIT, current_user.id, tier=current_user.tier)
     try:
         return await credit_service.initiate_purchase(
             user=current_user,
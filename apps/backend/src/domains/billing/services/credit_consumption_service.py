@@ -19,6 +19,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Any, Literal
 
+from redis.exceptions import RedisError
 from sqlalchemy import select
 
 from src.domains.identity.db_models import User, LimitReachedEmailLog
@@ -28,8 +29,10 @@ from src.shared.database import get_session_factory
 
 from src.config import Settings, get_settings
 from src.shared.infrastructure.email import send_limit_reached_email
+from src.domains.billing.services import credit_ledger as ledger
+from src.domains.billing.services.credit_ledger import credit_ledger
 from src.domains.billing.services.referral_service import get_daily_limit_increase
-from src.utils.exceptions import SubscriptionLimitError
+from src.shared.exceptions import SubscriptionLimitError
 
 logger = logging.getLogger(__name__)
 
@@ -179,7 +182,8 @@ async def initialize_user_credits(
 
     # Update user with credit limits and reset usage
     identity_repo = IdentityRepository()
-    updated_user = await identity_repo.update(user.id, update_data)
+    async with credit_ledger.external_write(user.id):
+        updated_user = await identity_repo.update(user.id, update_data)
 
     logger.info(
         f"Initialized credits for user {user.id} (tier: {tier_str}): "
@@ -467,6 +471,237 @@ def apply_token_multiplier(tokens: int) -> int:
     return max(1, adjusted) if tokens > 0 else 0
 
 
+def _usage_warning(
+    tier_str: str,
+    hard_cap: int,
+    soft_cap: int,
+    credits_used: int,
+    daily_limit: int,
+    credits_used_today: int,
+) -> str | None:
+    """80% warning after a subscription charge (monthly cap first, then FREE daily)."""
+    if soft_cap > 0 and credits_used >= soft_cap:
+        remaining = hard_cap - credits_used
+        return (
+            f"You've used 80% of your credit allocation. "
+            f"You have {remaining:,} credits remaining before hitting your limit. "
+            f"Consider purchasing additional credits to avoid interruption."
+        )
+
+    if tier_str == "FREE":
+        daily_soft_cap = int(daily_limit * 0.8)
+        if daily_soft_cap > 0 and credits_used_today >= daily_soft_cap:
+            daily_remaining = daily_limit - credits_used_today
+            return (
+                f"You've used 80% of your daily credit allocation. "
+                f"You have {daily_remaining:,} credits remaining today. "
+                f"Consider purchasing additional credits to avoid interruption."
+            )
+    return None
+
+
+def _daily_limit_error(
+    credits: int, credits_used_today: int, daily_limit: int, purchased_balance: int
+) -> SubscriptionLimitError:
+    """Error for a FREE-tier charge over the daily limit that purchased credits can't cover."""
+    if purchased_balance > 0:
+        # Purchased balance positive but insufficient
+        return SubscriptionLimitError(
+            message=(
+                f"Daily credit limit exceeded. You've used {credits_used_today:,} of "
+                f"{daily_limit:,} credits today. "
+                f"Your purchased credits balance ({purchased_balance:,}) is insufficient "
+                f"for this operation ({credits:,} credits required)."
+            ),
+            detail=(
+                f"credits_required={credits}, purchased_balance={purchased_balance}, "
+                f"purchase_deep_link={PURCHASE_DEEP_LINK}"
+            ),
+        )
+    # No purchased credits available
+    return SubscriptionLimitError(
+        message=(
+            f"Daily credit limit exceeded. You've used {credits_used_today:,} of "
+            f"{daily_limit:,} credits today."
+        ),
+        detail=(
+            f"This operation requires {credits} credits. Your daily limit resets at midnight UTC. "
+            f"Purchase credits to continue without waiting. "
+            f"purchase_deep_link={PURCHASE_DEEP_LINK}"
+        ),
+    )
+
+
+def _credits_exhausted_error(
+    credits: int, credits_used: int, hard_cap: int, purchased_balance: int
+) -> SubscriptionLimitError:
+    """Error when subscription and purchased credits together can't cover a charge."""
+    if purchased_balance > 0:
+        # Purchased balance positive but insufficient for the operation
+        shortfall = credits - max(0, hard_cap - credits_used)
+        return SubscriptionLimitError(
+            message=(
+                f"Insufficient credits. This operation requires {shortfall:,} credits "
+                f"from purchased balance, but you only have {purchased_balance:,} purchased credits remaining."
+            ),
+            detail=(
+                f"credits_required={shortfall}, purchased_balance={purchased_balance}, "
+                f"purchase_deep_link={PURCHASE_DEEP_LINK}"
+            ),
+        )
+    # Both fully exhausted
+    return SubscriptionLimitError(
+        message=(
+            f"Credit limit exceeded. You've used {credits_used:,} of {hard_cap:,} "
+            f"subscription credits and have no purchased credits remaining. "
+            f"Purchase credits to continue or wait for your next period reset."
+        ),
+        detail=(
+            f"This operation requires {credits} credits. "
+            f"purchase_deep_link={PURCHASE_DEEP_LINK}"
+        ),
+    )
+
+
+async def _notify_limit_reached(user: User) -> None:
+    """Send the limit-reached email once per credit period."""
+    period_end = user.credits_period_end
+    if not period_end:
+        return
+    try:
+        factory = get_session_factory()
+        async with factory() as session:
+            stmt = select(LimitReachedEmailLog).where(
+                LimitReachedEmailLog.user_id == user.id,
+                LimitReachedEmailLog.period_end == period_end,
+            )
+            result = await session.execute(stmt)
+            existing = result.scalar_one_or_none()
+        if not existing:
+            await send_limit_reached_email(
+                email=user.email,
+                name=user.name or None,
+            )
+            async with factory() as session:
+                log_entry = LimitReachedEmailLog(
+                    user_id=user.id,
+                    period_end=period_end,
+                )
+                session.add(log_entry)
+                await session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to send limit reached email to {user.id}: {e}")
+
+
+async def _prime_ledger(user: User) -> None:
+    """Load the user's credit state from Postgres into the ledger."""
+    user = await ensure_credit_period(user)
+    user = await reset_daily_credits_if_needed(user)
+    user = await IdentityRepository().find_by_id(user.id)
+    if not user:
+        raise ValueError("User not found after refresh")
+
+    free = (str(user.tier) if user.tier else "FREE") == "FREE"
+    await credit_ledger.prime(
+        user.id,
+        free=free,
+        credits_used=user.credits_used or 0,
+        hard_cap=user.credits_hard_cap or 0,
+        soft_cap=user.credits_soft_cap or 0,
+        purchased_balance=user.purchased_credits_balance or 0,
+        daily_limit=(user.credits_daily_limit or 0) if free else 0,
+        daily_bonus=await get_daily_limit_increase(user) if free else 0,
+        credits_used_today=user.credits_used_today or 0,
+        period_end=user.credits_period_end,
+    )
+
+
+async def _consume_from_ledger(
+    user: User, credits: int, operation: str
+) -> CreditConsumptionResult | None:
+    """
+    Check and deduct credits in one atomic ledger call.
+
+    Postgres is only touched to prime the ledger on a miss; the deduction
+    reaches the ``User`` row through the ledger's write-behind flush.
+
+    Returns:
+        CreditConsumptionResult, or None if the ledger entry could not be
+        primed (the caller then charges via the database).
+    """
+    for _ in range(3):
+        charge = await credit_ledger.consume(user.id, credits)
+        if charge.status == ledger.EXPIRED:
+            await credit_ledger.invalidate(user.id)
+        if charge.status in (ledger.MISS, ledger.EXPIRED):
+            await _prime_ledger(user)
+            continue
+        break
+    else:
+        return None
+
+    tier_str = str(user.tier) if user.tier else "FREE"
+
+    if charge.status == ledger.DAILY_DENIED:
+        raise _daily_limit_error(
+            credits, charge.credits_used_today, charge.daily_limit, charge.purchased_balance
+        )
+    if charge.status == ledger.DENIED:
+        if tier_str == "FREE":
+            await _notify_limit_reached(user)
+        raise _credits_exhausted_error(
+            credits, charge.credits_used, charge.hard_cap, charge.purchased_balance
+        )
+
+    # Reflect the new balances on the (detached) user object
+    user.credits_used = charge.credits_used
+    user.purchased_credits_balance = charge.purchased_balance
+    if tier_str == "FREE":
+        user.credits_used_today = charge.credits_used_today
+
+    warning = None
+    notice = None
+    if charge.status == ledger.SUBSCRIPTION:
+        source = "subscription"
+        warning = _usage_warning(
+            tier_str,
+            charge.hard_cap,
+            charge.soft_cap,
+            charge.credits_used,
+            charge.daily_limit,
+            charge.credits_used_today,
+        )
+    elif charge.status == ledger.DAILY_PURCHASED:
+        source = "purchased"
+        notice = (
+            f"Daily limit reached. {credits:,} credits consumed from purchased balance. "
+            f"Remaining purchased credits: {charge.purchased_balance:,}."
+        )
+    else:
+        source = "both" if charge.status == ledger.BOTH else "purchased"
+        notice = (
+            f"Subscription credits exhausted. {charge.purchased_deducted:,} credits consumed "
+            f"from purchased balance. Remaining purchased credits: {charge.purchased_balance:,}."
+        )
+
+    logger.info(
+        f"Consumed {credits} credits for user {user.id} (operation: {operation}, "
+        f"source: {source}). Subscription used: {charge.credits_used}/{charge.hard_cap}, "
+        f"purchased balance: {charge.purchased_balance}"
+    )
+
+    return CreditConsumptionResult(
+        user=user,
+        credits_consumed=credits,
+        source=source,
+        subscription_deducted=charge.subscription_deducted,
+        purchased_deducted=charge.purchased_deducted,
+        warning=warning,
+        notice=notice,
+        purchased_balance_remaining=charge.purchased_balance,
+    )
+
+
 async def consume_credits(
     user: User,
     credits: int,
@@ -536,6 +771,15 @@ async def consume_credits(
             purchased_balance_remaining=user.purchased_credits_balance or 0,
         )
 
+    if credit_ledger.started:
+        try:
+            result = await _consume_from_ledger(user, credits, operation)
+        except RedisError as e:
+            logger.warning(f"Credit ledger unavailable, charging via database: {e}")
+        else:
+            if result is not None:
+                return result
+
     # Ensure credit period is active
     user = await ensure_credit_period(user)
 
@@ -600,33 +844,9 @@ async def consume_credits(
                 notice=notice,
                 purchased_balance_remaining=new_purchased_balance,
             )
-        elif purchased_balance > 0:
-            # Purchased balance positive but insufficient
-            raise SubscriptionLimitError(
-                message=(
-                    f"Daily credit limit exceeded. You've used {credits_used_today:,} of "
-                    f"{effective_daily_limit:,} credits today. "
-                    f"Your purchased credits balance ({purchased_balance:,}) is insufficient "
-                    f"for this operation ({credits:,} credits required)."
-                ),
-                detail=(
-                    f"credits_required={credits}, purchased_balance={purchased_balance}, "
-                    f"purchase_deep_link={PURCHASE_DEEP_LINK}"
-                ),
-            )
-        else:
-            # No purchased credits available
-            raise SubscriptionLimitError(
-                message=(
-                    f"Daily credit limit exceeded. You've used {credits_used_today:,} of "
-                    f"{effective_daily_limit:,} credits today."
-                ),
-                detail=(
-                    f"This operation requires {credits} credits. Your daily limit resets at midnight UTC. "
-                    f"Purchase credits to continue without waiting. "
-                    f"purchase_deep_link={PURCHASE_DEEP_LINK}"
-                ),
-            )
+        raise _daily_limit_error(
+            credits, credits_used_today, effective_daily_limit, purchased_balance
+        )
 
     # Case 2: Subscription credits are sufficient
     if remaining_subscription >= credits:
@@ -637,28 +857,15 @@ async def consume_credits(
 
         updated_user = await identity_repo.update(user.id, update_data)
 
-        # Check for 80% soft cap warning
-        warning_message = None
-        new_credits_used = updated_user.credits_used or 0
-        if soft_cap > 0 and new_credits_used >= soft_cap:
-            new_remaining = hard_cap - new_credits_used
-            warning_message = (
-                f"You've used 80% of your credit allocation. "
-                f"You have {new_remaining:,} credits remaining before hitting your limit. "
-                f"Consider purchasing additional credits to avoid interruption."
-            )
-
-        # Check FREE tier daily 80% warning
-        if tier_str == "FREE" and not warning_message:
-            new_daily_used = updated_user.credits_used_today or 0
-            daily_soft_cap = int(effective_daily_limit * 0.8)
-            if daily_soft_cap > 0 and new_daily_used >= daily_soft_cap:
-                daily_remaining = effective_daily_limit - new_daily_used
-                warning_message = (
-                    f"You've used 80% of your daily credit allocation. "
-                    f"You have {daily_remaining:,} credits remaining today. "
-                    f"Consider purchasing additional credits to avoid interruption."
-                )
+        # Check for 80% soft cap (and FREE tier daily 80%) warning
+        warning_message = _usage_warning(
+            tier_str,
+            hard_cap,
+            soft_cap,
+            updated_user.credits_used or 0,
+            effective_daily_limit if tier_str == "FREE" else 0,
+            updated_user.credits_used_today or 0,
+        )
 
         logger.info(
             f"Consumed {credits} subscription credits for user {user.id} "
@@ -758,59 +965,9 @@ async def consume_credits(
     # Case 5: Both subscription and purchased credits insufficient
     # Send limit-reached email for FREE tier (once per period)
     if tier_str == "FREE":
-        period_end = user.credits_period_end
-        if period_end:
-            try:
-                factory = get_session_factory()
-                async with factory() as session:
-                    stmt = select(LimitReachedEmailLog).where(
-                        LimitReachedEmailLog.user_id == user.id,
-                        LimitReachedEmailLog.period_end == period_end,
-                    )
-                    result = await session.execute(stmt)
-                    existing = result.scalar_one_or_none()
-                if not existing:
-                    await send_limit_reached_email(
-                        email=user.email,
-                        name=user.name or None,
-                    )
-                    async with factory() as session:
-                        log_entry = LimitReachedEmailLog(
-                            user_id=user.id,
-                            period_end=period_end,
-                        )
-                        session.add(log_entry)
-                        await session.commit()
-            except Exception as e:
-                logger.warning(f"Failed to send limit reached email to {user.id}: {e}")
-
-    # Determine error message based on state
-    if purchased_balance > 0:
-        # Purchased balance positive but insufficient for the operation
-        shortfall = credits - remaining_subscription
-        raise SubscriptionLimitError(
-            message=(
-                f"Insufficient credits. This operation requires {shortfall:,} credits "
-                f"from purchased balance, but you only have {purchased_balance:,} purchased credits remaining."
-            ),
-            detail=(
-                f"credits_required={shortfall}, purchased_balance={purchased_balance}, "
-                f"purchase_deep_link={PURCHASE_DEEP_LINK}"
-            ),
-        )
-    else:
-        # Both fully exhausted
-        raise SubscriptionLimitError(
-            message=(
-                f"Credit limit exceeded. You've used {credits_used:,} of {hard_cap:,} "
-                f"subscription credits and have no purchased credits remaining. "
-                f"Purchase credits to continue or wait for your next period reset."
-            ),
-            detail=(
-                f"This operation requires {credits} credits. "
-                f"purchase_deep_link={PURCHASE_DEEP_LINK}"
-            ),
-        )
+        await _notify_limit_reached(user)
+
+    raise _credits_exhausted_error(credits, credits_used, hard_cap, purchased_balance)
 
 
 async def get_credit_usage(user: User, db_client: Any | None = None) -> dict:
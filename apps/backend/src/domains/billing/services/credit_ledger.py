@@ -0,0 +1,541 @@
+"""
+Redis-backed credit ledger.
+
+``consume_credits`` used to run ``ensure_credit_period``,
+``reset_daily_credits_if_needed``, a fresh ``find_by_id``,
+``get_daily_limit_increase`` and one or more read-modify-write ``update``
+calls per chargeable operation: 4-6 round trips, and two concurrent chat
+turns could both read the same balance and both spend it.
+
+The ledger keeps each user's subscription, daily and purchased balances in a
+Redis hash (``<prefix>credits:<user_id>``):
+
+- the availability check and the deduction run in one Lua script, so
+  concurrent charges serialise in Redis and can never double-spend;
+- every deduction is also accumulated as a pending delta (``d_used`` /
+  ``d_purchased``) and the user is added to a dirty set;
+- a background task drains the dirty set and applies the deltas to the
+  ``User`` columns in one ``UPDATE ... FROM unnest(...)`` per batch. Deltas
+  are relative, so they commute with grants written straight to Postgres.
+
+The hash is primed from Postgres on first use (or after invalidation). Its
+``stale_at`` field is set ``CREDIT_LEDGER_TTL_SECONDS`` after priming and
+charges do not move it: once passed, the next charge reports ``expired``
+(flush, evict, re-prime), so caps are re-read at least that often. The Redis
+TTL only ever removes clean hashes: a charge ``PERSIST``s the hash while it
+holds unflushed deltas, and the drain that takes them out restores the TTL
+(a failed flush puts them back and persists it again). Code that writes tier or credit
+columns directly (purchases, grants, plan changes) wraps the write in
+``credit_ledger.external_write(user_id)``, which flushes pending deltas before
+the write and drops the cached balances after it; ``IdentityRepository.update``
+does this for those columns. Celery tasks, which have no running ledger, call
+``invalidate_many`` instead: it marks the entries' period as ended, so the
+next charge flushes, evicts and re-primes them.
+
+On startup ``reconcile()`` flushes deltas left behind by a previous process
+and evicts every clean hash, so balances are re-read from Postgres. If a
+process dies between draining a batch and committing it, that batch is lost
+(the user is under-charged, never double-charged).
+
+When Redis is unavailable (or ``CREDIT_LEDGER_ENABLED`` is off) the ledger is
+not started and ``consume_credits`` falls back to the database path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import Any, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# Charge outcomes returned by the consume script
+MISS = "miss"  # No ledger entry: prime from Postgres and retry
+EXPIRED = "expired"  # Credit period ended: reset in Postgres and re-prime
+SUBSCRIPTION = "subscription"
+PURCHASED = "purchased"
+BOTH = "both"
+DAILY_PURCHASED = "daily_purchased"  # FREE daily limit hit, paid from purchased
+DAILY_DENIED = "daily_denied"
+DENIED = "denied"
+
+# KEYS: ledger hash, dirty set
+# ARGV: user_id, credits, today (YYYY-MM-DD), now (epoch seconds)
+_CONSUME_SCRIPT = """
+local key = KEYS[1]
+if redis.call('EXISTS', key) == 0 then return {'miss'} end
+local s = redis.call('HMGET', key, 'free', 'used', 'hard', 'soft', 'purchased',
+    'daily_limit', 'bonus', 'used_today', 'day', 'period_end', 'stale_at')
+local now = tonumber(ARGV[4])
+if tonumber(s[10]) <= now or tonumber(s[11] or 0) <= now then return {'expired'} end
+
+local credits = tonumber(ARGV[2])
+local free = s[1] == '1'
+local used = tonumber(s[2])
+local hard = tonumber(s[3])
+local purchased = tonumber(s[5])
+local daily_limit = tonumber(s[6])
+local bonus = tonumber(s[7])
+local used_today = tonumber(s[8])
+if s[9] ~= ARGV[3] then
+    -- New UTC day: daily usage and referral bonus start over
+    used_today = 0
+    bonus = 0
+    redis.call('HSET', key, 'used_today', 0, 'bonus', 0, 'day', ARGV[3])
+end
+
+local effective_daily = daily_limit + bonus
+local remaining = math.max(0, hard - used)
+local sub, pur, status = 0, 0, 'denied'
+if free and effective_daily > 0 and used_today + credits > effective_daily then
+    if purchased >= credits then
+        pur, status = credits, 'daily_purchased'
+    else
+        status = 'daily_denied'
+    end
+elseif remaining >= credits then
+    sub, status = credits, 'subscription'
+elseif remaining > 0 and purchased >= credits - remaining then
+    sub, pur, status = remaining, credits - remaining, 'both'
+elseif remaining == 0 and purchased >= credits then
+    pur, status = credits, 'purchased'
+end
+
+if status ~= 'denied' and status ~= 'daily_denied' then
+    used = used + sub
+    purchased = purchased - pur
+    if free and status ~= 'daily_purchased' then
+        used_today = used_today + credits
+    end
+    redis.call('HSET', key, 'used', used, 'purchased', purchased, 'used_today', used_today)
+    redis.call('HINCRBY', key, 'd_used', sub)
+    redis.call('HINCRBY', key, 'd_purchased', pur)
+    redis.call('SADD', KEYS[2], ARGV[1])
+    -- Unflushed deltas must outlive the TTL
+    redis.call('PERSIST', key)
+end
+return {status, sub, pur, used, hard, tonumber(s[4]), purchased, effective_daily, used_today}
+"""
+
+# KEYS: ledger hash. ARGV: ttl, then field/value pairs.
+_PRIME_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], (table.unpack or unpack)(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+# Move pending deltas out of the hash for flushing; the now clean hash may expire again.
+# KEYS: ledger hash. ARGV: ttl. Returns {d_used, d_purchased, used_today, day, free}.
+_DRAIN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+local v = redis.call('HMGET', KEYS[1], 'd_used', 'd_purchased', 'used_today', 'day', 'free')
+redis.call('HSET', KEYS[1], 'd_used', 0, 'd_purchased', 0)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+return v
+"""
+
+# Put deltas back after a failed flush. KEYS: ledger hash, dirty set.
+# ARGV: user_id, d_used, d_purchased
+_RESTORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HINCRBY', KEYS[1], 'd_used', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'd_purchased', ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('PERSIST', KEYS[1])
+return 1
+"""
+
+# Make the next charge report ``expired`` (flush, evict, re-prime). KEYS: ledger hash.
+_MARK_STALE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], 'period_end', 0)
+return 1
+"""
+
+# Delete the hash only when nothing is waiting to be flushed.
+_EVICT_CLEAN_SCRIPT = """
+local v = redis.call('HMGET', KEYS[1], 'd_used', 'd_purchased')
+if tonumber(v[1] or 0) ~= 0 or tonumber(v[2] or 0) ~= 0 then return 0 end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+@dataclass(slots=True)
+class LedgerCharge:
+    """Outcome of one atomic check-and-deduct, with balances after it."""
+
+    status: str
+    subscription_deducted: int = 0
+    purchased_deducted: int = 0
+    credits_used: int = 0
+    hard_cap: int = 0
+    soft_cap: int = 0
+    purchased_balance: int = 0
+    daily_limit: int = 0
+    credits_used_today: int = 0
+
+    @property
+    def allowed(self) -> bool:
+        return self.status in (SUBSCRIPTION, PURCHASED, BOTH, DAILY_PURCHASED)
+
+
+@dataclass(slots=True)
+class CreditDelta:
+    """Pending changes for one user, applied to Postgres by the flusher."""
+
+    user_id: str
+    used: int
+    purchased: int
+    used_today: int
+    day_start: datetime
+    free: bool
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, bytes):
+        value = value.decode()
+    return int(value or 0)
+
+
+def _str(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _day_start(day: str) -> datetime:
+    return datetime.combine(date.fromisoformat(day), datetime.min.time(), tzinfo=UTC)
+
+
+class CreditLedger:
+    """Atomic per-user credit balances in Redis with Postgres write-behind."""
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+        ttl_seconds: int = 6 * 3600,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.ttl_seconds = ttl_seconds
+
+        self._redis: Any = None
+        self._prefix = ""
+        self._scripts: dict[str, Any] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.stats: dict[str, float] = {
+            "charges": 0,
+            "denied": 0,
+            "misses": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_failures": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._redis is not None
+
+    def _key(self, user_id: str) -> str:
+        return f"{self._prefix}credits:{user_id}"
+
+    @property
+    def _dirty_key(self) -> str:
+        return f"{self._prefix}credits:dirty"
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, redis_client: Any, *, key_prefix: str = "") -> None:
+        """Register the scripts, reconcile with Postgres and start flushing."""
+        if self.started:
+            return
+        self._redis = redis_client
+        self._prefix = key_prefix
+        self._scripts = {
+            "consume": redis_client.register_script(_CONSUME_SCRIPT),
+            "prime": redis_client.register_script(_PRIME_SCRIPT),
+            "drain": redis_client.register_script(_DRAIN_SCRIPT),
+            "restore": redis_client.register_script(_RESTORE_SCRIPT),
+            "evict": redis_client.register_script(_EVICT_CLEAN_SCRIPT),
+        }
+        try:
+            await self.reconcile()
+        except Exception as e:
+            logger.error(f"Credit ledger reconciliation failed: {e}")
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info("Credit ledger started")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still pending."""
+        if not self.started:
+            return
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            while await self.flush():
+                pass
+        except Exception as e:
+            logger.error(f"Final credit ledger flush failed: {e}")
+        self._redis = None
+        self._scripts = {}
+        logger.info("Credit ledger stopped")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                while await self.flush() >= self.flush_batch:
+                    pass  # Backlog: keep draining without waiting
+            except Exception as e:
+                logger.error(f"Credit ledger flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Balances
+    # ------------------------------------------------------------------
+
+    async def consume(self, user_id: str, credits: int) -> LedgerCharge:
+        """Atomically check and deduct ``credits`` (already multiplied)."""
+        now = datetime.now(UTC)
+        result = await self._scripts["consume"](
+            keys=[self._key(user_id), self._dirty_key],
+            args=[user_id, credits, now.date().isoformat(), int(now.timestamp())],
+        )
+        status = _str(result[0])
+        if status in (MISS, EXPIRED):
+            self.stats["misses"] += 1
+            return LedgerCharge(status)
+        charge = LedgerCharge(status, *(_int(v) for v in result[1:]))
+        self.stats["charges" if charge.allowed else "denied"] += 1
+        return charge
+
+    async def prime(
+        self,
+        user_id: str,
+        *,
+        free: bool,
+        credits_used: int,
+        hard_cap: int,
+        soft_cap: int,
+        purchased_balance: int,
+        daily_limit: int,
+        daily_bonus: int,
+        credits_used_today: int,
+        period_end: datetime,
+    ) -> bool:
+        """Seed the ledger from Postgres; a no-op if another caller got there first."""
+        if period_end.tzinfo is None:
+            period_end = period_end.replace(tzinfo=UTC)
+        fields = {
+            "free": 1 if free else 0,
+            "used": credits_used,
+            "hard": hard_cap,
+            "soft": soft_cap,
+            "purchased": purchased_balance,
+            "daily_limit": daily_limit,
+            "bonus": daily_bonus,
+            "used_today": credits_used_today,
+            "day": datetime.now(UTC).date().isoformat(),
+            "period_end": int(period_end.timestamp()),
+            "stale_at": int(time.time()) + self.ttl_seconds,
+            "d_used": 0,
+            "d_purchased": 0,
+        }
+        args: list[Any] = [self.ttl_seconds]
+        for name, value in fields.items():
+            args.extend((name, value))
+        return bool(await self._scripts["prime"](keys=[self._key(user_id)], args=args))
+
+    async def invalidate(self, user_id: str) -> None:
+        """Flush the user's pending deltas and drop the cached balances."""
+        if not self.started:
+            return
+        for _ in range(3):
+            await self.flush_users([user_id])
+            if await self._scripts["evict"](keys=[self._key(user_id)]):
+                return
+        logger.warning(f"Credit ledger entry for user {user_id} kept changing; not evicted")
+
+    async def invalidate_many(self, user_ids: list[str]) -> None:
+        """Invalidate a batch of users, e.g. from a Celery task.
+
+        Celery tasks run on their own event loop without the shared Redis
+        connection, so when the ledger isn't started a short-lived client
+        marks the entries stale; the API process re-primes them on the next
+        charge, after flushing their pending deltas.
+        """
+        if not user_ids:
+            return
+        if self.started:
+            for user_id in user_ids:
+                try:
+                    await self.invalidate(user_id)
+                except Exception as e:
+                    logger.warning(f"Credit ledger invalidation failed for {user_id}: {e}")
+            return
+
+        import redis.asyncio as redis
+
+        from src.config import get_settings
+
+        settings = get_settings()
+        client = None
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            mark_stale = client.register_script(_MARK_STALE_SCRIPT)
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    await mark_stale(
+                        keys=[f"{settings.REDIS_KEY_PREFIX}credits:{user_id}"], client=pipe
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Credit ledger invalidation failed for {len(user_ids)} users: {e}")
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    @asynccontextmanager
+    async def external_write(self, user_id: str) -> AsyncIterator[None]:
+        """Wrap a direct write to a user's credit columns.
+
+        Pending deltas are flushed first (so the write reads current values)
+        and the cached balances are dropped afterwards (so the next charge
+        re-reads them).
+        """
+        if self.started:
+            try:
+                await self.flush_users([user_id])
+            except Exception as e:
+                logger.warning(f"Credit ledger flush before write failed for {user_id}: {e}")
+        try:
+            yield
+        finally:
+            if self.started:
+                try:
+                    await self.invalidate(user_id)
+                except Exception as e:
+                    logger.warning(f"Credit ledger invalidation failed for {user_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Write-behind
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Apply one batch of pending deltas to Postgres; return users flushed."""
+        if not self.started:
+            return 0
+        popped = await self._redis.spop(self._dirty_key, self.flush_batch)
+        if not popped:
+            return 0
+        await self.flush_users([_str(user_id) for user_id in popped])
+        return len(popped)
+
+    async def flush_users(self, user_ids: list[str]) -> int:
+        """Drain and persist the given users' pending deltas."""
+        if not self.started or not user_ids:
+            return 0
+        async with self._flush_lock:
+            started = time.perf_counter()
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    await self._scripts["drain"](
+                        keys=[self._key(user_id)], args=[self.ttl_seconds], client=pipe
+                    )
+                drained = await pipe.execute()
+
+            deltas = []
+            for user_id, values in zip(user_ids, drained):
+                if not values:
+                    continue
+                d_used, d_purchased, used_today, day, free = values
+                if not _int(d_used) and not _int(d_purchased):
+                    continue
+                deltas.append(
+                    CreditDelta(
+                        user_id=user_id,
+                        used=_int(d_used),
+                        purchased=_int(d_purchased),
+                        used_today=_int(used_today),
+                        day_start=_day_start(_str(day)),
+                        free=_str(free) == "1",
+                    )
+                )
+            if not deltas:
+                return 0
+
+            from src.domains.billing.repository import billing_repo
+
+            try:
+                await billing_repo.apply_credit_deltas(deltas)
+            except Exception:
+                self.stats["flush_failures"] += 1
+                await self._restore(deltas)
+                raise
+
+            self.stats["flushes"] += 1
+            self.stats["rows_flushed"] += len(deltas)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return len(deltas)
+
+    async def _restore(self, deltas: list[CreditDelta]) -> None:
+        for delta in deltas:
+            restored = await self._scripts["restore"](
+                keys=[self._key(delta.user_id), self._dirty_key],
+                args=[delta.user_id, delta.used, delta.purchased],
+            )
+            if not restored:
+                logger.error(
+                    f"Lost credit deltas for user {delta.user_id}: "
+                    f"used={delta.used}, purchased={delta.purchased}"
+                )
+
+    async def reconcile(self) -> int:
+        """Flush everything pending, then evict clean entries so they re-prime.
+
+        Returns the number of ledger entries evicted.
+        """
+        while await self.flush():
+            pass
+        evicted = 0
+        async for key in self._redis.scan_iter(match=f"{self._prefix}credits:*", count=500):
+            key = _str(key)
+            if key == self._dirty_key:
+                continue
+            evicted += await self._scripts["evict"](keys=[key])
+        logger.info(f"Credit ledger reconciled ({evicted} cached balances evicted)")
+        return evicted
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Charge/flush counters plus the current write-behind backlog."""
+        backlog = await self._redis.scard(self._dirty_key) if self.started else 0
+        return {**self.stats, "pending_users": backlog, "started": self.started}
+
+
+def _build_ledger() -> CreditLedger:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return CreditLedger(
+        flush_interval=settings.CREDIT_LEDGER_FLUSH_INTERVAL_SECONDS,
+        flush_batch=settings.CREDIT_LEDGER_FLUSH_BATCH,
+        ttl_seconds=settings.CREDIT_LEDGER_TTL_SECONDS,
+    )
+
+
+# Module-level singleton (started from the app lifespan)
+credit_ledger = _build_ledger()
@@ -20,12 +20,12 @@ from datetime import UTC, datetime, timedelta
 
 from typing import Any
 
-import httpx
 import stripe
 
 from src.domains.identity.db_models import User
 from src.domains.identity.repository import IdentityRepository
 from src.domains.billing.repository import billing_repo
+from src.domains.billing.services.credit_ledger import credit_ledger
 
 from src.config import get_settings
 from src.shared.database import get_session_factory
@@ -36,6 +36,7 @@ from src.domains.billing.services.credit_purchase_notifications import (
     format_push_notification_body,
     format_push_notification_payload,
 )
+from src.shared.infrastructure.http import http_clients
 from src.shared.infrastructure.push_notifications import send_push_notification
 from src.utils.exceptions import ResourceNotFoundError, ValidationError
 
@@ -273,14 +274,15 @@ async def fulfill_purchase(
 
     # Atomically increment user's purchased credits balance
     # Get current balance and add
-    user_before = await identity_repo.find_by_id(transaction.user_id)
-    current_balance = (user_before.purchased_credits_balance or 0) if user_before else 0
-    updated_user = await identity_repo.update(
-        transaction.user_id,
-        {
-            "purchasedCreditsBalance": current_balance + transaction.credits_granted,
-        },
-    )
+    async with credit_ledger.external_write(transaction.user_id):
+        user_before = await identity_repo.find_by_id(transaction.user_id)
+        current_balance = (user_before.purchased_credits_balance or 0) if user_before else 0
+        updated_user = await identity_repo.update(
+            transaction.user_id,
+            {
+                "purchasedCreditsBalance": current_balance + transaction.credits_granted,
+            },
+        )
 
     # Emit real-time balance update via WebSocket to all connected clients
     new_balance = updated_user.purchased_credits_balance if updated_user else 0
@@ -456,31 +458,33 @@ async def admin_adjust_balance(
     """
     identity_repo = IdentityRepository()
 
-    # Validate target user exists
-    target_user = await identity_repo.find_by_id(target_user_id)
-    if not target_user:
-        raise ResourceNotFoundError("User", target_user_id)
-
-    # Validate adjustment won't result in negative balance
-    current_balance = target_user.purchased_credits_balance or 0
-    if amount < 0 and abs(amount) > current_balance:
-        raise ValidationError(
-            message=(
-                f"Cannot deduct {abs(amount)} credits. "
-                f"Maximum deductible amount is {current_balance} "
-                f"(user's current purchased credits balance)."
-            ),
-            detail=f"current_balance={current_balance}, requested_deduction={abs(amount)}",
+    # Flush pending ledger charges first so the balance read below is current
+    async with credit_ledger.external_write(target_user_id):
+        # Validate target user exists
+        target_user = await identity_repo.find_by_id(target_user_id)
+        if not target_user:
+            raise ResourceNotFoundError("User", target_user_id)
+
+        # Validate adjustment won't result in negative balance
+        current_balance = target_user.purchased_credits_balance or 0
+        if amount < 0 and abs(amount) > current_balance:
+            raise ValidationError(
+                message=(
+                    f"Cannot deduct {abs(amount)} credits. "
+                    f"Maximum deductible amount is {current_balance} "
+                    f"(user's current purchased credits balance)."
+                ),
+                detail=f"current_balance={current_balance}, requested_deduction={abs(amount)}",
+            )
+
+        # Atomically update the balance
+        updated_user = await identity_repo.update(
+            target_user_id,
+            {
+                "purchasedCreditsBalance": current_balance + amount,
+            },
         )
 
-    # Atomically update the balance
-    updated_user = await identity_repo.update(
-        target_user_id,
-        {
-            "purchasedCreditsBalance": current_balance + amount,
-        },
-    )
-
     # Create audit log entry
     try:
         await log_admin_action(
@@ -673,15 +677,15 @@ async def _create_paystack_charge(
         },
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{PAYSTACK_BASE}/transaction/initialize",
-            json=payload,
-            headers={
-                "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-                "Content-Type": "application/json",
-            },
-        )
+    client = http_clients.get(PAYSTACK_BASE)
+    resp = await client.post(
+        f"{PAYSTACK_BASE}/transaction/initialize",
+        json=payload,
+        headers={
+            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
+            "Content-Type": "application/json",
+        },
+    )
 
     data = resp.json()
     if not data.get("status"):
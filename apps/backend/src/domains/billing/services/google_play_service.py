@@ -18,6 +18,7 @@ from googleapiclient.discovery import build
 
 from src.domains.identity.repository import IdentityRepository
 from src.domains.billing.repository import billing_repo
+from src.domains.billing.services.credit_ledger import credit_ledger
 from src.shared.database import get_session_factory
 
 from ..config import get_settings
@@ -270,16 +271,17 @@ async def verify_product_purchase(
     from sqlalchemy import select as sa_select
     from src.domains.identity.db_models import User as UserModel
 
-    async with factory() as session:
-        result_q = await session.execute(sa_select(UserModel).where(UserModel.id == user_id))
-        user_obj = result_q.scalar_one_or_none()
-        current_balance = (user_obj.purchased_credits_balance or 0) if user_obj else 0
-    updated_user = await identity_repo.update(
-        user_id,
-        {
-            "purchasedCreditsBalance": current_balance + credits_to_grant,
-        },
-    )
+    async with credit_ledger.external_write(user_id):
+        async with factory() as session:
+            result_q = await session.execute(sa_select(UserModel).where(UserModel.id == user_id))
+            user_obj = result_q.scalar_one_or_none()
+            current_balance = (user_obj.purchased_credits_balance or 0) if user_obj else 0
+        updated_user = await identity_repo.update(
+            user_id,
+            {
+                "purchasedCreditsBalance": current_balance + credits_to_grant,
+            },
+        )
 
     # Record the transaction
     await billing_repo.create_purchase_transaction(
@@ -11,9 +11,9 @@ import logging
 from datetime import datetime
 from typing import Any
 
-import httpx
-
+from src.domains.billing.services.credit_ledger import credit_ledger
 from src.domains.identity.db_models import User
+from src.shared.infrastructure.http import http_clients
 
 from ..config import get_settings
 from ..core.database import db
@@ -161,15 +161,15 @@ async def disable_paystack_subscription(
         "token": email_token,
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{PAYSTACK_BASE}/subscription/disable",
-            json=payload,
-            headers={
-                "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-                "Content-Type": "application/json",
-            },
-        )
+    client = http_clients.get(PAYSTACK_BASE)
+    resp = await client.post(
+        f"{PAYSTACK_BASE}/subscription/disable",
+        json=payload,
+        headers={
+            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
+            "Content-Type": "application/json",
+        },
+    )
     data = resp.json()
     if not data.get("status"):
         msg = data.get("message", "Failed to disable Paystack subscription")
@@ -219,16 +219,17 @@ async def cancel_paystack_subscription(user: User, db_client: Any | None = None)
     # If we want to allow access until period_end, we should store a 'is_cancelling' flag instead.
     # For now, we follow the existing disable logic which sets to FREE.
 
-    await db_client.user.update(
-        where={"id": user.id},
-        data={
-            "tier": "FREE",
-            "paystackSubscriptionCode": None,
-            "stripeSubscriptionStatus": "cancelled",
-            "subscriptionCurrentPeriodStart": None,
-            "subscriptionCurrentPeriodEnd": None,
-        },
-    )
+    async with credit_ledger.external_write(user.id):
+        await db_client.user.update(
+            where={"id": user.id},
+            data={
+                "tier": "FREE",
+                "paystackSubscriptionCode": None,
+                "stripeSubscriptionStatus": "cancelled",
+                "subscriptionCurrentPeriodStart": None,
+                "subscriptionCurrentPeriodEnd": None,
+            },
+        )
 
     return {
         "status": "cancelled",
@@ -243,11 +244,11 @@ async def _get_paystack_subscription_email_token(subscription_code: str) -> str
     if not settings.PAYSTACK_SECRET_KEY:
         return None
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{PAYSTACK_BASE}/subscription/{subscription_code}",
-            headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"},
-        )
+    client = http_clients.get(PAYSTACK_BASE)
+    resp = await client.get(
+        f"{PAYSTACK_BASE}/subscription/{subscription_code}",
+        headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"},
+    )
     data = resp.json()
     if data.get("status") and data.get("data"):
         return data["data"].get("email_token")
@@ -336,15 +337,15 @@ async def initialize_paystack_subscription(
     if user.name:
         payload["metadata"]["name"] = user.name
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{PAYSTACK_BASE}/transaction/initialize",
-            json=payload,
-            headers={
-                "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-                "Content-Type": "application/json",
-            },
-        )
+    client = http_clients.get(PAYSTACK_BASE)
+    resp = await client.post(
+        f"{PAYSTACK_BASE}/transaction/initialize",
+        json=payload,
+        headers={
+            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
+            "Content-Type": "application/json",
+        },
+    )
     data = resp.json()
     if not data.get("status"):
         msg = data.get("message", "Paystack initialization failed")
@@ -375,11 +376,11 @@ async def verify_paystack_transaction(
     if not settings.PAYSTACK_SECRET_KEY:
         return None
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{PAYSTACK_BASE}/transaction/verify/{reference}",
-            headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"},
-        )
+    client = http_clients.get(PAYSTACK_BASE)
+    resp = await client.get(
+        f"{PAYSTACK_BASE}/transaction/verify/{reference}",
+        headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"},
+    )
     result = resp.json()
     if not result.get("status"):
         logger.warning(f"Paystack verify failed for ref {reference}: {result.get('message')}")
@@ -434,15 +435,15 @@ async def verify_paystack_transaction(
         "subscriptionCurrentPeriodEnd": period_end,
         "stripeSubscriptionStatus": "active",
     }
-    updated = await db_client.user.update(
-        where={"id": user_id},
-        data={k: v for k, v in update_data.items() if v is not None},
-    )
-
-    try:
-        updated = await reset_credits_for_period_start(updated, now, period_end, db_client)
-    except Exception as e:
-        logger.error(f"Failed to reset credits for user {user_id}: {e}")
+    async with credit_ledger.external_write(user_id):
+        updated = await db_client.user.update(
+            where={"id": user_id},
+            data={k: v for k, v in update_data.items() if v is not None},
+        )
+        try:
+            updated = await reset_credits_for_period_start(updated, now, period_end, db_client)
+        except Exception as e:
+            logger.error(f"Failed to reset credits for user {user_id}: {e}")
 
     old_tier = str(user.tier) if user.tier else "FREE"
     if old_tier == "FREE" and tier in (
@@ -520,18 +521,19 @@ async def _handle_subscription_create(payload: dict, db_client: Any) -> None:
 
         period_end = datetime.utcnow() + timedelta(days=30)
 
-    await db_client.user.update(
-        where={"id": user.id},
-        data={
-            "tier": tier,
-            "paymentProvider": "paystack",
-            "paystackSubscriptionCode": sub_code,
-            "paystackCustomerCode": customer_code or user.paystackCustomerCode,
-            "subscriptionCurrentPeriodStart": datetime.utcnow(),
-            "subscriptionCurrentPeriodEnd": period_end,
-            "stripeSubscriptionStatus": "active",
-        },
-    )
+    async with credit_ledger.external_write(user.id):
+        await db_client.user.update(
+            where={"id": user.id},
+            data={
+                "tier": tier,
+                "paymentProvider": "paystack",
+                "paystackSubscriptionCode": sub_code,
+                "paystackCustomerCode": customer_code or user.paystackCustomerCode,
+                "subscriptionCurrentPeriodStart": datetime.utcnow(),
+                "subscriptionCurrentPeriodEnd": period_end,
+                "stripeSubscriptionStatus": "active",
+            },
+        )
     logger.info(f"Paystack subscription created for user {user.id}, tier={tier}")
 
 
@@ -543,16 +545,17 @@ async def _handle_subscription_disable(payload: dict, db_client: Any) -> None:
     user = await db_client.user.find_unique(where={"paystackSubscriptionCode": sub_code})
     if not user:
         return
-    await db_client.user.update(
-        where={"id": user.id},
-        data={
-            "tier": "FREE",
-            "paystackSubscriptionCode": None,
-            "stripeSubscriptionStatus": "cancelled",
-            "subscriptionCurrentPeriodStart": None,
-            "subscriptionCurrentPeriodEnd": None,
-        },
-    )
+    async with credit_ledger.external_write(user.id):
+        await db_client.user.update(
+            where={"id": user.id},
+            data={
+                "tier": "FREE",
+                "paystackSubscriptionCode": None,
+                "stripeSubscriptionStatus": "cancelled",
+                "subscriptionCurrentPeriodStart": None,
+                "subscriptionCurrentPeriodEnd": None,
+            },
+        )
     logger.info(f"Paystack subscription disabled for user {user.id}")
 
 
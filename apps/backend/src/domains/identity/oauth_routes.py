@@ -86,7 +86,7 @@ async def google_native_callback(data: NativeGoogleCallbackRequest):
 
     settings = get_settings()
     access = create_access_token(
-        data={"sub": user.email},
+        data={"sub": user.email, "uid": user.id},
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
     )
     refresh = create_refresh_token(data={"sub": user.email})
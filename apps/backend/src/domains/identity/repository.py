@@ -9,15 +9,33 @@ import logging
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, text, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.domains.billing.services.credit_ledger import credit_ledger
+from src.shared.auth.principal_cache import principal_cache
 from src.shared.database import get_session_factory
 
 from .db_models import User, UserPreferences
 
 logger = logging.getLogger(__name__)
 
+# User attributes cached by the credit ledger
+_LEDGER_FIELDS = frozenset(
+    {
+        "tier",
+        "credits_used",
+        "credits_period_start",
+        "credits_period_end",
+        "credits_soft_cap",
+        "credits_hard_cap",
+        "purchased_credits_balance",
+        "credits_used_today",
+        "credits_daily_limit",
+        "last_daily_reset",
+    }
+)
+
 
 class IdentityRepository:
     """Data access for User and UserPreferences."""
@@ -125,14 +143,26 @@ class IdentityRepository:
     # -----------------------------------------------------------------------
 
     async def update(self, user_id: str, data: dict[str, Any]) -> User:
-        """Generic update by user ID."""
+        """Generic update by user ID.
+
+        Tier and credit writes go through ``credit_ledger.external_write`` so
+        the cached balances are re-read on the next charge.
+        """
+        # Map API field names to model attribute names
+        mapped = self._map_fields(data)
+        if _LEDGER_FIELDS.isdisjoint(mapped):
+            await self._update_user(user_id, mapped)
+        else:
+            async with credit_ledger.external_write(user_id):
+                await self._update_user(user_id, mapped)
+        await principal_cache.invalidate(user_id)
+        return await self.find_by_id(user_id)
+
+    async def _update_user(self, user_id: str, values: dict[str, Any]) -> None:
         async with await self._get_session() as session:
-            # Map API field names to model attribute names
-            mapped = self._map_fields(data)
-            stmt = update(User).where(User.id == user_id).values(**mapped)
+            stmt = update(User).where(User.id == user_id).values(**values)
             await session.execute(stmt)
             await session.commit()
-            return await self.find_by_id(user_id)
 
     async def activate_user(self, user_id: str) -> User:
         """Activate user and clear verification codes."""
@@ -204,7 +234,8 @@ class IdentityRepository:
                 session.add(prefs)
 
             await session.commit()
-            return await self.find_by_id(user_id)
+        await principal_cache.invalidate(user_id)
+        return await self.find_by_id(user_id)
 
     # -----------------------------------------------------------------------
     # Account Deletion
@@ -260,6 +291,32 @@ class IdentityRepository:
         except Exception:
             pass  # Never fail a request for activity tracking
 
+    async def update_last_seen_many(self, entries: list[tuple[str, datetime, str]]) -> None:
+        """Write a batch of ``(user_id, last_seen_at, platform)`` in one UPDATE."""
+        if not entries:
+            return
+        stmt = text(
+            """
+            UPDATE "User" AS u SET
+                "lastSeenAt" = v.seen_at,
+                "lastSeenPlatform" = v.platform
+            FROM unnest(
+                CAST(:ids AS text[]),
+                CAST(:seen_at AS timestamptz[]),
+                CAST(:platforms AS text[])
+            ) AS v(id, seen_at, platform)
+            WHERE u.id = v.id
+            """
+        )
+        params = {
+            "ids": [e[0] for e in entries],
+            "seen_at": [e[1] for e in entries],
+            "platforms": [e[2] for e in entries],
+        }
+        async with await self._get_session() as session:
+            await session.execute(stmt, params)
+            await session.commit()
+
     # -----------------------------------------------------------------------
     # Field mapping helpers
     # -----------------------------------------------------------------------
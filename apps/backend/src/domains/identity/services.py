@@ -162,7 +162,7 @@ async def login(*, email: str, password: str) -> TokenResponse:
     if not user.is_active:
         raise EmailVerificationRequiredError()
 
-    return _create_tokens(user.email)
+    return _create_tokens(user.email, user.id)
 
 
 async def refresh_token(*, refresh_token_str: str) -> TokenResponse:
@@ -183,14 +183,15 @@ async def refresh_token(*, refresh_token_str: str) -> TokenResponse:
     if not user or not user.is_active:
         raise UnauthorizedError("User not found or inactive")
 
-    return _create_tokens(user.email)
+    return _create_tokens(user.email, user.id)
 
 
-def _create_tokens(email: str) -> TokenResponse:
+def _create_tokens(email: str, user_id: str | None = None) -> TokenResponse:
     """Generate access + refresh token pair."""
     settings = get_settings()
+    claims = {"sub": email, "uid": user_id} if user_id else {"sub": email}
     access = create_access_token(
-        data={"sub": email},
+        data=claims,
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
     )
     refresh = create_refresh_token(data={"sub": email})
@@ -293,7 +294,13 @@ async def reset_password(*, email: str, code: str, new_password: str) -> None:
 
 async def change_password(*, user: User, current_password: str, new_password: str) -> None:
     """Change password for an authenticated user."""
-    if not user.password_hash or not verify_password(current_password, user.password_hash):
+    # The authenticated principal may be cached without credentials; re-read them.
+    stored = await identity_repo.find_by_id(user.id)
+    if (
+        not stored
+        or not stored.password_hash
+        or not verify_password(current_password, stored.password_hash)
+    ):
         raise ValidationError("Incorrect current password")
 
     hashed = get_password_hash(new_password)
@@ -428,7 +435,9 @@ async def cancel_deletion(*, user: User, token: str | None = None) -> None:
         return  # Nothing to cancel
 
     if token:
-        db_token = getattr(user, "account_deletion_cancel_token", None)
+        # Not part of the cached principal; read it from the database.
+        stored = await identity_repo.find_by_id(user.id)
+        db_token = stored.account_deletion_cancel_token if stored else None
         if not db_token or not secrets.compare_digest(str(token), str(db_token)):
             raise ValidationError("Invalid cancellation token")
 
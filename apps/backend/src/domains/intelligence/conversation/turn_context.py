@@ -0,0 +1,363 @@
+"""
+Per-turn chat context loader — Intelligence Domain.
+
+Every chat message needs the same set of lookups before the LLM call: the
+(optionally pinned) chat session, its circle group, onboarding status, the
+recent history window, long-term memory, the effective tier and the user's
+model preference. Issued one at a time from ``websocket_endpoint`` these were
+8–12 sequential round trips, each repository call checking out its own pooled
+connection, and they dominated time-to-first-token.
+
+``load_turn_context`` cuts that to a handful of concurrent lookups:
+
+- the pinned session, only when the client switches to a different session,
+  and one statement returning onboarding status, model preference, history
+  and memory as scalar subqueries (see ``_turn_snapshot_stmt``), both on the
+  connection checked out for the turn;
+- the circle group lookup, the onboarding state (personal, non-review chats
+  only) and the effective tier, which go through their own repositories and
+  check out their own connections; the latter two run concurrently with the
+  snapshot statement.
+
+The result is a slotted ``TurnContext`` carrying a ``TurnTimings`` breakdown
+so slow stages show up in the logs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+
+from src.domains.identity.db_models import ModelPreference, User
+from src.domains.intelligence.conversation.chat_helpers import (
+    _get_circle_group_for_session,
+    _is_circle_member,
+)
+from src.domains.intelligence.db_models import ChatMessage, ChatSession
+from src.domains.intelligence.memory.memory_impl import format_memory_context
+from src.domains.intelligence.reasoning.llm.adapter_registry import get_feature_flag_service
+from src.domains.intelligence.reasoning.llm.feature_flags import PERSONAL_SCOPE, circle_scope
+from src.domains.intelligence.repository import intelligence_repo
+from src.shared.database import get_session_factory
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latest messages included as LLM history (the current message counts toward it).
+HISTORY_TAKE = 12
+
+# Turns slower than this are logged at INFO with their stage breakdown.
+SLOW_TURN_MS = 250.0
+
+
+class TurnTimings:
+    """Wall-clock breakdown (milliseconds) of the stages of one turn load."""
+
+    __slots__ = ("_started", "stages")
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and record it under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await ``awaitable`` as a named stage (usable inside ``asyncio.gather``)."""
+        with self.stage(name):
+            return await awaitable
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self._started) * 1000, 2)
+
+    def as_dict(self) -> dict[str, float]:
+        return {**self.stages, "total": self.total_ms}
+
+
+@dataclass(slots=True)
+class TurnContext:
+    """Everything the chat handler needs about a turn before calling the LLM."""
+
+    session: ChatSession
+    circle_group: Any | None = None
+    access_error: str | None = None
+    is_onboarded: bool = False
+    onboarding_state: dict[str, Any] | None = None
+    history: list[dict[str, Any]] = field(default_factory=list)
+    memory_context: str = ""
+    request_scope: str = PERSONAL_SCOPE
+    user_tier: str | None = None
+    model_preference: tuple[str, str] | None = None
+    timings: TurnTimings = field(default_factory=TurnTimings)
+
+    @property
+    def is_circle_session(self) -> bool:
+        return bool(self.circle_group)
+
+    def history_with(self, message: Any | None, *, take: int = HISTORY_TAKE) -> list[dict]:
+        """History window (oldest first) with the just-saved ``message`` appended.
+
+        The history snapshot is loaded before the user's message is persisted,
+        so the handler appends it here to keep the same "latest N messages"
+        window it used to read back from the database.
+        """
+        rows = list(self.history)
+        if message is not None:
+            rows.append(
+                {
+                    "role": message.role,
+                    "content": message.content,
+                    "image_url": getattr(message, "image_url", None),
+                    "image_urls": getattr(message, "image_urls", None),
+                }
+            )
+        return rows[-take:]
+
+
+def format_history(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Map history rows to the provider-agnostic ``{"role", "parts"}`` shape."""
+    formatted = []
+    for msg in rows:
+        role = "user" if msg.get("role") == "USER" else "model"
+        parts = [msg.get("content")]
+        # Include images if present (image_urls preferred, fallback to image_url)
+        msg_images = msg.get("image_urls") or []
+        if not msg_images and msg.get("image_url"):
+            msg_images = [msg["image_url"]]
+        parts.extend(msg_images)
+        formatted.append({"role": role, "parts": parts})
+    return formatted
+
+
+async def load_turn_context(
+    user: Any,
+    session: ChatSession,
+    context: dict[str, Any] | None,
+    *,
+    history_take: int = HISTORY_TAKE,
+) -> TurnContext:
+    """Resolve the session and per-turn context for one incoming chat message.
+
+    Args:
+        user: The authenticated user (connection-time snapshot).
+        session: The connection's current chat session.
+        context: Optional client context; ``sessionId`` pins a session and
+            ``reviewItemId`` scopes history to a review thread.
+        history_take: Size of the history window, including the current message.
+
+    Returns:
+        A ``TurnContext``. When ``access_error`` is set the caller must reject
+        the message and leave its current session unchanged.
+    """
+    timings = TurnTimings()
+    factory = get_session_factory()
+    async with factory() as db:
+        active, circle_group, access_error = await _resolve_session(
+            db, user, session, context, timings
+        )
+        turn = TurnContext(session=active, circle_group=circle_group, timings=timings)
+        if access_error:
+            turn.access_error = access_error
+            return turn
+
+        review_item_id = context.get("reviewItemId") if context else None
+        is_circle = turn.is_circle_session
+        stmt = _turn_snapshot_stmt(
+            user_id=user.id,
+            session_id=active.id,
+            review_item_id=review_item_id,
+            # Circle rooms share history across members and never see personal memory.
+            history_user_id=None if is_circle else user.id,
+            history_take=max(history_take - 1, 0),
+            include_memory=not is_circle,
+        )
+
+        snapshot, onboarding_state, tier = await asyncio.gather(
+            timings.timed("snapshot_query", db.execute(stmt)),
+            timings.timed(
+                "onboarding_state",
+                _load_onboarding_state(user.id, is_circle or bool(review_item_id)),
+            ),
+            timings.timed("tier", _resolve_tier(user, circle_group)),
+        )
+        row = snapshot.one()
+
+    turn.is_onboarded = bool(
+        getattr(user, "isOnboarded", False) or getattr(user, "is_onboarded", False)
+    ) or bool(row.is_onboarded)
+    turn.onboarding_state = onboarding_state
+    turn.request_scope, turn.user_tier = tier
+    if row.pref_provider and row.pref_model:
+        turn.model_preference = (row.pref_provider, row.pref_model)
+    turn.history = list(row.history or [])
+    if not is_circle:
+        with timings.stage("memory_format"):
+            turn.memory_context = format_memory_context(
+                list(row.summaries or []), list(row.insights or []), list(row.facts or [])
+            )
+
+    breakdown = timings.as_dict()
+    if breakdown["total"] >= SLOW_TURN_MS:
+        logger.info("Slow chat turn context for user %s: %s", user.id, breakdown)
+    else:
+        logger.debug("Chat turn context for user %s: %s", user.id, breakdown)
+    return turn
+
+
+async def _resolve_session(
+    db: Any,
+    user: Any,
+    session: ChatSession,
+    context: dict[str, Any] | None,
+    timings: TurnTimings,
+) -> tuple[ChatSession, Any | None, str | None]:
+    """Apply an optional ``sessionId`` pin and check room membership.
+
+    Returns ``(session, circle_group, access_error)``.
+    """
+    pinned = None
+    requested_session_id = context.get("sessionId") if context else None
+    if requested_session_id and requested_session_id != session.id:
+        try:
+            pinned = await timings.timed(
+                "pinned_session",
+                intelligence_repo.find_chat_session(requested_session_id, session=db),
+            )
+        except Exception:
+            # If anything goes wrong, fall back to the current session
+            pinned = None
+
+    candidate = pinned or session
+    circle_group = await timings.timed(
+        "circle_group", _get_circle_group_for_session(None, candidate.id)
+    )
+
+    if pinned is not None:
+        if circle_group:
+            if not _is_circle_member(circle_group, user.id):
+                return session, None, "You are not allowed to access this space room."
+        elif pinned.user_id != user.id:
+            return session, None, "You are not allowed to access this chat session."
+    elif circle_group and not _is_circle_member(circle_group, user.id):
+        return session, None, "You are not a member of this space room."
+
+    return candidate, circle_group, None
+
+
+def _turn_snapshot_stmt(
+    *,
+    user_id: str,
+    session_id: str,
+    review_item_id: str | None,
+    history_user_id: str | None,
+    history_take: int,
+    include_memory: bool,
+) -> Any:
+    """Single SELECT of scalar subqueries covering every per-turn DB read."""
+    conditions = [ChatMessage.session_id == session_id]
+    if review_item_id:
+        conditions.append(ChatMessage.review_item_id == review_item_id)
+    else:
+        conditions.append(ChatMessage.review_item_id.is_(None))
+    if history_user_id:
+        conditions.append(ChatMessage.user_id == history_user_id)
+    history = (
+        select(
+            ChatMessage.role.label("role"),
+            ChatMessage.content.label("content"),
+            ChatMessage.image_url.label("image_url"),
+            ChatMessage.image_urls.label("image_urls"),
+            ChatMessage.created_at.label("created_at"),
+        )
+        .where(*conditions)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(history_take)
+        .subquery("turn_history")
+    )
+
+    preference = select(ModelPreference).where(
+        ModelPreference.user_id == user_id,
+        ModelPreference.capability == "chat",
+    )
+    columns = [
+        select(User.is_onboarded).where(User.id == user_id).scalar_subquery().label("is_onboarded"),
+        preference.with_only_columns(ModelPreference.provider)
+        .scalar_subquery()
+        .label("pref_provider"),
+        preference.with_only_columns(ModelPreference.model_id)
+        .scalar_subquery()
+        .label("pref_model"),
+        select(
+            func.coalesce(
+                # Oldest first, matching the order the LLM expects.
+                func.json_agg(aggregate_order_by(history.table_valued(), history.c.created_at)),
+                func.json_build_array(),
+                type_=JSON,
+            )
+        )
+        .scalar_subquery()
+        .label("history"),
+    ]
+    if include_memory:
+        columns.extend(intelligence_repo.memory_snapshot_columns(user_id))
+    else:
+        columns.extend(
+            func.json_build_array(type_=JSON).label(name)
+            for name in ("summaries", "insights", "facts")
+        )
+    return select(*columns)
+
+
+async def _load_onboarding_state(user_id: str, skip: bool) -> dict[str, Any] | None:
+    """Onboarding state for the retroactive-onboarding check.
+
+    Only personal, non-review chats run that check; ``skip`` covers the rest.
+    """
+    if skip:
+        return None
+    try:
+        from src.domains.identity.onboarding import get_onboarding_state
+
+        return await get_onboarding_state(None, user_id)
+    except Exception as e:
+        logger.warning("Retroactive onboarding check failed: %s", e)
+        return None
+
+
+async def _resolve_tier(user: Any, circle_group: Any | None) -> tuple[str, str | None]:
+    """Resolve ``(usage_scope, effective_tier)`` for the turn.
+
+    For circle sessions the tier comes from the member's Seat_Tier in that
+    circle, not the user's Personal_Tier.
+    """
+    feature_flags = get_feature_flag_service()
+    if circle_group is not None:
+        scope = circle_scope(circle_group.space_id)
+        kwargs: dict[str, Any] = {}
+    else:
+        scope = PERSONAL_SCOPE
+        kwargs = {"personal_tier": str(user.tier) if getattr(user, "tier", None) else None}
+    try:
+        tier = await feature_flags.effective_tier_for_request(
+            user_id=user.id, scope=scope, **kwargs
+        )
+    except Exception as e:
+        logger.warning("Effective tier resolution failed for user %s: %s", user.id, e)
+        tier = None
+    return scope, tier
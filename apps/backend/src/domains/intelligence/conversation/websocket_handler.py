@@ -10,6 +10,7 @@ Migrated from routes/chat_ws.py into domains/intelligence/conversation/.
 import asyncio
 import json
 import logging
+from collections.abc import Awaitable, Callable
 from datetime import UTC, datetime
 
 from typing import Any
@@ -21,10 +22,12 @@ from sqlalchemy import select, update as sa_update, func
 from src.config import settings
 from src.core.cache import cache
 from src.core.celery_app import celery_app
-from src.domains.identity.db_models import ModelPreference
+from src.core.websocket import manager
+from src.core.websocket_stream import StreamCoalescer
 from src.domains.identity.repository import IdentityRepository
 from src.domains.intelligence.db_models import ChatSession, ChatMessage
 from src.domains.intelligence.repository import intelligence_repo
+from src.shared.auth import resolve_principal
 from src.shared.database import get_session_factory
 from src.domains.intelligence.conversation.chat_greeting import (
     _build_greeting_components,
@@ -42,6 +45,7 @@ from src.domains.intelligence.conversation.chat_helpers import (
     _strip_maigie_mention,
 )
 from src.domains.intelligence.conversation import note_service
+from src.domains.intelligence.conversation.turn_context import format_history, load_turn_context
 from src.domains.intelligence.conversation.component_response import (
     format_action_component_response,
     format_list_component_response,
@@ -53,20 +57,13 @@ from src.domains.billing.services.credit_service import (
     consume_credits,
     get_credit_usage,
 )
-from src.domains.intelligence.reasoning.llm.adapter_registry import (
-    get_feature_flag_service,
-    get_llm_router,
-)
+from src.domains.intelligence.reasoning.llm.adapter_registry import get_llm_router
 from src.domains.intelligence.reasoning.llm.errors import LLMProviderError
-from src.domains.intelligence.reasoning.llm.feature_flags import (
-    PERSONAL_SCOPE,
-    circle_scope,
-)
+from src.domains.intelligence.reasoning.llm.feature_flags import PERSONAL_SCOPE
 from src.domains.intelligence.reasoning.llm.registry import LlmTask, default_model_for
 from src.domains.intelligence.reasoning.llm.llm_service import llm_service
 from src.domains.intelligence.reasoning.rag_service import rag_service
-from src.shared.infrastructure.socket_manager import manager
-from src.utils.exceptions import SubscriptionLimitError
+from src.shared.exceptions import SubscriptionLimitError
 
 logger = logging.getLogger(__name__)
 
@@ -147,42 +144,26 @@ _ERROR_CATEGORY_MESSAGES: dict[str, str] = {
 }
 
 
-async def _get_user_model_preference(
-    user_id: str, capability: str = "chat"
-) -> tuple[str, str] | None:
-    """Fetch the user's model preference for a given capability from the DB.
-
-    Returns a (provider, model_id) tuple if a preference is set, else None.
-    """
-    try:
-        factory = get_session_factory()
-        async with factory() as session:
-            stmt = select(ModelPreference).where(
-                ModelPreference.user_id == user_id,
-                ModelPreference.capability == capability,
-            )
-            result = await session.execute(stmt)
-            pref = result.scalar_one_or_none()
-        if pref and pref.provider and pref.model_id:
-            return (pref.provider, pref.model_id)
-    except Exception as e:
-        logger.debug("Failed to fetch model preference for user %s: %s", user_id, e)
-    return None
+def _stream_coalescer(emit: Callable[[str, bool], Awaitable[None]]) -> StreamCoalescer:
+    """Merge streamed chunks into one frame per flush window instead of one per chunk."""
+    return StreamCoalescer(
+        emit,
+        flush_interval=settings.WEBSOCKET_STREAM_FLUSH_MS / 1000,
+        flush_bytes=settings.WEBSOCKET_STREAM_FLUSH_BYTES,
+    )
 
 
 def register_chat_websocket_routes(router: APIRouter, db: Any):
     """Register ``/ws``; returns ``get_current_user_ws`` for the voice upload route."""
 
     async def get_current_user_ws(token: str = Query(...)):
-        identity_repo = IdentityRepository()
-
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             email: str = payload.get("sub")
             if not email:
                 raise HTTPException(status_code=403, detail="Invalid token")
 
-            user = await identity_repo.find_by_email(email)
+            user = await resolve_principal(payload, token)
             if not user:
                 raise HTTPException(status_code=403, detail="User not found")
 
@@ -318,58 +299,19 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                     # If not JSON, treat as plain text
                     pass
 
-                # 3.1 If client pins a sessionId, switch to it (per-message)
-                if context and context.get("sessionId"):
-                    requested_session_id = context.get("sessionId")
-                    try:
-                        pinned = await intelligence_repo.find_chat_session(requested_session_id)
-                        if pinned:
-                            pinned_circle_group = await _get_circle_group_for_session(
-                                None, pinned.id
-                            )
-                            if pinned_circle_group:
-                                if _is_circle_member(pinned_circle_group, user.id):
-                                    session = pinned
-                                else:
-                                    await manager.send_connection_json(
-                                        {
-                                            "type": "error",
-                                            "payload": {
-                                                "message": "You are not allowed to access this space room."
-                                            },
-                                        },
-                                        connection_id,
-                                    )
-                                    continue
-                            elif pinned.user_id == user.id:
-                                session = pinned
-                            else:
-                                await manager.send_connection_json(
-                                    {
-                                        "type": "error",
-                                        "payload": {
-                                            "message": "You are not allowed to access this chat session."
-                                        },
-                                    },
-                                    connection_id,
-                                )
-                                continue
-                    except Exception:
-                        # If anything goes wrong, fall back to the current session
-                        pass
-
-                circle_group = await _get_circle_group_for_session(None, session.id)
-                is_circle_session = bool(circle_group)
+                # 3.1 Resolve per-turn context (pinned session, room membership, onboarding,
+                # history, memory, tier, model preference) in one batched DB round trip.
+                turn = await load_turn_context(user, session, context)
+                if turn.access_error:
+                    await manager.send_connection_json(
+                        {"type": "error", "payload": {"message": turn.access_error}},
+                        connection_id,
+                    )
+                    continue
+                session = turn.session
+                circle_group = turn.circle_group
+                is_circle_session = turn.is_circle_session
                 if is_circle_session:
-                    if not _is_circle_member(circle_group, user.id):
-                        await manager.send_connection_json(
-                            {
-                                "type": "error",
-                                "payload": {"message": "You are not a member of this space room."},
-                            },
-                            connection_id,
-                        )
-                        continue
                     manager.join_room(connection_id, session.id)
 
                 should_reply_as_ai = True
@@ -379,31 +321,18 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                     llm_user_text = _strip_maigie_mention(user_text)
 
                 # 3.2.0 Check Retroactive Onboarding Need
-                is_onboarded = getattr(user, "isOnboarded", False) or getattr(
-                    user, "is_onboarded", False
-                )
-                if not is_onboarded:
-                    try:
-                        identity_repo = IdentityRepository()
-                        fresh = await identity_repo.find_by_id(user.id)
-                        if fresh:
-                            is_onboarded = getattr(fresh, "is_onboarded", False)
-                    except Exception:
-                        pass
-
+                is_onboarded = turn.is_onboarded
                 needs_retro_onboarding = False
                 if (
                     not is_circle_session
                     and is_onboarded
                     and not (context and context.get("reviewItemId"))
+                    and turn.onboarding_state is not None
                 ):
                     try:
-                        from src.domains.identity.onboarding import (
-                            get_onboarding_state,
-                            save_onboarding_state,
-                        )
+                        from src.domains.identity.onboarding import save_onboarding_state
 
-                        state = await get_onboarding_state(None, user.id)
+                        state = turn.onboarding_state
                         profile = state.get("profile") or {}
                         if not profile.get("commitmentRaw"):
                             needs_retro_onboarding = True
@@ -426,31 +355,27 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                             # Stream callback
                             streamed_greeting_chunks: list[str] = []
 
-                            async def stream_greeting(chunk: str, is_final: bool):
-                                streamed_greeting_chunks.append(chunk)
+                            async def send_greeting_frame(text: str, is_final: bool):
                                 await manager.send_json(
                                     {
                                         "type": "stream",
-                                        "payload": {"chunk": chunk, "is_final": is_final},
+                                        "payload": {"chunk": text, "is_final": is_final},
                                     },
                                     user.id,
                                 )
 
+                            greeting_buffer = _stream_coalescer(send_greeting_frame)
+
+                            async def stream_greeting(chunk: str, is_final: bool):
+                                streamed_greeting_chunks.append(chunk)
+                                await greeting_buffer.push(chunk, is_final)
+
                             # Route greeting through the multi-provider LLM router.
                             # Resolve effective tier per the request's Usage_Scope:
                             # greetings only fire on Personal sessions, so the
                             # scope is always personal here.
-                            feature_flags = get_feature_flag_service()
-                            greeting_tier = await feature_flags.effective_tier_for_request(
-                                user_id=user.id,
-                                scope=PERSONAL_SCOPE,
-                                personal_tier=(
-                                    str(user.tier) if getattr(user, "tier", None) else None
-                                ),
-                            )
-                            greeting_preference = await _get_user_model_preference(
-                                user.id, capability="chat"
-                            )
+                            greeting_tier = turn.user_tier
+                            greeting_preference = turn.model_preference
                             greeting_router = get_llm_router()
                             (
                                 response_text,
@@ -470,6 +395,7 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                                 usage_scope=PERSONAL_SCOPE,
                                 space_id=None,
                             )
+                            await greeting_buffer.flush()
 
                             clean_greeting = response_text.strip()
                             if clean_greeting:
@@ -502,7 +428,7 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                                 await intelligence_repo.create_message(data=greeting_data)
 
                                 # Send final plain-text message (deduped by frontend)
-                                await manager.send_personal_message(clean_greeting, user.id)
+                                await manager.send_text(clean_greeting, user.id)
 
                                 # Send optional components (e.g. pick-up course, schedule, goals)
                                 for comp in greeting_components:
@@ -518,7 +444,7 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                             fallback = (
                                 f"Hey {first_name}! 👋 What would you like to " "work on today?"
                             )
-                            await manager.send_personal_message(fallback, user.id)
+                            await manager.send_text(fallback, user.id)
                             await intelligence_repo.create_message(
                                 data={
                                     "sessionId": session.id,
@@ -715,19 +641,8 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                     logger.warning("Failed to update session title: %s", e)
 
                 # 4.2 Onboarding router: for new users, run a guided flow instead of LLM chat.
-                # Re-read `isOnboarded` from DB each iteration because the WS `user` object
-                # was fetched at connection time and becomes stale after onboarding completes.
-                is_onboarded = getattr(user, "isOnboarded", False) or getattr(
-                    user, "is_onboarded", False
-                )
-                if not is_onboarded:
-                    try:
-                        identity_repo = IdentityRepository()
-                        fresh_user = await identity_repo.find_by_id(user.id)
-                        if fresh_user:
-                            is_onboarded = getattr(fresh_user, "is_onboarded", False)
-                    except Exception:
-                        pass
+                # `turn.is_onboarded` is re-read from the DB every message (the WS `user`
+                # object was fetched at connection time and goes stale after onboarding).
 
                 # Skip onboarding in review threads (spaced repetition), and only run for general chat.
                 if (
@@ -824,7 +739,7 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
 
                         # Send credit limit error first if present (triggers upgrade modal)
                         if onboarding_result.credit_limit_error:
-                            await manager.send_personal_message(
+                            await manager.send_text(
                                 json.dumps(onboarding_result.credit_limit_error), user.id
                             )
 
@@ -847,20 +762,22 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                         # Stream reply to the client so the user sees progress (word-by-word)
                         reply_text = onboarding_result.reply_text or ""
                         words = reply_text.split()
-                        for i, word in enumerate(words):
-                            chunk = word + (" " if i < len(words) - 1 else "")
+
+                        async def send_onboarding_frame(text: str, is_final: bool):
                             await manager.send_json(
                                 {
                                     "type": "stream",
-                                    "payload": {
-                                        "chunk": chunk,
-                                        "is_final": i == len(words) - 1,
-                                    },
+                                    "payload": {"chunk": text, "is_final": is_final},
                                 },
                                 user.id,
                             )
+
+                        onboarding_buffer = _stream_coalescer(send_onboarding_frame)
+                        for i, word in enumerate(words):
+                            chunk = word + (" " if i < len(words) - 1 else "")
+                            await onboarding_buffer.push(chunk, i == len(words) - 1)
                         if not words:
-                            await manager.send_personal_message(reply_text, user.id)
+                            await manager.send_text(reply_text, user.id)
 
                         # Send created courses as component for immediate UI rendering
                         for comp in onboarding_components:
@@ -874,47 +791,9 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                 if is_circle_session and not should_reply_as_ai:
                     continue
 
-                # 5. Build History for Context (latest messages to reduce token usage)
-                # IMPORTANT: Use the *most recent* messages; ordering asc with take would grab the oldest.
-                history_take = 12
-                history_where_session_id = session.id
-                history_review_item_id = None
-                # Keep review conversations isolated from general chat (and from other reviews)
-                if context and context.get("reviewItemId"):
-                    history_review_item_id = context["reviewItemId"]
-                history_user_id_filter = None if is_circle_session else user.id
-
-                factory = get_session_factory()
-                async with factory() as sa_session:
-                    conditions = [ChatMessage.session_id == history_where_session_id]
-                    if history_review_item_id:
-                        conditions.append(ChatMessage.review_item_id == history_review_item_id)
-                    else:
-                        conditions.append(ChatMessage.review_item_id.is_(None))
-                    if history_user_id_filter:
-                        conditions.append(ChatMessage.user_id == history_user_id_filter)
-                    stmt = (
-                        select(ChatMessage)
-                        .where(*conditions)
-                        .order_by(ChatMessage.created_at.desc())
-                        .limit(history_take)
-                    )
-                    result = await sa_session.execute(stmt)
-                    history_records = list(reversed(result.scalars().all()))
-
-                # Format history for Gemini (including images)
-                formatted_history = []
-                for msg in history_records:
-                    # Map DB roles to Gemini roles ('user' or 'model')
-                    role = "user" if msg.role == "USER" else "model"
-                    parts = [msg.content]
-                    # Include images if present (image_urls preferred, fallback to image_url)
-                    msg_images = getattr(msg, "image_urls", None) or []
-                    if not msg_images and getattr(msg, "image_url", None):
-                        msg_images = [msg.image_url]
-                    for img_url in msg_images:
-                        parts.append(img_url)
-                    formatted_history.append({"role": role, "parts": parts})
+                # 5. Build History for Context (latest messages to reduce token usage).
+                # The window was loaded with the turn context; append the message just saved.
+                formatted_history = format_history(turn.history_with(user_message))
 
                 # 5.5. Enrich context with topic/course/note details if IDs are provided
                 enriched_context = None
@@ -1418,17 +1297,10 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                 # 5b. Inject long-term memory context (conversation summaries + learning insights)
                 if is_circle_session:
                     print("⏭️ Skipping personal memory injection for circle chat.")
-                else:
-                    try:
-                        from src.domains.intelligence.memory.memory_impl import get_memory_context
-
-                        memory_ctx = await get_memory_context(user.id, query=llm_user_text)
-                        if memory_ctx:
-                            if not enriched_context:
-                                enriched_context = {}
-                            enriched_context["memory_context"] = memory_ctx
-                    except Exception as e:
-                        print(f"⚠️ Memory context retrieval failed: {e}")
+                elif turn.memory_context:
+                    if not enriched_context:
+                        enriched_context = {}
+                    enriched_context["memory_context"] = turn.memory_context
 
                 # 6. Get AI response with tool calling support
                 ai_request_id = user_message.id if should_reply_as_ai else None
@@ -1460,13 +1332,12 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                 # Define stream callback for streaming text responses
                 streamed_chunks = []
 
-                async def stream_text(chunk: str, is_final: bool):
-                    """Stream text chunks to frontend via WebSocket"""
-                    streamed_chunks.append(chunk)
+                async def send_stream_frame(text: str, is_final: bool):
+                    """Send one coalesced stream frame to the frontend via WebSocket"""
                     payload = {
                         "type": "stream",
                         "payload": {
-                            "chunk": chunk,
+                            "chunk": text,
                             "is_final": is_final,
                             "sessionId": session.id,
                             "requestId": ai_request_id,
@@ -1478,27 +1349,23 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                     else:
                         await manager.send_json(payload, user.id)
 
+                # Fast models emit many tiny chunks; merge them into one frame per
+                # flush window instead of one frame (and room fan-out) per chunk.
+                stream_buffer = _stream_coalescer(send_stream_frame)
+
+                async def stream_text(chunk: str, is_final: bool):
+                    """Stream text chunks to frontend via WebSocket"""
+                    streamed_chunks.append(chunk)
+                    await stream_buffer.push(chunk, is_final)
+
                 try:
-                    # Determine usage scope (personal vs circle) and resolve
-                    # the effective tier (free | plus) via the feature flag
-                    # service. For Circle sessions, tier comes from the
-                    # member's Seat_Tier in that Circle, not the user's
-                    # Personal_Tier (Requirements 7.2, 7.3, 7.4).
-                    feature_flags = get_feature_flag_service()
-                    if is_circle_session and circle_group is not None:
-                        request_scope = circle_scope(circle_group.space_id)
-                        user_tier = await feature_flags.effective_tier_for_request(
-                            user_id=user.id,
-                            scope=request_scope,
-                        )
-                    else:
-                        request_scope = PERSONAL_SCOPE
-                        user_tier = await feature_flags.effective_tier_for_request(
-                            user_id=user.id,
-                            scope=PERSONAL_SCOPE,
-                            personal_tier=(str(user.tier) if getattr(user, "tier", None) else None),
-                        )
-                    model_preference = await _get_user_model_preference(user.id, capability="chat")
+                    # Usage scope (personal vs circle) and effective tier were resolved
+                    # with the turn context. For Circle sessions, tier comes from the
+                    # member's Seat_Tier in that Circle, not the user's Personal_Tier
+                    # (Requirements 7.2, 7.3, 7.4).
+                    request_scope = turn.request_scope
+                    user_tier = turn.user_tier
+                    model_preference = turn.model_preference
 
                     # Route through the multi-provider LLM router
                     llm_router = get_llm_router()
@@ -1556,6 +1423,9 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                     executed_actions = []
                     query_results = []
 
+                # Emit any chunks still buffered before the final response frames
+                await stream_buffer.flush()
+
                 # 7. Process query tool results (if any)
                 # NOTE: Only show query results as components when the user EXPLICITLY asked
                 # to view their data. This prevents showing course cards when the LLM was
@@ -1770,7 +1640,7 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                 identity_repo = IdentityRepository()
                 user_obj = await identity_repo.find_by_id(user.id)
                 if not user_obj:
-                    await websocket.close()
+                    await manager.disconnect(connection_id, reason="user_not_found")
                     return
 
                 circle_credit_id = (
@@ -2084,14 +1954,14 @@ def register_chat_websocket_routes(router: APIRouter, db: Any):
                 continue  # Skip to next message
 
         except WebSocketDisconnect:
-            manager.disconnect(connection_id)
+            await manager.disconnect(connection_id)
         except Exception as e:
             print(f"WS Error: {e}")
             try:
                 await websocket.close()
             except Exception:
                 pass
-            manager.disconnect(connection_id)
+            await manager.disconnect(connection_id)
             raise
 
     return get_current_user_ws
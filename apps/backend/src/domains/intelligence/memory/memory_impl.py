@@ -14,9 +14,11 @@ import asyncio
 import json
 import logging
 import re
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from ..reasoning.llm.registry import LlmTask
 from ..repository import intelligence_repo
 
 logger = logging.getLogger(__name__)
@@ -27,44 +29,78 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 
-async def _call_gemini(prompt: str, max_tokens: int = 600) -> dict[str, Any] | None:
-    """Call Gemini for JSON output. Returns parsed dict or None on failure."""
+def _parse_json(text: str) -> Any:
+    """Extract JSON from response (handle markdown code blocks)."""
+    match = re.search(r"\{[\s\S]*\}", text)
+    if not match:
+        # Try array
+        match = re.search(r"\[[\s\S]*\]", text)
+        if match:
+            return json.loads(match.group(0))
+        return None
+    return json.loads(match.group(0))
+
+
+async def _call_gemini(
+    prompt: str, max_tokens: int = 600, task: LlmTask = LlmTask.MEMORY_JSON
+) -> dict[str, Any] | None:
+    """Call Gemini for JSON output. Returns parsed dict or None on failure.
+
+    ``task`` picks the model; tasks with a response cache policy reuse earlier
+    answers to the same prompt.
+    """
     try:
-        from google import genai
         from google.genai import types
 
+        from src.domains.intelligence.reasoning.llm.clients import (
+            Priority,
+            estimate_tokens,
+            llm_clients,
+            usage_tokens,
+        )
         from src.domains.intelligence.reasoning.llm.registry import (
-            LlmTask,
             default_model_for,
             gemini_api_key,
         )
+        from src.domains.intelligence.reasoning.llm.response_cache import llm_response_cache
 
-        api_key = gemini_api_key()
-        if not api_key:
+        if not gemini_api_key():
             return None
 
-        client = genai.Client(api_key=api_key)
-        response = await client.aio.models.generate_content(
-            model=default_model_for(LlmTask.MEMORY_JSON),
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=max_tokens,
-                temperature=0.3,
-            ),
-        )
+        model = default_model_for(task)
+        cached = await llm_response_cache.get(task, model, prompt, 0.3)
+        if cached is not None:
+            return _parse_json(cached.text)
+        started = time.perf_counter()
+
+        # Summaries and insights run behind interactive chat on the shared client
+        tokens = estimate_tokens(prompt, max_tokens)
+        async with llm_clients.slot("gemini", priority=Priority.BACKGROUND, tokens=tokens) as slot:
+            response = await slot.client.aio.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    max_output_tokens=max_tokens,
+                    temperature=0.3,
+                ),
+            )
+            slot.report_usage(usage_tokens(response))
         text = (response.text or "").strip()
         if not text:
             return None
 
-        # Extract JSON from response (handle markdown code blocks)
-        match = re.search(r"\{[\s\S]*\}", text)
-        if not match:
-            # Try array
-            match = re.search(r"\[[\s\S]*\]", text)
-            if match:
-                return json.loads(match.group(0))
-            return None
-        return json.loads(match.group(0))
+        result = _parse_json(text)
+        if result is not None:
+            await llm_response_cache.put(
+                task,
+                model,
+                prompt,
+                0.3,
+                text,
+                latency=time.perf_counter() - started,
+                tokens=usage_tokens(response),
+            )
+        return result
     except Exception as e:
         logger.warning("Gemini call for memory service failed: %s", e)
         return None
@@ -124,7 +160,7 @@ Return a JSON object with:
 
 Output only valid JSON, no markdown."""
 
-        result = await _call_gemini(prompt, max_tokens=400)
+        result = await _call_gemini(prompt, max_tokens=400, task=LlmTask.CONVERSATION_SUMMARY)
         if not result:
             # Fallback: create a basic summary
             summary_text = f"Conversation with {len(user_msgs)} messages."
@@ -165,42 +201,59 @@ async def get_memory_context(user_id: str, query: str | None = None) -> str:
     - Recent conversation summaries
     - Active learning insights
     - Saved user facts
-    """
-    context_parts = []
 
+    All three lists are fetched in a single query (see
+    ``IntelligenceRepository.load_memory_snapshot``).
+    """
     try:
-        # 1. Recent conversation summaries (last 5)
-        summaries = await intelligence_repo.list_summaries(user_id, take=5)
-        if summaries:
-            summary_lines = []
-            for s in summaries:
-                date_str = s.created_at.strftime("%b %d") if s.created_at else ""
-                topics = ", ".join(s.key_topics) if s.key_topics else ""
-                line = f"- [{date_str}] {s.summary}"
-                if topics:
-                    line += f" (Topics: {topics})"
-                summary_lines.append(line)
-            context_parts.append("Recent Conversation History:\n" + "\n".join(summary_lines))
-
-        # 2. Active learning insights
-        insights = await intelligence_repo.list_insights(user_id, active_only=True, take=10)
-        if insights:
-            insight_lines = []
-            for ins in insights:
-                conf_str = (
-                    f" ({int(ins.confidence * 100)}% confident)" if ins.confidence < 0.9 else ""
-                )
-                insight_lines.append(f"- [{ins.insight_type}] {ins.content}{conf_str}")
-            context_parts.append("Learning Insights About This User:\n" + "\n".join(insight_lines))
-
-        # 3. Saved user facts
-        facts = await intelligence_repo.list_user_facts(user_id, active_only=True, take=15)
-        if facts:
-            fact_lines = [f"- [{f.category}] {f.content}" for f in facts]
-            context_parts.append("Remembered Facts About This User:\n" + "\n".join(fact_lines))
-
+        snapshot = await intelligence_repo.load_memory_snapshot(user_id)
     except Exception as e:
         logger.warning("Failed to retrieve memory context: %s", e)
+        return ""
+
+    return format_memory_context(snapshot["summaries"], snapshot["insights"], snapshot["facts"])
+
+
+def format_memory_context(
+    summaries: list[dict[str, Any]],
+    insights: list[dict[str, Any]],
+    facts: list[dict[str, Any]],
+) -> str:
+    """Render memory snapshot rows into the prompt block used by chat.
+
+    Rows are the JSON dicts produced by ``IntelligenceRepository.memory_snapshot_columns``.
+    """
+    context_parts = []
+
+    # 1. Recent conversation summaries
+    if summaries:
+        summary_lines = []
+        for s in summaries:
+            created_at = _parse_timestamp(s.get("created_at"))
+            date_str = created_at.strftime("%b %d") if created_at else ""
+            key_topics = s.get("key_topics") or []
+            topics = ", ".join(key_topics) if key_topics else ""
+            line = f"- [{date_str}] {s.get('summary')}"
+            if topics:
+                line += f" (Topics: {topics})"
+            summary_lines.append(line)
+        context_parts.append("Recent Conversation History:\n" + "\n".join(summary_lines))
+
+    # 2. Active learning insights
+    if insights:
+        insight_lines = []
+        for ins in insights:
+            confidence = ins.get("confidence")
+            if confidence is None:
+                confidence = 0.7
+            conf_str = f" ({int(confidence * 100)}% confident)" if confidence < 0.9 else ""
+            insight_lines.append(f"- [{ins.get('insight_type')}] {ins.get('content')}{conf_str}")
+        context_parts.append("Learning Insights About This User:\n" + "\n".join(insight_lines))
+
+    # 3. Saved user facts
+    if facts:
+        fact_lines = [f"- [{f.get('category')}] {f.get('content')}" for f in facts]
+        context_parts.append("Remembered Facts About This User:\n" + "\n".join(fact_lines))
 
     if not context_parts:
         return ""
@@ -208,6 +261,18 @@ async def get_memory_context(user_id: str, query: str | None = None) -> str:
     return "\n\n".join(context_parts)
 
 
+def _parse_timestamp(value: Any) -> datetime | None:
+    """Parse a JSON timestamp (ISO string) or pass a datetime through."""
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
 async def get_user_learning_profile(user_id: str) -> str:
     """
     Build a compressed learning profile for the system prompt.
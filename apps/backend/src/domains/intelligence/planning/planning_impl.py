@@ -15,6 +15,7 @@ import json
 import logging
 import random
 import re
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -30,45 +31,79 @@ class PlanRateLimited(Exception):
     pass
 
 
+_PLAN_TEMPERATURE = 0.5
+
+
+def _parse_plan(text: str) -> dict | None:
+    match = re.search(r"\{[\s\S]*\}", text)
+    if not match:
+        return None
+    return json.loads(match.group(0))
+
+
 async def _call_gemini_for_plan(prompt: str, max_tokens: int = 1200) -> dict | None:
     """Call Gemini for plan generation. Returns parsed JSON or None."""
-    from google import genai
     from google.genai import types
 
+    from src.domains.intelligence.reasoning.llm.clients import (
+        estimate_tokens,
+        llm_clients,
+        usage_tokens,
+    )
     from src.domains.intelligence.reasoning.llm.registry import (
         LlmTask,
         default_model_for,
         gemini_api_key,
     )
+    from src.domains.intelligence.reasoning.llm.response_cache import llm_response_cache
 
-    api_key = gemini_api_key()
-    if not api_key:
+    if not gemini_api_key():
         return None
 
-    client = genai.Client(api_key=api_key)
+    task = LlmTask.PLAN_GENERATION
+    model = default_model_for(task)
+    cached = await llm_response_cache.get(task, model, prompt, _PLAN_TEMPERATURE)
+    if cached is not None:
+        return _parse_plan(cached.text)
+    started = time.perf_counter()
+
     # RESOURCE_EXHAUSTED: short exponential backoff; many long retries still fail and tie up HTTP (~60s+).
     max_attempts = 4
 
     for attempt in range(max_attempts):
         try:
-            response = await client.aio.models.generate_content(
-                model=default_model_for(LlmTask.STRUCTURED_COMPLETION),
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    max_output_tokens=max_tokens,
-                    temperature=0.5,
-                    # No tools here; AFC can add noise and extra remote behavior.
-                    automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True),
-                ),
-            )
+            async with llm_clients.slot(
+                "gemini", tokens=estimate_tokens(prompt, max_tokens)
+            ) as slot:
+                response = await slot.client.aio.models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        max_output_tokens=max_tokens,
+                        temperature=_PLAN_TEMPERATURE,
+                        # No tools here; AFC can add noise and extra remote behavior.
+                        automatic_function_calling=types.AutomaticFunctionCallingConfig(
+                            disable=True
+                        ),
+                    ),
+                )
+                slot.report_usage(usage_tokens(response))
             text = (response.text or "").strip()
             if not text:
                 return None
 
-            match = re.search(r"\{[\s\S]*\}", text)
-            if not match:
-                return None
-            return json.loads(match.group(0))
+            plan = _parse_plan(text)
+            if plan is not None:
+                await llm_response_cache.put(
+                    task,
+                    model,
+                    prompt,
+                    _PLAN_TEMPERATURE,
+                    text,
+                    latency=time.perf_counter() - started,
+                    tokens=usage_tokens(response),
+                )
+            return plan
         except Exception as e:
             msg = str(e)
             is_429 = "429" in msg and (
@@ -15,7 +15,7 @@ from src.domains.knowledge.repository import knowledge_repo
 from src.domains.progress.repository import progress_repo
 from src.shared.database import get_session_factory
 from src.config import get_settings
-from src.domains.intelligence.reasoning.llm import new_gemini_client
+from src.domains.intelligence.reasoning.llm import Priority, llm_clients, usage_tokens
 from src.domains.intelligence.action.skills.handlers import handle_create_schedule
 
 logger = logging.getLogger(__name__)
@@ -203,15 +203,16 @@ Return ONLY the JSON array, no other text."""
 
         # Try Gemini first
         try:
-            client = new_gemini_client(settings.GEMINI_API_KEY)
             model_name = "gemini-3.5-flash"
             if settings.GEMINI_SCHEDULE_AI_MODELS:
                 model_name = settings.GEMINI_SCHEDULE_AI_MODELS.split(",")[0].strip()
 
-            response = await client.aio.models.generate_content(
-                model=model_name,
-                contents=prompt,
-            )
+            async with llm_clients.slot("gemini", priority=Priority.BACKGROUND) as slot:
+                response = await slot.client.aio.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                )
+                slot.report_usage(usage_tokens(response))
             response_text = response.text or ""
         except Exception as gemini_err:
             logger.warning(f"Gemini failed for schedule regen, trying OpenAI: {gemini_err}")
@@ -219,14 +220,13 @@ Return ONLY the JSON array, no other text."""
             # Fall back to OpenAI
             if settings.OPENAI_API_KEY:
                 try:
-                    import openai
-
-                    openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-                    completion = await openai_client.chat.completions.create(
-                        model=settings.OPENAI_DEFAULT_MODEL,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7,
-                    )
+                    async with llm_clients.slot("openai", priority=Priority.BACKGROUND) as slot:
+                        completion = await slot.client.chat.completions.create(
+                            model=settings.OPENAI_DEFAULT_MODEL,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=0.7,
+                        )
+                        slot.report_usage(usage_tokens(completion))
                     response_text = completion.choices[0].message.content or ""
                 except Exception as openai_err:
                     logger.error(f"OpenAI also failed for schedule regen: {openai_err}")
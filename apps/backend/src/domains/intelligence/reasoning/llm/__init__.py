@@ -6,8 +6,12 @@ without knowing about provider specifics.
 """
 
 import logging
+import time
 from typing import Any
 
+from .clients import LlmClientManager, Priority, estimate_tokens, llm_clients, usage_tokens
+from .health import ProviderHealth, ProviderHealthRegistry, provider_health
+from .response_cache import CachedResponse, LlmResponseCache, llm_response_cache
 from .gemini_sdk import new_gemini_client, types as gemini_types
 from .registry import LlmTask, default_model_for, gemini_api_key
 from .errors import LLMError, LLMProviderError, LLMUnavailableError, GeminiError
@@ -17,6 +21,17 @@ logger = logging.getLogger(__name__)
 __all__ = [
     "generate_content",
     "new_gemini_client",
+    "llm_clients",
+    "LlmClientManager",
+    "Priority",
+    "estimate_tokens",
+    "usage_tokens",
+    "provider_health",
+    "ProviderHealth",
+    "ProviderHealthRegistry",
+    "llm_response_cache",
+    "LlmResponseCache",
+    "CachedResponse",
     "gemini_types",
     "LlmTask",
     "default_model_for",
@@ -28,11 +43,25 @@ __all__ = [
 ]
 
 
-async def generate_content(prompt: str, *, max_tokens: int = 2048, temperature: float = 0.7) -> str:
+async def generate_content(
+    prompt: str,
+    *,
+    max_tokens: int = 2048,
+    temperature: float = 0.7,
+    priority: Priority = Priority.NORMAL,
+    task: LlmTask = LlmTask.CHAT_DEFAULT,
+    cache_scope: str | None = None,
+    use_cache: bool = True,
+) -> str:
     """Generate text content using the default LLM provider.
 
     This is the primary interface for domains that need simple text generation
-    (topic explanations, quizzes, summaries, etc.).
+    (topic explanations, quizzes, summaries, etc.). Calls share the pooled
+    Gemini client and queue by ``priority`` when the provider is saturated.
+
+    ``task`` picks the model; tasks with a response cache policy are answered
+    from ``llm_response_cache`` when the same prompt was seen recently
+    (``cache_scope``, usually the user id, scopes near-duplicate matches).
 
     Raises:
         GeminiError: If Gemini returned no usable text (e.g. safety filter blocked
@@ -40,15 +69,24 @@ async def generate_content(prompt: str, *, max_tokens: int = 2048, temperature:
             The error message includes the ``finish_reason`` so callers can
             decide whether to retry or fall back.
     """
-    client = new_gemini_client(gemini_api_key() or None)
-    response = await client.aio.models.generate_content(
-        model=default_model_for(LlmTask.CHAT_DEFAULT),
-        contents=prompt,
-        config=gemini_types.GenerateContentConfig(
-            max_output_tokens=max_tokens,
-            temperature=temperature,
-        ),
-    )
+    model = default_model_for(task)
+    cache_task = task if use_cache else None
+    cached = await llm_response_cache.get(cache_task, model, prompt, temperature, scope=cache_scope)
+    if cached is not None:
+        return cached.text
+
+    started = time.perf_counter()
+    tokens = estimate_tokens(prompt, max_tokens)
+    async with llm_clients.slot("gemini", priority=priority, tokens=tokens) as slot:
+        response = await slot.client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=gemini_types.GenerateContentConfig(
+                max_output_tokens=max_tokens,
+                temperature=temperature,
+            ),
+        )
+        slot.report_usage(usage_tokens(response))
 
     text = _extract_text(response)
     if not text:
@@ -62,6 +100,16 @@ async def generate_content(prompt: str, *, max_tokens: int = 2048, temperature:
         raise GeminiError(
             f"empty response (finish_reason={finish_reason})",
         )
+    await llm_response_cache.put(
+        cache_task,
+        model,
+        prompt,
+        temperature,
+        text,
+        latency=time.perf_counter() - started,
+        tokens=usage_tokens(response),
+        scope=cache_scope,
+    )
     return text
 
 
@@ -0,0 +1,365 @@
+"""
+Long-lived LLM provider clients with request-level concurrency control.
+
+Building a ``genai.Client`` / ``AsyncOpenAI`` / ``AsyncAnthropic`` per prompt
+opens a new HTTP pool (and TLS handshake) every time. :data:`llm_clients`
+keeps one client per provider and puts every call through a per-provider
+lane:
+
+- at most ``LLM_MAX_CONCURRENT_REQUESTS`` calls in flight per provider;
+- waiters are served by :class:`Priority` (interactive chat before
+  background summarisation), FIFO within a priority;
+- an optional tokens-per-minute budget (``LLM_TOKENS_PER_MINUTE``) charged
+  with an estimate up front and corrected with the reported usage.
+
+Clients and lanes are bound to the running event loop and rebuilt when it
+changes (Celery runs each task on a fresh loop); a loop's clients are closed
+just before that loop is. Tests register a fake provider with
+:meth:`LlmClientManager.register_provider`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Queue priority for an LLM call; lower values are served first."""
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+def estimate_tokens(prompt: str, max_tokens: int = 0) -> int:
+    """Rough up-front charge for the token budget (~4 characters per token)."""
+    return len(prompt) // 4 + max_tokens
+
+
+def usage_tokens(response: Any) -> int | None:
+    """Total tokens a Gemini, OpenAI or Anthropic response reports, if any."""
+    meta = getattr(response, "usage_metadata", None)
+    if meta is not None and getattr(meta, "total_token_count", None) is not None:
+        return int(meta.total_token_count)
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if getattr(usage, "total_tokens", None) is not None:
+        return int(usage.total_tokens)
+    if getattr(usage, "input_tokens", None) is not None:
+        return int(usage.input_tokens) + int(getattr(usage, "output_tokens", 0) or 0)
+    return None
+
+
+async def _close_client(client: Any) -> None:
+    """Close an SDK client: genai's ``aio.aclose()``, else ``close()`` / ``aclose()``."""
+    close = (
+        getattr(getattr(client, "aio", None), "aclose", None)
+        or getattr(client, "close", None)
+        or getattr(client, "aclose", None)
+    )
+    if close is None:
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        await result
+
+
+def _new_gemini(api_key: str) -> Any:
+    from .gemini_sdk import new_gemini_client
+
+    return new_gemini_client(api_key or None)
+
+
+def _new_openai(api_key: str) -> Any:
+    import openai
+
+    return openai.AsyncOpenAI(api_key=api_key)
+
+
+def _new_anthropic(api_key: str) -> Any:
+    import anthropic
+
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+
+def _api_key(provider: str) -> str:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return (
+        {
+            "gemini": settings.GEMINI_API_KEY,
+            "openai": settings.OPENAI_API_KEY,
+            "anthropic": settings.ANTHROPIC_API_KEY,
+        }
+        .get(provider, "")
+        .strip()
+    )
+
+
+class _Lane:
+    """Per-provider concurrency slots, priority queue and token bucket."""
+
+    _SAMPLES = 512
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int = 0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self.stats = {
+            "calls": 0,
+            "errors": 0,
+            "tokens": 0,
+            "budget_waits": 0,
+            "max_queue_depth": 0,
+        }
+        self.wait_ms: deque[float] = deque(maxlen=self._SAMPLES)
+        self.latency_ms: deque[float] = deque(maxlen=self._SAMPLES)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for *_, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority: int, tokens: int) -> None:
+        if self.in_flight < self.max_concurrency and not self.queue_depth:
+            self.in_flight += 1
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self.release()  # The slot was handed over as we were cancelled
+                raise
+        try:
+            await self._take_tokens(tokens)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)  # Hand the slot straight to the next waiter
+                return
+        self.in_flight -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60
+        self._tokens = min(self.tokens_per_minute, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    async def _take_tokens(self, tokens: int) -> None:
+        if not self.tokens_per_minute:
+            return
+        tokens = min(tokens, self.tokens_per_minute)
+        self._refill()
+        if self._tokens < tokens:
+            self.stats["budget_waits"] += 1
+        while self._tokens < tokens:
+            await asyncio.sleep((tokens - self._tokens) / (self.tokens_per_minute / 60))
+            self._refill()
+        self._tokens -= tokens
+
+    def adjust_tokens(self, delta: int) -> None:
+        """Correct the up-front estimate once the provider reports usage."""
+        if self.tokens_per_minute:
+            self._refill()
+            self._tokens = min(self.tokens_per_minute, self._tokens - delta)
+
+
+def _percentile(samples: deque[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 2)
+
+
+class LlmSlot:
+    """A granted call slot; report actual usage with :meth:`report_usage`."""
+
+    def __init__(self, lane: _Lane, client: Any, estimate: int):
+        self._lane = lane
+        self.client = client
+        self.estimate = estimate
+        self.tokens = estimate
+
+    def report_usage(self, total_tokens: int | None) -> None:
+        if total_tokens is None:
+            return
+        self._lane.adjust_tokens(total_tokens - self.tokens)
+        self.tokens = total_tokens
+
+
+class LlmClientManager:
+    """One client and one lane per provider, per event loop."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        tokens_per_minute: dict[str, int] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = dict(tokens_per_minute or {})
+        self._factories: dict[str, Callable[[str], Any]] = {
+            "gemini": _new_gemini,
+            "openai": _new_openai,
+            "anthropic": _new_anthropic,
+        }
+        self._clients: dict[str, Any] = {}
+        self._lanes: dict[str, _Lane] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def register_provider(self, name: str, factory: Callable[[str], Any]) -> None:
+        """Add (or replace) the client factory for ``name``; called with the API key."""
+        self._factories[name] = factory
+        self._clients.pop(name, None)
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        from src.shared.infrastructure.http import run_before_loop_close
+
+        # Clients and queued futures from a previous loop cannot be reused.
+        # Its clients are normally closed already, by the hook below.
+        if self._clients:
+            logger.warning(f"Event loop changed; dropping {len(self._clients)} open LLM clients")
+        self._clients = {}
+        self._lanes.clear()
+        self._loop = loop
+
+        async def close_loop_clients() -> None:
+            if self._loop is loop:
+                await self.aclose()
+
+        run_before_loop_close(loop, close_loop_clients)
+
+    async def aclose(self) -> None:
+        """Close every client's HTTP pool and unbind from the loop."""
+        clients, self._clients = self._clients, {}
+        self._lanes.clear()
+        self._loop = None
+        for provider, client in clients.items():
+            try:
+                await _close_client(client)
+            except Exception as e:
+                logger.warning(f"Failed to close {provider} LLM client: {e}")
+
+    def client(self, provider: str) -> Any:
+        """The long-lived client for ``provider`` (built on first use)."""
+        self._bind_loop()
+        client = self._clients.get(provider)
+        if client is None:
+            if provider not in self._factories:
+                raise ValueError(f"Unknown LLM provider: {provider!r}")
+            client = self._clients[provider] = self._factories[provider](_api_key(provider))
+        return client
+
+    def _lane(self, provider: str) -> _Lane:
+        self._bind_loop()
+        lane = self._lanes.get(provider)
+        if lane is None:
+            lane = self._lanes[provider] = _Lane(
+                self.max_concurrency, self.tokens_per_minute.get(provider, 0)
+            )
+        return lane
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        *,
+        priority: Priority = Priority.NORMAL,
+        tokens: int = 0,
+    ):
+        """Wait for a concurrency slot and token budget, yielding an :class:`LlmSlot`."""
+        client = self.client(provider)
+        lane = self._lane(provider)
+        queued_at = time.perf_counter()
+        await lane.acquire(int(priority), tokens)
+        started = time.perf_counter()
+        lane.wait_ms.append((started - queued_at) * 1000)
+        slot = LlmSlot(lane, client, tokens)
+        try:
+            yield slot
+        except BaseException:
+            lane.stats["errors"] += 1
+            raise
+        finally:
+            lane.latency_ms.append((time.perf_counter() - started) * 1000)
+            lane.stats["calls"] += 1
+            lane.stats["tokens"] += slot.tokens
+            lane.release()
+
+    async def run(
+        self,
+        provider: str,
+        call: Callable[[Any], Awaitable[Any]],
+        *,
+        priority: Priority = Priority.NORMAL,
+        tokens: int = 0,
+    ) -> Any:
+        """Run ``call(client)`` inside a slot; returns its result."""
+        async with self.slot(provider, priority=priority, tokens=tokens) as slot:
+            return await call(slot.client)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Per-provider queue depth, in-flight calls, wait and call latency."""
+        return {
+            provider: {
+                **lane.stats,
+                "in_flight": lane.in_flight,
+                "queue_depth": lane.queue_depth,
+                "wait_ms_p50": _percentile(lane.wait_ms, 0.5),
+                "wait_ms_p95": _percentile(lane.wait_ms, 0.95),
+                "latency_ms_p50": _percentile(lane.latency_ms, 0.5),
+                "latency_ms_p95": _percentile(lane.latency_ms, 0.95),
+            }
+            for provider, lane in self._lanes.items()
+        }
+
+
+def _parse_budgets(raw: str | None) -> dict[str, int]:
+    """Parse ``"gemini=4000000,openai=200000"``."""
+    budgets: dict[str, int] = {}
+    for item in (raw or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def _build_manager() -> LlmClientManager:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return LlmClientManager(
+        max_concurrency=settings.LLM_MAX_CONCURRENT_REQUESTS,
+        tokens_per_minute=_parse_budgets(settings.LLM_TOKENS_PER_MINUTE),
+    )
+
+
+# Module-level singleton (clients are created lazily on the running loop)
+llm_clients = _build_manager()
@@ -0,0 +1,395 @@
+"""
+Cluster-wide LLM provider health: circuit breaker, error rates, latency.
+
+Every uvicorn and Celery worker reads and writes the same per-provider state
+in Redis, so an outage opens the breaker after ``failure_threshold`` failures
+across the cluster instead of per process. Per provider:
+
+- a hash with the breaker ``state`` (CLOSED / OPEN / HALF_OPEN), the
+  consecutive ``failures`` and ``opened_at`` (Redis clock, ms);
+- a capped list of recent call samples (``ok`` flag + latency) from which
+  the rolling error rate and p50/p95 latency are computed;
+- a probe lock: when the cooldown ends, exactly one worker wins the lock and
+  makes the half-open test call; everyone else keeps skipping the provider
+  until it reports back (or the lock expires because the prober died).
+
+State changes are single Lua calls reading Redis' own clock. A worker that
+sees a provider OPEN remembers the reopen deadline locally and does not ask
+Redis again until then. Snapshots used for failover ordering are cached for
+``snapshot_ttl`` seconds.
+
+When Redis is unavailable the same state machine runs in-process, which is
+the old per-worker behaviour.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from src.shared.infrastructure.redis import cache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+# KEYS: state hash, probe lock; ARGV: recovery ms, probe ttl ms
+# Returns {allowed, state, retry_after_ms}
+_ALLOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HGET', KEYS[1], 'state') or 'CLOSED'
+if state == 'CLOSED' then return {1, state, 0} end
+local opened_at = tonumber(redis.call('HGET', KEYS[1], 'opened_at')) or 0
+local reopen_at = opened_at + tonumber(ARGV[1])
+if state == 'OPEN' and now < reopen_at then
+  return {0, state, reopen_at - now}
+end
+if redis.call('SET', KEYS[2], now, 'NX', 'PX', ARGV[2]) then
+  redis.call('HSET', KEYS[1], 'state', 'HALF_OPEN')
+  return {1, 'HALF_OPEN', 0}
+end
+return {0, 'HALF_OPEN', tonumber(redis.call('PTTL', KEYS[2]))}
+"""
+
+# KEYS: state hash, probe lock, samples; ARGV: ok, latency ms, count failure,
+# threshold, sample size, samples ttl s
+# Returns {state, failures, previous state}
+_RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('LPUSH', KEYS[3], ARGV[1] .. ':' .. ARGV[2])
+redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[5]) - 1)
+redis.call('EXPIRE', KEYS[3], ARGV[6])
+local state = redis.call('HGET', KEYS[1], 'state') or 'CLOSED'
+if ARGV[1] == '1' then
+  redis.call('HSET', KEYS[1], 'state', 'CLOSED', 'failures', 0)
+  redis.call('DEL', KEYS[2])
+  return {'CLOSED', 0, state}
+end
+if ARGV[3] ~= '1' then
+  return {state, tonumber(redis.call('HGET', KEYS[1], 'failures')) or 0, state}
+end
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+if state == 'HALF_OPEN' or failures >= tonumber(ARGV[4]) then
+  redis.call('HSET', KEYS[1], 'state', 'OPEN', 'opened_at', now)
+  redis.call('DEL', KEYS[2])
+  return {'OPEN', failures, state}
+end
+return {state, failures, state}
+"""
+
+cache.register_script("llm_health_allow", _ALLOW_SCRIPT)
+cache.register_script("llm_health_record", _RECORD_SCRIPT)
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+@dataclass(slots=True)
+class ProviderHealth:
+    """Point-in-time view of one provider, shared by all workers."""
+
+    provider: str
+    state: str = CLOSED
+    failures: int = 0
+    samples: int = 0
+    error_rate: float = 0.0
+    latency_ms_p50: float | None = None
+    latency_ms_p95: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "samples": self.samples,
+            "error_rate": self.error_rate,
+            "latency_ms_p50": self.latency_ms_p50,
+            "latency_ms_p95": self.latency_ms_p95,
+        }
+
+
+def _summarise(provider: str, state: str, failures: int, samples: list[str]) -> ProviderHealth:
+    latencies: list[float] = []
+    errors = 0
+    for sample in samples:
+        ok, _, latency = sample.partition(":")
+        if ok != "1":
+            errors += 1
+        try:
+            latencies.append(float(latency))
+        except ValueError:
+            continue
+    latencies.sort()
+
+    def percentile(q: float) -> float | None:
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 2)
+
+    return ProviderHealth(
+        provider=provider,
+        state=state,
+        failures=failures,
+        samples=len(samples),
+        error_rate=round(errors / len(samples), 3) if samples else 0.0,
+        latency_ms_p50=percentile(0.5),
+        latency_ms_p95=percentile(0.95),
+    )
+
+
+class _LocalCircuit:
+    """In-process fallback used while Redis is unavailable."""
+
+    def __init__(self, sample_size: int):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.samples: deque[str] = deque(maxlen=sample_size)
+
+
+class ProviderHealthRegistry:
+    """Shared breaker state and rolling health per LLM provider."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 60.0,
+        probe_timeout: float = 30.0,
+        sample_size: int = 200,
+        sample_ttl: int = 3600,
+        snapshot_ttl: float = 5.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout
+        self.sample_size = sample_size
+        self.sample_ttl = sample_ttl
+        self.snapshot_ttl = snapshot_ttl
+        # provider -> monotonic time before which Redis is not asked again
+        self._open_until: dict[str, float] = {}
+        self._local: dict[str, _LocalCircuit] = {}
+        self._snapshot: dict[str, ProviderHealth] = {}
+        self._snapshot_at = 0.0
+        self.stats = {"redis_calls": 0, "local_skips": 0, "degraded": 0}
+
+    def _keys(self, provider: str) -> list[str]:
+        return [
+            cache.make_key(["llm", "health", provider]),
+            cache.make_key(["llm", "health", provider, "probe"]),
+            cache.make_key(["llm", "health", provider, "samples"]),
+        ]
+
+    def _circuit(self, provider: str) -> _LocalCircuit:
+        circuit = self._local.get(provider)
+        if circuit is None:
+            circuit = self._local[provider] = _LocalCircuit(self.sample_size)
+        return circuit
+
+    # --- Breaker ---
+
+    async def allow(self, provider: str) -> bool:
+        """Whether a call to ``provider`` may go ahead.
+
+        While OPEN this is False until the cooldown ends; then exactly one
+        caller in the cluster gets True (the half-open probe).
+        """
+        open_until = self._open_until.get(provider)
+        if open_until is not None:
+            if time.monotonic() < open_until:
+                self.stats["local_skips"] += 1
+                return False
+            del self._open_until[provider]
+
+        reply = None
+        if cache.is_connected:
+            self.stats["redis_calls"] += 1
+            state_key, probe_key, _ = self._keys(provider)
+            reply = await cache.run_script(
+                "llm_health_allow",
+                keys=[state_key, probe_key],
+                args=[int(self.recovery_timeout * 1000), int(self.probe_timeout * 1000)],
+            )
+        if reply is None:
+            self.stats["degraded"] += 1
+            return self._allow_local(provider)
+
+        allowed, state, retry_after_ms = int(reply[0]), _text(reply[1]), int(reply[2])
+        if allowed and state == HALF_OPEN:
+            logger.info(f"LLM circuit breaker [{provider}]: HALF_OPEN (this worker probes)")
+        if not allowed and retry_after_ms > 0:
+            self._open_until[provider] = time.monotonic() + retry_after_ms / 1000
+        return bool(allowed)
+
+    def _allow_local(self, provider: str) -> bool:
+        circuit = self._circuit(provider)
+        if circuit.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if circuit.state == OPEN and now - circuit.opened_at < self.recovery_timeout:
+            return False
+        if circuit.probing and now - circuit.opened_at < self.recovery_timeout + self.probe_timeout:
+            return False
+        circuit.state = HALF_OPEN
+        circuit.probing = True
+        logger.info(f"LLM circuit breaker [{provider}]: HALF_OPEN (testing recovery)")
+        return True
+
+    async def record(
+        self, provider: str, *, ok: bool, latency: float, count_failure: bool = True
+    ) -> str:
+        """Record one call outcome; returns the provider's breaker state.
+
+        Every outcome feeds the rolling error rate and latency. A failure
+        only moves the breaker when ``count_failure`` is set (callers pass
+        False for attempts that will still be retried).
+        """
+        latency_ms = round(latency * 1000, 1)
+        reply = None
+        if cache.is_connected:
+            self.stats["redis_calls"] += 1
+            reply = await cache.run_script(
+                "llm_health_record",
+                keys=self._keys(provider),
+                args=[
+                    1 if ok else 0,
+                    latency_ms,
+                    1 if count_failure else 0,
+                    self.failure_threshold,
+                    self.sample_size,
+                    self.sample_ttl,
+                ],
+            )
+        if reply is None:
+            self.stats["degraded"] += 1
+            state, failures, previous = self._record_local(provider, ok, latency_ms, count_failure)
+        else:
+            state, failures, previous = _text(reply[0]), int(reply[1]), _text(reply[2])
+
+        if ok:
+            self._open_until.pop(provider, None)
+            if previous != CLOSED:
+                logger.info(f"LLM circuit breaker [{provider}]: CLOSED (recovered)")
+        elif state == OPEN and previous != OPEN:
+            self._open_until[provider] = time.monotonic() + self.recovery_timeout
+            logger.warning(
+                f"LLM circuit breaker [{provider}]: OPEN after {failures} "
+                f"consecutive failures. Will retry in {self.recovery_timeout:g}s."
+            )
+        return state
+
+    def _record_local(
+        self, provider: str, ok: bool, latency_ms: float, count_failure: bool
+    ) -> tuple[str, int, str]:
+        circuit = self._circuit(provider)
+        previous = circuit.state
+        circuit.samples.appendleft(f"{int(ok)}:{latency_ms}")
+        if ok:
+            circuit.state, circuit.failures, circuit.probing = CLOSED, 0, False
+        elif count_failure:
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+        return circuit.state, circuit.failures, previous
+
+    # --- Health snapshots ---
+
+    async def snapshot(self, providers: list[str] | tuple[str, ...]) -> dict[str, ProviderHealth]:
+        """Health of ``providers``, read in one pipelined round trip.
+
+        Cached for ``snapshot_ttl`` seconds; falls back to local state when
+        Redis is unavailable.
+        """
+        now = time.monotonic()
+        if now - self._snapshot_at < self.snapshot_ttl and all(
+            p in self._snapshot for p in providers
+        ):
+            return {p: self._snapshot[p] for p in providers}
+
+        result: dict[str, ProviderHealth] = {}
+        try:
+            async with cache.pipeline() as pipe:
+                for provider in providers:
+                    state_key, _, samples_key = self._keys(provider)
+                    pipe.hmget(state_key, "state", "failures")
+                    pipe.lrange(samples_key, 0, -1)
+                replies = await pipe.execute()
+            for i, provider in enumerate(providers):
+                (state, failures), samples = replies[2 * i], replies[2 * i + 1]
+                result[provider] = _summarise(
+                    provider,
+                    _text(state) if state else CLOSED,
+                    int(failures or 0),
+                    [_text(s) for s in samples],
+                )
+        except Exception as e:
+            if cache.is_connected:
+                logger.warning(f"LLM health snapshot failed: {e}")
+            for provider in providers:
+                circuit = self._circuit(provider)
+                result[provider] = _summarise(
+                    provider, circuit.state, circuit.failures, list(circuit.samples)
+                )
+
+        self._snapshot = result
+        self._snapshot_at = now
+        return result
+
+    async def rank(self, providers: list[str]) -> list[str]:
+        """Order ``providers`` for failover by observed health.
+
+        Providers with a majority of recent errors go last; the rest are
+        sorted by p95 latency. Providers without samples keep their given
+        order, after the measured ones.
+        """
+        health = await self.snapshot(providers)
+
+        def key(item: tuple[int, str]) -> tuple[bool, bool, float, int]:
+            index, provider = item
+            h = health[provider]
+            p95 = h.latency_ms_p95
+            return (h.error_rate >= 0.5, p95 is None, p95 or 0.0, index)
+
+        return [p for _, p in sorted(enumerate(providers), key=key)]
+
+    def reset_local(self) -> None:
+        """Forget in-process state (local breakers, deadlines, snapshot)."""
+        self._open_until.clear()
+        self._local.clear()
+        self._snapshot = {}
+        self._snapshot_at = 0.0
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            **self.stats,
+            "locally_open": sorted(
+                p for p, until in self._open_until.items() if until > time.monotonic()
+            ),
+            "providers": {p: h.as_dict() for p, h in self._snapshot.items()},
+        }
+
+
+def _build_registry() -> ProviderHealthRegistry:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return ProviderHealthRegistry(
+        failure_threshold=settings.LLM_HEALTH_FAILURE_THRESHOLD,
+        recovery_timeout=settings.LLM_HEALTH_RECOVERY_SECONDS,
+        probe_timeout=settings.LLM_HEALTH_PROBE_TIMEOUT_SECONDS,
+        sample_size=settings.LLM_HEALTH_SAMPLE_SIZE,
+        snapshot_ttl=settings.LLM_HEALTH_SNAPSHOT_TTL_SECONDS,
+    )
+
+
+# Module-level singleton (state lives in Redis; local deadlines per process)
+provider_health = _build_registry()
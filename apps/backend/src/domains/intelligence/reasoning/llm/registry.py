@@ -24,6 +24,12 @@ class LlmTask(StrEnum):
     EMAIL_PRIMARY = "email_primary"
     EMAIL_FALLBACK = "email_fallback"
     VOICE_TRANSCRIPTION = "voice_transcription"
+    GUIDANCE = "guidance"
+    TOPIC_EXTRACTION = "topic_extraction"
+    RESOURCE_RECOMMENDATION = "resource_recommendation"
+    FLASHCARD_GENERATION = "flashcard_generation"
+    CONVERSATION_SUMMARY = "conversation_summary"
+    PLAN_GENERATION = "plan_generation"
 
 
 _DEFAULTS: dict[LlmTask, str] = {
@@ -39,6 +45,12 @@ _DEFAULTS: dict[LlmTask, str] = {
     LlmTask.EMAIL_PRIMARY: "gemini-3.5-flash",
     LlmTask.EMAIL_FALLBACK: "gemini-3.1-flash-lite",
     LlmTask.VOICE_TRANSCRIPTION: "gemini-3.5-flash",
+    LlmTask.GUIDANCE: "gemini-3.5-flash",
+    LlmTask.TOPIC_EXTRACTION: "gemini-3.5-flash",
+    LlmTask.RESOURCE_RECOMMENDATION: "gemini-3.5-flash",
+    LlmTask.FLASHCARD_GENERATION: "gemini-3.5-flash",
+    LlmTask.CONVERSATION_SUMMARY: "gemini-3.1-flash-lite",
+    LlmTask.PLAN_GENERATION: "gemini-3.5-flash",
 }
 
 
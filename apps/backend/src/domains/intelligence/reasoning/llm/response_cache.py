@@ -0,0 +1,394 @@
+"""
+Response cache for repeatable LLM generation tasks.
+
+Guidance, topic extraction, resource recommendations, flashcards,
+conversation summaries and plan generation often send the same (or nearly
+the same) prompt again: client retries, re-opened screens, the same note
+generated twice. Each of those is a paid, multi-second call. This cache sits
+under ``generate_content`` / ``generate_content_json`` and answers them from
+Redis.
+
+- Opt-in per :class:`LlmTask`: only tasks with a :class:`ResponseCachePolicy`
+  in ``POLICIES`` are cached, each with its own TTL.
+- Keyed by (task, model, normalised prompt hash, temperature bucket), so a
+  model change or a different temperature never reuses an answer.
+- Size-bounded per task: entries live in one Redis hash with an LRU sorted
+  set beside it; storing past ``max_entries`` evicts the least recently used.
+- Optional near-duplicate lookup: tasks with a ``similarity`` threshold also
+  keep a short list of prompt embeddings (scoped per user), and a miss is
+  answered by the closest cached prompt above the threshold.
+
+Hits, near-duplicate hits, misses, saved tokens and saved latency are counted
+per task (:meth:`LlmResponseCache.get_stats`). Degrades to no caching when
+Redis is unavailable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from src.shared.infrastructure.redis import cache
+
+from .clients import Priority, estimate_tokens, llm_clients
+from .registry import LlmTask, default_model_for
+
+logger = logging.getLogger(__name__)
+
+# KEYS: entries hash, lru zset; ARGV: field
+_GET_SCRIPT = """
+local value = redis.call('HGET', KEYS[1], ARGV[1])
+if not value then return false end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZADD', KEYS[2], 'XX', now, ARGV[1])
+return value
+"""
+
+# KEYS: entries hash, lru zset; ARGV: field, value, max entries, idle ttl ms
+# Returns the number of evicted entries.
+_PUT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[3])
+if excess > 0 then
+  local evicted = redis.call('ZPOPMIN', KEYS[2], excess)
+  for i = 1, #evicted, 2 do redis.call('HDEL', KEYS[1], evicted[i]) end
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[2], ARGV[4])
+return math.max(excess, 0)
+"""
+
+cache.register_script("llm_response_get", _GET_SCRIPT)
+cache.register_script("llm_response_put", _PUT_SCRIPT)
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+_INLINE_WS = re.compile(r"[ \t]+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop differences a model does not care about (line endings, spacing)."""
+    prompt = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    lines = (_INLINE_WS.sub(" ", line).strip() for line in prompt.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def temperature_bucket(temperature: float) -> str:
+    """Temperatures within 0.1 of each other share cached answers."""
+    return f"{round(temperature, 1):.1f}"
+
+
+def response_key(task: LlmTask, model: str, prompt: str, temperature: float) -> str:
+    """Content hash identifying one cacheable generation."""
+    payload = {
+        "task": str(task),
+        "model": model,
+        "temperature": temperature_bucket(temperature),
+        "prompt": normalize_prompt(prompt),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class ResponseCachePolicy:
+    """How long a task's answers stay valid, and whether near duplicates count.
+
+    ``similarity`` is the minimum cosine similarity between prompt embeddings
+    for a near-duplicate hit; None disables the embedding lookup.
+    """
+
+    ttl_seconds: int
+    similarity: float | None = None
+
+
+POLICIES: dict[LlmTask, ResponseCachePolicy] = {
+    LlmTask.GUIDANCE: ResponseCachePolicy(ttl_seconds=30 * 60),
+    LlmTask.TOPIC_EXTRACTION: ResponseCachePolicy(ttl_seconds=7 * 24 * 3600),
+    LlmTask.RESOURCE_RECOMMENDATION: ResponseCachePolicy(ttl_seconds=24 * 3600, similarity=0.95),
+    LlmTask.FLASHCARD_GENERATION: ResponseCachePolicy(ttl_seconds=7 * 24 * 3600),
+    LlmTask.CONVERSATION_SUMMARY: ResponseCachePolicy(ttl_seconds=24 * 3600),
+    LlmTask.PLAN_GENERATION: ResponseCachePolicy(ttl_seconds=6 * 3600),
+}
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """A cached answer and what producing it originally cost."""
+
+    text: str
+    tokens: int
+    latency_ms: float
+    similar: bool = False
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+async def gemini_embedding(text: str) -> list[float] | None:
+    """Embed ``text`` with the shared Gemini client (reduced dimensionality)."""
+    from .gemini_sdk import types as gemini_types
+
+    async with llm_clients.slot(
+        "gemini", priority=Priority.INTERACTIVE, tokens=estimate_tokens(text)
+    ) as slot:
+        response = await slot.client.aio.models.embed_content(
+            model=default_model_for(LlmTask.EMBEDDING),
+            contents=text,
+            config=gemini_types.EmbedContentConfig(output_dimensionality=256),
+        )
+    embeddings = getattr(response, "embeddings", None) or []
+    return list(embeddings[0].values) if embeddings else None
+
+
+class LlmResponseCache:
+    """Redis-backed, size-bounded response cache with per-task stats."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        max_entries: int = 5000,
+        similarity_candidates: int = 200,
+        policies: dict[LlmTask, ResponseCachePolicy] | None = None,
+        embedder: Callable[[str], Awaitable[list[float] | None]] = gemini_embedding,
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.similarity_candidates = similarity_candidates
+        self.policies = dict(POLICIES if policies is None else policies)
+        self.embedder = embedder
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def policy_for(self, task: LlmTask | None) -> ResponseCachePolicy | None:
+        """The task's policy, or None if its answers are not cached."""
+        if not self.enabled or task is None:
+            return None
+        return self.policies.get(task)
+
+    def _keys(self, task: LlmTask) -> list[str]:
+        return [
+            cache.make_key(["llm", "resp", str(task)]),
+            cache.make_key(["llm", "resp", str(task), "lru"]),
+        ]
+
+    def _vectors_key(self, task: LlmTask, model: str, temperature: float, scope: str | None):
+        return cache.make_key(
+            [
+                "llm",
+                "resp",
+                str(task),
+                "vec",
+                model,
+                temperature_bucket(temperature),
+                scope or "global",
+            ]
+        )
+
+    def _count(self, task: LlmTask, name: str, amount: float = 1) -> None:
+        stats = self._stats.setdefault(
+            str(task),
+            {
+                "hits": 0,
+                "similar_hits": 0,
+                "misses": 0,
+                "stores": 0,
+                "evictions": 0,
+                "saved_tokens": 0,
+                "saved_latency_ms": 0.0,
+            },
+        )
+        stats[name] += amount
+
+    async def _embed(self, prompt: str) -> list[float] | None:
+        try:
+            return await self.embedder(normalize_prompt(prompt))
+        except Exception as e:
+            logger.warning(f"LLM response cache embedding failed: {e}")
+            return None
+
+    async def _read(self, task: LlmTask, key: str) -> dict[str, Any] | None:
+        raw = await cache.run_script("llm_response_get", keys=self._keys(task), args=[key])
+        if raw is None:
+            return None
+        entry = cache.decode(raw)
+        if not isinstance(entry, dict) or entry.get("expires_at", 0) < time.time():
+            return None
+        return entry
+
+    async def get(
+        self,
+        task: LlmTask | None,
+        model: str,
+        prompt: str,
+        temperature: float,
+        *,
+        scope: str | None = None,
+    ) -> CachedResponse | None:
+        """Cached answer for this generation, or None.
+
+        ``scope`` (usually the user id) limits near-duplicate matches to
+        prompts from the same scope; exact matches are shared.
+        """
+        policy = self.policy_for(task)
+        if policy is None or not cache.is_connected:
+            return None
+        started = time.perf_counter()
+
+        entry = await self._read(task, response_key(task, model, prompt, temperature))
+        similar = False
+        if entry is None and policy.similarity is not None:
+            entry = await self._nearest(task, model, prompt, temperature, scope, policy)
+            similar = entry is not None
+
+        if entry is None:
+            self._count(task, "misses")
+            return None
+
+        lookup_ms = (time.perf_counter() - started) * 1000
+        self._count(task, "similar_hits" if similar else "hits")
+        self._count(task, "saved_tokens", entry.get("tokens", 0))
+        self._count(task, "saved_latency_ms", max(0.0, entry.get("latency_ms", 0.0) - lookup_ms))
+        return CachedResponse(
+            text=entry["text"],
+            tokens=entry.get("tokens", 0),
+            latency_ms=entry.get("latency_ms", 0.0),
+            similar=similar,
+        )
+
+    async def _nearest(
+        self,
+        task: LlmTask,
+        model: str,
+        prompt: str,
+        temperature: float,
+        scope: str | None,
+        policy: ResponseCachePolicy,
+    ) -> dict[str, Any] | None:
+        try:
+            async with cache.pipeline() as pipe:
+                pipe.lrange(self._vectors_key(task, model, temperature, scope), 0, -1)
+                (candidates,) = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"LLM response cache similarity lookup failed: {e}")
+            return None
+        if not candidates:
+            return None
+        vector = await self._embed(prompt)
+        if not vector:
+            return None
+
+        best_key, best_score = None, policy.similarity
+        for raw in candidates:
+            candidate = cache.decode(raw)
+            if not isinstance(candidate, dict):
+                continue
+            score = _cosine(vector, candidate.get("v") or [])
+            if score >= best_score:
+                best_key, best_score = candidate.get("k"), score
+        if best_key is None:
+            return None
+        return await self._read(task, best_key)
+
+    async def put(
+        self,
+        task: LlmTask | None,
+        model: str,
+        prompt: str,
+        temperature: float,
+        text: str,
+        *,
+        latency: float,
+        tokens: int | None = None,
+        scope: str | None = None,
+    ) -> None:
+        """Remember an answer that took ``latency`` seconds to produce."""
+        policy = self.policy_for(task)
+        if policy is None or not cache.is_connected or not text:
+            return
+        key = response_key(task, model, prompt, temperature)
+        entry = {
+            "text": text,
+            "tokens": tokens if tokens is not None else estimate_tokens(prompt + text),
+            "latency_ms": round(latency * 1000, 1),
+            "expires_at": time.time() + policy.ttl_seconds,
+        }
+        evicted = await cache.run_script(
+            "llm_response_put",
+            keys=self._keys(task),
+            args=[key, cache.encode(entry), self.max_entries, policy.ttl_seconds * 1000],
+        )
+        if evicted is None:
+            return
+        self._count(task, "stores")
+        self._count(task, "evictions", int(evicted))
+
+        if policy.similarity is not None:
+            vector = await self._embed(prompt)
+            if vector:
+                vectors_key = self._vectors_key(task, model, temperature, scope)
+                try:
+                    async with cache.pipeline() as pipe:
+                        pipe.lpush(vectors_key, cache.encode({"k": key, "v": vector}))
+                        pipe.ltrim(vectors_key, 0, self.similarity_candidates - 1)
+                        pipe.expire(vectors_key, policy.ttl_seconds)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"LLM response cache embedding store failed: {e}")
+
+    async def discard(
+        self, task: LlmTask | None, model: str, prompt: str, temperature: float
+    ) -> None:
+        """Forget a cached answer the caller could not use (e.g. malformed JSON)."""
+        if self.policy_for(task) is None or not cache.is_connected:
+            return
+        key = response_key(task, model, prompt, temperature)
+        entries_key, lru_key = self._keys(task)
+        try:
+            async with cache.pipeline() as pipe:
+                pipe.hdel(entries_key, key)
+                pipe.zrem(lru_key, key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"LLM response cache discard failed: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        """Per-task hits, misses, hit rate, saved tokens and saved latency."""
+        report = {}
+        for task, stats in self._stats.items():
+            hits = stats["hits"] + stats["similar_hits"]
+            lookups = hits + stats["misses"]
+            report[task] = {
+                **stats,
+                "saved_latency_ms": round(stats["saved_latency_ms"], 1),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return report
+
+
+def _build_cache() -> LlmResponseCache:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return LlmResponseCache(
+        enabled=settings.LLM_RESPONSE_CACHE_ENABLED,
+        max_entries=settings.LLM_RESPONSE_CACHE_MAX_ENTRIES,
+        similarity_candidates=settings.LLM_RESPONSE_CACHE_SIMILARITY_CANDIDATES,
+    )
+
+
+# Module-level singleton
+llm_response_cache = _build_cache()
@@ -6,10 +6,13 @@ interaction memory, conversation summaries), agent tasks, uploads, and LLM cost
 """
 
 import logging
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
 
 from sqlalchemy import select, update, delete, func, and_
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -37,14 +40,27 @@ class IntelligenceRepository:
     async def _session(self) -> AsyncSession:
         return get_session_factory()()
 
+    @asynccontextmanager
+    async def _use_session(
+        self, session: AsyncSession | None
+    ) -> AsyncGenerator[AsyncSession, None]:
+        """Use the caller's session when given, otherwise open a short-lived one."""
+        if session is not None:
+            yield session
+        else:
+            async with await self._session() as new_session:
+                yield new_session
+
     # -----------------------------------------------------------------------
     # Chat Sessions
     # -----------------------------------------------------------------------
 
-    async def find_chat_session(self, session_id: str) -> ChatSession | None:
-        async with await self._session() as session:
+    async def find_chat_session(
+        self, session_id: str, *, session: AsyncSession | None = None
+    ) -> ChatSession | None:
+        async with self._use_session(session) as s:
             stmt = select(ChatSession).where(ChatSession.id == session_id)
-            result = await session.execute(stmt)
+            result = await s.execute(stmt)
             return result.scalar_one_or_none()
 
     async def list_chat_sessions(
@@ -312,6 +328,83 @@ class IntelligenceRepository:
                 session.add(insight)
                 await session.commit()
 
+    # -----------------------------------------------------------------------
+    # Memory snapshot (summaries + insights + facts in one statement)
+    # -----------------------------------------------------------------------
+
+    def memory_snapshot_columns(
+        self,
+        user_id: str,
+        *,
+        summaries_take: int = 5,
+        insights_take: int = 10,
+        facts_take: int = 15,
+    ) -> list[Any]:
+        """Labelled scalar subqueries that aggregate each memory list into JSON.
+
+        Each column is a ``json_agg`` over a bounded, ordered subquery, so the
+        three lists can ride along in any SELECT (see ``load_memory_snapshot``
+        and the chat turn context loader) instead of costing a round trip each.
+        Rows come back as dicts keyed by the labels below.
+        """
+        summaries = (
+            select(
+                ConversationSummary.summary.label("summary"),
+                ConversationSummary.key_topics.label("key_topics"),
+                ConversationSummary.created_at.label("created_at"),
+            )
+            .where(ConversationSummary.user_id == user_id)
+            .order_by(ConversationSummary.created_at.desc())
+            .limit(summaries_take)
+            .subquery("mem_summaries")
+        )
+        insights = (
+            select(
+                LearningInsight.insight_type.label("insight_type"),
+                LearningInsight.content.label("content"),
+                LearningInsight.confidence.label("confidence"),
+                LearningInsight.updated_at.label("updated_at"),
+            )
+            .where(
+                LearningInsight.user_id == user_id,
+                LearningInsight.is_active == True,  # noqa: E712
+            )
+            .order_by(LearningInsight.updated_at.desc())
+            .limit(insights_take)
+            .subquery("mem_insights")
+        )
+        facts = (
+            select(
+                UserFact.category.label("category"),
+                UserFact.content.label("content"),
+                UserFact.updated_at.label("updated_at"),
+            )
+            .where(
+                UserFact.user_id == user_id,
+                UserFact.is_active == True,  # noqa: E712
+            )
+            .order_by(UserFact.updated_at.desc())
+            .limit(facts_take)
+            .subquery("mem_facts")
+        )
+        return [
+            _json_rows(summaries, summaries.c.created_at).label("summaries"),
+            _json_rows(insights, insights.c.updated_at).label("insights"),
+            _json_rows(facts, facts.c.updated_at).label("facts"),
+        ]
+
+    async def load_memory_snapshot(
+        self, user_id: str, *, session: AsyncSession | None = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Fetch recent summaries, active insights and active facts in one query."""
+        async with self._use_session(session) as s:
+            row = (await s.execute(select(*self.memory_snapshot_columns(user_id)))).one()
+            return {
+                "summaries": list(row.summaries or []),
+                "insights": list(row.insights or []),
+                "facts": list(row.facts or []),
+            }
+
     # -----------------------------------------------------------------------
     # User Interaction Memory
     # -----------------------------------------------------------------------
@@ -581,5 +674,16 @@ class IntelligenceRepository:
         return {self._UPLOAD_MAP.get(k, k): v for k, v in data.items() if k in self._UPLOAD_MAP}
 
 
+def _json_rows(subquery: Any, order_col: Any) -> Any:
+    """``json_agg`` a subquery's rows (newest first), yielding ``[]`` when empty."""
+    return select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(subquery.table_valued(), order_col.desc())),
+            func.json_build_array(),
+            type_=JSON,
+        )
+    ).scalar_subquery()
+
+
 # Singleton
 intelligence_repo = IntelligenceRepository()
@@ -136,7 +136,12 @@ async def recommend_resources(
         user_context.update(context)
 
     # Use intelligence domain's RAG capability
-    from src.domains.intelligence.reasoning.llm import generate_content
+    from src.domains.intelligence.reasoning.llm import (
+        LlmTask,
+        default_model_for,
+        generate_content,
+        llm_response_cache,
+    )
 
     prompt = (
         f"Based on the user's learning context, recommend {limit} resources for: {query}\n\n"
@@ -146,7 +151,10 @@ async def recommend_resources(
 
     import json
 
-    raw = await generate_content(prompt, max_tokens=1500, temperature=0.3)
+    task = LlmTask.RESOURCE_RECOMMENDATION
+    raw = await generate_content(
+        prompt, max_tokens=1500, temperature=0.3, task=task, cache_scope=user_id
+    )
     try:
         import re
 
@@ -154,6 +162,8 @@ async def recommend_resources(
         recommendations = json.loads(match.group(0)) if match else []
     except Exception:
         recommendations = []
+    if not recommendations:
+        await llm_response_cache.discard(task, default_model_for(task), prompt, 0.3)
 
     return {
         "recommendations": [
@@ -277,7 +277,7 @@ class SpaceListResponse(BaseModel):
 
 
 # ===========================================================================
-# Import
+# Import / export
 # ===========================================================================
 
 
@@ -288,3 +288,12 @@ class ImportRequest(BaseModel):
     courseIds: list[str] = []
     noteIds: list[str] = []
     goalIds: list[str] = []
+
+
+class ExportRequest(BaseModel):
+    """Copy Learning Space items into the personal workspace."""
+
+    resourceIds: list[str] = []
+    courseIds: list[str] = []
+    noteIds: list[str] = []
+    goalIds: list[str] = []
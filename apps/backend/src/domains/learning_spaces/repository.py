@@ -2,17 +2,23 @@
 Learning Spaces domain — Data access layer (SQLAlchemy).
 
 Encapsulates all queries for Space, SpaceMember, SpaceInvite,
-SpaceChatGroup, SpaceSession, SpaceSeatAddon.
+SpaceChatGroup, SpaceSession, SpaceSeatAddon, and the set-based statements
+that move or copy notes, courses, resources and goals in and out of a space.
 """
 
+import hashlib
 import logging
 from datetime import UTC, datetime
 from typing import Any
 
-from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy import String, and_, any_, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.domains.knowledge.db_models import Course, Module, Resource, Topic
+from src.domains.personal_learning.db_models import Note, NoteAttachment, NoteTag
+from src.domains.progress.db_models import Goal
 from src.shared.database import get_session_factory
 
 from .db_models import (
@@ -29,6 +35,24 @@ from .db_models import (
 
 logger = logging.getLogger(__name__)
 
+# Items a learner can move into a space or copy out of it, by transfer type
+TRANSFER_MODELS = {"notes": Note, "courses": Course, "resources": Resource, "goals": Goal}
+
+
+def _any_id(column, ids: list[str]):
+    """``column = ANY(:ids)`` — one array parameter however many ids."""
+    return column == any_(literal(list(ids), ARRAY(String)))
+
+
+def _copy_id(salt: str, column):
+    """Id of the copy of ``column``'s row (md5 of salt + id, like ``copy_id``)."""
+    return func.substr(func.md5(literal(salt) + column), 1, 25)
+
+
+def copy_id(salt: str, original_id: str) -> str:
+    """The id ``copy_from_space`` gives the copy of ``original_id`` for ``salt``."""
+    return hashlib.md5((salt + original_id).encode()).hexdigest()[:25]
+
 
 class LearningSpaceRepository:
     """Data access for Learning Spaces."""
@@ -325,6 +349,142 @@ class LearningSpaceRepository:
             result = await session.execute(stmt)
             return list(result.scalars().all())
 
+    # -----------------------------------------------------------------------
+    # Bulk transfers (run inside the caller's transaction)
+    # -----------------------------------------------------------------------
+
+    async def import_into_space(
+        self, session: AsyncSession, kind: str, space_id: str, user_id: str, ids: list[str]
+    ) -> int:
+        """
+        Move the learner's own ``kind`` items with ``ids`` into the space.
+
+        Items owned by someone else, already in a space or missing are left
+        alone by the WHERE clause; returns how many moved.
+        """
+        model = TRANSFER_MODELS[kind]
+        stmt = (
+            update(model)
+            .where(_any_id(model.id, ids), model.user_id == user_id, model.space_id.is_(None))
+            .values(space_id=space_id, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return result.rowcount
+
+    async def copy_from_space(
+        self,
+        session: AsyncSession,
+        kind: str,
+        space_id: str,
+        user_id: str,
+        ids: list[str],
+        salt: str,
+    ) -> list[Any]:
+        """
+        Copy the space's ``kind`` items with ``ids`` into the learner's workspace.
+
+        One ``INSERT ... SELECT`` per table: courses bring their modules and
+        topics, notes their tags and attachments. Copies get ``copy_id(salt,
+        original id)``, so child rows find their copied parent without a
+        mapping table. Returns ``(id, title)`` of each top-level copy.
+        """
+        model = TRANSFER_MODELS[kind]
+        in_space = and_(_any_id(model.id, ids), model.space_id == space_id)
+        now = func.now()
+        columns = {
+            "notes": ("title", "content", "summary", "archived", "voiceRecordingUrl"),
+            "courses": ("title", "description", "difficulty", "isAIGenerated"),
+            "resources": ("title", "url", "description", "type", "metadata"),
+            "goals": ("title", "description", "targetDate"),
+        }[kind]
+        table = model.__table__
+        result = await session.execute(
+            insert(model)
+            .from_select(
+                ["id", "userId", *columns, "createdAt", "updatedAt"],
+                select(
+                    _copy_id(salt, model.id),
+                    literal(user_id),
+                    *(table.c[name] for name in columns),
+                    now,
+                    now,
+                ).where(in_space),
+            )
+            .returning(model.id, model.title)
+        )
+        copies = list(result.all())
+
+        if kind == "notes":
+            await session.execute(
+                insert(NoteTag).from_select(
+                    ["id", "noteId", "tag"],
+                    select(_copy_id(salt, NoteTag.id), _copy_id(salt, NoteTag.note_id), NoteTag.tag)
+                    .join(Note, Note.id == NoteTag.note_id)
+                    .where(in_space),
+                )
+            )
+            await session.execute(
+                insert(NoteAttachment).from_select(
+                    ["id", "noteId", "filename", "url", "size", "createdAt"],
+                    select(
+                        _copy_id(salt, NoteAttachment.id),
+                        _copy_id(salt, NoteAttachment.note_id),
+                        NoteAttachment.filename,
+                        NoteAttachment.url,
+                        NoteAttachment.size,
+                        now,
+                    )
+                    .join(Note, Note.id == NoteAttachment.note_id)
+                    .where(in_space),
+                )
+            )
+        elif kind == "courses":
+            await session.execute(
+                insert(Module).from_select(
+                    ["id", "courseId", "title", "description", "order", "createdAt", "updatedAt"],
+                    select(
+                        _copy_id(salt, Module.id),
+                        _copy_id(salt, Module.course_id),
+                        Module.title,
+                        Module.description,
+                        Module.order,
+                        now,
+                        now,
+                    )
+                    .join(Course, Course.id == Module.course_id)
+                    .where(in_space),
+                )
+            )
+            await session.execute(
+                insert(Topic).from_select(
+                    [
+                        "id",
+                        "moduleId",
+                        "title",
+                        "content",
+                        "order",
+                        "estimatedHours",
+                        "createdAt",
+                        "updatedAt",
+                    ],
+                    select(
+                        _copy_id(salt, Topic.id),
+                        _copy_id(salt, Topic.module_id),
+                        Topic.title,
+                        Topic.content,
+                        Topic.order,
+                        Topic.estimated_hours,
+                        now,
+                        now,
+                    )
+                    .join(Module, Module.id == Topic.module_id)
+                    .join(Course, Course.id == Module.course_id)
+                    .where(in_space),
+                )
+            )
+        return copies
+
     # -----------------------------------------------------------------------
     # Field mapping helpers
     # -----------------------------------------------------------------------
@@ -1,12 +1,12 @@
 """Public API routes for Learning Spaces."""
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 
 from src.shared.auth import CurrentUser
 
 from . import models
 from .repository import space_repo
-from .services import membership_service, space_service
+from .services import membership_service, space_service, transfer_service
 
 router = APIRouter(tags=["learning-spaces"])
 
@@ -89,3 +89,53 @@ async def get_space(space_id: str, current_user: CurrentUser):
     )
     member = next((item for item in space.members if item.user_id == current_user.id), None)
     return _space_response(space, role=member.role if member else None)
+
+
+async def _transfer(direction: str, space_id: str, body, user_id: str, response: Response) -> dict:
+    result = await transfer_service.start_transfer(
+        direction, space_id=space_id, user_id=user_id, ids=transfer_service.ids_by_type(body)
+    )
+    if result["status"] == "queued":
+        response.status_code = status.HTTP_202_ACCEPTED
+    return result
+
+
+@router.post("/{space_id}/import")
+async def import_items(
+    space_id: str, body: models.ImportRequest, response: Response, current_user: CurrentUser
+):
+    """
+    Move the authenticated user's notes, courses, resources and goals into a space.
+
+    Returns ``{"status": "completed", "counts": {...}}``. Large transfers are
+    queued instead (``202``, ``{"taskId": ..., "status": "queued"}``); poll
+    ``GET /{space_id}/transfers/{task_id}``.
+    """
+    return await _transfer(transfer_service.IMPORT, space_id, body, current_user.id, response)
+
+
+@router.post("/{space_id}/export")
+async def export_items(
+    space_id: str, body: models.ExportRequest, response: Response, current_user: CurrentUser
+):
+    """
+    Copy space items into the authenticated user's personal workspace.
+
+    Courses are copied with their modules and topics, notes with their tags
+    and attachments. Responds like ``POST /{space_id}/import``.
+    """
+    return await _transfer(transfer_service.EXPORT, space_id, body, current_user.id, response)
+
+
+@router.get("/{space_id}/transfers/{task_id}")
+async def get_transfer(space_id: str, task_id: str, current_user: CurrentUser):
+    """
+    Poll a queued import or export.
+
+    Response shape: ``{"taskId": ..., "status": "queued|running|success|failed"}``
+    plus ``progress`` (``{"done", "total", "counts"}``) while running and
+    ``counts`` on success.
+    """
+    return await transfer_service.get_transfer_job(
+        task_id, space_id=space_id, user_id=current_user.id
+    )
@@ -905,66 +905,26 @@ async def import_to_space(db: Any, space_id: str, user_id: str, data: ImportRequ
     """Import items (notes, courses, resources, goals) into a space."""
     await _verify_membership(db, space_id, user_id)
 
-    from sqlalchemy import update as sa_update, text
-    from src.domains.knowledge.db_models import Course, Resource
-    from src.domains.progress.db_models import Goal
+    from .transfer_service import IMPORT, ids_by_type, transfer
 
-    imported_stats = {"notes": 0, "courses": 0, "resources": 0, "goals": 0}
-    factory = get_session_factory()
+    return await transfer(IMPORT, space_id, user_id, ids_by_type(data))
 
-    # Import Notes (no SQLAlchemy model — use raw SQL)
-    for note_id in data.noteIds:
-        async with factory() as session:
-            result = await session.execute(
-                text('SELECT id, "userId", "spaceId" FROM "Note" WHERE id = :nid'),
-                {"nid": note_id},
-            )
-            note = result.fetchone()
-            if note and note.userId == user_id and not note.spaceId:
-                await session.execute(
-                    text('UPDATE "Note" SET "spaceId" = :cid WHERE id = :nid'),
-                    {"cid": space_id, "nid": note_id},
-                )
-                await session.commit()
-                imported_stats["notes"] += 1
 
-    # Import Courses
-    for course_id in data.courseIds:
-        async with factory() as session:
-            result = await session.execute(select(Course).where(Course.id == course_id))
-            course = result.scalar_one_or_none()
-            if course and course.user_id == user_id and not course.space_id:
-                stmt = sa_update(Course).where(Course.id == course_id).values(space_id=space_id)
-                await session.execute(stmt)
-                await session.commit()
-                imported_stats["courses"] += 1
-
-    # Import Resources
-    for resource_id in data.resourceIds:
-        async with factory() as session:
-            result = await session.execute(select(Resource).where(Resource.id == resource_id))
-            resource = result.scalar_one_or_none()
-            if resource and resource.user_id == user_id and not resource.space_id:
-                stmt = (
-                    sa_update(Resource).where(Resource.id == resource_id).values(space_id=space_id)
-                )
-                await session.execute(stmt)
-                await session.commit()
-                imported_stats["resources"] += 1
+async def _verify_export(db: Any, space_id: str, user_id: str):
+    """Verify user may copy items out of the space (``Space.allowMemberExport``; OWNER always)."""
+    member = await _verify_membership(db, space_id, user_id)
 
-    # Import Goals
-    if hasattr(data, "goalIds") and data.goalIds:
-        for goal_id in data.goalIds:
-            async with factory() as session:
-                result = await session.execute(select(Goal).where(Goal.id == goal_id))
-                goal = result.scalar_one_or_none()
-                if goal and goal.user_id == user_id and not goal.space_id:
-                    stmt = sa_update(Goal).where(Goal.id == goal_id).values(space_id=space_id)
-                    await session.execute(stmt)
-                    await session.commit()
-                    imported_stats["goals"] += 1
+    space = await space_repo.find_space_basic(space_id)
+    if space is None:
+        raise HTTPException(status_code=404, detail="Space not found.")
 
-    return imported_stats
+    is_owner = str(member.role) == "OWNER"
+    if not is_owner and not space.allow_member_export:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Member export is not allowed for this Space.",
+        )
+    return member
 
 
 async def export_from_space(
@@ -973,7 +933,8 @@ async def export_from_space(
     """Export (copy) a Space resource into the user's Personal_Workspace.
 
     Gated by ``Space.allowMemberExport`` — OWNER is always allowed.
-    The original resource remains in the Space.
+    The original resource remains in the Space; courses are copied with
+    their modules and topics, notes with their tags and attachments.
 
     Args:
         resource_type: One of "note", "course", "goal", "resource"
@@ -982,99 +943,23 @@ async def export_from_space(
     Returns:
         The newly created personal copy.
     """
-    member = await _verify_membership(db, space_id, user_id)
+    await _verify_export(db, space_id, user_id)
 
-    # Check export permission
-    space = await space_repo.find_space_basic(space_id)
-    if space is None:
-        raise HTTPException(status_code=404, detail="Space not found.")
+    from .transfer_service import TRANSFER_TYPES, export_item
 
-    is_owner = str(member.role) == "OWNER"
-    if not is_owner and not space.allow_member_export:
+    kind = f"{resource_type}s"
+    if kind not in TRANSFER_TYPES:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Member export is not allowed for this Space.",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported resource type: {resource_type}",
         )
 
-    from sqlalchemy import text
-    from src.domains.knowledge.db_models import Course
-    from src.domains.progress.db_models import Goal
-
-    factory = get_session_factory()
-
-    if resource_type == "note":
-        import uuid as _uuid
-
-        async with factory() as session:
-            result = await session.execute(
-                text('SELECT * FROM "Note" WHERE id = :nid'),
-                {"nid": resource_id},
-            )
-            original = result.fetchone()
-        if not original or original.spaceId != space_id:
-            raise HTTPException(status_code=404, detail="Note not found in this Space.")
-        new_id = _uuid.uuid4().hex[:25]
-        async with factory() as session:
-            await session.execute(
-                text(
-                    'INSERT INTO "Note" (id, title, content, "userId", "spaceId", summary) '
-                    "VALUES (:id, :title, :content, :uid, NULL, :summary)"
-                ),
-                {
-                    "id": new_id,
-                    "title": original.title,
-                    "content": original.content,
-                    "uid": user_id,
-                    "summary": original.summary,
-                },
-            )
-            await session.commit()
-        return {"type": "note", "id": new_id, "title": original.title}
-
-    elif resource_type == "course":
-        async with factory() as session:
-            result = await session.execute(select(Course).where(Course.id == resource_id))
-            original = result.scalar_one_or_none()
-        if not original or original.space_id != space_id:
-            raise HTTPException(status_code=404, detail="Course not found in this Space.")
-        async with factory() as session:
-            copy = Course(
-                title=original.title,
-                description=original.description,
-                user_id=user_id,
-                space_id=None,
-                difficulty=original.difficulty,
-                is_ai_generated=original.is_ai_generated,
-            )
-            session.add(copy)
-            await session.commit()
-            await session.refresh(copy)
-        return {"type": "course", "id": copy.id, "title": copy.title}
-
-    elif resource_type == "goal":
-        async with factory() as session:
-            result = await session.execute(select(Goal).where(Goal.id == resource_id))
-            original = result.scalar_one_or_none()
-        if not original or original.space_id != space_id:
-            raise HTTPException(status_code=404, detail="Goal not found in this Space.")
-        async with factory() as session:
-            copy = Goal(
-                title=original.title,
-                description=original.description,
-                user_id=user_id,
-                space_id=None,
-                target_date=original.target_date,
-            )
-            session.add(copy)
-            await session.commit()
-            await session.refresh(copy)
-        return {"type": "goal", "id": copy.id, "title": copy.title}
-
-    else:
+    copy = await export_item(space_id, user_id, kind, resource_id)
+    if copy is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported resource type: {resource_type}",
+            status_code=404, detail=f"{resource_type.capitalize()} not found in this Space."
         )
+    return {"type": resource_type, "id": copy.id, "title": copy.title}
 
 
 # --- Group Sessions ---
@@ -1260,25 +1145,29 @@ Provide your response strictly as valid JSON matching this schema:
         import json
         import re
 
-        from google import genai
         from google.genai import types
 
+        from src.domains.intelligence.reasoning.llm.clients import (
+            estimate_tokens,
+            llm_clients,
+            usage_tokens,
+        )
         from src.domains.intelligence.reasoning.llm.registry import (
             LlmTask,
             default_model_for,
-            gemini_api_key,
         )
 
-        client = genai.Client(api_key=gemini_api_key() or None)
-        response = await client.aio.models.generate_content(
-            model=default_model_for(LlmTask.STRUCTURED_COMPLETION),
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=800,
-                temperature=0.7,
-                response_mime_type="application/json",
-            ),
-        )
+        async with llm_clients.slot("gemini", tokens=estimate_tokens(prompt, 800)) as slot:
+            response = await slot.client.aio.models.generate_content(
+                model=default_model_for(LlmTask.STRUCTURED_COMPLETION),
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    max_output_tokens=800,
+                    temperature=0.7,
+                    response_mime_type="application/json",
+                ),
+            )
+            slot.report_usage(usage_tokens(response))
         text = (response.text or "").strip()
 
         try:
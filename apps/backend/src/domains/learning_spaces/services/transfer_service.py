@@ -0,0 +1,226 @@
+"""
+Space transfers — bulk import into and export out of a Learning Space.
+
+- Import moves the learner's own notes, courses, resources and goals into the
+  space with one UPDATE per type. Its WHERE clause (``id = ANY(:ids)``, owned
+  by the learner, not yet in a space) is also the ownership check.
+- Export deep-copies space items into the learner's personal workspace with
+  one ``INSERT ... SELECT`` per table: courses with their modules and topics,
+  notes with their tags and attachments.
+
+``transfer`` applies every type in one transaction. Transfers of more than
+``SPACE_TRANSFER_ASYNC_THRESHOLD`` items are queued by ``start_transfer`` as
+the ``learning_spaces.transfer`` job instead, which commits every
+``SPACE_TRANSFER_BATCH_SIZE`` ids and reports its progress.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import status
+
+from src.config import get_settings
+from src.shared.database import get_session_factory
+from src.shared.exceptions import MaigieError, NotFoundError
+
+from ..models import ExportRequest, ImportRequest
+from ..repository import TRANSFER_MODELS, space_repo
+
+logger = logging.getLogger(__name__)
+
+IMPORT = "import"
+EXPORT = "export"
+TRANSFER_TYPES = tuple(TRANSFER_MODELS)
+
+# Request field holding each type's ids
+REQUEST_FIELDS = {
+    "notes": "noteIds",
+    "courses": "courseIds",
+    "resources": "resourceIds",
+    "goals": "goalIds",
+}
+
+_JOB_OWNER_TTL_SECONDS = 86_400
+
+# Celery states as reported to clients
+_JOB_STATUSES = {
+    "pending": "queued",
+    "received": "queued",
+    "started": "running",
+    "progress": "running",
+    "retry": "running",
+    "success": "success",
+    "failure": "failed",
+    "revoked": "failed",
+}
+
+ProgressCallback = Callable[[int, int, dict[str, int]], None]
+
+
+def ids_by_type(data: ImportRequest | ExportRequest) -> dict[str, list[str]]:
+    """The request's ids per transfer type, without duplicates."""
+    return {
+        kind: list(dict.fromkeys(getattr(data, field))) for kind, field in REQUEST_FIELDS.items()
+    }
+
+
+def transfer_size(ids: dict[str, list[str]]) -> int:
+    return sum(len(ids.get(kind) or ()) for kind in TRANSFER_TYPES)
+
+
+async def _apply(
+    session: Any, direction: str, space_id: str, user_id: str, ids: dict[str, list[str]], salt: str
+) -> dict[str, int]:
+    counts = dict.fromkeys(TRANSFER_TYPES, 0)
+    for kind in TRANSFER_TYPES:
+        kind_ids = ids.get(kind)
+        if not kind_ids:
+            continue
+        if direction == IMPORT:
+            counts[kind] = await space_repo.import_into_space(
+                session, kind, space_id, user_id, kind_ids
+            )
+        else:
+            copies = await space_repo.copy_from_space(
+                session, kind, space_id, user_id, kind_ids, salt
+            )
+            counts[kind] = len(copies)
+    return counts
+
+
+async def transfer(
+    direction: str, space_id: str, user_id: str, ids: dict[str, list[str]]
+) -> dict[str, int]:
+    """
+    Import or export ``ids`` in one transaction; returns the count per type.
+
+    Ids the learner may not transfer (someone else's, already in a space,
+    not in this space) are skipped and not counted.
+    """
+    async with get_session_factory()() as session:
+        counts = await _apply(session, direction, space_id, user_id, ids, uuid.uuid4().hex)
+        await session.commit()
+    return counts
+
+
+async def export_item(space_id: str, user_id: str, kind: str, item_id: str) -> Any | None:
+    """Copy one space item into the learner's workspace; ``(id, title)`` of the copy or None."""
+    async with get_session_factory()() as session:
+        copies = await space_repo.copy_from_space(
+            session, kind, space_id, user_id, [item_id], uuid.uuid4().hex
+        )
+        await session.commit()
+    return copies[0] if copies else None
+
+
+async def run_transfer(
+    direction: str,
+    space_id: str,
+    user_id: str,
+    ids: dict[str, list[str]],
+    *,
+    batch_size: int | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> dict[str, int]:
+    """
+    Apply a large transfer in pages of ``batch_size`` ids, one transaction each.
+
+    ``on_progress(done, total, counts)`` is called after every page. A failed
+    page leaves the earlier pages applied; re-running the same request is
+    safe for imports (moved items no longer match) but copies again on export.
+    """
+    batch_size = batch_size or get_settings().SPACE_TRANSFER_BATCH_SIZE
+    salt = uuid.uuid4().hex
+    total, done = transfer_size(ids), 0
+    counts = dict.fromkeys(TRANSFER_TYPES, 0)
+    factory = get_session_factory()
+    for kind in TRANSFER_TYPES:
+        kind_ids = ids.get(kind) or []
+        for start in range(0, len(kind_ids), batch_size):
+            page = kind_ids[start : start + batch_size]
+            async with factory() as session:
+                applied = await _apply(session, direction, space_id, user_id, {kind: page}, salt)
+                await session.commit()
+            counts[kind] += applied[kind]
+            done += len(page)
+            if on_progress is not None:
+                on_progress(done, total, counts)
+    return counts
+
+
+# --- Jobs ---
+
+
+def _job_owner_key(task_id: str) -> str:
+    return f"space_transfer_job:{task_id}"
+
+
+async def start_transfer(
+    direction: str, *, space_id: str, user_id: str, ids: dict[str, list[str]]
+) -> dict:
+    """
+    Check the learner may transfer, then run the transfer or queue it.
+
+    Returns ``{"status": "completed", "counts": {...}}``, or for transfers
+    above ``SPACE_TRANSFER_ASYNC_THRESHOLD`` items ``{"taskId": ...,
+    "status": "queued"}`` to poll with ``get_transfer_job``.
+    """
+    from .space_impl import _verify_export, _verify_membership
+
+    if direction == IMPORT:
+        await _verify_membership(None, space_id, user_id)
+    else:
+        await _verify_export(None, space_id, user_id)
+
+    if transfer_size(ids) <= get_settings().SPACE_TRANSFER_ASYNC_THRESHOLD:
+        counts = await transfer(direction, space_id, user_id, ids)
+        return {"status": "completed", "counts": counts}
+
+    from src.shared.infrastructure import cache
+    from src.workers.learning_spaces_tasks import space_transfer_task
+
+    task_id = uuid.uuid4().hex
+    # Record ownership before queueing: a job whose owner is unknown could never be polled.
+    owner = {"userId": user_id, "spaceId": space_id}
+    if not await cache.set(_job_owner_key(task_id), owner, expire=_JOB_OWNER_TTL_SECONDS):
+        logger.error("Refusing to queue space transfer: owner could not be recorded")
+        raise MaigieError(
+            "Large transfers are temporarily unavailable",
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "SERVICE_UNAVAILABLE",
+        )
+    space_transfer_task.apply_async(
+        task_id=task_id,
+        kwargs={"direction": direction, "space_id": space_id, "user_id": user_id, "ids": ids},
+    )
+    return {"taskId": task_id, "status": "queued"}
+
+
+async def get_transfer_job(task_id: str, *, space_id: str, user_id: str) -> dict:
+    """
+    Status of a queued transfer, with ``progress`` while it runs and
+    ``counts`` once done. Unknown jobs, other learners' jobs and jobs of
+    another space are not found.
+    """
+    from celery.result import AsyncResult
+
+    from src.shared.infrastructure import cache
+    from src.workers.celery_app import celery_app
+
+    if await cache.get(_job_owner_key(task_id)) != {"userId": user_id, "spaceId": space_id}:
+        raise NotFoundError("Transfer job", task_id)
+
+    result = AsyncResult(task_id, app=celery_app)
+    state = (result.state or "PENDING").lower()
+    body: dict = {"taskId": task_id, "status": _JOB_STATUSES.get(state, state)}
+    if state == "progress" and isinstance(result.info, dict):
+        body["progress"] = result.info
+    elif result.successful():
+        body["counts"] = result.result
+    elif result.failed():
+        body["error"] = "Transfer failed"
+    return body
@@ -10,7 +10,18 @@ Column names use camelCase to match the existing schema exactly.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text, ForeignKey, Index, JSON
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    Text,
+    ForeignKey,
+    Index,
+    JSON,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.shared.database.base import Base, TimestampMixin
@@ -442,6 +453,11 @@ class LearningProfile(Base, TimestampMixin):
 # ---------------------------------------------------------------------------
 
 
+# Statuses the delivery pipeline picks up once scheduledAt has passed
+# (QUEUED: held back until the learner's quiet hours end)
+DELIVERABLE_NOTIFICATION_STATUSES = ("PENDING", "QUEUED")
+
+
 class Notification(Base, TimestampMixin):
     __tablename__ = "Notification"
 
@@ -473,6 +489,12 @@ class Notification(Base, TimestampMixin):
     __table_args__ = (
         Index("Notification_userId_status_idx", "userId", "status"),
         Index("Notification_scheduledAt_idx", "scheduledAt"),
+        # Delivery queue: only rows still waiting to go out, in due order
+        Index(
+            "Notification_due_idx",
+            "scheduledAt",
+            postgresql_where=text("status IN ('PENDING', 'QUEUED')"),
+        ),
     )
 
     def __repr__(self) -> str:
@@ -140,11 +140,55 @@ async def emit_study_plan_item_completed(user_id: str, plan_id: str, item_id: st
     )
 
 
+async def emit_profile_updated(user_id: str) -> None:
+    await emit("personal_learning.profile_updated", {"user_id": user_id})
+
+
+async def emit_preparation_created(user_id: str, prep_id: str) -> None:
+    await emit(
+        "personal_learning.preparation_created",
+        {
+            "user_id": user_id,
+            "prep_id": prep_id,
+        },
+    )
+
+
+async def emit_study_plan_created(user_id: str, plan_id: str) -> None:
+    await emit(
+        "personal_learning.study_plan_created",
+        {
+            "user_id": user_id,
+            "plan_id": plan_id,
+        },
+    )
+
+
 # ===========================================================================
-# Events Consumed (from other domains)
+# Events Consumed
 # ===========================================================================
 
 
+@listen("personal_learning.flashcard_reviewed")
+@listen("personal_learning.note_created")
+@listen("personal_learning.topic_completed")
+@listen("personal_learning.quiz_completed")
+@listen("personal_learning.study_plan_item_completed")
+@listen("personal_learning.study_plan_created")
+@listen("personal_learning.preparation_created")
+@listen("personal_learning.preparation_completed")
+@listen("personal_learning.profile_updated")
+@listen("knowledge.topic_completed")
+@listen("user.onboarded")
+async def handle_home_inputs_changed(data: dict) -> None:
+    """Rebuild the learner's home snapshot in the background."""
+    from .services.home_snapshot import home_snapshots
+
+    user_id = data.get("user_id")
+    if user_id:
+        await home_snapshots.invalidate(user_id)
+
+
 @listen("progress.streak_updated")
 async def handle_streak_updated(data: dict) -> None:
     """Check for streak milestones and generate celebration notifications."""
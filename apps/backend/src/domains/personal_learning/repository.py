@@ -17,13 +17,14 @@ from contextlib import asynccontextmanager
 from datetime import UTC, datetime, timedelta, timezone
 from typing import Any
 
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete, func, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.shared.database import get_session_factory
 
 from .db_models import (
+    DELIVERABLE_NOTIFICATION_STATUSES,
     ActivityFeedEntry,
     DiscoveryRecommendation,
     ExamPrep,
@@ -670,73 +671,58 @@ class PersonalLearningRepository:
     async def get_flashcard_stats(
         self, user_id: str, *, session: AsyncSession | None = None
     ) -> dict[str, Any]:
+        """Counts, review activity and current streak in one aggregate query.
+
+        Review days (UTC) come from the learner's REVIEW activity-day bitset,
+        read in the same statement, so the streak and the week's active days
+        are bit operations rather than a scan of review history.
+        """
+        from src.domains.progress.db_models import UserActivityDays
+        from src.domains.progress.services.activity_days import REVIEW, DayBitmap
+
         async with self._use_session(session) as s:
             now = datetime.now(timezone.utc)
             today = now.date()
             week_start_date = today - timedelta(days=today.weekday())
-
-            total_stmt = (
-                select(func.count()).select_from(Flashcard).where(Flashcard.user_id == user_id)
-            )
-            total = (await s.execute(total_stmt)).scalar() or 0
-
-            due_stmt = (
-                select(func.count())
-                .select_from(Flashcard)
-                .where(
-                    Flashcard.user_id == user_id,
-                    Flashcard.next_review_at <= now,
-                )
-            )
-            due_today = (await s.execute(due_stmt)).scalar() or 0
-
-            mastered_stmt = (
-                select(func.count())
-                .select_from(Flashcard)
-                .where(
-                    Flashcard.user_id == user_id,
-                    Flashcard.interval_days > 21,
-                )
-            )
-            mastered_count = (await s.execute(mastered_stmt)).scalar() or 0
-
-            avg_ease_stmt = select(func.avg(Flashcard.ease_factor)).where(
-                Flashcard.user_id == user_id
-            )
-            avg_ease_factor = (await s.execute(avg_ease_stmt)).scalar() or 2.5
-
-            activity_stmt = select(Flashcard.last_reviewed_at).where(
-                Flashcard.user_id == user_id,
-                Flashcard.last_reviewed_at.is_not(None),
-            )
-            activity_result = await s.execute(activity_stmt)
-            review_timestamps = [value for value in activity_result.scalars().all() if value]
-            activity_dates = {value.date() for value in review_timestamps}
-            active_days_this_week = sorted(
-                value.isoformat() for value in activity_dates if value >= week_start_date
-            )
-            reviewed_this_week = sum(
-                1 for value in review_timestamps if value.date() >= week_start_date
-            )
-
-            streak_cursor = today
-            if streak_cursor not in activity_dates:
-                yesterday = today - timedelta(days=1)
-                streak_cursor = yesterday if yesterday in activity_dates else today
-            current_streak = 0
-            while streak_cursor in activity_dates:
-                current_streak += 1
-                streak_cursor -= timedelta(days=1)
-
+            week_start = datetime.combine(week_start_date, datetime.min.time(), tzinfo=UTC)
+
+            reviewed = Flashcard.last_reviewed_at
+            review_days = (
+                select(UserActivityDays.bits)
+                .where(UserActivityDays.user_id == user_id, UserActivityDays.kind == REVIEW)
+                .scalar_subquery()
+            )
+            stmt = select(
+                func.count(),
+                func.count().filter(Flashcard.next_review_at <= now),
+                func.count().filter(Flashcard.interval_days > 21),
+                func.avg(Flashcard.ease_factor),
+                func.count(reviewed),
+                func.count().filter(reviewed >= week_start),
+                review_days,
+            ).where(Flashcard.user_id == user_id)
+            (
+                total,
+                due_today,
+                mastered_count,
+                avg_ease_factor,
+                reviewed_total,
+                reviewed_this_week,
+                review_bits,
+            ) = (await s.execute(stmt)).one()
+
+            days = DayBitmap(review_bits)
             return {
-                "total": total,
-                "due_today": due_today,
-                "mastered_count": mastered_count,
-                "avg_ease_factor": round(float(avg_ease_factor), 2),
-                "reviewed_total": len(review_timestamps),
-                "reviewed_this_week": reviewed_this_week,
-                "active_days_this_week": active_days_this_week,
-                "current_streak": current_streak,
+                "total": total or 0,
+                "due_today": due_today or 0,
+                "mastered_count": mastered_count or 0,
+                "avg_ease_factor": round(float(avg_ease_factor or 2.5), 2),
+                "reviewed_total": reviewed_total or 0,
+                "reviewed_this_week": reviewed_this_week or 0,
+                "active_days_this_week": [
+                    day.isoformat() for day in days.active_days(week_start_date, today)
+                ],
+                "current_streak": days.current_streak(today),
             }
 
     # -----------------------------------------------------------------------
@@ -1126,22 +1112,6 @@ class PersonalLearningRepository:
             result = (await s.execute(stmt)).scalar() or 0
             return result
 
-    async def list_pending_for_delivery(
-        self, *, session: AsyncSession | None = None
-    ) -> list[Notification]:
-        async with self._use_session(session) as s:
-            now = datetime.now(timezone.utc)
-            stmt = (
-                select(Notification)
-                .where(
-                    Notification.status == "PENDING",
-                    Notification.scheduled_at <= now,
-                )
-                .order_by(Notification.scheduled_at.asc())
-            )
-            result = await s.execute(stmt)
-            return list(result.scalars().all())
-
     async def update_status(
         self,
         notification_id: str,
@@ -1157,6 +1127,94 @@ class PersonalLearningRepository:
             stmt = update(Notification).where(Notification.id == notification_id).values(**values)
             await s.execute(stmt)
 
+    async def get_delivery_context(
+        self, user_id: str, *, now: datetime, session: AsyncSession | None = None
+    ) -> tuple[Any | None, int]:
+        """The learner's scheduling fields and today's delivered count, in one query.
+
+        The profile row carries the same fields as the cohort notification
+        rows (``user_id``, quiet hours, ``max_daily_notifications``,
+        ``preferred_study_times``); it is None when the learner has no profile.
+        """
+        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        delivered_today = (
+            select(func.count())
+            .where(
+                Notification.user_id == user_id,
+                Notification.delivered_at >= start_of_day,
+                Notification.delivered_at < start_of_day + timedelta(days=1),
+            )
+            .scalar_subquery()
+        )
+        async with self._use_session(session) as s:
+            stmt = select(
+                LearningProfile.user_id,
+                LearningProfile.quiet_hours_start,
+                LearningProfile.quiet_hours_end,
+                LearningProfile.max_daily_notifications,
+                LearningProfile.preferred_study_times,
+                delivered_today.label("delivered_today"),
+            ).where(LearningProfile.user_id == user_id)
+            profile = (await s.execute(stmt)).first()
+            if profile is not None:
+                return profile, profile.delivered_today
+            return None, (await s.execute(select(delivered_today))).scalar() or 0
+
+    async def claim_due_notifications(
+        self, *, now: datetime, limit: int, session: AsyncSession
+    ) -> list[Any]:
+        """Lock up to ``limit`` due notifications together with the learner's quiet hours.
+
+        ``FOR UPDATE OF "Notification" SKIP LOCKED``: concurrent deliverers
+        each get a disjoint batch and hold it until their transaction ends,
+        so ``session`` must be the transaction that records the outcome.
+        """
+        stmt = (
+            select(
+                Notification.id,
+                Notification.user_id,
+                Notification.type,
+                Notification.title,
+                Notification.body,
+                Notification.action_data,
+                LearningProfile.quiet_hours_start,
+                LearningProfile.quiet_hours_end,
+            )
+            .outerjoin(LearningProfile, LearningProfile.user_id == Notification.user_id)
+            .where(
+                Notification.status.in_(DELIVERABLE_NOTIFICATION_STATUSES),
+                Notification.scheduled_at <= now,
+            )
+            .order_by(Notification.scheduled_at)
+            .limit(limit)
+            .with_for_update(of=Notification, skip_locked=True)
+        )
+        return list((await session.execute(stmt)).all())
+
+    async def mark_notifications_delivered(
+        self, notification_ids: list[str], *, delivered_at: datetime, session: AsyncSession
+    ) -> None:
+        if not notification_ids:
+            return
+        stmt = (
+            update(Notification)
+            .where(Notification.id.in_(notification_ids))
+            .values(status="DELIVERED", delivered_at=delivered_at)
+        )
+        await session.execute(stmt)
+
+    async def reschedule_notifications(
+        self, schedule: dict[str, tuple[str, datetime]], *, session: AsyncSession
+    ) -> None:
+        """Bulk move notifications to ``(status, scheduled_at)``, keyed by id."""
+        if not schedule:
+            return
+        params = [
+            {"id": notification_id, "status": status, "scheduled_at": scheduled_at}
+            for notification_id, (status, scheduled_at) in schedule.items()
+        ]
+        await session.execute(update(Notification), params)
+
     # -----------------------------------------------------------------------
     # Field mapping helpers — Notifications
     # -----------------------------------------------------------------------
@@ -1189,6 +1247,19 @@ class PersonalLearningRepository:
             await s.refresh(topic)
             return topic
 
+    async def create_prep_topics(
+        self, rows: list[dict[str, Any]], *, session: AsyncSession | None = None
+    ) -> list[PrepTopic]:
+        """Insert many topics in one statement; returned in input order."""
+        if not rows:
+            return []
+        async with self._use_session(session) as s:
+            result = await s.scalars(
+                insert(PrepTopic).returning(PrepTopic, sort_by_parameter_order=True),
+                [self._map_prep_topic(row) for row in rows],
+            )
+            return list(result.all())
+
     async def list_prep_topics(
         self, prep_id: str, *, session: AsyncSession | None = None
     ) -> list[PrepTopic]:
@@ -2039,6 +2110,163 @@ class PersonalLearningRepository:
             )
             await s.execute(stmt)
 
+    # -----------------------------------------------------------------------
+    # Cohort jobs (set-based reads and bulk writes over a page of learners)
+    # -----------------------------------------------------------------------
+
+    @staticmethod
+    async def _count_by_user(s: AsyncSession, user_column: Any, *criteria: Any) -> dict[str, int]:
+        stmt = select(user_column, func.count()).where(*criteria).group_by(user_column)
+        return {user_id: count for user_id, count in (await s.execute(stmt)).all()}
+
+    async def count_due_flashcards_by_user(
+        self, user_ids: list[str], *, now: datetime, session: AsyncSession | None = None
+    ) -> dict[str, int]:
+        async with self._use_session(session) as s:
+            return await self._count_by_user(
+                s,
+                Flashcard.user_id,
+                Flashcard.user_id.in_(user_ids),
+                Flashcard.next_review_at <= now,
+            )
+
+    async def count_active_plans_by_user(
+        self, user_ids: list[str], *, session: AsyncSession | None = None
+    ) -> dict[str, int]:
+        async with self._use_session(session) as s:
+            return await self._count_by_user(
+                s, StudyPlan.user_id, StudyPlan.user_id.in_(user_ids), StudyPlan.status == "ACTIVE"
+            )
+
+    async def count_delivered_today_by_user(
+        self, user_ids: list[str], *, now: datetime, session: AsyncSession | None = None
+    ) -> dict[str, int]:
+        """``count_today_delivered`` for many learners in one statement."""
+        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        async with self._use_session(session) as s:
+            return await self._count_by_user(
+                s,
+                Notification.user_id,
+                Notification.user_id.in_(user_ids),
+                Notification.delivered_at >= start_of_day,
+                Notification.delivered_at < start_of_day + timedelta(days=1),
+            )
+
+    async def create_notifications(
+        self, rows: list[dict[str, Any]], *, session: AsyncSession | None = None
+    ) -> int:
+        """Bulk INSERT notifications (same fields as ``create_notification``)."""
+        if not rows:
+            return 0
+        async with self._use_session(session) as s:
+            await s.execute(insert(Notification), [self._map_notification(r) for r in rows])
+            return len(rows)
+
+    async def list_study_sessions_by_user(
+        self, user_ids: list[str], *, since: datetime, session: AsyncSession | None = None
+    ) -> dict[str, list[Any]]:
+        """Study sessions started since ``since``, grouped by learner (oldest first)."""
+        from src.domains.progress.db_models import StudySession
+
+        async with self._use_session(session) as s:
+            stmt = (
+                select(StudySession.user_id, StudySession.start_time, StudySession.duration)
+                .where(StudySession.user_id.in_(user_ids), StudySession.start_time >= since)
+                .order_by(StudySession.user_id, StudySession.start_time)
+            )
+            by_user: dict[str, list[Any]] = {}
+            for row in (await s.execute(stmt)).all():
+                by_user.setdefault(row.user_id, []).append(row)
+            return by_user
+
+    async def update_profiles_behaviour(
+        self, updates: dict[str, dict[str, Any]], *, session: AsyncSession | None = None
+    ) -> None:
+        """Bulk ``update_profile_behaviour``, keyed by LearningProfile id."""
+        params = []
+        for profile_id, data in updates.items():
+            mapped = self._map_profile(data)
+            if mapped:
+                params.append({"id": profile_id, **mapped})
+        if not params:
+            return
+        async with self._use_session(session) as s:
+            # ORM bulk UPDATE by primary key: one executemany for the whole page
+            await s.execute(update(LearningProfile), params)
+
+    async def increment_maturity_days_many(
+        self, user_ids: list[str], *, session: AsyncSession | None = None
+    ) -> None:
+        async with self._use_session(session) as s:
+            stmt = (
+                update(LearningProfile)
+                .where(LearningProfile.user_id.in_(user_ids))
+                .values(maturity_days=LearningProfile.maturity_days + 1)
+            )
+            await s.execute(stmt)
+
+    async def expire_trials(
+        self, user_ids: list[str], *, now: datetime, session: AsyncSession | None = None
+    ) -> list[str]:
+        """Stamp ``last_trial_ended_at`` on overdue trials; returns the users expired."""
+        async with self._use_session(session) as s:
+            stmt = (
+                update(LearningProfile)
+                .where(
+                    LearningProfile.user_id.in_(user_ids),
+                    LearningProfile.trial_ends_at < now,
+                    LearningProfile.last_trial_ended_at.is_(None),
+                )
+                .values(last_trial_ended_at=now)
+                .returning(LearningProfile.user_id)
+            )
+            return list((await s.execute(stmt)).scalars().all())
+
+    async def get_value_summary_counts(
+        self, user_ids: list[str], *, since: datetime, session: AsyncSession | None = None
+    ) -> dict[str, dict[str, int]]:
+        """Activity counts behind the value summary, per learner, since ``since``."""
+        async with self._use_session(session) as s:
+            plan_items = (
+                select(StudyPlan.user_id, func.count())
+                .join(StudyPlanItem, StudyPlanItem.plan_id == StudyPlan.id)
+                .where(StudyPlan.user_id.in_(user_ids), StudyPlanItem.completed_at >= since)
+                .group_by(StudyPlan.user_id)
+            )
+            counts = {
+                "documents": await self._count_by_user(
+                    s,
+                    GeneratedDocument.user_id,
+                    GeneratedDocument.user_id.in_(user_ids),
+                    GeneratedDocument.created_at >= since,
+                ),
+                "flashcards_reviewed": await self._count_by_user(
+                    s,
+                    Flashcard.user_id,
+                    Flashcard.user_id.in_(user_ids),
+                    Flashcard.last_reviewed_at >= since,
+                ),
+                "quizzes_taken": await self._count_by_user(
+                    s,
+                    QuizSession.user_id,
+                    QuizSession.user_id.in_(user_ids),
+                    QuizSession.status == "COMPLETED",
+                    QuizSession.created_at >= since,
+                ),
+                "plan_items_completed": dict((await s.execute(plan_items)).all()),
+                "preps_completed": await self._count_by_user(
+                    s,
+                    ExamPrep.user_id,
+                    ExamPrep.user_id.in_(user_ids),
+                    ExamPrep.status == "COMPLETED",
+                    ExamPrep.updated_at >= since,
+                ),
+            }
+            return {
+                user_id: {name: by_user.get(user_id, 0) for name, by_user in counts.items()}
+                for user_id in user_ids
+            }
+
 
 # Singleton
 personal_learning_repo = PersonalLearningRepository()
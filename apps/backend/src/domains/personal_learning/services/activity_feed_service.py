@@ -39,10 +39,13 @@ async def record(
         }
     )
 
-    # Check streak milestone after recording activity
+    # Mark the day active; the streak can only grow on the day's first activity,
+    # so that is when milestones are checked
     try:
-        streak = await _compute_current_streak(user_id)
-        if streak >= 7:
+        from src.domains.progress.services.activity_tracker import record_activity
+
+        streak = await record_activity(user_id, at=now)
+        if streak is not None and streak >= 7:
             from . import milestone_service
 
             await milestone_service.check_milestones(user_id, {"current_streak": streak})
@@ -61,43 +64,3 @@ async def list_feed(*, user_id: str, page: int = 1, page_size: int = 20) -> tupl
     """
     skip = (page - 1) * page_size
     return await repo.list_feed_entries(user_id, skip=skip, take=page_size)
-
-
-async def _compute_current_streak(user_id: str) -> int:
-    """
-    Compute the current consecutive-day streak for a user.
-
-    Counts backwards from today: how many consecutive days have at least one activity.
-    """
-    from src.shared.database.session import get_session_factory
-    from src.domains.personal_learning.db_models import ActivityFeedEntry
-    from sqlalchemy import select, func, cast, Date
-
-    factory = get_session_factory()
-    async with factory() as session:
-        # Get distinct activity dates in the last 30 days, ordered desc
-        thirty_days_ago = datetime.now(timezone.utc) - __import__("datetime").timedelta(days=30)
-        stmt = (
-            select(func.distinct(cast(ActivityFeedEntry.occurred_at, Date)))
-            .where(ActivityFeedEntry.user_id == user_id)
-            .where(ActivityFeedEntry.occurred_at >= thirty_days_ago)
-            .order_by(cast(ActivityFeedEntry.occurred_at, Date).desc())
-        )
-        result = await session.execute(stmt)
-        dates = [row[0] for row in result.all()]
-
-    if not dates:
-        return 0
-
-    # Count consecutive days from today backwards
-    today = datetime.now(timezone.utc).date()
-    streak = 0
-
-    for i, d in enumerate(dates):
-        expected = today - __import__("datetime").timedelta(days=i)
-        if d == expected:
-            streak += 1
-        else:
-            break
-
-    return streak
@@ -8,15 +8,21 @@ Feeds insights into Home_Service, StudyPlan_Service, and Proactive_Intelligence.
 
 import logging
 from collections import Counter
+from collections.abc import Sequence
 from datetime import datetime, timedelta, timezone
 from statistics import mean
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from ..repository import personal_learning_repo as repo
 from .cache import cached
 
 logger = logging.getLogger(__name__)
 
+# Study history the nightly analysis looks at
+BEHAVIOUR_WINDOW_DAYS = 30
+
 
 async def get_behaviour_profile(*, user_id: str) -> dict[str, Any]:
     """
@@ -82,14 +88,53 @@ async def _get_behaviour_profile_cached(*, user_id: str) -> dict[str, Any]:
 
 async def analyze_behaviour(*, user_id: str, sessions: list[Any]) -> dict[str, Any]:
     """
-    Compute behaviour metrics from a list of study sessions.
-    Called by the background task with recent session data.
+    Compute behaviour metrics from a list of study sessions and cache them
+    on the learner's profile.
 
     Req 11.3: Compute preferred study times, average session duration,
     most productive periods, consistency score (capped at 100), and best day.
 
     Req 11.6: Identify patterns that correlate with dropout.
     """
+    behaviour_data = compute_behaviour(sessions)
+    if not sessions:
+        return behaviour_data
+
+    await repo.update_profile_behaviour(user_id, behaviour_data)
+
+    # Invalidate the cached behaviour profile since we just updated it
+    await _get_behaviour_profile_cached.invalidate(user_id=user_id)
+
+    return behaviour_data
+
+
+async def analyze_cohort(s: AsyncSession, profiles: Sequence[Any], now: datetime) -> int:
+    """
+    Nightly behaviour analysis for a page of learners (cohort batch function).
+
+    ``profiles`` are rows carrying the profile ``id`` and ``user_id``. Study
+    sessions from the last ``BEHAVIOUR_WINDOW_DAYS`` are read for the whole
+    page at once, metrics are computed per learner and written back with one
+    bulk UPDATE; every learner's ``maturity_days`` also advances by one.
+    """
+    user_ids = [p.user_id for p in profiles]
+    sessions = await repo.list_study_sessions_by_user(
+        user_ids, since=now - timedelta(days=BEHAVIOUR_WINDOW_DAYS), session=s
+    )
+    updates = {
+        p.id: compute_behaviour(sessions[p.user_id]) for p in profiles if p.user_id in sessions
+    }
+    await repo.update_profiles_behaviour(updates, session=s)
+    await repo.increment_maturity_days_many(user_ids, session=s)
+
+    for p in profiles:
+        if p.id in updates:
+            await _get_behaviour_profile_cached.invalidate(user_id=p.user_id)
+    return len(profiles)
+
+
+def compute_behaviour(sessions: Sequence[Any]) -> dict[str, Any]:
+    """Behaviour metrics for sessions with ``start_time`` and ``duration``."""
     if not sessions:
         return {
             "preferredStudyTimes": None,
@@ -118,20 +163,13 @@ async def analyze_behaviour(*, user_id: str, sessions: list[Any]) -> dict[str, A
     # Dropout risk
     dropout_risk = _compute_dropout_risk(sessions)
 
-    # Update the profile cache
-    behaviour_data = {
+    return {
         "preferredStudyTimes": preferred_times,
         "avgSessionMinutes": round(avg_duration, 1),
         "consistencyScore": min(consistency, 100.0),  # Capped at 100
         "bestDayOfWeek": best_day,
         "dropoutRisk": round(dropout_risk, 2),
     }
-    await repo.update_profile_behaviour(user_id, behaviour_data)
-
-    # Invalidate the cached behaviour profile since we just updated it
-    await _get_behaviour_profile_cached.invalidate(user_id=user_id)
-
-    return behaviour_data
 
 
 def _compute_preferred_times(hours: list[int]) -> dict[str, Any]:
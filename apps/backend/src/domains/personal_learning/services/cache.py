@@ -1,13 +1,25 @@
 """
-Simple async TTL cache for the Personal Learning domain.
+Async two-tier cache for the Personal Learning domain.
 
 Reduces database load for frequently-read, infrequently-changing data like
 behaviour profiles, flashcard stats, and learning profiles.
 
-This is an in-process LRU+TTL cache — no external dependency (Redis).
-Suitable for single-instance or low-traffic multi-instance deployments.
-For high-traffic multi-instance deployments, swap this for a Redis-backed
-implementation with the same interface.
+``@cached`` keeps results in two tiers:
+
+- **L1** — an in-process LRU with per-entry TTL;
+- **L2** — Redis (the shared ``src.shared.infrastructure`` cache), so a
+  result computed on one worker is reused by every other. Values must be
+  JSON-serialisable; pass ``shared=False`` to keep a function process-local.
+
+Concurrent misses for the same key are coalesced (single-flight): one call
+runs the function, the others await its result. ``invalidate()`` drops the
+entry from both tiers and, once ``cache_invalidations.start()`` has run,
+broadcasts over Redis pub/sub so every node drops its L1 copy too. With
+``stale_seconds`` set, an expired entry is still served for that long while
+a single background refresh recomputes it (stale-while-revalidate).
+
+When Redis is unavailable both L2 and the broadcast are skipped and the
+cache behaves as a per-process LRU.
 
 Usage:
     from .cache import cached
@@ -16,25 +28,43 @@ Usage:
     async def get_behaviour_profile(*, user_id: str) -> dict:
         ...
 
-    # Invalidate a specific entry:
-    get_behaviour_profile.invalidate(user_id="abc123")
+    @cached(ttl_seconds=300, key_args=("user_id", "course_id"), stale_seconds=60)
+    async def get_course_progress(*, user_id: str, course_id: str) -> dict:
+        ...
+
+    # Invalidate a specific entry (every node):
+    await get_behaviour_profile.invalidate(user_id="abc123")
+
+    # Clear all entries for a function (this node's L1):
+    await get_behaviour_profile.clear()
 
-    # Clear all entries for a function:
-    get_behaviour_profile.clear()
+    # Per-function hit/miss/latency counters:
+    get_behaviour_profile.get_stats()
 """
 
+from __future__ import annotations
+
 import asyncio
 import functools
+import json
 import logging
 import time
 from collections import OrderedDict
+from collections.abc import Sequence
 from typing import Any, Callable, Coroutine
+from uuid import uuid4
+
+from src.shared.infrastructure import cache as redis_cache
 
 logger = logging.getLogger(__name__)
 
 
-class _TTLCache:
-    """Thread-safe (asyncio-safe) LRU cache with per-entry TTL."""
+class TTLCache:
+    """Thread-safe (asyncio-safe) LRU cache with per-entry TTL.
+
+    A plain in-process store for callers that manage their own keys (e.g.
+    ``render_cache``); ``@cached`` functions use ``_TwoTierCache`` instead.
+    """
 
     __slots__ = ("_cache", "_ttl", "_max_size", "_lock")
 
@@ -81,61 +111,332 @@ class _TTLCache:
             self._cache.clear()
 
 
+# Every @cached function by name, for invalidation messages and stats.
+_registry: dict[str, "_TwoTierCache"] = {}
+
+
+class _TwoTierCache:
+    """L1 LRU + L2 Redis store with single-flight loading for one function."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        ttl_seconds: float,
+        max_size: int,
+        stale_seconds: float,
+        shared: bool,
+    ):
+        self.name = name
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self.stale = stale_seconds
+        self.shared = shared
+        # key -> (fresh_until, stale_until, value); wall-clock so L2 agrees
+        self._local: OrderedDict[str, tuple[float, float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._refreshing: set[str] = set()
+        # Bumped by every invalidation: a load that started before one must
+        # not write its (possibly stale) result back.
+        self._epoch = 0
+        self.stats: dict[str, float] = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "stale_served": 0,
+            "errors": 0,
+            "invalidations": 0,
+            "load_ms_total": 0.0,
+            "load_ms_max": 0.0,
+        }
+
+    def _redis_key(self, key: str) -> str:
+        return redis_cache.make_key(["cached", self.name, key])
+
+    # -- L1 ---------------------------------------------------------------
+
+    def _remember(self, key: str, fresh_until: float, value: Any) -> None:
+        self._local[key] = (fresh_until, fresh_until + self.stale, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    # -- lookup -----------------------------------------------------------
+
+    async def get_or_load(self, key: str, load: Callable[[], Coroutine]) -> Any:
+        now = time.time()
+        entry = self._local.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            if now < fresh_until:
+                self._local.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return value
+            if now < stale_until:
+                self.stats["stale_served"] += 1
+                self._refresh_in_background(key, load)
+                return value
+            del self._local[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            # The load runs as its own task so that a cancelled caller
+            # doesn't fail every other caller waiting on the same key.
+            task = asyncio.get_running_loop().create_task(self._load_shared(key, load, self._epoch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._loaded(key, t))
+        return await asyncio.shield(task)
+
+    def _loaded(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here even if every caller was cancelled
+
+    async def _load_shared(self, key: str, load: Callable[[], Coroutine], epoch: int) -> Any:
+        """L2, then the function itself."""
+        if self.shared:
+            stored = await redis_cache.get(self._redis_key(key))
+            if isinstance(stored, dict) and "fresh_until" in stored:
+                fresh_until = float(stored["fresh_until"])
+                if time.time() < fresh_until + self.stale:
+                    self.stats["l2_hits"] += 1
+                    if self._epoch == epoch:
+                        self._remember(key, fresh_until, stored["value"])
+                    return stored["value"]
+
+        self.stats["misses"] += 1
+        return await self._compute(key, load, epoch)
+
+    async def _compute(self, key: str, load: Callable[[], Coroutine], epoch: int) -> Any:
+        started = time.perf_counter()
+        try:
+            value = await load()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats["load_ms_total"] += elapsed
+        self.stats["load_ms_max"] = max(self.stats["load_ms_max"], elapsed)
+
+        if self._epoch != epoch:
+            return value  # Invalidated while loading; don't cache
+        fresh_until = time.time() + self.ttl
+        self._remember(key, fresh_until, value)
+        if self.shared:
+            await redis_cache.set(
+                self._redis_key(key),
+                {"fresh_until": fresh_until, "value": value},
+                expire=max(1, int(self.ttl + self.stale)),
+            )
+        return value
+
+    def _refresh_in_background(self, key: str, load: Callable[[], Coroutine]) -> None:
+        if key in self._refreshing or key in self._inflight:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                await self._compute(key, load, self._epoch)
+            except Exception as e:
+                logger.warning(f"Background refresh of {self.name}[{key}] failed: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.get_running_loop().create_task(refresh())
+
+    # -- invalidation -----------------------------------------------------
+
+    def drop_local(self, key: str | None) -> None:
+        """Forget one key (or everything) in this process."""
+        self._epoch += 1
+        if key is None:
+            self._local.clear()
+        else:
+            self._local.pop(key, None)
+
+    async def invalidate(self, key: str) -> None:
+        self.stats["invalidations"] += 1
+        self.drop_local(key)
+        if self.shared:
+            await redis_cache.delete(self._redis_key(key))
+            await cache_invalidations.publish(self.name, key)
+
+    async def clear(self) -> None:
+        self.drop_local(None)
+
+    def get_stats(self) -> dict[str, Any]:
+        loads = self.stats["misses"]
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + loads
+        lookups += self.stats["coalesced"] + self.stats["stale_served"]
+        hits = lookups - loads
+        return {
+            **self.stats,
+            "entries": len(self._local),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "load_ms_avg": round(self.stats["load_ms_total"] / loads, 2) if loads else 0.0,
+        }
+
+
+class CacheInvalidationBus:
+    """Broadcasts ``@cached`` invalidations to every node over Redis pub/sub."""
+
+    def __init__(self):
+        self.node_id = uuid4().hex
+        self._redis: Any = None
+        self._channel = ""
+        self._pubsub: Any = None
+        self._task: asyncio.Task | None = None
+        self.stats = {"published": 0, "received": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._redis is not None
+
+    async def start(self, redis_client: Any, *, key_prefix: str = "") -> None:
+        """Subscribe to the invalidation channel and start listening."""
+        if self.started:
+            return
+        self._channel = f"{key_prefix}cached:invalidate"
+        self._pubsub = redis_client.pubsub()
+        await self._pubsub.subscribe(self._channel)
+        self._redis = redis_client
+        self._task = asyncio.create_task(self._listen_loop())
+        logger.info("Cache invalidation bus started")
+
+    async def stop(self) -> None:
+        if not self.started:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing cache invalidation subscription: {e}")
+        self._pubsub = None
+        self._redis = None
+
+    async def publish(self, name: str, key: str | None) -> None:
+        if not self.started:
+            return
+        message = json.dumps({"fn": name, "key": key, "o": self.node_id})
+        try:
+            await self._redis.publish(self._channel, message)
+            self.stats["published"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to broadcast cache invalidation for {name}: {e}")
+
+    async def _listen_loop(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None or message.get("type") != "message":
+                    continue
+                self.handle(message["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in cache invalidation listener: {e}")
+                await asyncio.sleep(1)
+
+    def handle(self, data: bytes | str) -> None:
+        """Apply an invalidation published by another node."""
+        payload = json.loads(data)
+        if payload.get("o") == self.node_id:
+            return
+        target = _registry.get(payload.get("fn", ""))
+        if target is not None:
+            self.stats["received"] += 1
+            target.drop_local(payload.get("key"))
+
+
+# Module-level singleton (started from the app lifespan)
+cache_invalidations = CacheInvalidationBus()
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Stats for every ``@cached`` function, keyed by function name."""
+    return {name: store.get_stats() for name, store in _registry.items()}
+
+
 def cached(
     ttl_seconds: float = 60,
     max_size: int = 500,
     key_arg: str = "user_id",
+    *,
+    key_args: Sequence[str] | None = None,
+    stale_seconds: float = 0,
+    shared: bool = True,
 ) -> Callable:
-    """Decorator that adds TTL caching to an async function.
+    """Decorator that adds two-tier caching to an async function.
 
     Args:
-        ttl_seconds: How long entries live (default 60s).
-        max_size: Maximum cache entries (LRU eviction beyond this).
+        ttl_seconds: How long entries stay fresh (default 60s).
+        max_size: Maximum L1 entries (LRU eviction beyond this).
         key_arg: The keyword argument to use as cache key (default "user_id").
-
-    The decorated function gains two extra methods:
-        - .invalidate(**kwargs): Remove the cache entry for given key_arg value.
-        - .clear(): Remove all cache entries for this function.
+        key_args: Several keyword arguments forming the key (overrides key_arg).
+        stale_seconds: How long past ``ttl_seconds`` an entry may be served
+            while it is refreshed in the background (0 disables).
+        shared: Also cache in Redis and broadcast invalidations.
+
+    The decorated function gains extra methods:
+        - .invalidate(**kwargs): Remove the entry for the given key arguments.
+        - .clear(): Remove all of this node's L1 entries for this function.
+        - .get_stats(): Hit/miss/latency counters.
     """
+    names = tuple(key_args) if key_args else (key_arg,)
 
     def decorator(func: Callable[..., Coroutine]) -> Callable[..., Coroutine]:
-        cache = _TTLCache(ttl_seconds=ttl_seconds, max_size=max_size)
+        name = f"{func.__module__}.{func.__qualname__}"
+        store = _TwoTierCache(
+            name,
+            ttl_seconds=ttl_seconds,
+            max_size=max_size,
+            stale_seconds=stale_seconds,
+            shared=shared,
+        )
+        _registry[name] = store
+
+        def make_key(kwargs: dict[str, Any]) -> str | None:
+            values = [kwargs.get(n) for n in names]
+            if any(v is None for v in values):
+                return None
+            return ":".join(str(v) for v in values)
 
         @functools.wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Extract cache key from kwargs
-            cache_key = kwargs.get(key_arg)
+            cache_key = make_key(kwargs)
             if cache_key is None:
                 # Can't cache without a key — call through
                 return await func(*args, **kwargs)
-
-            cache_key = str(cache_key)
-
-            # Check cache
-            hit, value = await cache.get(cache_key)
-            if hit:
-                return value
-
-            # Cache miss — compute
-            result = await func(*args, **kwargs)
-
-            # Store in cache
-            await cache.set(cache_key, result)
-            return result
+            return await store.get_or_load(cache_key, lambda: func(*args, **kwargs))
 
         async def invalidate(**kwargs: Any) -> None:
-            """Invalidate the cache entry for a specific key."""
-            key_value = kwargs.get(key_arg)
-            if key_value is not None:
-                await cache.invalidate(str(key_value))
+            """Invalidate the cache entry for a specific key, on every node."""
+            cache_key = make_key(kwargs)
+            if cache_key is not None:
+                await store.invalidate(cache_key)
 
         async def clear() -> None:
-            """Clear all cache entries for this function."""
-            await cache.clear()
+            """Clear this node's cache entries for this function."""
+            await store.clear()
 
         wrapper.invalidate = invalidate  # type: ignore[attr-defined]
         wrapper.clear = clear  # type: ignore[attr-defined]
-        wrapper.cache = cache  # type: ignore[attr-defined]
+        wrapper.get_stats = store.get_stats  # type: ignore[attr-defined]
+        wrapper.cache = store  # type: ignore[attr-defined]
 
         return wrapper
 
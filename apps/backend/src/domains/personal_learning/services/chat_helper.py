@@ -70,10 +70,10 @@ async def send_message(*, user_id: str, message: str) -> dict[str, Any]:
         return response
     except (ImportError, AttributeError):
         # Fallback if intelligence domain method doesn't exist yet
-        from src.domains.intelligence.reasoning.llm import generate_content
+        from src.domains.intelligence.reasoning.llm import Priority, generate_content
 
         prompt = f"{system_context}\n\nLearner: {message}\n\nMaigie:"
-        ai_response = await generate_content(prompt, max_tokens=2000)
+        ai_response = await generate_content(prompt, max_tokens=2000, priority=Priority.INTERACTIVE)
 
         return {
             "message": ai_response,
@@ -0,0 +1,158 @@
+"""
+Cohort engine for learner batch jobs.
+
+The nightly tasks used to page ``LearningProfile`` with OFFSET and then run
+a handful of queries and an INSERT per learner, all inside one Celery task:
+runtime grew with learners × queries, and late pages paid for skipping every
+earlier row. A cohort job is now a query naming who is in the cohort plus a
+batch function:
+
+- the engine walks the cohort with keyset pagination (``WHERE key > last
+  ORDER BY key LIMIT n``), so every page costs the same however deep the
+  run is;
+- each page goes to the batch function in one transaction. It loads the
+  inputs for the whole page with a few grouped queries (``WHERE userId IN
+  (...) GROUP BY userId``), computes over the page in Python and writes with
+  bulk INSERT/UPDATE;
+- with ``shards > 1`` a run only visits keys whose ``hashtext(key)`` falls
+  in its residue class. ``fan_out`` turns one beat trigger into one Celery
+  task per shard, so a job spreads over worker processes.
+
+A failing page is rolled back and logged and the run moves on to the next.
+
+Usage:
+    async def process(s: AsyncSession, rows: Sequence[Row], now: datetime) -> int:
+        ...  # grouped reads + bulk writes for the page; returns learners acted on
+
+    result = await run_cohort(
+        "daily_plan",
+        select(LearningProfile.user_id, LearningProfile.quiet_hours_start, ...),
+        LearningProfile.user_id,
+        process,
+        shard=shard,
+        shards=shards,
+    )
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import Row, Select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.config import get_settings
+from src.shared.database import get_session_factory
+
+logger = logging.getLogger(__name__)
+
+BatchProcessor = Callable[[AsyncSession, Sequence[Row], datetime], Awaitable[int]]
+
+
+@dataclass
+class CohortResult:
+    """Outcome of one cohort run (or one shard of it).
+
+    ``failed`` counts the rows of failed (rolled back) batches; rows that were
+    neither processed nor failed were skipped by the batch processor.
+    """
+
+    name: str
+    scanned: int = 0
+    processed: int = 0
+    failed: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    elapsed_ms: float = 0.0
+
+    @property
+    def skipped(self) -> int:
+        return self.scanned - self.processed - self.failed
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "skipped": self.skipped}
+
+
+def shard_filter(key: InstrumentedAttribute, shard: int, shards: int) -> ColumnElement[bool]:
+    """Rows whose ``hashtext(key)`` modulo ``shards`` is ``shard``."""
+    # hashtext() is a signed int4: fold negative remainders back into range
+    bucket = func.mod(func.mod(func.hashtext(key), shards) + shards, shards)
+    return bucket == shard
+
+
+async def run_cohort(
+    name: str,
+    query: Select,
+    key: InstrumentedAttribute,
+    process: BatchProcessor,
+    *,
+    batch_size: int | None = None,
+    shard: int | None = None,
+    shards: int = 1,
+    now: datetime | None = None,
+) -> CohortResult:
+    """Walk ``query`` in keyset pages of ``batch_size`` and run ``process`` on each.
+
+    ``query`` must select ``key`` (the rows are read as ``getattr(row, key.key)``);
+    the engine adds the ordering, the limit and the keyset/shard filters.
+    ``now`` is fixed for the whole run so every page sees the same "today".
+    """
+    batch_size = batch_size or get_settings().COHORT_BATCH_SIZE
+    now = now or datetime.now(UTC)
+    if shard is not None and shards > 1:
+        query = query.where(shard_filter(key, shard, shards))
+        name = f"{name}[{shard}/{shards}]"
+    query = query.order_by(key).limit(batch_size)
+
+    result = CohortResult(name=name)
+    started = time.perf_counter()
+    factory = get_session_factory()
+    last: Any = None
+    while True:
+        page = query if last is None else query.where(key > last)
+        async with factory() as s:
+            rows = (await s.execute(page)).all()
+            if not rows:
+                break
+            last = getattr(rows[-1], key.key)
+            result.batches += 1
+            result.scanned += len(rows)
+            try:
+                result.processed += await process(s, rows, now)
+                await s.commit()
+            except Exception:
+                await s.rollback()
+                result.failed += len(rows)
+                result.failed_batches += 1
+                logger.exception(f"Cohort {name}: batch ending at {last!r} failed")
+        if len(rows) < batch_size:
+            break
+
+    result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        f"Cohort {name}: {result.processed} processed, {result.scanned} scanned in "
+        f"{result.batches} batch(es) ({result.failed_batches} failed), {result.elapsed_ms} ms"
+    )
+    return result
+
+
+def fan_out(task: Any, shard: int | None, shards: int | None = None) -> bool:
+    """Dispatch one ``task`` per shard when sharding is configured.
+
+    Returns True when this call only dispatched the shard tasks (the caller
+    should return), False when the caller should run the cohort itself.
+    """
+    count = shards or get_settings().COHORT_SHARDS
+    if shard is not None or count <= 1:
+        return False
+    for i in range(count):
+        task.apply_async(kwargs={"shard": i, "shards": count})
+    logger.info(f"{task.name}: dispatched {count} shard task(s)")
+    return True
@@ -3,6 +3,7 @@ Document Generation Service.
 
 Generates downloadable documents (PDF, DOCX) from HTML content.
 Uses WeasyPrint for PDF rendering and htmldocx for DOCX conversion.
+Rendering runs in the ``render_pool`` worker processes, off the event loop.
 """
 
 from __future__ import annotations
@@ -14,6 +15,16 @@ import uuid
 from datetime import UTC, datetime
 from typing import Any
 
+from src.domains.personal_learning.services.render_cache import render_cache, render_key
+from src.domains.personal_learning.services.render_pool import (
+    DOCX,
+    PDF,
+    PPTX,
+    PRESENTATION_PDF,
+    PRIORITY_FREE,
+    render_pool,
+)
+
 logger = logging.getLogger(__name__)
 
 # Content type mappings
@@ -248,6 +259,7 @@ class DocumentGenerationService:
         style: str = "academic",
         user_id: str | None = None,
         doc_type: str | None = None,
+        priority: int = PRIORITY_FREE,
     ) -> dict[str, Any]:
         """
         Generate a document in the specified format.
@@ -258,6 +270,7 @@ class DocumentGenerationService:
             content: HTML content to render (also handles markdown via conversion)
             style: Document style ("academic", "report", "minimal")
             user_id: User ID for path namespacing
+            priority: Render queue priority (see ``render_pool.priority_for_tier``)
 
         Returns:
             dict with keys: filename, url, size, format, content_type
@@ -272,20 +285,27 @@ class DocumentGenerationService:
         # Presentation as PDF gets a first-class HTML slide renderer.
         if is_presentation and format == "pdf":
             slides = self._extract_slides_from_content(content, title)
-            doc_bytes = render_presentation_pdf(title, slides, theme="indigo")
+            kind, args = PRESENTATION_PDF, {"title": title, "slides": slides, "theme": "indigo"}
             preview_html = build_presentation_html(title, slides, theme="indigo")
         elif format == "pptx":
-            doc_bytes = self._generate_pptx(title, content, style)
+            kind, args = PPTX, {"title": title, "content": content, "style": style}
             preview_html = self._build_pptx_preview_html(title, content, style)
         else:
             # Normalize content: if it's markdown, convert to HTML
             content = self._ensure_html(content)
-            if format == "pdf":
-                doc_bytes = self._generate_pdf(title, content, style)
-            else:
-                doc_bytes = self._generate_docx(title, content, style)
+            kind = PDF if format == "pdf" else DOCX
+            args = {"title": title, "content": content, "style": style}
             preview_html = self._build_full_html(title, content, style)
 
+        # Identical output was already rendered and stored: reuse it
+        cache_key = render_key(user_id=user_id, kind=kind, fmt=format, args=args)
+        cached = await render_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "format": format, "content_type": CONTENT_TYPES[format]}
+
+        # Render in the worker pool; the file is spooled to disk, not held in memory
+        rendered = await render_pool.render(kind, priority=priority, **args)
+
         # Generate a unique filename
         safe_title = re.sub(r"[^\w\s-]", "", title)[:50].strip().replace(" ", "_")
         timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
@@ -296,7 +316,12 @@ class DocumentGenerationService:
         from src.shared.infrastructure.storage_service import storage_service
 
         storage_path = f"generated-docs/{user_id or 'anonymous'}"
-        upload_result = await self._upload_bytes(storage_service, doc_bytes, filename, storage_path)
+        try:
+            upload_result = await self._upload_file(
+                storage_service, rendered.path, filename, storage_path
+            )
+        finally:
+            rendered.cleanup()
 
         # Also upload the styled HTML for in-app preview
         html_filename = f"{safe_title}_{timestamp}_{short_id}.html"
@@ -304,15 +329,15 @@ class DocumentGenerationService:
             storage_service, preview_html.encode("utf-8"), html_filename, storage_path
         )
 
-        return {
+        stored = {
             "filename": filename,
             "url": upload_result["url"],
             "size": upload_result["size"],
-            "format": format,
-            "content_type": CONTENT_TYPES[format],
             "title": title,
             "preview_url": preview_result["url"],
         }
+        await render_cache.put(cache_key, stored)
+        return {**stored, "format": format, "content_type": CONTENT_TYPES[format]}
 
     def _ensure_html(self, content: str) -> str:
         """If content is markdown, convert to HTML. If already HTML, return as-is."""
@@ -1143,6 +1168,14 @@ Reveal.initialize({{
         content_type = CONTENT_TYPES.get(filename.rsplit(".", 1)[-1], "application/octet-stream")
         return await storage_service.upload_bytes(content, remote_path, content_type=content_type)
 
+    async def _upload_file(
+        self, storage_service: Any, local_path: str, filename: str, path: str
+    ) -> dict[str, Any]:
+        """Stream a spooled render from local disk via the storage client."""
+        remote_path = f"{path.strip('/')}/{filename}"
+        content_type = CONTENT_TYPES.get(filename.rsplit(".", 1)[-1], "application/octet-stream")
+        return await storage_service.upload_file(local_path, remote_path, content_type=content_type)
+
 
 # Module-level singleton
 document_generation_service = DocumentGenerationService()
@@ -1235,7 +1268,10 @@ async def create_from_prompt(
 
     content = _sanitize_llm_output(content)
 
-    # Render the file bytes and upload
+    # Render the file bytes and upload (paid tiers jump the render queue)
+    from src.domains.personal_learning.services.render_pool import priority_for_tier
+
+    quality_tier = await feature_tier_service.get_quality_tier(user_id)
     result = await document_generation_service.generate_document(
         format=format,
         title=title,
@@ -1243,6 +1279,7 @@ async def create_from_prompt(
         style=style,
         user_id=user_id,
         doc_type=doc_type,
+        priority=priority_for_tier(quality_tier),
     )
 
     # Persist a DB record
@@ -12,6 +12,7 @@ from typing import Any
 
 from src.shared.exceptions import NotFoundError
 
+from ..events import emit_preparation_created
 from ..repository import personal_learning_repo as repo
 
 logger = logging.getLogger(__name__)
@@ -48,6 +49,7 @@ async def create_preparation(*, user_id: str, data: dict[str, Any]) -> Any:
         title=f"Started preparation: {data['subject']}",
         context={"source": "personal", "prepId": prep.id, "type": prep_data["type"]},
     )
+    await emit_preparation_created(user_id, prep.id)
 
     return prep
 
@@ -254,57 +256,63 @@ async def extract_topics(*, user_id: str, prep_id: str) -> list[Any]:
     AI-extract key topics from preparation materials.
 
     Req 4.3: Create topic records with titles, descriptions, and estimated study time.
+
+    Every material is read in full: chunks are extracted in parallel and the
+    merged topics are inserted in one statement (see ``topic_extraction``).
+    Progress is pushed to the user as ``prep_topics_progress`` events.
     """
-    from src.domains.intelligence.reasoning.llm import generate_content
-    import json
+    from src.config import get_settings
+    from src.shared.infrastructure.ws_event_bus import publish_ws_event
+
+    from . import topic_extraction
 
     prep = await repo.find_exam_prep(prep_id, user_id)
     if not prep:
         raise NotFoundError("Preparation", prep_id)
 
-    # Gather material text
     materials = await repo.list_prep_materials(prep_id)
-    material_text = "\n\n".join(
-        [f"[{m.filename}]: {m.extracted_text or ''}" for m in materials if m.extracted_text]
-    )
+    # Oldest first, so topic order follows the order materials were added
+    materials.reverse()
 
-    if not material_text:
-        material_text = f"Subject: {prep.subject}\nDescription: {prep.description or ''}"
-
-    prompt = (
-        f"Analyze this learning material and extract the key topics for study.\n"
-        f"Subject: {prep.subject}\n"
-        f"Materials:\n{material_text[:5000]}\n\n"
-        f"Return a JSON array of topic objects with:\n"
-        f"- 'title': short topic name\n"
-        f"- 'description': brief description of what to learn\n"
-        f"- 'estimatedMinutes': estimated study time in minutes (15-120)\n\n"
-        f"Generate 5-15 topics covering all important areas.\n"
-        f"Return ONLY the JSON array."
-    )
+    async def notify(payload: dict[str, Any]) -> None:
+        # Progress is best-effort; never fail extraction over a WebSocket push
+        try:
+            await publish_ws_event(user_id, "prep_topics_progress", {"prepId": prep_id, **payload})
+        except Exception as e:
+            logger.debug(f"Topic extraction progress push failed: {e}")
+
+    async def report(completed: int, total: int) -> None:
+        await notify({"status": "extracting", "completedChunks": completed, "totalChunks": total})
 
-    try:
-        response = await generate_content(prompt, max_tokens=3000)
-        topics_data = json.loads(response)
-    except (json.JSONDecodeError, Exception) as e:
-        logger.warning(f"Failed to extract topics for prep {prep_id}: {e}")
-        return []
-
-    created_topics = []
-    for idx, topic in enumerate(topics_data):
-        if isinstance(topic, dict) and "title" in topic:
-            prep_topic = await repo.create_prep_topic(
-                {
-                    "prepId": prep_id,
-                    "title": topic["title"],
-                    "description": topic.get("description"),
-                    "estimatedMinutes": topic.get("estimatedMinutes", 30),
-                    "orderIndex": idx,
-                    "status": "NOT_STARTED",
-                }
-            )
-            created_topics.append(prep_topic)
+    settings = get_settings()
+    topics_data = await topic_extraction.extract(
+        user_id=user_id,
+        subject=prep.subject,
+        materials=materials,
+        fallback_text=f"Subject: {prep.subject}\nDescription: {prep.description or ''}",
+        chunk_chars=settings.EXAM_PREP_CHUNK_CHARS,
+        concurrency=settings.EXAM_PREP_EXTRACTION_CONCURRENCY,
+        max_topics=settings.EXAM_PREP_MAX_TOPICS,
+        on_progress=report,
+    )
+    if not topics_data:
+        logger.warning(f"Failed to extract topics for prep {prep_id}")
+
+    created_topics = await repo.create_prep_topics(
+        [
+            {
+                "prepId": prep_id,
+                "title": topic["title"],
+                "description": topic["description"],
+                "estimatedMinutes": topic["estimatedMinutes"],
+                "orderIndex": idx,
+                "status": "NOT_STARTED",
+            }
+            for idx, topic in enumerate(topics_data)
+        ]
+    )
 
+    await notify({"status": "completed", "topicCount": len(created_topics)})
     return created_topics
 
 
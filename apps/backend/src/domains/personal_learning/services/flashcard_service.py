@@ -9,6 +9,7 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from ..events import emit_flashcard_reviewed
 from ..repository import personal_learning_repo as repo
 from .cache import cached as _cached
 
@@ -54,6 +55,8 @@ async def generate_from_note(*, user_id: str, note_id: str) -> list[Any]:
     FREE: up to 5 basic Q&A cards.
     PLUS: up to 10 cards with varied types (cloze, multi-choice, image prompts).
     """
+    from src.domains.intelligence.reasoning.llm.registry import LlmTask
+
     from .llm_resilient import generate_content_json
     from . import feature_tier_service, trial_service
 
@@ -89,7 +92,13 @@ async def generate_from_note(*, user_id: str, note_id: str) -> list[Any]:
         f"Return ONLY the JSON array, no other text."
     )
 
-    cards_data = await generate_content_json(prompt, max_tokens=2000, fallback=[], user_id=user_id)
+    cards_data = await generate_content_json(
+        prompt,
+        max_tokens=2000,
+        fallback=[],
+        user_id=user_id,
+        task=LlmTask.FLASHCARD_GENERATION,
+    )
     if not cards_data:
         return []
 
@@ -116,6 +125,8 @@ async def generate_from_topic(*, user_id: str, topic_id: str) -> list[Any]:
 
     Req 5.3: Generate flashcards based on topic content and materials.
     """
+    from src.domains.intelligence.reasoning.llm.registry import LlmTask
+
     from .llm_resilient import generate_content_json
     from sqlalchemy import select as sa_select
     from src.domains.knowledge.db_models import Topic
@@ -139,7 +150,13 @@ async def generate_from_topic(*, user_id: str, topic_id: str) -> list[Any]:
         f"Return ONLY the JSON array, no other text."
     )
 
-    cards_data = await generate_content_json(prompt, max_tokens=2000, fallback=[], user_id=user_id)
+    cards_data = await generate_content_json(
+        prompt,
+        max_tokens=2000,
+        fallback=[],
+        user_id=user_id,
+        task=LlmTask.FLASHCARD_GENERATION,
+    )
     if not cards_data:
         return []
 
@@ -211,8 +228,17 @@ async def review_flashcard(*, user_id: str, card_id: str, quality: int) -> Any:
 
     result = await repo.update_flashcard(card_id, update_data)
 
+    # Mark today as a review day (review streak and active days in the stats)
+    from src.domains.progress.services import activity_days
+
+    try:
+        await activity_days.record_day(user_id, activity_days.REVIEW, at=now)
+    except Exception as e:
+        logger.warning("Failed to record review day for user %s: %s", user_id, e)
+
     # Invalidate stats cache since a review changes due counts and mastery
     await _get_statistics_cached.invalidate(user_id=user_id)
+    await emit_flashcard_reviewed(user_id, card_id, quality, deck_id=card.deck_id)
 
     # Record in activity feed
     from . import activity_feed_service
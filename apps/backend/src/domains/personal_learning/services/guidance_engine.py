@@ -231,6 +231,8 @@ def _deterministic_guidance(state: dict) -> dict[str, Any] | None:
 
 async def _llm_guidance(user_id: str, state: dict) -> dict[str, Any]:
     """Use LLM to generate contextual, personalized guidance."""
+    from src.domains.intelligence.reasoning.llm.registry import LlmTask
+
     from .llm_resilient import generate_content_json
 
     context = _build_llm_context(state)
@@ -271,6 +273,7 @@ Return ONLY valid JSON."""
             timeout_s=20,
             fallback=None,
             user_id=user_id,
+            task=LlmTask.GUIDANCE,
         )
 
         return {
@@ -18,11 +18,21 @@ logger = logging.getLogger(__name__)
 
 async def get_home(*, user_id: str) -> dict[str, Any]:
     """
-    Build the personalized home response.
+    Get the personalized home response.
 
     The learner opens Maigie and everything is ready.
     They don't plan. They don't organize. They just learn.
+
+    Served from the precomputed snapshot (see ``home_snapshot``), which is
+    rebuilt in the background as the learner's state changes.
     """
+    from .home_snapshot import home_snapshots
+
+    return await home_snapshots.get(user_id)
+
+
+async def build_home(*, user_id: str) -> dict[str, Any]:
+    """Build the personalized home response from the learner's current state."""
     import asyncio
 
     from . import (
@@ -0,0 +1,242 @@
+"""
+Precomputed home snapshots.
+
+``GET /home`` used to gather the profile, flashcard stats, due cards, plans
+and guidance on every app open, and guidance can wait on the LLM. The home
+response is now kept per user in Redis and served with a single MGET:
+
+- learner events (flashcard reviewed, note created, plan item completed, ...)
+  mark the snapshot dirty and schedule a background rebuild, debounced so a
+  review session causes one rebuild rather than one per card;
+- a dirty snapshot, or one older than ``HOME_SNAPSHOT_REFRESH_SECONDS``, is
+  still served while it is rebuilt in the background;
+- past ``HOME_SNAPSHOT_MAX_AGE_SECONDS``, or once the UTC day has changed
+  (schedule blocks and due reviews are "today"), the snapshot is rebuilt
+  before answering.
+
+Only the first open, or one after a long absence, pays for the full build.
+A snapshot records when its build *started*, so an event that lands during
+a build leaves it dirty and triggers another one. Concurrent builds for the
+same user share one task. Without Redis every request builds the home
+directly, as before.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from src.config import get_settings
+from src.shared.infrastructure import cache
+
+logger = logging.getLogger(__name__)
+
+HomeBuilder = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+class HomeSnapshotStore:
+    """Per-user home snapshots with event-driven background rebuilds."""
+
+    def __init__(
+        self,
+        build: HomeBuilder,
+        *,
+        enabled: bool = True,
+        refresh_after: float = 300,
+        max_age: float = 3600,
+        debounce: float = 2.0,
+        concurrency: int = 8,
+    ):
+        self._build = build
+        self.enabled = enabled
+        self.refresh_after = refresh_after
+        self.max_age = max_age
+        self.debounce = debounce
+        # Bounds background rebuilds (each may call the LLM); request-path builds skip it
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._building: dict[str, asyncio.Task] = {}
+        self._scheduled: dict[str, asyncio.Task] = {}
+        self._again: set[str] = set()
+        self.stats: dict[str, float] = {
+            "hits": 0,
+            "stale_served": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "invalidations": 0,
+            "rebuilds": 0,
+            "rebuild_errors": 0,
+            "build_ms_total": 0.0,
+            "build_ms_max": 0.0,
+        }
+
+    def _keys(self, user_id: str) -> tuple[str, str]:
+        return (
+            cache.make_key(["home", "snapshot", user_id]),
+            cache.make_key(["home", "dirty", user_id]),
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get(self, user_id: str) -> dict[str, Any]:
+        """The user's home: the stored snapshot when servable, else a fresh build."""
+        if not self.enabled or not cache.is_connected:
+            self.stats["bypassed"] += 1
+            return await self._build(user_id)
+
+        snapshot_key, dirty_key = self._keys(user_id)
+        found = await cache.get_many([snapshot_key, dirty_key])
+        snapshot = found.get(snapshot_key)
+        now = time.time()
+        if self._servable(snapshot, now):
+            built_at = snapshot["builtAt"]
+            dirty_at = found.get(dirty_key)
+            if (dirty_at is not None and float(dirty_at) >= built_at) or (
+                now - built_at > self.refresh_after
+            ):
+                self.stats["stale_served"] += 1
+                self._schedule(user_id, delay=0, rerun=False)
+            else:
+                self.stats["hits"] += 1
+            return snapshot["home"]
+
+        self.stats["misses"] += 1
+        return await self.rebuild(user_id)
+
+    def _servable(self, snapshot: Any, now: float) -> bool:
+        if not isinstance(snapshot, dict) or "home" not in snapshot:
+            return False
+        built_at = snapshot.get("builtAt")
+        if not isinstance(built_at, (int, float)) or now - built_at > self.max_age:
+            return False
+        # Schedule blocks and due reviews are for "today": never serve yesterday's home
+        built_on = datetime.fromtimestamp(built_at, UTC).date()
+        return built_on == datetime.fromtimestamp(now, UTC).date()
+
+    # ------------------------------------------------------------------
+    # Rebuilds
+    # ------------------------------------------------------------------
+
+    async def rebuild(self, user_id: str) -> dict[str, Any]:
+        """Build and store the home now; concurrent callers share one build."""
+        task = self._building.get(user_id)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._rebuild(user_id))
+            self._building[user_id] = task
+            task.add_done_callback(lambda t: self._built(user_id, t))
+        return await asyncio.shield(task)
+
+    def _built(self, user_id: str, task: asyncio.Task) -> None:
+        if self._building.get(user_id) is task:
+            del self._building[user_id]
+        if not task.cancelled():
+            task.exception()  # Retrieved here even if every caller went away
+
+    async def _rebuild(self, user_id: str) -> dict[str, Any]:
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            home = await self._build(user_id)
+        except Exception:
+            self.stats["rebuild_errors"] += 1
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats["rebuilds"] += 1
+        self.stats["build_ms_total"] += elapsed
+        self.stats["build_ms_max"] = max(self.stats["build_ms_max"], elapsed)
+
+        snapshot_key, _ = self._keys(user_id)
+        await cache.set(
+            snapshot_key,
+            {"builtAt": started_at, "home": home},
+            expire=max(1, int(self.max_age)),
+        )
+        return home
+
+    async def invalidate(self, user_id: str) -> None:
+        """Mark the user's snapshot dirty and schedule a debounced rebuild."""
+        if not self.enabled or not cache.is_connected:
+            return
+        self.stats["invalidations"] += 1
+        _, dirty_key = self._keys(user_id)
+        await cache.set(dirty_key, time.time(), expire=max(1, int(self.max_age)))
+        self._schedule(user_id, delay=self.debounce, rerun=True)
+
+    def _schedule(self, user_id: str, *, delay: float, rerun: bool) -> None:
+        if user_id in self._scheduled:
+            if rerun:
+                self._again.add(user_id)
+            return
+        self._scheduled[user_id] = asyncio.get_running_loop().create_task(
+            self._run_scheduled(user_id, delay)
+        )
+
+    async def _run_scheduled(self, user_id: str, delay: float) -> None:
+        try:
+            while True:
+                await asyncio.sleep(delay)
+                # Events up to here are covered by the build below
+                self._again.discard(user_id)
+                async with self._semaphore:
+                    await self.rebuild(user_id)
+                if user_id not in self._again:
+                    return
+                delay = self.debounce
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Home snapshot rebuild failed for user {user_id}: {e}")
+        finally:
+            self._scheduled.pop(user_id, None)
+            self._again.discard(user_id)
+
+    async def stop(self) -> None:
+        """Cancel pending background rebuilds (app shutdown)."""
+        tasks = list(self._scheduled.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # A task cancelled before it first ran never reaches its own cleanup
+        self._scheduled.clear()
+        self._again.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        served = self.stats["hits"] + self.stats["stale_served"] + self.stats["misses"]
+        rebuilds = self.stats["rebuilds"]
+        return {
+            **self.stats,
+            "pending_rebuilds": len(self._scheduled),
+            "hit_rate": (
+                round((self.stats["hits"] + self.stats["stale_served"]) / served, 4)
+                if served
+                else 0.0
+            ),
+            "build_ms_avg": round(self.stats["build_ms_total"] / rebuilds, 2) if rebuilds else 0.0,
+        }
+
+
+async def _build_home(user_id: str) -> dict[str, Any]:
+    from .home_service import build_home
+
+    return await build_home(user_id=user_id)
+
+
+def _build_home_snapshots() -> HomeSnapshotStore:
+    settings = get_settings()
+    return HomeSnapshotStore(
+        _build_home,
+        enabled=settings.HOME_SNAPSHOT_ENABLED,
+        refresh_after=settings.HOME_SNAPSHOT_REFRESH_SECONDS,
+        max_age=settings.HOME_SNAPSHOT_MAX_AGE_SECONDS,
+        debounce=settings.HOME_SNAPSHOT_DEBOUNCE_SECONDS,
+        concurrency=settings.HOME_SNAPSHOT_REBUILD_CONCURRENCY,
+    )
+
+
+# Module-level singleton
+home_snapshots = _build_home_snapshots()
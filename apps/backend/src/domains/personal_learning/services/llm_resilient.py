@@ -9,10 +9,14 @@ Provider Selection:
 - Falls back to system default (Gemini) if no preference or provider unavailable
 - Supported values: "gemini", "openai", "anthropic"
 
-Circuit Breaker States (per-provider):
+Circuit Breaker States (per-provider, shared by all workers via Redis):
 - CLOSED: Normal operation; calls go through.
 - OPEN: Too many failures; calls short-circuit with fallback immediately.
-- HALF_OPEN: After cooldown, allow one test call. Success → CLOSED; failure → OPEN.
+- HALF_OPEN: After cooldown, one worker in the cluster makes a test call.
+  Success → CLOSED; failure → OPEN.
+
+Fallback providers are tried in order of observed p95 latency (see
+``reasoning.llm.health``).
 """
 
 import asyncio
@@ -20,14 +24,23 @@ import logging
 import time
 from typing import Any
 
+from src.domains.intelligence.reasoning.llm.clients import (
+    Priority,
+    estimate_tokens,
+    llm_clients,
+    usage_tokens,
+)
+from src.domains.intelligence.reasoning.llm.health import provider_health
+from src.domains.intelligence.reasoning.llm.registry import LlmTask, default_model_for
+from src.domains.intelligence.reasoning.llm.response_cache import llm_response_cache
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-_FAILURE_THRESHOLD = 5  # Consecutive failures before opening circuit
-_RECOVERY_TIMEOUT_S = 60  # Seconds before trying again after open
+# Breaker threshold and cooldown: LLM_HEALTH_* settings (reasoning.llm.health)
 _DEFAULT_TIMEOUT_S = 30  # Per-call timeout in seconds
 _MAX_RETRIES = 2  # Max retries per call (total attempts = MAX_RETRIES + 1)
 _DEFAULT_PROVIDER = "gemini"
@@ -35,118 +48,67 @@ _DEFAULT_PROVIDER = "gemini"
 # Supported providers
 SUPPORTED_PROVIDERS = ("gemini", "openai", "anthropic")
 
-# ---------------------------------------------------------------------------
-# Per-Provider Circuit Breaker State
-# ---------------------------------------------------------------------------
-
-_circuit_states: dict[str, dict[str, Any]] = {}
-
-
-def _get_circuit(provider: str) -> dict[str, Any]:
-    """Get or create circuit breaker state for a provider."""
-    if provider not in _circuit_states:
-        _circuit_states[provider] = {
-            "failure_count": 0,
-            "last_failure_time": 0.0,
-            "state": "CLOSED",
-        }
-    return _circuit_states[provider]
-
-
-def _is_circuit_open(provider: str) -> bool:
-    """Check if the circuit breaker is open for a specific provider."""
-    circuit = _get_circuit(provider)
-
-    if circuit["state"] == "CLOSED":
-        return False
-
-    if circuit["state"] == "OPEN":
-        elapsed = time.monotonic() - circuit["last_failure_time"]
-        if elapsed >= _RECOVERY_TIMEOUT_S:
-            circuit["state"] = "HALF_OPEN"
-            logger.info(f"LLM circuit breaker [{provider}]: HALF_OPEN (testing recovery)")
-            return False
-        return True
-
-    return False  # HALF_OPEN allows one call
-
-
-def _record_success(provider: str) -> None:
-    """Record a successful call — reset circuit breaker for provider."""
-    circuit = _get_circuit(provider)
-    circuit["failure_count"] = 0
-    if circuit["state"] != "CLOSED":
-        logger.info(f"LLM circuit breaker [{provider}]: CLOSED (recovered)")
-    circuit["state"] = "CLOSED"
-
-
-def _record_failure(provider: str) -> None:
-    """Record a failed call — potentially open the circuit for provider."""
-    circuit = _get_circuit(provider)
-    circuit["failure_count"] += 1
-    circuit["last_failure_time"] = time.monotonic()
-
-    if circuit["failure_count"] >= _FAILURE_THRESHOLD:
-        circuit["state"] = "OPEN"
-        logger.warning(
-            f"LLM circuit breaker [{provider}]: OPEN after {circuit['failure_count']} "
-            f"consecutive failures. Will retry in {_RECOVERY_TIMEOUT_S}s."
-        )
-    elif circuit["state"] == "HALF_OPEN":
-        circuit["state"] = "OPEN"
-        logger.warning(f"LLM circuit breaker [{provider}]: OPEN (recovery test failed)")
-
 
 # ---------------------------------------------------------------------------
 # Provider Implementations
 # ---------------------------------------------------------------------------
 
 
-async def _call_gemini(prompt: str, *, max_tokens: int, temperature: float) -> str:
+async def _call_gemini(
+    prompt: str, *, max_tokens: int, temperature: float, priority: Priority
+) -> str:
     """Call Gemini via the existing intelligence domain interface."""
     from src.domains.intelligence.reasoning.llm import generate_content as _gemini_generate
 
-    return await _gemini_generate(prompt, max_tokens=max_tokens, temperature=temperature)
+    return await _gemini_generate(
+        prompt, max_tokens=max_tokens, temperature=temperature, priority=priority
+    )
 
 
-async def _call_openai(prompt: str, *, max_tokens: int, temperature: float) -> str:
-    """Call OpenAI directly."""
-    import openai
+async def _call_openai(
+    prompt: str, *, max_tokens: int, temperature: float, priority: Priority
+) -> str:
+    """Call OpenAI through the shared provider client."""
     from src.config import get_settings
 
     settings = get_settings()
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY not configured")
 
-    client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    completion = await client.chat.completions.create(
-        model=settings.OPENAI_DEFAULT_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
+    tokens = estimate_tokens(prompt, max_tokens)
+    async with llm_clients.slot("openai", priority=priority, tokens=tokens) as slot:
+        completion = await slot.client.chat.completions.create(
+            model=settings.OPENAI_DEFAULT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        slot.report_usage(usage_tokens(completion))
     text = completion.choices[0].message.content or ""
     if not text.strip():
         raise RuntimeError("OpenAI returned empty response")
     return text.strip()
 
 
-async def _call_anthropic(prompt: str, *, max_tokens: int, temperature: float) -> str:
-    """Call Anthropic directly."""
-    import anthropic
+async def _call_anthropic(
+    prompt: str, *, max_tokens: int, temperature: float, priority: Priority
+) -> str:
+    """Call Anthropic through the shared provider client."""
     from src.config import get_settings
 
     settings = get_settings()
     if not settings.ANTHROPIC_API_KEY:
         raise RuntimeError("ANTHROPIC_API_KEY not configured")
 
-    client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-    message = await client.messages.create(
-        model=settings.ANTHROPIC_DEFAULT_MODEL,
-        max_tokens=max_tokens,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-    )
+    tokens = estimate_tokens(prompt, max_tokens)
+    async with llm_clients.slot("anthropic", priority=priority, tokens=tokens) as slot:
+        message = await slot.client.messages.create(
+            model=settings.ANTHROPIC_DEFAULT_MODEL,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+        )
+        slot.report_usage(usage_tokens(message))
     # Anthropic returns content blocks
     text = "".join(block.text for block in message.content if hasattr(block, "text"))
     if not text.strip():
@@ -191,11 +153,20 @@ async def _resolve_provider(user_id: str | None) -> str:
     return _DEFAULT_PROVIDER
 
 
-def _get_fallback_providers(primary: str) -> list[str]:
-    """Get fallback provider order if primary fails."""
-    # Try other providers in a reasonable order
-    fallback_order = ["gemini", "openai", "anthropic"]
-    return [p for p in fallback_order if p != primary]
+def _provider_model(provider: str) -> str:
+    """Model a provider answers with (part of the response cache key)."""
+    from src.config import get_settings
+
+    if provider == "openai":
+        return get_settings().OPENAI_DEFAULT_MODEL
+    if provider == "anthropic":
+        return get_settings().ANTHROPIC_DEFAULT_MODEL
+    return default_model_for(LlmTask.CHAT_DEFAULT)
+
+
+async def _get_fallback_providers(primary: str) -> list[str]:
+    """Get fallback provider order if primary fails (fastest healthy p95 first)."""
+    return await provider_health.rank([p for p in SUPPORTED_PROVIDERS if p != primary])
 
 
 # ---------------------------------------------------------------------------
@@ -218,6 +189,8 @@ async def generate_content(
     max_retries: int = _MAX_RETRIES,
     fallback: str | None = None,
     user_id: str | None = None,
+    priority: Priority = Priority.NORMAL,
+    task: LlmTask | None = None,
 ) -> str:
     """Generate text content with resilience and per-user provider routing.
 
@@ -225,9 +198,11 @@ async def generate_content(
     - Per-user provider selection (from LearningProfile.preferred_llm_provider)
     - Per-call timeout (default 30s)
     - Retry with exponential backoff (default 2 retries)
-    - Per-provider circuit breaker (opens after 5 failures, 60s cooldown)
-    - Automatic fallback to other providers if primary is down
+    - Per-provider circuit breaker shared across workers (opens after 5
+      failures, 60s cooldown, one worker probes recovery)
+    - Automatic fallback to other providers if primary is down, fastest first
     - Optional fallback string returned when all providers unavailable
+    - Response cache for tasks with a cache policy (``llm_response_cache``)
 
     Args:
         prompt: The prompt to send.
@@ -237,6 +212,8 @@ async def generate_content(
         max_retries: Max retry attempts per provider.
         fallback: String to return if all providers fail.
         user_id: User ID to resolve provider preference (None = system default).
+        priority: Queue priority when the provider is saturated.
+        task: Logical task; answers to cacheable tasks are reused.
 
     Returns:
         Generated text, or fallback string if all providers unavailable.
@@ -251,31 +228,54 @@ async def generate_content(
         f"prompt_length={len(prompt)}, max_tokens={max_tokens}"
     )
 
+    model = _provider_model(primary_provider)
+    cached = await llm_response_cache.get(task, model, prompt, temperature, scope=user_id)
+    if cached is not None:
+        logger.info(f"LLM [{task}] served from response cache (similar={cached.similar})")
+        return cached.text
+    requested_at = time.perf_counter()
+
     # Build provider attempt order: primary first, then fallbacks
-    providers_to_try = [primary_provider] + _get_fallback_providers(primary_provider)
+    providers_to_try = [primary_provider] + await _get_fallback_providers(primary_provider)
 
     last_error: Exception | None = None
 
     for provider in providers_to_try:
-        # Check circuit breaker for this provider
-        if _is_circuit_open(provider):
-            logger.debug(f"LLM circuit open for [{provider}] — skipping")
-            continue
-
         # Check if provider has an API key configured
         call_fn = _PROVIDER_CALLABLES.get(provider)
         if not call_fn:
             continue
 
+        # Check circuit breaker for this provider
+        if not await provider_health.allow(provider):
+            logger.debug(f"LLM circuit open for [{provider}] — skipping")
+            continue
+
         # Try this provider with retries
         for attempt in range(max_retries + 1):
+            started = time.perf_counter()
             try:
                 result = await asyncio.wait_for(
-                    call_fn(prompt, max_tokens=max_tokens, temperature=temperature),
+                    call_fn(
+                        prompt, max_tokens=max_tokens, temperature=temperature, priority=priority
+                    ),
                     timeout=timeout_s,
                 )
-                _record_success(provider)
+                await provider_health.record(
+                    provider, ok=True, latency=time.perf_counter() - started
+                )
                 logger.info(f"LLM [{provider}] succeeded: response_length={len(result)}")
+                # Keyed by the model that answered: a fallback answer must not be
+                # served as the primary provider's
+                await llm_response_cache.put(
+                    task,
+                    _provider_model(provider),
+                    prompt,
+                    temperature,
+                    result,
+                    latency=time.perf_counter() - requested_at,
+                    scope=user_id,
+                )
                 return result
 
             except asyncio.TimeoutError:
@@ -304,12 +304,17 @@ async def generate_content(
                     f"{type(e).__name__}: {e}"
                 )
 
+            # The last failed attempt moves the breaker; earlier ones only feed stats
+            await provider_health.record(
+                provider,
+                ok=False,
+                latency=time.perf_counter() - started,
+                count_failure=attempt == max_retries,
+            )
+
             # Exponential backoff between retries
             if attempt < max_retries:
                 await asyncio.sleep(0.5 * (2**attempt))
-        else:
-            # All retries exhausted for this provider — record failure
-            _record_failure(provider)
 
     # All providers exhausted
     if fallback is not None:
@@ -330,6 +335,8 @@ async def generate_content_json(
     max_retries: int = _MAX_RETRIES,
     fallback: Any = None,
     user_id: str | None = None,
+    priority: Priority = Priority.NORMAL,
+    task: LlmTask | None = None,
 ) -> Any:
     """Generate content and parse as JSON. Returns fallback on failure.
 
@@ -349,6 +356,8 @@ async def generate_content_json(
             max_retries=max_retries,
             fallback=None,  # We handle fallback ourselves after JSON parse
             user_id=user_id,
+            priority=priority,
+            task=task,
         )
         # Strip markdown fences if present
         cleaned = response.strip()
@@ -380,6 +389,10 @@ async def generate_content_json(
                         return json.loads(trimmed)
                     except json.JSONDecodeError:
                         pass
+            # Don't keep serving an answer that cannot be parsed
+            if llm_response_cache.policy_for(task) is not None:
+                model = _provider_model(await _resolve_provider(user_id))
+                await llm_response_cache.discard(task, model, prompt, temperature)
             raise
 
     except (LLMUnavailableError, json.JSONDecodeError, Exception) as e:
@@ -284,6 +284,10 @@ async def process_referral_completion(referrer_id: str, referred_id: str) -> Ref
         await session.execute(stmt)
         await session.commit()
 
+    from src.domains.billing.services.credit_ledger import credit_ledger
+
+    await credit_ledger.invalidate(referrer_id)
+
     logger.info(
         f"Referral reward: {REFERRAL_REWARD_CREDITS} credits to {referrer_id} "
         f"for referring {referred_id}"
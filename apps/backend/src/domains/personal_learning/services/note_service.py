@@ -9,6 +9,7 @@ from typing import Any
 
 from src.shared.exceptions import NotFoundError
 
+from ..events import emit_note_created
 from ..repository import personal_learning_repo as repo
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,13 @@ async def create_note(*, user_id: str, data: dict[str, Any]) -> Any:
         title=f"Created note: {data.get('title', 'Untitled')}",
         context={"source": "personal", "noteId": note.id},
     )
+    await emit_note_created(
+        user_id,
+        note.id,
+        title=note.title,
+        course_id=note.course_id,
+        topic_id=note.topic_id,
+    )
 
     return note
 
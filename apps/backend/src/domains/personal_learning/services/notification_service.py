@@ -3,16 +3,55 @@ Notification service — smart notification creation and delivery.
 
 Every notification earns the right to exist. Right moment, right message.
 Respects quiet hours, daily limits, and priority deduplication.
+
+Delivery runs in passes (``deliver_due``). Each pass claims a batch of due
+notifications joined with the learner's quiet hours in one ``SELECT ... FOR
+UPDATE SKIP LOCKED``, so any number of deliverers can share the queue
+without sending anything twice. Notifications whose learner is in quiet
+hours are moved to the end of them (QUEUED) rather than re-read on every
+pass; the rest are sent grouped by channel through the batch send APIs, and
+the outcomes are written with bulk UPDATEs in the same transaction.
 """
 
+import asyncio
 import logging
+import time as clock
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime, time, timedelta, timezone
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import get_settings
+from src.shared.database import get_session_factory
+
 from ..repository import personal_learning_repo as repo
 
 logger = logging.getLogger(__name__)
 
+# Notification types delivered by email; everything else goes out as a push
+EMAIL_NOTIFICATION_TYPES = frozenset({"WEEKLY"})
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of one or more delivery passes."""
+
+    claimed: int = 0
+    delivered: int = 0
+    deferred: int = 0  # Moved to the end of the learner's quiet hours
+    failed: int = 0  # Send failed; back in the queue after the retry delay
+    passes: int = 0
+    elapsed_ms: float = 0.0
+
+    def add(self, other: "DeliveryResult") -> None:
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
 
 async def create_notification(
     *,
@@ -32,28 +71,18 @@ async def create_notification(
     Req 13.4: Enforce daily limit (max 5, excluding quiet-hours overflow).
     Req 10.7: Priority deduplication — only highest priority when simultaneous.
     """
-    # Get the learner's profile for scheduling intelligence
-    profile = await repo.get_profile_by_user(user_id)
+    # Get the learner's profile for scheduling intelligence (and today's count)
+    profile, today_count = await repo.get_delivery_context(user_id, now=datetime.now(timezone.utc))
 
     # Determine delivery time
     if scheduled_at is None:
         scheduled_at = _compute_optimal_time(profile)
 
-    # Check daily limit (enforce max per day, excluding quiet-hours overflow)
-    today_count = await repo.count_today_delivered(user_id)
-    max_daily = profile.max_daily_notifications if profile else 5
-    if today_count >= max_daily:
+    planned = _plan_delivery(profile, scheduled_at, today_count)
+    if planned is None:
         logger.info(f"Daily notification limit reached for user {user_id}, suppressing.")
         return None
-
-    # Check quiet hours — if scheduled during quiet hours, queue for later
-    status = "PENDING"
-    if profile and _is_during_quiet_hours(
-        scheduled_at, profile.quiet_hours_start, profile.quiet_hours_end
-    ):
-        status = "QUEUED"
-        # Reschedule to after quiet hours end
-        scheduled_at = _reschedule_after_quiet_hours(scheduled_at, profile.quiet_hours_end)
+    status, scheduled_at = planned
 
     notification = await repo.create_notification(
         {
@@ -71,6 +100,56 @@ async def create_notification(
     return notification
 
 
+async def create_cohort_notifications(
+    profiles: Sequence[Any],
+    *,
+    type: str,
+    title: str,
+    body: str | Mapping[str, str],
+    priority: int = 5,
+    action_data: dict | None = None,
+    now: datetime,
+    session: AsyncSession,
+) -> int:
+    """
+    ``create_notification`` for a page of learners (cohort jobs).
+
+    ``profiles`` are rows carrying ``user_id``, ``quiet_hours_start``,
+    ``quiet_hours_end``, ``max_daily_notifications`` and
+    ``preferred_study_times``; ``body`` is one text for all of them or a
+    text per user id. Daily limits come from one grouped count and the
+    notifications are written with one bulk INSERT. Returns how many were
+    created.
+    """
+    delivered = await repo.count_delivered_today_by_user(
+        [p.user_id for p in profiles], now=now, session=session
+    )
+    rows = []
+    for profile in profiles:
+        text = body if isinstance(body, str) else body.get(profile.user_id)
+        if text is None:
+            continue
+        planned = _plan_delivery(
+            profile, _compute_optimal_time(profile), delivered.get(profile.user_id, 0)
+        )
+        if planned is None:
+            continue
+        status, scheduled_at = planned
+        rows.append(
+            {
+                "userId": profile.user_id,
+                "type": type,
+                "title": title,
+                "body": text,
+                "priority": priority,
+                "actionData": action_data,
+                "scheduledAt": scheduled_at,
+                "status": status,
+            }
+        )
+    return await repo.create_notifications(rows, session=session)
+
+
 async def get_unread(*, user_id: str) -> list[Any]:
     """
     Get unread notifications, sorted by priority then scheduled_at.
@@ -100,43 +179,163 @@ async def enforce_daily_limit(*, user_id: str) -> bool:
     Check if the daily notification limit has been reached.
     Returns True if more notifications can be sent, False otherwise.
     """
-    profile = await repo.get_profile_by_user(user_id)
+    profile, today_count = await repo.get_delivery_context(user_id, now=datetime.now(timezone.utc))
     max_daily = profile.max_daily_notifications if profile else 5
-    today_count = await repo.count_today_delivered(user_id)
     return today_count < max_daily
 
 
 async def deliver_pending() -> int:
     """
-    Deliver pending notifications whose scheduled_at has passed.
-    Called by the Celery notification_delivery task every 5 minutes.
+    Deliver every notification whose scheduled_at has passed.
 
-    Returns the count of delivered notifications.
+    Runs delivery passes until the due queue is empty. Returns the count of
+    delivered notifications.
     """
-    pending = await repo.list_pending_for_delivery()
+    batch_size = get_settings().NOTIFICATION_DELIVERY_BATCH_SIZE
     delivered_count = 0
+    while True:
+        result = await deliver_due(batch_size=batch_size)
+        delivered_count += result.delivered
+        if result.claimed < batch_size:
+            return delivered_count
 
-    for notification in pending:
-        # Check quiet hours for queued notifications
-        profile = await repo.get_profile_by_user(notification.user_id)
-        now = datetime.now(timezone.utc)
 
-        if profile and _is_during_quiet_hours(
-            now, profile.quiet_hours_start, profile.quiet_hours_end
-        ):
-            # Still in quiet hours, skip for now
-            continue
+async def deliver_due(
+    *, batch_size: int | None = None, now: datetime | None = None
+) -> DeliveryResult:
+    """
+    One delivery pass over up to ``batch_size`` due notifications.
 
-        # Deliver the notification (push/email would go here)
-        await repo.update_status(
-            notification.id,
-            status="DELIVERED",
-            delivered_at=now,
-        )
-        delivered_count += 1
-        logger.info(f"Delivered notification {notification.id} to user {notification.user_id}")
+    The claimed rows stay locked until the pass commits, so concurrent passes
+    (other workers) skip them.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+    now = now or datetime.now(timezone.utc)
+    retry_at = now + timedelta(seconds=settings.NOTIFICATION_RETRY_DELAY_SECONDS)
+    result = DeliveryResult(passes=1)
+    started = clock.perf_counter()
+
+    factory = get_session_factory()
+    async with factory() as s:
+        claimed = await repo.claim_due_notifications(now=now, limit=batch_size, session=s)
+        result.claimed = len(claimed)
+        if not claimed:
+            return result
+
+        schedule: dict[str, tuple[str, datetime]] = {}
+        by_channel: dict[str, list[Any]] = {}
+        for notification in claimed:
+            if _is_during_quiet_hours(
+                now, notification.quiet_hours_start, notification.quiet_hours_end
+            ):
+                # Still in quiet hours: hold it until they end
+                schedule[notification.id] = (
+                    "QUEUED",
+                    _reschedule_after_quiet_hours(now, notification.quiet_hours_end),
+                )
+            else:
+                by_channel.setdefault(_channel_for(notification), []).append(notification)
+        result.deferred = len(schedule)
+
+        delivered: list[str] = []
+        for channel, notifications in by_channel.items():
+            sent = await _send_batch(channel, notifications)
+            for notification, ok in zip(notifications, sent):
+                if ok:
+                    delivered.append(notification.id)
+                else:
+                    schedule[notification.id] = ("PENDING", retry_at)
+        result.delivered = len(delivered)
+        result.failed = len(schedule) - result.deferred
+
+        await repo.mark_notifications_delivered(delivered, delivered_at=now, session=s)
+        await repo.reschedule_notifications(schedule, session=s)
+        await s.commit()
+
+    result.elapsed_ms = round((clock.perf_counter() - started) * 1000, 1)
+    logger.info(
+        f"Notification delivery: {result.delivered} delivered, {result.deferred} deferred, "
+        f"{result.failed} failed of {result.claimed} claimed in {result.elapsed_ms} ms"
+    )
+    return result
+
+
+async def run_delivery_worker(
+    *, run_seconds: float | None = None, idle_seconds: float | None = None
+) -> DeliveryResult:
+    """
+    Deliver continuously for ``run_seconds``.
+
+    Passes run back to back while there is a backlog; while the queue is
+    empty (or a pass fails) the worker sleeps ``idle_seconds`` between passes.
+    Several workers can run at once.
+    """
+    settings = get_settings()
+    if run_seconds is None:
+        run_seconds = settings.NOTIFICATION_DELIVERY_RUN_SECONDS
+    if idle_seconds is None:
+        idle_seconds = settings.NOTIFICATION_DELIVERY_IDLE_SECONDS
+    batch_size = settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+    deadline = clock.monotonic() + run_seconds
+
+    total = DeliveryResult()
+    started = clock.perf_counter()
+    while True:
+        try:
+            result = await deliver_due(batch_size=batch_size)
+        except Exception:
+            logger.exception("Notification delivery pass failed")
+            result = DeliveryResult(passes=1)
+        total.add(result)
+        remaining = deadline - clock.monotonic()
+        if remaining <= 0:
+            break
+        if result.claimed < batch_size:
+            await asyncio.sleep(min(idle_seconds, remaining))
+    total.elapsed_ms = round((clock.perf_counter() - started) * 1000, 1)
+    return total
+
+
+def _channel_for(notification: Any) -> str:
+    return "email" if notification.type in EMAIL_NOTIFICATION_TYPES else "push"
+
+
+async def _send_batch(channel: str, notifications: Sequence[Any]) -> list[bool]:
+    """Send through the channel's batch API; one success flag per notification."""
+    from src.shared.infrastructure.email import send_notification_email_batch
+    from src.shared.infrastructure.push_notifications import send_push_batch
+
+    sender = send_notification_email_batch if channel == "email" else send_push_batch
+    messages = [
+        {"user_id": n.user_id, "title": n.title, "body": n.body, "data": n.action_data}
+        for n in notifications
+    ]
+    try:
+        return await sender(messages)
+    except Exception:
+        logger.exception(f"Batch {channel} send of {len(messages)} notification(s) failed")
+        return [False] * len(messages)
 
-    return delivered_count
+
+def _plan_delivery(
+    profile: Any | None, scheduled_at: datetime, today_count: int
+) -> tuple[str, datetime] | None:
+    """
+    Status and delivery time for a new notification, or None to suppress it.
+
+    Req 13.4: Enforce the daily limit (excluding quiet-hours overflow).
+    A notification scheduled during quiet hours is QUEUED until they end.
+    """
+    max_daily = profile.max_daily_notifications if profile else 5
+    if today_count >= max_daily:
+        return None
+
+    if profile and _is_during_quiet_hours(
+        scheduled_at, profile.quiet_hours_start, profile.quiet_hours_end
+    ):
+        return "QUEUED", _reschedule_after_quiet_hours(scheduled_at, profile.quiet_hours_end)
+    return "PENDING", scheduled_at
 
 
 def _compute_optimal_time(profile: Any | None) -> datetime:
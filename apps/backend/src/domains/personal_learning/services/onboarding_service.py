@@ -12,6 +12,7 @@ from typing import Any
 from src.domains.identity.repository import IdentityRepository
 from src.shared.exceptions import NotFoundError
 
+from ..events import emit_profile_updated
 from ..repository import personal_learning_repo as repo
 
 logger = logging.getLogger(__name__)
@@ -30,15 +31,18 @@ async def set_purpose(*, user_id: str, purpose: str) -> Any:
     existing = await repo.get_profile_by_user(user_id)
     if existing:
         # Update purpose on existing profile
-        return await repo.update_profile(user_id, {"purpose": purpose})
-
-    # Create new profile
-    return await repo.create_profile(
-        {
-            "userId": user_id,
-            "purpose": purpose,
-        }
-    )
+        profile = await repo.update_profile(user_id, {"purpose": purpose})
+    else:
+        # Create new profile
+        profile = await repo.create_profile(
+            {
+                "userId": user_id,
+                "purpose": purpose,
+            }
+        )
+
+    await emit_profile_updated(user_id)
+    return profile
 
 
 async def set_subjects(
@@ -83,6 +87,7 @@ async def set_subjects(
         logger.error(f"Auto-setup failed after subjects set: {e}")
         # Don't fail the subjects endpoint — auto-setup is best-effort
 
+    await emit_profile_updated(user_id)
     return profile
 
 
@@ -99,6 +104,7 @@ async def complete_onboarding(*, user_id: str) -> None:
 
     await IdentityRepository().set_onboarded(user_id)
     await repo.update_profile(user_id, {"onboardingCompletedAt": datetime.now(UTC)})
+    await emit_profile_updated(user_id)
 
 
 async def set_preferred_llm_provider(*, user_id: str, provider: str) -> Any:
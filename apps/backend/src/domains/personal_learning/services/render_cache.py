@@ -0,0 +1,137 @@
+"""
+Content-addressed cache for rendered documents.
+
+``generate_document`` used to render and upload both the binary and the HTML
+preview on every call, even for byte-identical output (client retries,
+duplicate prompts, re-exporting the same slides). This cache maps a hash of
+everything that determines the output — normalised HTML (or slide data),
+title, style/theme, format and renderer version — to the stored object URLs,
+so a hit skips the render pool and both uploads.
+
+Entries are scoped per user (objects live under ``generated-docs/<user_id>``)
+and held in two tiers:
+
+- an in-process LRU with TTL (``cache.TTLCache``);
+- Redis, so hits are shared across workers (best-effort — the cache degrades
+  to in-process only when Redis is unavailable).
+
+Bump ``RENDERER_VERSION`` when CSS, templates or renderer code change the
+output; installed renderer library versions are folded into the key
+automatically.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from functools import lru_cache
+from importlib import metadata
+from typing import Any
+
+from src.shared.infrastructure import cache as redis_cache
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Bump when templates/CSS/renderer code change the rendered output.
+RENDERER_VERSION = "1"
+
+_RENDER_LIBRARIES = ("weasyprint", "xhtml2pdf", "htmldocx", "python-docx", "python-pptx")
+
+_TRAILING_WS = re.compile(r"[ \t]+\n")
+
+
+def normalize_html(html: str) -> str:
+    """Normalise insignificant differences (line endings, trailing blanks).
+
+    Whitespace inside lines is left alone: it is significant in ``<pre>``.
+    """
+    html = html.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_WS.sub("\n", html).strip()
+
+
+@lru_cache(maxsize=1)
+def renderer_fingerprint() -> str:
+    """RENDERER_VERSION plus the installed renderer library versions."""
+    versions = []
+    for name in _RENDER_LIBRARIES:
+        try:
+            versions.append(f"{name}={metadata.version(name)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{name}=-")
+    return f"{RENDERER_VERSION};" + ",".join(versions)
+
+
+def render_key(*, user_id: str | None, kind: str, fmt: str, args: dict[str, Any]) -> str:
+    """Content hash for one render job (see ``render_pool`` job kinds/args)."""
+    payload = {
+        "user": user_id or "anonymous",
+        "kind": kind,
+        "format": fmt,
+        "renderer": renderer_fingerprint(),
+        **{
+            name: normalize_html(value) if name == "content" else value
+            for name, value in args.items()
+        },
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Two-tier (in-process + Redis) map of content hash -> stored document."""
+
+    def __init__(self, *, ttl_seconds: int = 7 * 24 * 3600, max_size: int = 2000):
+        self.ttl_seconds = ttl_seconds
+        self._local = TTLCache(ttl_seconds=ttl_seconds, max_size=max_size)
+        self.stats: dict[str, int] = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+    def _redis_key(self, key: str) -> str:
+        return redis_cache.make_key(["render", key])
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Stored document info for ``key``, or None on a miss."""
+        hit, value = await self._local.get(key)
+        if hit:
+            self.stats["local_hits"] += 1
+            return value
+
+        value = await redis_cache.get(self._redis_key(key))
+        if isinstance(value, dict):
+            self.stats["redis_hits"] += 1
+            await self._local.set(key, value)
+            return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, value: dict[str, Any]) -> None:
+        """Remember where the rendered document and preview were stored."""
+        self.stats["stores"] += 1
+        await self._local.set(key, value)
+        await redis_cache.set(self._redis_key(key), value, expire=self.ttl_seconds)
+
+    async def clear(self) -> None:
+        """Drop in-process entries (Redis entries expire on their own)."""
+        await self._local.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters and overall hit rate."""
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        lookups = hits + self.stats["misses"]
+        return {**self.stats, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+
+
+def _build_cache() -> RenderCache:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return RenderCache(
+        ttl_seconds=settings.RENDER_CACHE_TTL_SECONDS,
+        max_size=settings.RENDER_CACHE_MAX_ENTRIES,
+    )
+
+
+# Module-level singleton
+render_cache = _build_cache()
@@ -0,0 +1,402 @@
+"""
+Document Rendering Pool.
+
+WeasyPrint, xhtml2pdf, htmldocx and python-pptx are synchronous and CPU/memory
+heavy: rendering a large deck inline in an ``async def`` blocks the event loop
+(and every WebSocket on the worker) for seconds. ``RenderPool`` moves that
+work to a warm pool of worker processes:
+
+- workers preload WeasyPrint and render one tiny document per style at
+  startup, so fonts and CSS are loaded before the first real job;
+- jobs queue by priority (paid tiers first), then FIFO;
+- each job has a wall-clock timeout (SIGALRM inside the worker, plus a
+  parent-side backstop that recycles the pool) and workers run under an
+  address-space cap;
+- output is spooled to a temp file in the worker and streamed to storage by
+  the caller, so large documents are never pickled back through the pool.
+
+When the pool is not started (tests, Celery, ``RENDER_POOL_WORKERS=0``) jobs
+run in a thread with the same spooling, which still keeps the loop free.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Render job kinds
+PDF = "pdf"
+DOCX = "docx"
+PPTX = "pptx"
+PRESENTATION_PDF = "presentation_pdf"
+
+_SUFFIXES = {PDF: ".pdf", DOCX: ".docx", PPTX: ".pptx", PRESENTATION_PDF: ".pdf"}
+
+# Queue priorities (lower runs first)
+PRIORITY_PLUS = 0
+PRIORITY_FREE = 10
+
+# Extra seconds the parent waits past the job timeout before recycling workers
+_BACKSTOP_GRACE_SECONDS = 5.0
+
+
+class RenderError(Exception):
+    """Raised when a document cannot be rendered."""
+
+
+class RenderTimeoutError(RenderError):
+    """Raised when a render job exceeds its timeout."""
+
+
+def priority_for_tier(tier: str | None) -> int:
+    """Queue priority for a feature tier ("plus" or "free")."""
+    return PRIORITY_PLUS if tier == "plus" else PRIORITY_FREE
+
+
+@dataclass(slots=True)
+class RenderResult:
+    """A rendered document spooled to a local temp file."""
+
+    path: str
+    size: int
+    elapsed_ms: float
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as fh:
+            return fh.read()
+
+    def cleanup(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass(order=True, slots=True)
+class _Job:
+    priority: int
+    seq: int
+    kind: str = field(compare=False)
+    args: dict[str, Any] = field(compare=False)
+    timeout: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in pool processes, or a thread when the pool is off)
+# ---------------------------------------------------------------------------
+
+
+def render_bytes(kind: str, args: dict[str, Any]) -> bytes:
+    """Render one document synchronously and return its bytes."""
+    from src.domains.personal_learning.services.document_impl import (
+        document_generation_service as svc,
+        render_presentation_pdf,
+    )
+
+    if kind == PDF:
+        return svc._generate_pdf(args["title"], args["content"], args["style"])
+    if kind == DOCX:
+        return svc._generate_docx(args["title"], args["content"], args["style"])
+    if kind == PPTX:
+        return svc._generate_pptx(args["title"], args["content"], args["style"])
+    if kind == PRESENTATION_PDF:
+        return render_presentation_pdf(args["title"], args["slides"], theme=args["theme"])
+    raise RenderError(f"Unknown render kind: {kind}")
+
+
+def _on_alarm(signum: int, frame: Any) -> None:
+    raise RenderTimeoutError("Render job timed out")
+
+
+def _run_job(kind: str, args: dict[str, Any], timeout: float, spool_dir: str | None):
+    """Render, spool to a temp file and return ``(path, size, elapsed_ms)``."""
+    started = time.perf_counter()
+    use_alarm = hasattr(signal, "setitimer") and (
+        threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        data = render_bytes(kind, args)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    fd, path = tempfile.mkstemp(prefix="render_", suffix=_SUFFIXES[kind], dir=spool_dir)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    return path, len(data), round((time.perf_counter() - started) * 1000, 2)
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Pool initializer: cap memory and warm the renderers."""
+    if memory_limit_mb > 0:
+        try:
+            import resource
+
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Render worker memory cap not applied: {e}")
+
+    # Importing WeasyPrint and laying out one page per style loads Pango,
+    # fonts and the stylesheets once per worker instead of on the first job.
+    from src.domains.personal_learning.services.document_impl import _STYLE_CSS
+
+    for style in _STYLE_CSS:
+        try:
+            render_bytes(PDF, {"title": "warmup", "content": "<p>warmup</p>", "style": style})
+        except Exception as e:
+            logger.warning(f"Render worker warm-up failed for style {style}: {e}")
+            break
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+
+class RenderPool:
+    """Priority-queued process pool for document rendering."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        timeout: float = 60.0,
+        memory_limit_mb: int = 1536,
+        max_queue: int = 200,
+        spool_dir: str | None = None,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_queue = max_queue
+        self.spool_dir = spool_dir
+
+        self._executor: ProcessPoolExecutor | None = None
+        self._queue: asyncio.PriorityQueue[_Job] | None = None
+        self._dispatchers: list[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._running = 0
+        self.stats: dict[str, float] = {
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "recycles": 0,
+            "render_ms_total": 0.0,
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        """Spawn and warm the worker processes, then start dispatching."""
+        if self.started or self.workers <= 0:
+            return
+        self._executor = self._new_executor()
+        self._queue = asyncio.PriorityQueue()
+        loop = asyncio.get_running_loop()
+        # Force every worker to spawn (and run its warm-up) before traffic.
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers))
+        )
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        logger.info(f"Render pool started ({self.workers} workers)")
+
+    async def stop(self) -> None:
+        """Stop dispatching, fail queued jobs and shut the workers down."""
+        for task in self._dispatchers:
+            task.cancel()
+        for task in self._dispatchers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._dispatchers = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                if not job.future.done():
+                    job.future.set_exception(RenderError("Render pool stopped"))
+            self._queue = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Render pool stopped")
+
+    async def render(
+        self,
+        kind: str,
+        *,
+        priority: int = PRIORITY_FREE,
+        timeout: float | None = None,
+        **args: Any,
+    ) -> RenderResult:
+        """
+        Render a document off the event loop.
+
+        Args:
+            kind: One of ``pdf``, ``docx``, ``pptx``, ``presentation_pdf``
+            priority: Queue priority (see ``priority_for_tier``)
+            timeout: Per-job timeout in seconds (defaults to the pool's)
+            **args: Renderer arguments (title/content/style or title/slides/theme)
+
+        Returns:
+            A ``RenderResult``; the caller must ``cleanup()`` the spooled file.
+
+        Raises:
+            RenderError: On failure, overload or shutdown
+            RenderTimeoutError: When the job exceeds its timeout
+        """
+        timeout = timeout or self.timeout
+        if not self.started:
+            try:
+                path, size, elapsed = await asyncio.to_thread(
+                    _run_job, kind, args, timeout, self.spool_dir
+                )
+            except RenderError:
+                raise
+            except Exception as e:
+                raise RenderError(f"Render failed: {e}") from e
+            return RenderResult(path, size, elapsed)
+
+        if self._queue.qsize() >= self.max_queue:
+            raise RenderError("Render queue is full, try again shortly")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Job(priority, next(self._seq), kind, args, timeout, future))
+        return await future
+
+    async def _dispatch(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.future.done():  # Caller went away
+                continue
+            self._running += 1
+            try:
+                result = await self._execute(job)
+            except Exception as e:
+                self.stats["failed"] += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.stats["completed"] += 1
+                self.stats["render_ms_total"] += result.elapsed_ms
+                if job.future.done():
+                    result.cleanup()
+                else:
+                    job.future.set_result(result)
+            finally:
+                self._running -= 1
+
+    async def _execute(self, job: _Job) -> RenderResult:
+        loop = asyncio.get_running_loop()
+        # Remember which pool ran the job: another job may recycle it meanwhile.
+        executor = self._executor
+        call = loop.run_in_executor(
+            executor, _run_job, job.kind, job.args, job.timeout, self.spool_dir
+        )
+        try:
+            path, size, elapsed = await asyncio.wait_for(
+                call, timeout=job.timeout + _BACKSTOP_GRACE_SECONDS
+            )
+        except RenderTimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except TimeoutError as e:
+            # The worker ignored SIGALRM (stuck in native code): replace the pool.
+            self.stats["timeouts"] += 1
+            self._recycle(executor)
+            raise RenderTimeoutError("Render job timed out") from e
+        except BrokenProcessPool as e:
+            # A worker died outright; the pool is unusable until replaced.
+            if not self._recycle(executor):
+                raise RenderError("Render pool was recycled, try again") from e
+            raise RenderError("Render worker crashed") from e
+        except asyncio.CancelledError as e:
+            # Shutting down a recycled pool cancels its pending jobs; only a
+            # cancellation of this task itself should propagate.
+            if executor is self._executor or asyncio.current_task().cancelling():
+                raise
+            raise RenderError("Render pool was recycled, try again") from e
+        except MemoryError as e:
+            raise RenderError("Render exceeded the worker memory limit") from e
+        except RenderError:
+            raise
+        except Exception as e:
+            raise RenderError(f"Render failed: {e}") from e
+        return RenderResult(path, size, elapsed)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.memory_limit_mb,),
+        )
+
+    def _recycle(self, executor: ProcessPoolExecutor | None) -> bool:
+        """
+        Kill ``executor``'s workers and start a fresh pool.
+
+        Does nothing (and returns False) when ``executor`` was already replaced,
+        so jobs failing together on the same broken pool recycle it once.
+        """
+        if executor is None or executor is not self._executor:
+            return False
+        self._executor = self._new_executor()
+        self.stats["recycles"] += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Render pool recycled")
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        """Queue depth, in-flight jobs and outcome counters."""
+        completed = self.stats["completed"]
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "workers": self.workers if self.started else 0,
+            "avg_render_ms": (
+                round(self.stats["render_ms_total"] / completed, 2) if completed else 0.0
+            ),
+        }
+
+
+def _build_pool() -> RenderPool:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return RenderPool(
+        workers=settings.RENDER_POOL_WORKERS,
+        timeout=settings.RENDER_JOB_TIMEOUT_SECONDS,
+        memory_limit_mb=settings.RENDER_WORKER_MEMORY_LIMIT_MB,
+        max_queue=settings.RENDER_QUEUE_MAX,
+    )
+
+
+# Module-level singleton (started from the app lifespan)
+render_pool = _build_pool()
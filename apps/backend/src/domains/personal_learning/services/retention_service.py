@@ -10,10 +10,14 @@ Book principle: "Renewal should be earned through value. Never through habit."
 from __future__ import annotations
 
 import logging
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.shared.database.session import get_session_factory
 
 logger = logging.getLogger(__name__)
@@ -36,6 +40,12 @@ SIGNAL_WEIGHTS = {
     "behaviour_dropout_risk": 0.15,
     "days_since_activity": 0.10,
 }
+SIGNAL_NAMES = tuple(SIGNAL_WEIGHTS)
+_SIGNAL_WEIGHT_VECTOR = np.array([SIGNAL_WEIGHTS[name] for name in SIGNAL_NAMES])
+
+# Activity windows compared by the decline signals
+RECENT_WINDOW_DAYS = 14
+PREVIOUS_WINDOW_DAYS = 28
 
 
 # ===========================================================================
@@ -53,6 +63,40 @@ class ChurnRiskProfile:
     recommendation: str
 
 
+@dataclass
+class ChurnInputs:
+    """Churn inputs for a cohort of subscribers, one aligned NumPy column each."""
+
+    user_ids: list[str]
+    activity_recent: np.ndarray  # Activity feed entries, last 14 days
+    activity_previous: np.ndarray  # ... the 14 days before that
+    days_inactive: np.ndarray  # Whole days since the last entry (NaN: none ever)
+    docs_recent: np.ndarray  # Generated documents, last 14 days
+    docs_previous: np.ndarray
+    plus_features_used: np.ndarray  # PLUS features used this period (-1: no profile)
+    dropout_risk: np.ndarray  # Behaviour dropout risk (NaN: unknown)
+
+
+@dataclass
+class ChurnScores:
+    """Vectorised churn scoring output, aligned with ``ChurnInputs.user_ids``."""
+
+    user_ids: list[str]
+    signals: np.ndarray  # (subscribers, signals), columns in SIGNAL_NAMES order
+    scores: np.ndarray
+    primary: np.ndarray  # Column index of each subscriber's primary risk factor
+
+    def profile(self, i: int) -> ChurnRiskProfile:
+        signals = dict(zip(SIGNAL_NAMES, self.signals[i].tolist()))
+        primary_factor = SIGNAL_NAMES[int(self.primary[i])]
+        return ChurnRiskProfile(
+            score=float(self.scores[i]),
+            signals=signals,
+            primary_risk_factor=primary_factor,
+            recommendation=_generate_recommendation(primary_factor, signals[primary_factor]),
+        )
+
+
 @dataclass
 class RetentionAction:
     """A retention intervention to deliver."""
@@ -96,39 +140,10 @@ async def calculate_churn_risk(user_id: str) -> ChurnRiskProfile:
     Score is 0.0 (no risk) to 1.0 (very high risk).
     Uses weighted signals based on behavioural patterns.
     """
-    signals: dict[str, float] = {}
-
-    # Signal 1: Login frequency decline (0.0 = stable/growing, 1.0 = severe decline)
-    signals["login_frequency_decline"] = await _calc_login_decline(user_id)
-
-    # Signal 2: Feature usage decline vs previous period
-    signals["feature_usage_decline"] = await _calc_feature_decline(user_id)
-
-    # Signal 3: PLUS feature absence in current period
-    signals["plus_feature_absence"] = await _calc_plus_feature_absence(user_id)
-
-    # Signal 4: Behaviour service dropout risk
-    signals["behaviour_dropout_risk"] = await _calc_behaviour_dropout(user_id)
-
-    # Signal 5: Days since last activity
-    signals["days_since_activity"] = await _calc_inactivity_signal(user_id)
-
-    # Calculate weighted score
-    score = sum(signals.get(signal, 0.0) * weight for signal, weight in SIGNAL_WEIGHTS.items())
-    score = max(0.0, min(1.0, score))  # Clamp to [0, 1]
-
-    # Identify primary risk factor
-    primary_factor = max(signals, key=lambda k: signals[k] * SIGNAL_WEIGHTS[k])
-
-    # Generate recommendation
-    recommendation = _generate_recommendation(primary_factor, signals[primary_factor])
-
-    return ChurnRiskProfile(
-        score=score,
-        signals=signals,
-        primary_risk_factor=primary_factor,
-        recommendation=recommendation,
-    )
+    factory = get_session_factory()
+    async with factory() as session:
+        inputs = await load_churn_inputs(session, [user_id], now=datetime.now(timezone.utc))
+    return score_churn_risk(inputs).profile(0)
 
 
 async def evaluate_retention_intervention(user_id: str) -> RetentionAction | None:
@@ -137,28 +152,100 @@ async def evaluate_retention_intervention(user_id: str) -> RetentionAction | Non
 
     Returns None if no intervention appropriate (risk too low or cooldown active).
     """
-    # Calculate risk
-    risk_profile = await calculate_churn_risk(user_id)
-
-    if risk_profile.score < CHURN_RISK_THRESHOLD:
-        return None
+    factory = get_session_factory()
+    async with factory() as session:
+        actions = await evaluate_interventions(session, [user_id], now=datetime.now(timezone.utc))
+        await session.commit()
+    return actions.get(user_id)
 
-    # Check cooldown
-    if await _intervention_recently_delivered(user_id):
-        return None
 
-    # Select intervention type based on primary risk factor
-    intervention = _select_intervention(risk_profile)
+async def evaluate_interventions(
+    session: AsyncSession, user_ids: Sequence[str], *, now: datetime
+) -> dict[str, RetentionAction]:
+    """
+    Score a cohort of subscribers and record interventions for those at risk.
 
-    # Record the intervention
-    await _record_intervention(user_id, risk_profile.score, intervention.intervention_type)
+    Inputs come from a few grouped queries, scoring is vectorised, cooldowns
+    are checked with one query for everyone over the threshold and the
+    interventions are written with one bulk INSERT (in ``session``; the
+    caller commits). Returns the interventions by user id.
+    """
+    from sqlalchemy import insert
+    from src.domains.personal_learning.db_models import RetentionIntervention
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    scores = score_churn_risk(await load_churn_inputs(session, user_ids, now=now))
+
+    at_risk = np.flatnonzero(scores.scores >= CHURN_RISK_THRESHOLD)
+    if not at_risk.size:
+        return {}
+    cooling_down = await _recently_intervened(session, [user_ids[i] for i in at_risk], now=now)
+
+    actions: dict[str, RetentionAction] = {}
+    records = []
+    for i in at_risk.tolist():
+        user_id = user_ids[i]
+        if user_id in cooling_down:
+            continue
+        # Select intervention type based on primary risk factor
+        risk_profile = scores.profile(i)
+        intervention = _select_intervention(risk_profile)
+        actions[user_id] = intervention
+        records.append(
+            {
+                "user_id": user_id,
+                "churn_risk_score": risk_profile.score,
+                "intervention_type": intervention.intervention_type,
+                "delivered_at": now,
+            }
+        )
+        logger.info(
+            f"Retention intervention for user {user_id}: "
+            f"type={intervention.intervention_type}, risk={risk_profile.score:.2f}"
+        )
 
-    logger.info(
-        f"Retention intervention for user {user_id}: "
-        f"type={intervention.intervention_type}, risk={risk_profile.score:.2f}"
+    if records:
+        await session.execute(insert(RetentionIntervention), records)
+    return actions
+
+
+async def evaluate_intervention_cohort(
+    s: AsyncSession, subscribers: Sequence[Any], now: datetime
+) -> int:
+    """``evaluate_interventions`` for a page of subscribers (cohort batch function)."""
+    return len(await evaluate_interventions(s, [row.id for row in subscribers], now=now))
+
+
+def score_churn_risk(inputs: ChurnInputs) -> ChurnScores:
+    """Compute every signal and the weighted risk for the whole cohort at once."""
+    signals = np.column_stack(
+        [
+            # Signal 1: Login frequency decline (0.0 = stable/growing, 1.0 = severe decline)
+            _decline(inputs.activity_recent, inputs.activity_previous, no_history=0.5),
+            # Signal 2: Feature usage decline vs previous period
+            _decline(inputs.docs_recent, inputs.docs_previous, no_history=0.3),
+            # Signal 3: PLUS feature absence in current period
+            np.select(
+                [inputs.plus_features_used < 0, inputs.plus_features_used <= 1],
+                [0.5, np.where(inputs.plus_features_used == 0, 1.0, 0.5)],
+                default=0.0,
+            ),
+            # Signal 4: Behaviour service dropout risk (moderate when unknown)
+            np.where(np.isnan(inputs.dropout_risk), 0.3, np.clip(inputs.dropout_risk, 0.0, 1.0)),
+            # Signal 5: Days since last activity
+            _inactivity(inputs.days_inactive),
+        ]
     )
 
-    return intervention
+    weighted = signals * _SIGNAL_WEIGHT_VECTOR
+    return ChurnScores(
+        user_ids=inputs.user_ids,
+        signals=signals,
+        scores=np.clip(weighted.sum(axis=1), 0.0, 1.0),
+        primary=weighted.argmax(axis=1),
+    )
 
 
 async def offer_pause(user_id: str) -> PauseOffer:
@@ -235,168 +322,131 @@ async def record_intervention_outcome(intervention_id: str, outcome: str) -> Non
 # ===========================================================================
 
 
-async def _calc_login_decline(user_id: str) -> float:
-    """
-    Calculate login frequency decline signal.
+async def load_churn_inputs(
+    session: AsyncSession, user_ids: list[str], *, now: datetime
+) -> ChurnInputs:
+    """Load the churn inputs for ``user_ids`` with three grouped queries."""
+    from sqlalchemy import func, select
+    from src.domains.personal_learning.db_models import (
+        ActivityFeedEntry,
+        GeneratedDocument,
+        LearningProfile,
+    )
 
-    Compares last 14 days vs previous 14 days.
-    Returns 0.0 (stable/growing) to 1.0 (severe decline).
-    """
-    factory = get_session_factory()
-    async with factory() as session:
-        from sqlalchemy import func, select
-        from src.domains.personal_learning.db_models import ActivityFeedEntry
-
-        now = datetime.now(timezone.utc)
-        recent_start = now - timedelta(days=14)
-        previous_start = now - timedelta(days=28)
-
-        # Recent activity count
-        recent_stmt = (
-            select(func.count())
-            .select_from(ActivityFeedEntry)
-            .where(ActivityFeedEntry.user_id == user_id)
-            .where(ActivityFeedEntry.occurred_at >= recent_start)
-        )
-        recent_result = await session.execute(recent_stmt)
-        recent_count = recent_result.scalar_one() or 0
-
-        # Previous period count
-        prev_stmt = (
-            select(func.count())
-            .select_from(ActivityFeedEntry)
-            .where(ActivityFeedEntry.user_id == user_id)
-            .where(ActivityFeedEntry.occurred_at >= previous_start)
-            .where(ActivityFeedEntry.occurred_at < recent_start)
+    recent_start = now - timedelta(days=RECENT_WINDOW_DAYS)
+    previous_start = now - timedelta(days=PREVIOUS_WINDOW_DAYS)
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    occurred = ActivityFeedEntry.occurred_at
+    activity = await session.execute(
+        select(
+            ActivityFeedEntry.user_id,
+            func.count().filter(occurred >= recent_start),
+            func.count().filter(occurred >= previous_start, occurred < recent_start),
+            func.max(occurred),
         )
-        prev_result = await session.execute(prev_stmt)
-        prev_count = prev_result.scalar_one() or 0
-
-    if prev_count == 0:
-        return 0.0 if recent_count > 0 else 0.5
-
-    decline_ratio = 1.0 - (recent_count / prev_count)
-    return max(0.0, min(1.0, decline_ratio))
-
+        .where(ActivityFeedEntry.user_id.in_(user_ids))
+        .group_by(ActivityFeedEntry.user_id)
+    )
+    activity_recent, activity_previous, last_activity = _scatter(
+        [(u, recent, prev, last.timestamp()) for u, recent, prev, last in activity.all()],
+        index,
+        fills=(0, 0, np.nan),
+    )
 
-async def _calc_feature_decline(user_id: str) -> float:
-    """Calculate feature usage decline vs previous period."""
-    # Simplified: compare document + quiz counts between periods
-    factory = get_session_factory()
-    async with factory() as session:
-        from sqlalchemy import func, select
-        from src.domains.personal_learning.db_models import GeneratedDocument, QuizSession
-
-        now = datetime.now(timezone.utc)
-        recent_start = now - timedelta(days=14)
-        previous_start = now - timedelta(days=28)
-
-        # Recent docs
-        recent_docs = (
-            select(func.count())
-            .select_from(GeneratedDocument)
-            .where(GeneratedDocument.user_id == user_id)
-            .where(GeneratedDocument.created_at >= recent_start)
-        )
-        r1 = await session.execute(recent_docs)
-        recent = r1.scalar_one() or 0
-
-        # Previous docs
-        prev_docs = (
-            select(func.count())
-            .select_from(GeneratedDocument)
-            .where(GeneratedDocument.user_id == user_id)
-            .where(GeneratedDocument.created_at >= previous_start)
-            .where(GeneratedDocument.created_at < recent_start)
+    created = GeneratedDocument.created_at
+    docs = await session.execute(
+        select(
+            GeneratedDocument.user_id,
+            func.count().filter(created >= recent_start),
+            func.count().filter(created < recent_start),
         )
-        r2 = await session.execute(prev_docs)
-        previous = r2.scalar_one() or 0
-
-    if previous == 0:
-        return 0.0 if recent > 0 else 0.3
-
-    decline = 1.0 - (recent / previous)
-    return max(0.0, min(1.0, decline))
-
-
-async def _calc_plus_feature_absence(user_id: str) -> float:
-    """Check if user is not using any PLUS-exclusive features this period."""
-    from src.domains.personal_learning.repository import PersonalLearningRepository
-
-    repo = PersonalLearningRepository()
-    profile = await repo.get_profile_by_user(user_id)
-
-    if not profile:
-        return 0.5
-
-    used = profile.plus_features_used_this_period or []
-    if len(used) == 0:
-        return 1.0  # Not using any PLUS features
-    elif len(used) <= 1:
-        return 0.5  # Barely using PLUS features
-    else:
-        return 0.0  # Actively using PLUS features
-
-
-async def _calc_behaviour_dropout(user_id: str) -> float:
-    """Get dropout risk from the behaviour service."""
-    from src.domains.personal_learning.repository import PersonalLearningRepository
-
-    repo = PersonalLearningRepository()
-    profile = await repo.get_profile_by_user(user_id)
-
-    if not profile or profile.dropout_risk is None:
-        return 0.3  # Default moderate risk when unknown
+        .where(GeneratedDocument.user_id.in_(user_ids), created >= previous_start)
+        .group_by(GeneratedDocument.user_id)
+    )
+    docs_recent, docs_previous = _scatter(docs.all(), index, fills=(0, 0))
+
+    profiles = await session.execute(
+        select(
+            LearningProfile.user_id,
+            LearningProfile.plus_features_used_this_period,
+            LearningProfile.dropout_risk,
+        ).where(LearningProfile.user_id.in_(user_ids))
+    )
+    plus_features_used, dropout_risk = _scatter(
+        [(u, len(used or []), risk) for u, used, risk in profiles.all()],
+        index,
+        fills=(-1, np.nan),
+    )
 
-    return max(0.0, min(1.0, profile.dropout_risk))
+    return ChurnInputs(
+        user_ids=user_ids,
+        activity_recent=activity_recent,
+        activity_previous=activity_previous,
+        days_inactive=np.floor((now.timestamp() - last_activity) / 86400),
+        docs_recent=docs_recent,
+        docs_previous=docs_previous,
+        plus_features_used=plus_features_used,
+        dropout_risk=dropout_risk,
+    )
 
 
-async def _calc_inactivity_signal(user_id: str) -> float:
-    """Calculate signal based on days since last activity."""
-    factory = get_session_factory()
-    async with factory() as session:
-        from sqlalchemy import func, select
-        from src.domains.personal_learning.db_models import ActivityFeedEntry
+def _scatter(
+    rows: Sequence[Sequence[Any]], index: dict[str, int], *, fills: tuple[float, ...]
+) -> list[np.ndarray]:
+    """Spread grouped rows ``(user_id, v1, v2, ...)`` into per-subscriber columns.
 
-        stmt = select(func.max(ActivityFeedEntry.occurred_at)).where(
-            ActivityFeedEntry.user_id == user_id
-        )
-        result = await session.execute(stmt)
-        last_activity = result.scalar_one_or_none()
-
-    if not last_activity:
-        return 0.8
+    Subscribers without a row keep ``fills``; a NULL value becomes NaN.
+    """
+    columns = [np.full(len(index), fill, dtype=float) for fill in fills]
+    if rows:
+        at = np.fromiter((index[row[0]] for row in rows), dtype=np.intp, count=len(rows))
+        for j, column in enumerate(columns, start=1):
+            column[at] = [np.nan if row[j] is None else row[j] for row in rows]
+    return columns
+
+
+def _decline(recent: np.ndarray, previous: np.ndarray, *, no_history: float) -> np.ndarray:
+    """1 - recent/previous clipped to [0, 1]; without a previous period, 0 if
+    there is recent activity and ``no_history`` otherwise."""
+    ratio = np.divide(recent, previous, out=np.zeros_like(recent), where=previous > 0)
+    return np.where(
+        previous > 0,
+        np.clip(1.0 - ratio, 0.0, 1.0),
+        np.where(recent > 0, 0.0, no_history),
+    )
 
-    days_inactive = (datetime.now(timezone.utc) - last_activity).days
 
-    if days_inactive <= 2:
-        return 0.0
-    elif days_inactive <= 5:
-        return 0.2
-    elif days_inactive <= 10:
-        return 0.5
-    elif days_inactive <= 14:
-        return 0.7
-    else:
-        return 1.0
+def _inactivity(days_inactive: np.ndarray) -> np.ndarray:
+    """Map days since the last activity onto the inactivity signal."""
+    return np.select(
+        [
+            np.isnan(days_inactive),
+            days_inactive <= 2,
+            days_inactive <= 5,
+            days_inactive <= 10,
+            days_inactive <= 14,
+        ],
+        [0.8, 0.0, 0.2, 0.5, 0.7],
+        default=1.0,
+    )
 
 
-async def _intervention_recently_delivered(user_id: str) -> bool:
-    """Check if an intervention was delivered within the cooldown period."""
-    factory = get_session_factory()
-    async with factory() as session:
-        from sqlalchemy import select
-        from src.domains.personal_learning.db_models import RetentionIntervention
+async def _recently_intervened(
+    session: AsyncSession, user_ids: list[str], *, now: datetime
+) -> set[str]:
+    """Users with an intervention delivered within the cooldown period."""
+    from sqlalchemy import select
+    from src.domains.personal_learning.db_models import RetentionIntervention
 
-        cutoff = datetime.now(timezone.utc) - timedelta(days=INTERVENTION_COOLDOWN_DAYS)
-        stmt = (
-            select(RetentionIntervention.id)
-            .where(RetentionIntervention.user_id == user_id)
-            .where(RetentionIntervention.delivered_at >= cutoff)
-            .limit(1)
-        )
-        result = await session.execute(stmt)
-        return result.scalar_one_or_none() is not None
+    cutoff = now - timedelta(days=INTERVENTION_COOLDOWN_DAYS)
+    stmt = (
+        select(RetentionIntervention.user_id)
+        .where(RetentionIntervention.user_id.in_(user_ids))
+        .where(RetentionIntervention.delivered_at >= cutoff)
+        .distinct()
+    )
+    return set((await session.execute(stmt)).scalars().all())
 
 
 def _select_intervention(risk_profile: ChurnRiskProfile) -> RetentionAction:
@@ -445,25 +495,6 @@ def _generate_recommendation(primary_factor: str, signal_value: float) -> str:
     return recommendations.get(primary_factor, "Monitor and reassess in next cycle")
 
 
-async def _record_intervention(
-    user_id: str, churn_risk_score: float, intervention_type: str
-) -> None:
-    """Record a delivered intervention."""
-    factory = get_session_factory()
-    async with factory() as session:
-        from src.domains.personal_learning.db_models import RetentionIntervention
-
-        record = RetentionIntervention(
-            id=__import__("uuid").uuid4().hex[:25],
-            user_id=user_id,
-            churn_risk_score=churn_risk_score,
-            intervention_type=intervention_type,
-            delivered_at=datetime.now(timezone.utc),
-        )
-        session.add(record)
-        await session.commit()
-
-
 async def _get_approximate_churn_date(user_id: str) -> datetime | None:
     """Get approximate date when user churned (tier changed to FREE from PREMIUM)."""
     # This would ideally check audit logs or subscription events.
@@ -11,6 +11,7 @@ from typing import Any
 
 from src.shared.exceptions import NotFoundError
 
+from ..events import emit_study_plan_created, emit_study_plan_item_completed
 from ..repository import personal_learning_repo as repo
 
 logger = logging.getLogger(__name__)
@@ -122,6 +123,7 @@ async def generate_plan(*, user_id: str, data: dict[str, Any]) -> Any:
                 "status": "PENDING",
             }
         )
+    await emit_study_plan_created(user_id, plan.id)
 
     return await repo.get_study_plan(plan.id, user_id)
 
@@ -207,6 +209,7 @@ async def complete_item(*, user_id: str, plan_id: str, item_id: str) -> Any:
     if len(pending_past_due) > 2:
         await _redistribute_plan(plan_id, user_id)
 
+    await emit_study_plan_item_completed(user_id, plan_id, item_id)
     return await repo.get_study_plan(plan_id, user_id)
 
 
@@ -0,0 +1,300 @@
+"""
+Map-reduce topic extraction over exam-prep materials.
+
+Materials are split along their own structure (headings, numbered sections,
+then paragraphs) into chunks of at most ``EXAM_PREP_CHUNK_CHARS``. Each chunk
+is a separate topic-extraction call, at most
+``EXAM_PREP_EXTRACTION_CONCURRENCY`` in flight; the reducer then merges the
+per-chunk lists, folding together topics that name the same thing. Nothing is
+truncated, so cost and latency grow with the material instead of the tail of a
+long syllabus being dropped.
+
+Chunk prompts depend only on the subject and the chunk itself, and answers go
+through the topic-extraction response cache, so re-running extraction after
+adding a file mostly pays for the new chunks.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MINUTES = 30
+_MIN_MINUTES = 15
+_MAX_MINUTES = 120
+
+# A line that starts a new section: markdown headings, "Chapter 3", "Unit 2:",
+# "1.2 Title", "IV. Title" or a short all-caps line.
+_HEADING = re.compile(
+    r"^(#{1,6}\s+\S"
+    r"|(?i:chapter|unit|module|week|section|part|lecture|topic)\s+[\w.]+"
+    r"|\d+(\.\d+)*[.)]?\s+[A-Z]"
+    r"|[IVXLC]+\.\s+\S"
+    r"|[A-Z][A-Z0-9 ,&:/-]{3,60}$)"
+)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_TITLE_PREFIXES = (
+    "introduction to ",
+    "intro to ",
+    "overview of ",
+    "basics of ",
+    "fundamentals of ",
+    "the ",
+)
+_STOPWORDS = {"a", "an", "and", "the", "of", "in", "to", "for", "on", "with", "&"}
+
+
+@dataclass(slots=True)
+class MaterialChunk:
+    """One slice of one material, small enough for a single extraction call."""
+
+    index: int
+    source: str
+    text: str
+
+
+# ---------------------------------------------------------------------------
+# Chunking
+# ---------------------------------------------------------------------------
+
+
+def _sections(text: str) -> list[str]:
+    """Split text at heading lines; each section keeps its heading."""
+    sections: list[list[str]] = [[]]
+    for line in text.replace("\r\n", "\n").split("\n"):
+        stripped = line.strip()
+        if stripped and _HEADING.match(stripped) and any(s.strip() for s in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(lines).strip() for lines in sections if any(s.strip() for s in lines)]
+
+
+def _split_oversized(text: str, max_chars: int) -> list[str]:
+    """Split a section that is too big: by paragraph, then sentence, then hard."""
+    pieces: list[str] = []
+    for unit_re in (_PARAGRAPH_BREAK, _SENTENCE_END):
+        units = [u.strip() for u in unit_re.split(text) if u.strip()]
+        if len(units) > 1:
+            for unit in units:
+                pieces.extend(
+                    _split_oversized(unit, max_chars) if len(unit) > max_chars else [unit]
+                )
+            return pieces
+    return [text[i : i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def _pack(units: list[str], max_chars: int) -> list[str]:
+    """Greedily pack consecutive units into chunks of at most ``max_chars``."""
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for unit in units:
+        if current and size + len(unit) + 2 > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_materials(sources: list[tuple[str, str]], max_chars: int) -> list[MaterialChunk]:
+    """Chunk ``(source name, text)`` pairs along their structure."""
+    chunks: list[MaterialChunk] = []
+    for source, text in sources:
+        text = (text or "").strip()
+        if not text:
+            continue
+        units: list[str] = []
+        for section in _sections(text):
+            if len(section) > max_chars:
+                units.extend(_split_oversized(section, max_chars))
+            else:
+                units.append(section)
+        for piece in _pack(units, max_chars):
+            chunks.append(MaterialChunk(len(chunks), source, piece))
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Map: one extraction call per chunk
+# ---------------------------------------------------------------------------
+
+
+def _prompt(subject: str, chunk: MaterialChunk, total: int) -> str:
+    if total == 1:
+        scope = "Generate 5-15 topics covering all important areas."
+    else:
+        # No part numbers: the prompt must not change when other files are added
+        scope = (
+            "This is one part of a larger set of materials. "
+            "Generate 2-10 topics covering the important areas of this part only."
+        )
+    return (
+        f"Analyze this learning material and extract the key topics for study.\n"
+        f"Subject: {subject}\n"
+        f"Materials:\n[{chunk.source}]: {chunk.text}\n\n"
+        f"Return a JSON array of topic objects with:\n"
+        f"- 'title': short topic name\n"
+        f"- 'description': brief description of what to learn\n"
+        f"- 'estimatedMinutes': estimated study time in minutes (15-120)\n\n"
+        f"{scope}\n"
+        f"Return ONLY the JSON array."
+    )
+
+
+def parse_topics(response: str) -> list[dict[str, Any]]:
+    """Topic dicts from a model answer (tolerates fences and surrounding text).
+
+    Raises:
+        json.JSONDecodeError: If no JSON array can be recovered.
+    """
+    cleaned = response.strip()
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        start, end = cleaned.find("["), cleaned.rfind("]")
+        if start < 0 or end <= start:
+            raise
+        data = json.loads(cleaned[start : end + 1])
+    if isinstance(data, dict):
+        data = data.get("topics", [])
+    if not isinstance(data, list):
+        return []
+    return [t for t in data if isinstance(t, dict) and str(t.get("title") or "").strip()]
+
+
+async def _extract_chunk(subject: str, chunk: MaterialChunk, total: int, user_id: str):
+    from src.domains.intelligence.reasoning.llm import (
+        LlmTask,
+        default_model_for,
+        generate_content,
+        llm_response_cache,
+    )
+
+    task = LlmTask.TOPIC_EXTRACTION
+    prompt = _prompt(subject, chunk, total)
+    try:
+        response = await generate_content(
+            prompt,
+            max_tokens=3000,
+            task=task,
+            cache_scope=user_id,
+        )
+    except Exception as e:
+        logger.warning(f"Topic extraction failed for chunk {chunk.index} ({chunk.source}): {e}")
+        return []
+    try:
+        return parse_topics(response)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Unparseable topics for chunk {chunk.index} ({chunk.source}): {e}")
+        await llm_response_cache.discard(task, default_model_for(task), prompt, 0.7)
+        return []
+
+
+# ---------------------------------------------------------------------------
+# Reduce: merge and deduplicate
+# ---------------------------------------------------------------------------
+
+
+def _title_tokens(title: str) -> frozenset[str]:
+    title = title.lower().strip()
+    for prefix in _TITLE_PREFIXES:
+        if title.startswith(prefix):
+            title = title[len(prefix) :]
+    words = re.findall(r"[a-z0-9]+", title)
+    # Crude plural folding so "Graph" and "Graphs" meet
+    return frozenset(w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words) - _STOPWORDS
+
+
+def _minutes(value: Any) -> int:
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        return _DEFAULT_MINUTES
+    return max(_MIN_MINUTES, min(_MAX_MINUTES, minutes))
+
+
+def merge_topics(
+    per_chunk: list[list[dict[str, Any]]], *, max_topics: int, similarity: float = 0.8
+) -> list[dict[str, Any]]:
+    """Merge per-chunk topic lists in chunk order, folding near-identical titles.
+
+    Two topics merge when their title word sets overlap by at least
+    ``similarity`` (Jaccard). A merged topic keeps the first title, the longer
+    description and the larger time estimate (capped at 120 minutes).
+    """
+    merged: list[dict[str, Any]] = []
+    keys: list[frozenset[str]] = []
+    for topics in per_chunk:
+        for topic in topics:
+            title = str(topic["title"]).strip()
+            tokens = _title_tokens(title) or frozenset([title.lower()])
+            description = (topic.get("description") or "").strip() or None
+            minutes = _minutes(topic.get("estimatedMinutes", _DEFAULT_MINUTES))
+
+            for existing, key in zip(merged, keys):
+                if len(tokens & key) / len(tokens | key) >= similarity:
+                    if description and len(description) > len(existing["description"] or ""):
+                        existing["description"] = description
+                    existing["estimatedMinutes"] = max(existing["estimatedMinutes"], minutes)
+                    break
+            else:
+                merged.append(
+                    {"title": title, "description": description, "estimatedMinutes": minutes}
+                )
+                keys.append(tokens)
+    if len(merged) > max_topics:
+        logger.info(f"Topic extraction produced {len(merged)} topics; keeping {max_topics}")
+    return merged[:max_topics]
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+
+async def extract(
+    *,
+    user_id: str,
+    subject: str,
+    materials: list[Any],
+    fallback_text: str,
+    chunk_chars: int,
+    concurrency: int,
+    max_topics: int,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> list[dict[str, Any]]:
+    """Run the map-reduce extraction and return merged topic dicts.
+
+    ``fallback_text`` is used when no material has extracted text.
+    ``on_progress(completed, total)`` is awaited as chunks finish.
+    """
+    sources = [(m.filename, m.extracted_text) for m in materials if m.extracted_text]
+    chunks = chunk_materials(sources or [("subject", fallback_text)], chunk_chars)
+    total = len(chunks)
+    results: list[list[dict[str, Any]]] = [[] for _ in chunks]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(chunk: MaterialChunk) -> None:
+        async with semaphore:
+            results[chunk.index] = await _extract_chunk(subject, chunk, total, user_id)
+
+    if on_progress:
+        await on_progress(0, total)
+    completed = 0
+    for finished in asyncio.as_completed([run(chunk) for chunk in chunks]):
+        await finished
+        completed += 1
+        if on_progress:
+            await on_progress(completed, total)
+
+    return merge_topics(results, max_topics=max_topics)
@@ -9,10 +9,13 @@ and graceful expiry (no data loss).
 from __future__ import annotations
 
 import logging
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.shared.database.session import get_session_factory
 
 logger = logging.getLogger(__name__)
@@ -457,6 +460,21 @@ async def expire_trial(user_id: str) -> None:
     logger.info(f"Trial expired for user {user_id}")
 
 
+async def expire_trial_cohort(s: AsyncSession, profiles: Sequence[Any], now: datetime) -> int:
+    """
+    ``expire_trial`` for a page of overdue trials (cohort batch function).
+
+    One UPDATE ... RETURNING stamps every still-unexpired trial in the page.
+    """
+    from src.domains.personal_learning.repository import PersonalLearningRepository
+
+    repo = PersonalLearningRepository()
+    expired = await repo.expire_trials([p.user_id for p in profiles], now=now, session=s)
+    for user_id in expired:
+        logger.info(f"Trial expired for user {user_id}")
+    return len(expired)
+
+
 async def record_plus_feature_used(user_id: str, feature_id: str) -> None:
     """
     Record that a user used a PLUS feature (during trial or subscription).
@@ -10,10 +10,15 @@ Book principle: "Renewal should be earned through value. Never through habit."
 from __future__ import annotations
 
 import logging
+import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from src.shared.database.session import get_session_factory
 
 logger = logging.getLogger(__name__)
@@ -131,37 +136,16 @@ async def generate_monthly_summary(user_id: str) -> ValueSummary:
     profile = await repo.get_profile_by_user(user_id)
     plus_features = profile.plus_features_used_this_period if profile else []
 
-    # Calculate estimated time saved (rough: 15 min per document generated)
-    time_saved = docs_count * 15
-
-    # Build headline
-    headline = _build_headline(docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed)
-
-    # Build detail message
-    detail = _build_detail_message(
-        docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed, plus_features
-    )
-
-    # Determine top features
-    top_features = _identify_top_features(
-        docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed
-    )
-
-    summary = ValueSummary(
-        period_start=period_start,
-        period_end=now,
-        ai_assisted_sessions=docs_count + quizzes_taken,
-        documents_generated=docs_count,
-        documents_time_saved_minutes=time_saved,
+    summary = _build_summary(
+        period_start,
+        now,
+        docs_count=docs_count,
         flashcards_reviewed=flashcards_reviewed,
-        study_plan_items_completed=plan_items_completed,
-        goals_achieved=preps_completed,
         quizzes_taken=quizzes_taken,
-        quiz_score_improvement=quiz_score_trend,
-        top_features_used=top_features,
-        plus_exclusive_features_used=plus_features or [],
-        headline=headline,
-        detail_message=detail,
+        quiz_score_trend=quiz_score_trend,
+        plan_items_completed=plan_items_completed,
+        preps_completed=preps_completed,
+        plus_features=plus_features,
     )
 
     # Store the summary
@@ -170,6 +154,44 @@ async def generate_monthly_summary(user_id: str) -> ValueSummary:
     return summary
 
 
+async def generate_cohort_summaries(
+    s: AsyncSession, subscribers: Sequence[Any], now: datetime
+) -> int:
+    """
+    Monthly value summaries for a page of subscribers (cohort batch function).
+
+    ``subscribers`` are rows carrying ``id`` (the user id) and
+    ``plus_features_used_this_period``. Activity counts for the whole page
+    come from one grouped query per metric, and the records are written
+    with one bulk INSERT.
+    """
+    from src.domains.personal_learning.db_models import ValueSummaryRecord
+    from src.domains.personal_learning.repository import PersonalLearningRepository
+
+    period_start = now - timedelta(days=30)
+    counts = await PersonalLearningRepository().get_value_summary_counts(
+        [row.id for row in subscribers], since=period_start, session=s
+    )
+    records = []
+    for row in subscribers:
+        activity = counts[row.id]
+        summary = _build_summary(
+            period_start,
+            now,
+            docs_count=activity["documents"],
+            flashcards_reviewed=activity["flashcards_reviewed"],
+            quizzes_taken=activity["quizzes_taken"],
+            quiz_score_trend=None,
+            plan_items_completed=activity["plan_items_completed"],
+            preps_completed=activity["preps_completed"],
+            plus_features=row.plus_features_used_this_period,
+        )
+        records.append(_summary_record(row.id, summary))
+    if records:
+        await s.execute(insert(ValueSummaryRecord), records)
+    return len(records)
+
+
 async def get_period_highlights(user_id: str) -> PeriodHighlights | None:
     """
     Get condensed value highlights for the Home response.
@@ -433,28 +455,79 @@ async def _store_summary(user_id: str, summary: ValueSummary) -> None:
     async with factory() as session:
         from src.domains.personal_learning.db_models import ValueSummaryRecord
 
-        record = ValueSummaryRecord(
-            id=__import__("uuid").uuid4().hex[:25],
-            user_id=user_id,
-            period_start=summary.period_start,
-            period_end=summary.period_end,
-            summary_data={
-                "ai_assisted_sessions": summary.ai_assisted_sessions,
-                "documents_generated": summary.documents_generated,
-                "flashcards_reviewed": summary.flashcards_reviewed,
-                "quizzes_taken": summary.quizzes_taken,
-                "plan_items_completed": summary.study_plan_items_completed,
-                "goals_achieved": summary.goals_achieved,
-                "headline": summary.headline,
-                "top_features": summary.top_features_used,
-                "plus_features": summary.plus_exclusive_features_used,
-            },
-            delivery_method="notification",
-        )
-        session.add(record)
+        session.add(ValueSummaryRecord(**_summary_record(user_id, summary)))
         await session.commit()
 
 
+def _summary_record(user_id: str, summary: ValueSummary) -> dict[str, Any]:
+    """ValueSummaryRecord column values for a summary."""
+    return {
+        "id": uuid.uuid4().hex[:25],
+        "user_id": user_id,
+        "period_start": summary.period_start,
+        "period_end": summary.period_end,
+        "summary_data": {
+            "ai_assisted_sessions": summary.ai_assisted_sessions,
+            "documents_generated": summary.documents_generated,
+            "flashcards_reviewed": summary.flashcards_reviewed,
+            "quizzes_taken": summary.quizzes_taken,
+            "plan_items_completed": summary.study_plan_items_completed,
+            "goals_achieved": summary.goals_achieved,
+            "headline": summary.headline,
+            "top_features": summary.top_features_used,
+            "plus_features": summary.plus_exclusive_features_used,
+        },
+        "delivery_method": "notification",
+    }
+
+
+def _build_summary(
+    period_start: datetime,
+    period_end: datetime,
+    *,
+    docs_count: int,
+    flashcards_reviewed: int,
+    quizzes_taken: int,
+    quiz_score_trend: float | None,
+    plan_items_completed: int,
+    preps_completed: int,
+    plus_features: list[str] | None,
+) -> ValueSummary:
+    """Frame activity counts as a ValueSummary (headline, detail, top features)."""
+    # Calculate estimated time saved (rough: 15 min per document generated)
+    time_saved = docs_count * 15
+
+    # Build headline
+    headline = _build_headline(docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed)
+
+    # Build detail message
+    detail = _build_detail_message(
+        docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed, plus_features
+    )
+
+    # Determine top features
+    top_features = _identify_top_features(
+        docs_count, flashcards_reviewed, quizzes_taken, plan_items_completed
+    )
+
+    return ValueSummary(
+        period_start=period_start,
+        period_end=period_end,
+        ai_assisted_sessions=docs_count + quizzes_taken,
+        documents_generated=docs_count,
+        documents_time_saved_minutes=time_saved,
+        flashcards_reviewed=flashcards_reviewed,
+        study_plan_items_completed=plan_items_completed,
+        goals_achieved=preps_completed,
+        quizzes_taken=quizzes_taken,
+        quiz_score_improvement=quiz_score_trend,
+        top_features_used=top_features,
+        plus_exclusive_features_used=plus_features or [],
+        headline=headline,
+        detail_message=detail,
+    )
+
+
 def _build_headline(docs: int, flashcards: int, quizzes: int, plan_items: int) -> str:
     """Build a learning-framed headline for the value summary."""
     total_activities = docs + quizzes + plan_items
@@ -58,7 +58,9 @@ def get_beat_schedule() -> dict:
         },
         "learning.notification_delivery": {
             "task": "learning.notification_delivery",
-            "schedule": 300.0,  # Every 5 minutes
-            "options": {"queue": "default"},
+            # Each run delivers for NOTIFICATION_DELIVERY_RUN_SECONDS, so back-to-back
+            # runs keep the queue drained continuously
+            "schedule": 60.0,
+            "options": {"queue": "default", "expires": 60},
         },
     }
@@ -2,7 +2,10 @@
 
 Schedule: Daily at 02:00 UTC | Queue: heavy
 
-Uses paginated batch processing to avoid loading all users into memory.
+Runs as a cohort job (see ``services/cohort_engine``): each keyset page of
+learners reads its study sessions with one query and writes the behaviour
+cache and ``maturity_days`` with bulk UPDATEs. With ``COHORT_SHARDS > 1``
+the run fans out into one task per shard.
 """
 
 import asyncio
@@ -12,8 +15,6 @@ from src.core.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
-_BATCH_SIZE = 50
-
 
 @celery_app.task(
     name="learning.analyze_behaviour",
@@ -22,53 +23,42 @@ _BATCH_SIZE = 50
     time_limit=300,
     soft_time_limit=240,
 )
-def analyze_behaviour():
+def analyze_behaviour(shard: int | None = None, shards: int = 1):
     """
     For each active learner, compute behaviour metrics and update
     LearningProfile cache. Detect dropout risk.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(analyze_behaviour, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        loop.run_until_complete(_analyze_behaviour_async())
+        return loop.run_until_complete(_analyze_behaviour_async(shard=shard, shards=shards))
     finally:
         loop.close()
 
 
-async def _analyze_behaviour_async():
+async def _analyze_behaviour_async(*, shard: int | None = None, shards: int = 1) -> dict:
     from src.shared.database.session import ensure_db
 
     await ensure_db()
+    from sqlalchemy import select
+
+    from src.domains.personal_learning.db_models import LearningProfile
     from src.domains.personal_learning.services import behaviour_service
-    from src.domains.personal_learning.repository import personal_learning_repo as repo
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
 
     logger.info("Behaviour analysis task started")
-
-    updated = 0
-    total = 0
-    skip = 0
-
-    while True:
-        profiles = await repo.list_active_profiles(skip=skip, take=_BATCH_SIZE)
-        if not profiles:
-            break
-
-        total += len(profiles)
-
-        for profile in profiles:
-            user_id = profile.user_id
-            try:
-                # Recompute behaviour analytics and persist to profile
-                await behaviour_service.analyze_behaviour(user_id=user_id)
-
-                # Also increment maturity_days
-                await repo.increment_maturity_days(user_id)
-
-                updated += 1
-            except Exception:
-                logger.exception(f"Failed to analyze behaviour for user {user_id}")
-
-        skip += _BATCH_SIZE
-        if len(profiles) < _BATCH_SIZE:
-            break
-
-    logger.info(f"Behaviour analysis completed: updated {updated}/{total} profile(s)")
+    result = await run_cohort(
+        "behaviour",
+        select(LearningProfile.id, LearningProfile.user_id),
+        LearningProfile.user_id,
+        behaviour_service.analyze_cohort,
+        shard=shard,
+        shards=shards,
+    )
+    logger.info(
+        f"Behaviour analysis completed: updated {result.processed}/{result.scanned} profile(s)"
+    )
+    return result.as_dict()
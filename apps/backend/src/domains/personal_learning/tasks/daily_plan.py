@@ -2,7 +2,10 @@
 
 Schedule: Daily at 06:00 UTC | Queue: heavy | Max retries: 3
 
-Uses paginated batch processing to avoid loading all users into memory.
+Runs as a cohort job (see ``services/cohort_engine``): learners are walked in
+keyset pages, each page's due-review and active-plan counts come from two
+grouped queries, and the notifications are written with one bulk INSERT.
+With ``COHORT_SHARDS > 1`` the run fans out into one task per shard.
 """
 
 import asyncio
@@ -12,7 +15,8 @@ from src.core.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
-_BATCH_SIZE = 50  # Process users in batches of 50
+# The plan summary reports at most this many due cards
+_DUE_PREVIEW_LIMIT = 10
 
 
 @celery_app.task(
@@ -22,76 +26,81 @@ _BATCH_SIZE = 50  # Process users in batches of 50
     time_limit=300,
     soft_time_limit=240,
 )
-def prepare_daily_plan():
+def prepare_daily_plan(shard: int | None = None, shards: int = 1):
     """
     For each active learner, compose a daily plan from schedule blocks,
     due reviews, and study plan items. Create a notification with the plan
     respecting the learner's quiet hours.
-
-    Processes users in paginated batches to limit memory and DB pressure.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(prepare_daily_plan, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        loop.run_until_complete(_prepare_daily_plan_async())
+        return loop.run_until_complete(_prepare_daily_plan_async(shard=shard, shards=shards))
     finally:
         loop.close()
 
 
-async def _prepare_daily_plan_async():
+async def _prepare_daily_plan_async(*, shard: int | None = None, shards: int = 1) -> dict:
     from src.shared.database.session import ensure_db
 
     await ensure_db()
-    from src.domains.personal_learning.services import (
-        notification_service,
+    from sqlalchemy import select
+
+    from src.domains.personal_learning.db_models import LearningProfile
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
+
+    logger.info("Daily plan task started")
+    result = await run_cohort(
+        "daily_plan",
+        select(
+            LearningProfile.user_id,
+            LearningProfile.quiet_hours_start,
+            LearningProfile.quiet_hours_end,
+            LearningProfile.max_daily_notifications,
+            LearningProfile.preferred_study_times,
+        ),
+        LearningProfile.user_id,
+        _send_daily_plans,
+        shard=shard,
+        shards=shards,
     )
+    logger.info(f"Daily plan task completed for {result.processed} learner(s)")
+    return result.as_dict()
+
+
+async def _send_daily_plans(s, profiles, now) -> int:
     from src.domains.personal_learning.repository import personal_learning_repo as repo
+    from src.domains.personal_learning.services import notification_service
+
+    user_ids = [p.user_id for p in profiles]
+    due = await repo.count_due_flashcards_by_user(user_ids, now=now, session=s)
+    plans = await repo.count_active_plans_by_user(user_ids, session=s)
+
+    bodies = {
+        user_id: _plan_body(due.get(user_id, 0), plans.get(user_id, 0)) for user_id in user_ids
+    }
+    return await notification_service.create_cohort_notifications(
+        profiles,
+        type="DAILY_PLAN",
+        title="Your Daily Learning Plan",
+        body=bodies,
+        priority=3,
+        action_data={"type": "navigate", "target": "/home"},
+        now=now,
+        session=s,
+    )
 
-    logger.info("Daily plan task started")
 
-    total_processed = 0
-    skip = 0
-
-    while True:
-        # Fetch one batch
-        profiles = await repo.list_active_profiles(skip=skip, take=_BATCH_SIZE)
-        if not profiles:
-            break
-
-        for profile in profiles:
-            user_id = profile.user_id
-            try:
-                # Gather due flashcards and active plan items for today
-                due_flashcards = await repo.list_due_flashcards(user_id, limit=10)
-                active_plans = await repo.list_active_plans(user_id)
-
-                # Build plan summary
-                plan_parts = []
-                if due_flashcards:
-                    plan_parts.append(f"{len(due_flashcards)} flashcard(s) due for review")
-                if active_plans:
-                    plan_parts.append(f"{len(active_plans)} active study plan(s)")
-
-                if plan_parts:
-                    body = "Today's focus: " + "; ".join(plan_parts)
-                else:
-                    body = "No pending reviews today. Great time to explore something new!"
-
-                await notification_service.create_notification(
-                    user_id=user_id,
-                    type="DAILY_PLAN",
-                    title="Your Daily Learning Plan",
-                    body=body,
-                    priority=3,
-                    action_data={"type": "navigate", "target": "/home"},
-                )
-                total_processed += 1
-            except Exception:
-                logger.exception(f"Failed to prepare daily plan for user {user_id}")
-
-        skip += _BATCH_SIZE
-
-        # If we got fewer than batch size, we're done
-        if len(profiles) < _BATCH_SIZE:
-            break
-
-    logger.info(f"Daily plan task completed for {total_processed} learner(s)")
+def _plan_body(due_flashcards: int, active_plans: int) -> str:
+    plan_parts = []
+    if due_flashcards:
+        plan_parts.append(f"{min(due_flashcards, _DUE_PREVIEW_LIMIT)} flashcard(s) due for review")
+    if active_plans:
+        plan_parts.append(f"{active_plans} active study plan(s)")
+
+    if plan_parts:
+        return "Today's focus: " + "; ".join(plan_parts)
+    return "No pending reviews today. Great time to explore something new!"
@@ -2,7 +2,9 @@
 
 Schedule: Every 6 hours | Queue: default
 
-Uses paginated batch processing to avoid loading all users into memory.
+Runs as a cohort job (see ``services/cohort_engine``) over profiles with a
+high dropout risk: each keyset page checks daily limits with one grouped
+count and writes its nudges with one bulk INSERT.
 """
 
 import asyncio
@@ -12,8 +14,6 @@ from src.core.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
-_BATCH_SIZE = 50
-
 
 @celery_app.task(
     name="learning.check_declining_engagement",
@@ -22,54 +22,61 @@ _BATCH_SIZE = 50
     time_limit=120,
     soft_time_limit=90,
 )
-def check_declining_engagement():
+def check_declining_engagement(shard: int | None = None, shards: int = 1):
     """
     Find learners with 3+ consecutive days of declining activity.
     Create a gentle nudge notification (no guilt language) with a low-effort action.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(check_declining_engagement, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        loop.run_until_complete(_check_engagement_async())
+        return loop.run_until_complete(_check_engagement_async(shard=shard, shards=shards))
     finally:
         loop.close()
 
 
-async def _check_engagement_async():
+async def _check_engagement_async(*, shard: int | None = None, shards: int = 1) -> dict:
     from src.shared.database.session import ensure_db
 
     await ensure_db()
-    from src.domains.personal_learning.services import notification_service
-    from src.domains.personal_learning.repository import personal_learning_repo as repo
+    from sqlalchemy import select
+
+    from src.domains.personal_learning.db_models import LearningProfile
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
 
     logger.info("Engagement check task started")
+    # Same cohort as list_declining_engagement_profiles: cached dropout_risk > 0.5
+    result = await run_cohort(
+        "engagement",
+        select(
+            LearningProfile.user_id,
+            LearningProfile.quiet_hours_start,
+            LearningProfile.quiet_hours_end,
+            LearningProfile.max_daily_notifications,
+            LearningProfile.preferred_study_times,
+        ).where(LearningProfile.dropout_risk.isnot(None), LearningProfile.dropout_risk > 0.5),
+        LearningProfile.user_id,
+        _send_nudges,
+        shard=shard,
+        shards=shards,
+    )
+    logger.info(f"Engagement check completed: sent {result.processed} nudge(s)")
+    return result.as_dict()
+
+
+async def _send_nudges(s, profiles, now) -> int:
+    from src.domains.personal_learning.services import notification_service
 
-    nudge_count = 0
-    skip = 0
-
-    while True:
-        profiles = await repo.list_declining_engagement_profiles(
-            min_declining_days=3, skip=skip, take=_BATCH_SIZE
-        )
-        if not profiles:
-            break
-
-        for profile in profiles:
-            user_id = profile.user_id
-            try:
-                await notification_service.create_notification(
-                    user_id=user_id,
-                    type="ENGAGEMENT_NUDGE",
-                    title="Quick review?",
-                    body="A 2-minute flashcard session can keep your momentum going.",
-                    priority=2,
-                    action_data={"type": "navigate", "target": "/flashcards/due"},
-                )
-                nudge_count += 1
-            except Exception:
-                logger.exception(f"Failed to send engagement nudge to user {user_id}")
-
-        skip += _BATCH_SIZE
-        if len(profiles) < _BATCH_SIZE:
-            break
-
-    logger.info(f"Engagement check completed: sent {nudge_count} nudge(s)")
+    return await notification_service.create_cohort_notifications(
+        profiles,
+        type="ENGAGEMENT_NUDGE",
+        title="Quick review?",
+        body="A 2-minute flashcard session can keep your momentum going.",
+        priority=2,
+        action_data={"type": "navigate", "target": "/flashcards/due"},
+        now=now,
+        session=s,
+    )
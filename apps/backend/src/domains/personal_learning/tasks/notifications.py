@@ -1,6 +1,12 @@
 """Celery task: Deliver pending notifications.
 
-Schedule: Every 5 minutes | Queue: default
+Schedule: Every minute | Queue: default
+
+Each run is a delivery worker that keeps claiming and sending due
+notifications for ``NOTIFICATION_DELIVERY_RUN_SECONDS``. With
+``NOTIFICATION_DELIVERY_WORKERS`` above 1 the beat trigger fans out into that
+many workers; ``FOR UPDATE SKIP LOCKED`` claims keep them from sending the
+same notification twice.
 """
 
 import asyncio
@@ -15,27 +21,33 @@ logger = logging.getLogger(__name__)
     name="learning.notification_delivery",
     queue="default",
     max_retries=2,
-    time_limit=60,
-    soft_time_limit=45,
+    time_limit=90,
+    soft_time_limit=75,
 )
-def notification_delivery():
+def notification_delivery(shard: int | None = None, shards: int = 1):
     """
-    Find notifications with status=PENDING and scheduled_at <= now.
-    Check quiet hours. Deliver via push/email. Update status to DELIVERED.
+    Claim notifications with status PENDING/QUEUED and scheduled_at <= now.
+    Check quiet hours. Deliver via push/email in batches. Update statuses in bulk.
     """
+    from src.config import get_settings
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(notification_delivery, shard, get_settings().NOTIFICATION_DELIVERY_WORKERS):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        loop.run_until_complete(_deliver_notifications_async())
+        return loop.run_until_complete(_deliver_notifications_async())
     finally:
         loop.close()
 
 
-async def _deliver_notifications_async():
+async def _deliver_notifications_async() -> dict:
     from src.shared.database.session import ensure_db
     from src.domains.personal_learning.services import notification_service
 
     await ensure_db()
     logger.info("Notification delivery task started")
-    count = await notification_service.deliver_pending()
-    if count > 0:
-        logger.info(f"Delivered {count} notification(s)")
+    result = await notification_service.run_delivery_worker()
+    if result.delivered > 0:
+        logger.info(f"Delivered {result.delivered} notification(s)")
+    return result.as_dict()
@@ -2,6 +2,9 @@
 Retention Check — Daily task that evaluates churn risk for PLUS subscribers.
 
 Calculates risk scores and triggers retention interventions when score > 0.7.
+Runs as a cohort job (see ``services/cohort_engine``): each keyset page of
+subscribers is loaded with a few grouped queries and scored in one
+vectorised pass.
 """
 
 import asyncio
@@ -11,6 +14,10 @@ from src.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+# Subscribers scored per page; vectorised scoring is cheap, so pages are
+# bounded by the size of the IN (...) lists rather than by compute
+SCORING_BATCH_SIZE = 5000
+
 
 @celery_app.task(
     name="personal_learning.retention_check",
@@ -19,59 +26,52 @@ logger = logging.getLogger(__name__)
     time_limit=300,
     soft_time_limit=240,
 )
-def check_retention():
+def check_retention(shard: int | None = None, shards: int = 1):
     """
     Daily: Evaluate churn risk for all PLUS subscribers.
 
     Triggers retention interventions for users with risk > 0.7.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(check_retention, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        result = loop.run_until_complete(_run_retention_check())
+        result = loop.run_until_complete(_run_retention_check(shard=shard, shards=shards))
         return result
     finally:
         loop.close()
 
 
-async def _run_retention_check() -> dict:
+async def _run_retention_check(*, shard: int | None = None, shards: int = 1) -> dict:
+    """Core async logic for retention check."""
     from src.shared.database.session import ensure_db
 
     await ensure_db()
-    """Core async logic for retention check."""
-    from src.domains.personal_learning.repository import PersonalLearningRepository
-    from src.domains.personal_learning.services import retention_service
-    from src.shared.database.session import get_session
     from sqlalchemy import select
     from src.domains.identity.db_models import User
+    from src.domains.personal_learning.services import retention_service
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
 
-    total_checked = 0
-    interventions_triggered = 0
-
-    # Get all PLUS subscribers
-    async with get_session() as session:
-        stmt = select(User.id).where(User.tier.like("PREMIUM%")).where(User.is_active.is_(True))
-        result = await session.execute(stmt)
-        user_ids = [row[0] for row in result.all()]
-
-    for user_id in user_ids:
-        try:
-            total_checked += 1
-            intervention = await retention_service.evaluate_retention_intervention(user_id)
-            if intervention:
-                interventions_triggered += 1
-                logger.info(
-                    f"Retention intervention triggered for {user_id}: "
-                    f"type={intervention.intervention_type}"
-                )
-        except Exception as e:
-            logger.error(f"Error checking retention for {user_id}: {e}")
+    # All PLUS subscribers
+    result = await run_cohort(
+        "retention_check",
+        select(User.id).where(User.tier.like("PREMIUM%")).where(User.is_active.is_(True)),
+        User.id,
+        retention_service.evaluate_intervention_cohort,
+        batch_size=SCORING_BATCH_SIZE,
+        shard=shard,
+        shards=shards,
+    )
 
     logger.info(
-        f"Retention check complete: {total_checked} checked, "
-        f"{interventions_triggered} interventions triggered"
+        f"Retention check complete: {result.scanned} checked, "
+        f"{result.processed} interventions triggered"
     )
 
     return {
-        "total_checked": total_checked,
-        "interventions_triggered": interventions_triggered,
+        "total_checked": result.scanned,
+        "interventions_triggered": result.processed,
+        "cohort": result.as_dict(),
     }
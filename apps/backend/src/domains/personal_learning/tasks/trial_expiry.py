@@ -2,7 +2,9 @@
 Trial Expiry — Hourly task that expires overdue trials.
 
 Gracefully expires trials that have passed their end date and generates
-trial summaries for those users.
+trial summaries for those users. Runs as a cohort job (see
+``services/cohort_engine``): each keyset page of overdue trials is expired
+with one UPDATE ... RETURNING.
 """
 
 import asyncio
@@ -20,55 +22,54 @@ logger = logging.getLogger(__name__)
     time_limit=120,
     soft_time_limit=90,
 )
-def expire_trials():
+def expire_trials(shard: int | None = None, shards: int = 1):
     """
     Hourly: Expire trials that have passed their end date.
 
     Gracefully degrades PLUS features back to FREE without data loss.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(expire_trials, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        result = loop.run_until_complete(_run_trial_expiry())
+        result = loop.run_until_complete(_run_trial_expiry(shard=shard, shards=shards))
         return result
     finally:
         loop.close()
 
 
-async def _run_trial_expiry() -> dict:
+async def _run_trial_expiry(*, shard: int | None = None, shards: int = 1) -> dict:
+    """Core async logic for trial expiry."""
     from src.shared.database.session import ensure_db
 
     await ensure_db()
-    """Core async logic for trial expiry."""
     from datetime import datetime, timezone
 
     from sqlalchemy import select
     from src.domains.personal_learning.db_models import LearningProfile
     from src.domains.personal_learning.services import trial_service
-    from src.shared.database.session import get_session
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
 
     now = datetime.now(timezone.utc)
-    total_expired = 0
-
-    # Find profiles with expired trials (trial_ends_at < now AND last_trial_ended_at is NULL)
-    async with get_session() as session:
-        stmt = (
-            select(LearningProfile.user_id)
-            .where(LearningProfile.trial_ends_at.isnot(None))
-            .where(LearningProfile.trial_ends_at < now)
-            .where(LearningProfile.last_trial_ended_at.is_(None))
-        )
-        result = await session.execute(stmt)
-        user_ids = [row[0] for row in result.all()]
-
-    for user_id in user_ids:
-        try:
-            await trial_service.expire_trial(user_id)
-            total_expired += 1
-            logger.info(f"Trial expired for user {user_id}")
-        except Exception as e:
-            logger.error(f"Error expiring trial for {user_id}: {e}")
+
+    # Profiles with expired trials (trial_ends_at < now AND last_trial_ended_at is NULL)
+    result = await run_cohort(
+        "trial_expiry",
+        select(LearningProfile.user_id)
+        .where(LearningProfile.trial_ends_at.isnot(None))
+        .where(LearningProfile.trial_ends_at < now)
+        .where(LearningProfile.last_trial_ended_at.is_(None)),
+        LearningProfile.user_id,
+        trial_service.expire_trial_cohort,
+        shard=shard,
+        shards=shards,
+        now=now,
+    )
+    total_expired = result.processed
 
     if total_expired > 0:
         logger.info(f"Trial expiry complete: {total_expired} trials expired")
 
-    return {"total_expired": total_expired}
+    return {"total_expired": total_expired, "cohort": result.as_dict()}
@@ -2,7 +2,10 @@
 Value Summary Generation — Daily task that generates value summaries
 for PLUS subscribers 3 days before their renewal date.
 
-Delivers learning-framed value communication before renewal.
+Delivers learning-framed value communication before renewal. Runs as a
+cohort job (see ``services/cohort_engine``): each keyset page of subscribers
+gets its activity counts from one grouped query per metric and its summary
+records from one bulk INSERT.
 """
 
 import asyncio
@@ -20,61 +23,66 @@ logger = logging.getLogger(__name__)
     time_limit=300,
     soft_time_limit=240,
 )
-def generate_value_summaries():
+def generate_value_summaries(shard: int | None = None, shards: int = 1):
     """
     Daily: Generate value summaries for PLUS subscribers approaching renewal.
 
     Targets users whose billing period ends within 3 days.
     """
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(generate_value_summaries, shard):
+        return None
     loop = asyncio.new_event_loop()
     try:
-        result = loop.run_until_complete(_run_value_summary_generation())
+        result = loop.run_until_complete(_run_value_summary_generation(shard=shard, shards=shards))
         return result
     finally:
         loop.close()
 
 
-async def _run_value_summary_generation() -> dict:
+async def _run_value_summary_generation(*, shard: int | None = None, shards: int = 1) -> dict:
+    """Core async logic for value summary generation."""
     from src.shared.database.session import ensure_db
 
     await ensure_db()
-    """Core async logic for value summary generation."""
     from datetime import datetime, timedelta, timezone
 
     from sqlalchemy import select
     from src.domains.identity.db_models import User
+    from src.domains.personal_learning.db_models import LearningProfile
     from src.domains.personal_learning.services import value_summary_service
-    from src.shared.database.session import get_session
+    from src.domains.personal_learning.services.cohort_engine import run_cohort
 
     now = datetime.now(timezone.utc)
     target_end = now + timedelta(days=3)
 
-    total_generated = 0
-    errors = 0
-
-    # Find PLUS subscribers whose period ends within 3 days
-    async with get_session() as session:
-        stmt = (
-            select(User.id)
-            .where(User.tier.like("PREMIUM%"))
-            .where(User.is_active.is_(True))
-            .where(User.credits_period_end.isnot(None))
-            .where(User.credits_period_end <= target_end)
-            .where(User.credits_period_end > now)
-        )
-        result = await session.execute(stmt)
-        user_ids = [row[0] for row in result.all()]
-
-    for user_id in user_ids:
-        try:
-            await value_summary_service.generate_monthly_summary(user_id)
-            total_generated += 1
-        except Exception as e:
-            errors += 1
-            logger.error(f"Error generating value summary for {user_id}: {e}")
-
+    # PLUS subscribers whose period ends within 3 days
+    result = await run_cohort(
+        "value_summary",
+        select(User.id, LearningProfile.plus_features_used_this_period)
+        .outerjoin(LearningProfile, LearningProfile.user_id == User.id)
+        .where(User.tier.like("PREMIUM%"))
+        .where(User.is_active.is_(True))
+        .where(User.credits_period_end.isnot(None))
+        .where(User.credits_period_end <= target_end)
+        .where(User.credits_period_end > now),
+        User.id,
+        value_summary_service.generate_cohort_summaries,
+        shard=shard,
+        shards=shards,
+        now=now,
+    )
+    # Subscribers the batch function passes over are skipped, not errors: only
+    # the rows of failed (rolled back) batches count as errors
     logger.info(
-        f"Value summary generation complete: {total_generated} generated, " f"{errors} errors"
+        f"Value summary generation complete: {result.processed} generated, "
+        f"{result.skipped} skipped, {result.failed} errors"
     )
 
-    return {"total_generated": total_generated, "errors": errors}
+    return {
+        "total_generated": result.processed,
+        "skipped": result.skipped,
+        "errors": result.failed,
+        "cohort": result.as_dict(),
+    }
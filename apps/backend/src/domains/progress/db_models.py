@@ -1,7 +1,7 @@
 """
 Progress domain — SQLAlchemy models.
 
-Goal, ScheduleBlock, StudySession, UserStreak, Achievement,
+Goal, ScheduleBlock, StudySession, UserStreak, UserActivityDays, Achievement,
 ReviewItem, ScheduleBehaviourLog.
 
 Maps to existing PostgreSQL tables created by Prisma.
@@ -11,7 +11,17 @@ Column names use camelCase to match the existing schema exactly.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text, ForeignKey, Index
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    ForeignKey,
+    Index,
+)
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -279,6 +289,35 @@ class UserStreak(Base, TimestampMixin):
         return f"<UserStreak userId={self.user_id} current={self.current_streak}>"
 
 
+# ---------------------------------------------------------------------------
+# UserActivityDays
+# ---------------------------------------------------------------------------
+
+
+class UserActivityDays(Base, TimestampMixin):
+    """Day-indexed bitset of a learner's active days, one row per kind.
+
+    Bit ``n`` (Postgres ``get_bit`` numbering) is the UTC day
+    ``ACTIVITY_EPOCH + n``; see ``services/activity_days``.
+    """
+
+    __tablename__ = "UserActivityDays"
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: __import__("uuid").uuid4().hex[:25]
+    )
+    user_id: Mapped[str] = mapped_column(
+        "userId", String, ForeignKey("User.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String, nullable=False)  # ACTIVITY, REVIEW
+    bits: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    __table_args__ = (Index("UserActivityDays_userId_kind_key", "userId", "kind", unique=True),)
+
+    def __repr__(self) -> str:
+        return f"<UserActivityDays userId={self.user_id} kind={self.kind}>"
+
+
 # ---------------------------------------------------------------------------
 # Achievement
 # ---------------------------------------------------------------------------
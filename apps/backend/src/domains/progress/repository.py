@@ -6,10 +6,11 @@ achievements, and review items (spaced repetition).
 """
 
 import logging
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
-from sqlalchemy import select, update, delete, func, and_
+from sqlalchemy import case, select, true, update, delete, func, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -22,6 +23,7 @@ from .db_models import (
     ScheduleBehaviourLog,
     ScheduleBlock,
     StudySession,
+    UserActivityDays,
     UserStreak,
 )
 
@@ -256,6 +258,157 @@ class ProgressRepository:
                 await session.refresh(streak)
                 return streak
 
+    # -----------------------------------------------------------------------
+    # Activity days (per-learner day bitsets, see services/activity_days)
+    # -----------------------------------------------------------------------
+
+    async def mark_activity_day(self, user_id: str, kind: str, day: int) -> bytes | None:
+        """Set bit ``day`` of the learner's ``kind`` bitset, creating or growing it.
+
+        One INSERT ... ON CONFLICT DO UPDATE that skips the update when the
+        bit is already set. Returns the updated bitset, or None when the day
+        was already marked.
+        """
+        byte = day // 8
+        initial = bytearray(byte + 1)
+        initial[byte] = 1 << (day % 8)
+        bits = UserActivityDays.bits
+        # Zero bytes appended so that bit ``day`` exists before set_bit()
+        padding = func.decode(
+            func.repeat("00", func.greatest(byte + 1 - func.length(bits), 0)), "hex"
+        )
+        stmt = (
+            pg_insert(UserActivityDays)
+            .values(user_id=user_id, kind=kind, bits=bytes(initial))
+            .on_conflict_do_update(
+                index_elements=[UserActivityDays.user_id, UserActivityDays.kind],
+                set_={
+                    UserActivityDays.bits: func.set_bit(bits.concat(padding), day, 1),
+                    UserActivityDays.updated_at: func.now(),
+                },
+                where=case((func.length(bits) > byte, func.get_bit(bits, day) == 0), else_=true()),
+            )
+            .returning(UserActivityDays.bits)
+        )
+        async with await self._session() as session:
+            result = (await session.execute(stmt)).scalar_one_or_none()
+            await session.commit()
+            return result
+
+    async def get_activity_days(self, user_id: str, kinds: tuple[str, ...]) -> dict[str, bytes]:
+        async with await self._session() as session:
+            stmt = select(UserActivityDays.kind, UserActivityDays.bits).where(
+                UserActivityDays.user_id == user_id, UserActivityDays.kind.in_(kinds)
+            )
+            return {kind: bits for kind, bits in (await session.execute(stmt)).all()}
+
+    async def load_activity_history(
+        self, session: AsyncSession, user_ids: list[str]
+    ) -> dict[tuple[str, str], set[date]]:
+        """Active UTC days per ``(user_id, kind)`` rebuilt from existing tables.
+
+        ACTIVITY: activity feed entries, study sessions, flashcard reviews,
+        the learner's own chat messages and the run recorded on UserStreak;
+        REVIEW: flashcard reviews (the last review of each card, plus reviews
+        logged in the activity feed).
+        """
+        from src.domains.intelligence.db_models import ChatMessage
+        from src.domains.personal_learning.db_models import ActivityFeedEntry, Flashcard
+
+        def utc_day(column: Any) -> Any:
+            return func.date(func.timezone("UTC", column))
+
+        feed_day = utc_day(ActivityFeedEntry.occurred_at)
+        reviewed_day = utc_day(Flashcard.last_reviewed_at)
+        sources = {
+            "ACTIVITY": [
+                select(ActivityFeedEntry.user_id, feed_day)
+                .where(ActivityFeedEntry.user_id.in_(user_ids))
+                .distinct(),
+                select(StudySession.user_id, utc_day(StudySession.start_time))
+                .where(StudySession.user_id.in_(user_ids))
+                .distinct(),
+                select(Flashcard.user_id, reviewed_day)
+                .where(Flashcard.user_id.in_(user_ids), Flashcard.last_reviewed_at.is_not(None))
+                .distinct(),
+                # Chatting with the tutor counts towards the streak
+                select(ChatMessage.user_id, utc_day(ChatMessage.created_at))
+                .where(ChatMessage.user_id.in_(user_ids), ChatMessage.role == "USER")
+                .distinct(),
+            ],
+            "REVIEW": [
+                select(ActivityFeedEntry.user_id, feed_day)
+                .where(
+                    ActivityFeedEntry.user_id.in_(user_ids),
+                    ActivityFeedEntry.activity_type == "flashcard_reviewed",
+                )
+                .distinct(),
+                select(Flashcard.user_id, reviewed_day)
+                .where(Flashcard.user_id.in_(user_ids), Flashcard.last_reviewed_at.is_not(None))
+                .distinct(),
+            ],
+        }
+        history: dict[tuple[str, str], set[date]] = {}
+        for kind, statements in sources.items():
+            for stmt in statements:
+                for user_id, day in (await session.execute(stmt)).all():
+                    history.setdefault((user_id, kind), set()).add(day)
+
+        streaks = await session.execute(
+            select(UserStreak.user_id, UserStreak.current_streak, UserStreak.last_study_date).where(
+                UserStreak.user_id.in_(user_ids),
+                UserStreak.current_streak > 0,
+                UserStreak.last_study_date.is_not(None),
+            )
+        )
+        for user_id, length, last in streaks.all():
+            # Streak days that left no other trace
+            last_day = last.date()
+            days = history.setdefault((user_id, "ACTIVITY"), set())
+            days.update(date.fromordinal(last_day.toordinal() - i) for i in range(length))
+        return history
+
+    async def lock_activity_days(
+        self, session: AsyncSession, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], tuple[str, bytes]]:
+        """Lock the bitsets for ``(user_id, kind)`` keys, creating empty ones.
+
+        Returns ``{(user_id, kind): (row id, bits)}``; live ``mark_activity_day``
+        writes wait until ``session`` ends.
+        """
+        if not keys:
+            return {}
+        await session.execute(
+            pg_insert(UserActivityDays).on_conflict_do_nothing(
+                index_elements=[UserActivityDays.user_id, UserActivityDays.kind]
+            ),
+            [{"user_id": user_id, "kind": kind, "bits": b""} for user_id, kind in keys],
+        )
+        user_ids = sorted({user_id for user_id, _ in keys})
+        stmt = (
+            select(
+                UserActivityDays.id,
+                UserActivityDays.user_id,
+                UserActivityDays.kind,
+                UserActivityDays.bits,
+            )
+            .where(UserActivityDays.user_id.in_(user_ids))
+            .with_for_update()
+        )
+        return {
+            (row.user_id, row.kind): (row.id, row.bits)
+            for row in (await session.execute(stmt)).all()
+        }
+
+    async def save_activity_days(self, session: AsyncSession, bits_by_id: dict[str, bytes]) -> None:
+        """Bulk overwrite bitsets by row id (after ``lock_activity_days``)."""
+        if not bits_by_id:
+            return
+        await session.execute(
+            update(UserActivityDays),
+            [{"id": row_id, "bits": bits} for row_id, bits in bits_by_id.items()],
+        )
+
     # -----------------------------------------------------------------------
     # Achievements
     # -----------------------------------------------------------------------
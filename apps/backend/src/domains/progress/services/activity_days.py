@@ -0,0 +1,165 @@
+"""
+Activity days — per-learner bitsets of active days.
+
+Streaks and "active days" numbers used to be recomputed from history on
+every read. Each learner now has one bitset per kind in ``UserActivityDays``:
+bit n is set when the learner was active on the UTC day ``ACTIVITY_EPOCH + n``
+(about 46 bytes a year).
+
+- ``record_day`` sets the bit for a study, review or quiz event with one
+  upsert. Only a day's first event writes; later ones are answered from a
+  small in-process memo or skipped by the upsert itself.
+- ``DayBitmap`` answers the current streak, the active days in a range and
+  their count with bit operations over the bytes covering the range.
+- ``backfill_activity_days`` rebuilds the bitsets from existing tables (a
+  cohort batch function for the ``progress.backfill_activity_days`` task).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..repository import progress_repo
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_EPOCH = date(2020, 1, 1)
+
+ACTIVITY = "ACTIVITY"  # Any study, review or quiz event
+REVIEW = "REVIEW"  # Flashcard reviews
+KINDS = (ACTIVITY, REVIEW)
+
+# (user_id, kind, day) already marked by this process; bounded LRU
+_MARKED_MAX = 50_000
+_marked: OrderedDict[tuple[str, str, int], None] = OrderedDict()
+
+
+def day_index(day: date) -> int:
+    return (day - ACTIVITY_EPOCH).days
+
+
+class DayBitmap:
+    """Read view over one stored bitset (bit n: day ``ACTIVITY_EPOCH + n``)."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: bytes | None = None):
+        self.bits = bytes(bits or b"")
+
+    @classmethod
+    def from_days(cls, days: Iterable[date]) -> DayBitmap:
+        buf = bytearray()
+        for day in days:
+            n = day_index(day)
+            if n < 0:
+                continue
+            if n // 8 >= len(buf):
+                buf.extend(bytes(n // 8 + 1 - len(buf)))
+            buf[n // 8] |= 1 << (n % 8)
+        return cls(bytes(buf))
+
+    def __or__(self, other: DayBitmap) -> DayBitmap:
+        short, long = sorted((self.bits, other.bits), key=len)
+        merged = bytes(a | b for a, b in zip(short, long)) + long[len(short) :]
+        return DayBitmap(merged)
+
+    def _bit(self, n: int) -> bool:
+        return 0 <= n < len(self.bits) * 8 and bool(self.bits[n // 8] >> (n % 8) & 1)
+
+    def is_active(self, day: date) -> bool:
+        return self._bit(day_index(day))
+
+    def _window(self, start: date, end: date) -> int:
+        """The days ``start``..``end`` (inclusive) as an int, bit 0 being ``start``."""
+        first = day_index(start)
+        lo, hi = max(first, 0), min(day_index(end), len(self.bits) * 8 - 1)
+        if hi < lo:
+            return 0
+        chunk = int.from_bytes(self.bits[lo // 8 : hi // 8 + 1], "little")
+        return ((chunk >> (lo % 8)) & ((1 << (hi - lo + 1)) - 1)) << (lo - first)
+
+    def count(self, start: date, end: date) -> int:
+        """Active days between ``start`` and ``end`` (inclusive)."""
+        return self._window(start, end).bit_count()
+
+    def active_days(self, start: date, end: date) -> list[date]:
+        """Active days between ``start`` and ``end`` (inclusive), oldest first."""
+        window = self._window(start, end)
+        days = []
+        while window:
+            lowest = window & -window
+            days.append(start + timedelta(days=lowest.bit_length() - 1))
+            window ^= lowest
+        return days
+
+    def current_streak(self, today: date) -> int:
+        """Consecutive active days ending today (or yesterday, if today is not yet active)."""
+        n = day_index(today)
+        if not self._bit(n):
+            n -= 1
+        streak = 0
+        while self._bit(n):
+            if n % 8 == 7 and self.bits[n // 8] == 0xFF:
+                # A whole byte of active days at once
+                streak += 8
+                n -= 8
+                continue
+            streak += 1
+            n -= 1
+        return streak
+
+
+async def record_day(
+    user_id: str, kind: str = ACTIVITY, *, at: datetime | None = None
+) -> DayBitmap | None:
+    """
+    Mark the UTC day of ``at`` (default: now) as active for ``user_id``.
+
+    Returns the updated bitmap when this was the learner's first ``kind``
+    event of that day, None when the day was already marked.
+    """
+    day = day_index((at or datetime.now(UTC)).astimezone(UTC).date())
+    key = (user_id, kind, day)
+    if key in _marked:
+        _marked.move_to_end(key)
+        return None
+    bits = await progress_repo.mark_activity_day(user_id, kind, day)
+    _marked[key] = None
+    if len(_marked) > _MARKED_MAX:
+        _marked.popitem(last=False)
+    return None if bits is None else DayBitmap(bits)
+
+
+async def get_day_bitmaps(user_id: str, *kinds: str) -> dict[str, DayBitmap]:
+    """The learner's bitmaps for ``kinds`` (default: all); empty when never active."""
+    kinds = kinds or KINDS
+    stored = await progress_repo.get_activity_days(user_id, kinds)
+    return {kind: DayBitmap(stored.get(kind)) for kind in kinds}
+
+
+async def backfill_activity_days(s: AsyncSession, users: Sequence[Any], now: datetime) -> int:
+    """
+    Build the bitsets for a page of users from existing history (cohort batch function).
+
+    Rebuilt days are OR-ed into the stored bitsets under a row lock, so days
+    recorded live meanwhile are kept and re-running is harmless. Returns how
+    many users gained days.
+    """
+    history = await progress_repo.load_activity_history(s, [row.id for row in users])
+    stored = await progress_repo.lock_activity_days(s, sorted(history))
+    updates: dict[str, bytes] = {}
+    updated_users = set()
+    for key, days in history.items():
+        row_id, bits = stored[key]
+        merged = DayBitmap(bits) | DayBitmap.from_days(days)
+        if merged.bits != bits:
+            updates[row_id] = merged.bits
+            updated_users.add(key[0])
+    await progress_repo.save_activity_days(s, updates)
+    return len(updated_users)
@@ -2,11 +2,13 @@
 Activity Tracker Service.
 
 Handles:
+- Marking active days (see activity_days)
 - Updating UserStreak (consecutive study days)
 
 Meaningful activity includes:
 - Sending a chat message
-- Starting a study session
+- Starting or finishing a study session
+- Anything recorded in the activity feed (flashcard reviews, quizzes, documents, ...)
 - Creating/completing a course
 - Any AI action (goal creation, schedule creation, etc.)
 
@@ -14,81 +16,65 @@ This does NOT include passive actions like login, viewing pages, or token refres
 """
 
 import logging
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 
 from ..repository import progress_repo
+from . import activity_days
 
 logger = logging.getLogger(__name__)
 
 
-async def record_activity(user_id: str) -> None:
+async def record_activity(user_id: str, *, at: datetime | None = None) -> int | None:
     """
-    Record meaningful study activity (chat message, study session).
+    Record meaningful study activity (chat message, study session, review, quiz).
 
-    Only updates the streak. lastSeenAt is handled separately by the auth
-    dependency on every authenticated request.
+    Marks the day in the learner's activity-day bitset and, on the first
+    activity of a day, updates the streak. Returns the current streak when
+    this was the day's first activity, otherwise None. lastSeenAt is handled
+    separately by the auth dependency on every authenticated request.
     """
-    today = datetime.now(UTC).date()
+    at = at or datetime.now(UTC)
 
     # Update streak
     try:
-        await _update_streak(user_id, today)
+        return await _update_streak(user_id, at)
     except Exception as e:
         logger.warning("Failed to update streak for user %s: %s", user_id, e)
+        return None
 
 
-async def _update_streak(user_id: str, today) -> None:
+async def _update_streak(user_id: str, at: datetime) -> int | None:
     """
-    Update the user's study streak.
+    Update the user's study streak from the activity-day bitset.
 
-    Rules:
-    - If lastStudyDate is today: do nothing (already counted today)
-    - If lastStudyDate is yesterday: increment streak (consecutive day)
-    - If lastStudyDate is older: reset streak to 1 (streak broken)
-    - If no streak record exists: create one with streak = 1
+    Only the first activity of a day does any work: it sets the day's bit,
+    reads the streak back from the bitset (consecutive active days ending
+    that day) and stores it on UserStreak with the longest streak so far.
+    A run still going on UserStreak is never shortened, since the bitset may
+    lack days from before it was backfilled.
     """
-    streak = await progress_repo.get_streak(user_id)
-
-    today_dt = datetime(today.year, today.month, today.day, tzinfo=UTC)
-    yesterday = today - timedelta(days=1)
-
-    if streak is None:
-        # First time: create streak record
-        await progress_repo.upsert_streak(
-            user_id,
-            {
-                "currentStreak": 1,
-                "longestStreak": 1,
-                "lastStudyDate": today_dt,
-            },
-        )
-        return
+    bitmap = await activity_days.record_day(user_id, activity_days.ACTIVITY, at=at)
+    if bitmap is None:
+        # Already studied that day, nothing to do
+        return None
 
-    last_study = streak.last_study_date.date() if streak.last_study_date else None
-
-    if last_study == today:
-        # Already studied today, nothing to do
-        return
-
-    if last_study == yesterday:
-        # Consecutive day: increment streak
-        new_streak = streak.current_streak + 1
-        new_longest = max(streak.longest_streak, new_streak)
-        await progress_repo.upsert_streak(
-            user_id,
-            {
-                "currentStreak": new_streak,
-                "longestStreak": new_longest,
-                "lastStudyDate": today_dt,
-            },
-        )
-    else:
-        # Streak broken (missed a day or more): reset to 1
-        await progress_repo.upsert_streak(
-            user_id,
-            {
-                "currentStreak": 1,
-                "longestStreak": max(streak.longest_streak, 1),
-                "lastStudyDate": today_dt,
-            },
-        )
+    day = at.astimezone(UTC).date()
+    current = bitmap.current_streak(day)
+    streak = await progress_repo.get_streak(user_id)
+    if streak and streak.last_study_date:
+        last = streak.last_study_date
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=UTC)
+        gap = (day - last.astimezone(UTC).date()).days
+        if gap in (0, 1):
+            current = max(current, (streak.current_streak or 0) + gap)
+    longest = max(streak.longest_streak or 0, current) if streak else current
+    await progress_repo.upsert_streak(
+        user_id,
+        {
+            "currentStreak": current,
+            "longestStreak": longest,
+            "lastStudyDate": datetime(day.year, day.month, day.day, tzinfo=UTC),
+        },
+    )
+    return current
@@ -3,7 +3,7 @@ Analytics — study sessions, streaks, achievements, and reporting.
 """
 
 import logging
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from typing import Any
 
 from src.shared.events import emit
@@ -68,7 +68,9 @@ async def stop_study_session(*, session_id: str, user_id: str) -> dict[str, Any]
     )
 
     # Update streak
-    await _update_streak(user_id, end_time)
+    from src.domains.progress.services.activity_tracker import record_activity
+
+    await record_activity(user_id, at=end_time)
 
     await emit(
         "progress.study_session_completed",
@@ -105,37 +107,3 @@ async def list_achievements(*, user_id: str) -> list[dict[str, Any]]:
         }
         for a in achievements
     ]
-
-
-async def _update_streak(user_id: str, study_datetime: datetime) -> None:
-    """Update user's study streak."""
-    study_date = study_datetime.date()
-    streak = await progress_repo.get_streak(user_id)
-
-    if not streak:
-        await progress_repo.upsert_streak(
-            user_id, {"currentStreak": 1, "longestStreak": 1, "lastStudyDate": study_datetime}
-        )
-        return
-
-    if streak.last_study_date:
-        last_date = (
-            streak.last_study_date.date()
-            if isinstance(streak.last_study_date, datetime)
-            else streak.last_study_date
-        )
-        days_diff = (study_date - last_date).days
-        if days_diff == 0:
-            return
-        elif days_diff == 1:
-            new_streak = streak.current_streak + 1
-        else:
-            new_streak = 1
-    else:
-        new_streak = 1
-
-    longest = max(streak.longest_streak or 0, new_streak)
-    await progress_repo.upsert_streak(
-        user_id,
-        {"currentStreak": new_streak, "longestStreak": longest, "lastStudyDate": study_datetime},
-    )
@@ -13,7 +13,9 @@ from .dependencies import (
     get_super_admin_user,
     require_premium,
     require_space_membership,
+    resolve_principal,
 )
+from .principal_cache import principal_cache
 from .jwt import (
     create_access_token,
     create_refresh_token,
@@ -39,6 +41,8 @@ __all__ = [
     "get_super_admin_user",
     "require_premium",
     "require_space_membership",
+    "resolve_principal",
+    "principal_cache",
     # JWT
     "create_access_token",
     "create_refresh_token",
@@ -16,9 +16,7 @@ Usage:
         ...
 """
 
-import asyncio
 import logging
-import time
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, Query, Request, status
@@ -30,6 +28,8 @@ from src.shared.database import get_session_factory
 from src.domains.identity.db_models import User
 
 from .jwt import decode_access_token
+from .last_seen import last_seen_tracker
+from .principal_cache import principal_cache
 
 logger = logging.getLogger(__name__)
 
@@ -39,12 +39,9 @@ _security = HTTPBearer()
 _security_optional = HTTPBearer(auto_error=False)
 
 # ---------------------------------------------------------------------------
-# Last-seen tracking (throttled to avoid DB spam)
+# Last-seen tracking (throttled and batched, see last_seen.py)
 # ---------------------------------------------------------------------------
 
-_last_seen_cache: dict[str, float] = {}
-_LAST_SEEN_THROTTLE_SECONDS = 300  # Update DB at most every 5 minutes per user
-
 
 def _detect_platform(request: Request) -> str:
     """Detect platform from User-Agent header."""
@@ -56,42 +53,35 @@ def _detect_platform(request: Request) -> str:
     return "web"
 
 
-async def _update_last_seen(user_id: str, platform: str) -> None:
-    """Update lastSeenAt, throttled to avoid excessive writes."""
-    now = time.time()
-    if now - _last_seen_cache.get(user_id, 0) < _LAST_SEEN_THROTTLE_SECONDS:
-        return
-
-    _last_seen_cache[user_id] = now
-    try:
-        from datetime import UTC, datetime
-        from sqlalchemy import update
-
-        factory = get_session_factory()
-        async with factory() as session:
-            stmt = (
-                update(User)
-                .where(User.id == user_id)
-                .values(last_seen_at=datetime.now(UTC), last_seen_platform=platform)
-            )
-            await session.execute(stmt)
-            await session.commit()
-    except Exception:
-        pass  # Non-blocking — never fail a request for activity tracking
-
-
 # ---------------------------------------------------------------------------
 # Core user resolution
 # ---------------------------------------------------------------------------
 
 
+async def resolve_principal(payload: dict, token: str) -> User | None:
+    """Return the User for a decoded access token (principal cache, then DB)."""
+    user = await principal_cache.get(payload, token)
+    if user is not None:
+        return user
+
+    factory = get_session_factory()
+    async with factory() as session:
+        stmt = select(User).where(User.email == payload.get("sub"))
+        result = await session.execute(stmt)
+        user = result.scalar_one_or_none()
+
+    if user is not None:
+        await principal_cache.put(payload, token, user)
+    return user
+
+
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(_security)],
     request: Request,
 ) -> User:
     """Validate JWT and return the authenticated User.
 
-    Also fires a background task to update lastSeenAt (throttled).
+    Also queues a lastSeenAt update (throttled, written in batches).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,23 +97,16 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    # Fetch user from DB via SQLAlchemy
-    factory = get_session_factory()
-    async with factory() as session:
-        stmt = select(User).where(User.email == email)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
+    user = await resolve_principal(payload, credentials.credentials)
     if user is None:
         raise credentials_exception
 
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
-    # Fire-and-forget last seen update for non-admin users
+    # Last seen update for non-admin users
     if user.role == "USER":
-        platform = _detect_platform(request)
-        asyncio.ensure_future(_update_last_seen(user.id, platform))
+        last_seen_tracker.record(user.id, _detect_platform(request))
 
     return user
 
@@ -153,12 +136,7 @@ async def get_current_user_optional(
     except JWTError:
         return None
 
-    factory = get_session_factory()
-    async with factory() as session:
-        stmt = select(User).where(User.email == email)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
+    user = await resolve_principal(payload, credentials.credentials)
     if user is None or not user.is_active:
         return None
     return user
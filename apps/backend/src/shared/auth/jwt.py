@@ -62,7 +62,8 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
     """Generate a JWT access token.
 
     Args:
-        data: Claims to encode (must include "sub" with user email).
+        data: Claims to encode (must include "sub" with user email; "uid" with
+            the user id lets the principal cache skip the database entirely).
         expires_delta: Optional custom expiration. Defaults to settings value.
 
     Returns:
@@ -71,10 +72,10 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
     settings = get_settings()
     to_encode = data.copy()
 
-    expire = datetime.now(UTC) + (
-        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire, "type": "access"})
+    now = datetime.now(UTC)
+    expire = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    # jti/iat identify the token for the principal cache
+    to_encode.update({"exp": expire, "iat": now, "jti": secrets.token_hex(12), "type": "access"})
 
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
@@ -0,0 +1,210 @@
+"""
+Batched last-seen tracking.
+
+``get_current_user`` used to remember the last write per user in a module
+dict that never shrank, and then issue one ``UPDATE "User"`` per user once
+the throttle expired. The tracker keeps bounded state instead:
+
+- ``_recent``: users written within the throttle window, in write order, so
+  expired entries fall off the front and the map never exceeds
+  ``max_tracked`` (an evicted user at worst gets one extra write);
+- ``_pending``: the latest ``(timestamp, platform)`` per user waiting to be
+  written, capped at ``max_pending`` (the oldest entries are dropped, and
+  counted, if the database falls that far behind).
+
+A background task writes the pending entries every ``flush_interval``
+seconds in a single ``UPDATE ... FROM unnest(...)`` statement. State is per
+process: with several workers a user may be written once per worker per
+throttle window, which is still bounded and cheap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class LastSeenTracker:
+    """Throttle, aggregate and batch-write ``lastSeenAt`` updates."""
+
+    def __init__(
+        self,
+        *,
+        throttle_seconds: float = 300,
+        flush_interval: float = 10.0,
+        max_pending: int = 50000,
+        max_tracked: int = 100000,
+    ):
+        self.throttle_seconds = throttle_seconds
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_tracked = max_tracked
+
+        # user id -> monotonic time of the last accepted update
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        # user id -> (seen at, platform, monotonic time first queued)
+        self._pending: OrderedDict[str, tuple[datetime, str, float]] = OrderedDict()
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.stats: dict[str, float] = {
+            "recorded": 0,
+            "throttled": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_failures": 0,
+            "last_flush_size": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start the periodic flusher."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out whatever is still pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Final last-seen flush failed: {e}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Last-seen flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, user_id: str, platform: str) -> bool:
+        """Queue a last-seen update unless the user was updated recently.
+
+        Returns True when the update was queued. Never touches the database.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        last = self._recent.get(user_id)
+        if last is not None and now - last < self.throttle_seconds:
+            self.stats["throttled"] += 1
+            return False
+
+        self._recent[user_id] = now
+        self._recent.move_to_end(user_id)
+        while len(self._recent) > self.max_tracked:
+            self._recent.popitem(last=False)
+
+        self._pending[user_id] = (datetime.now(UTC), platform, now)
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self.stats["dropped"] += 1
+        self.stats["recorded"] += 1
+        return True
+
+    def _expire(self, now: float) -> None:
+        """Forget users whose throttle window has passed (oldest first)."""
+        cutoff = now - self.throttle_seconds
+        recent = self._recent
+        while recent:
+            if next(iter(recent.values())) > cutoff:
+                break
+            recent.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write every pending update in one statement. Returns rows written."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, OrderedDict()
+            entries = [
+                (user_id, seen_at, platform) for user_id, (seen_at, platform, _) in batch.items()
+            ]
+
+            from src.domains.identity.repository import IdentityRepository
+
+            started = time.perf_counter()
+            try:
+                await IdentityRepository().update_last_seen_many(entries)
+            except Exception:
+                self.stats["flush_failures"] += 1
+                self._requeue(batch)
+                raise
+            self.stats["flushes"] += 1
+            self.stats["rows_flushed"] += len(entries)
+            self.stats["last_flush_size"] = len(entries)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return len(entries)
+
+    def _requeue(self, batch: OrderedDict[str, tuple[datetime, str, float]]) -> None:
+        """Put a failed batch back at the front, so it is the first to go if over the cap."""
+        for user_id, entry in batch.items():
+            if user_id in self._pending:
+                continue  # A newer update arrived while flushing
+            self._pending[user_id] = entry
+            self._pending.move_to_end(user_id, last=False)
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self.stats["dropped"] += 1
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> dict[str, Any]:
+        """Flush size, lag and memory footprint."""
+        oldest = min((entry[2] for entry in self._pending.values()), default=None)
+        memory = sys.getsizeof(self._recent) + sys.getsizeof(self._pending)
+        memory += sum(sys.getsizeof(user_id) for user_id in self._recent)
+        memory += sum(
+            sys.getsizeof(user_id) + sys.getsizeof(entry) + sys.getsizeof(entry[0])
+            for user_id, entry in self._pending.items()
+        )
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "tracked": len(self._recent),
+            "lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "memory_bytes": memory,
+        }
+
+
+def _build_tracker() -> LastSeenTracker:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return LastSeenTracker(
+        throttle_seconds=settings.LAST_SEEN_THROTTLE_SECONDS,
+        flush_interval=settings.LAST_SEEN_FLUSH_INTERVAL_SECONDS,
+        max_pending=settings.LAST_SEEN_MAX_PENDING,
+        max_tracked=settings.LAST_SEEN_MAX_TRACKED,
+    )
+
+
+# Module-level singleton (flusher started from the app lifespan)
+last_seen_tracker = _build_tracker()
@@ -0,0 +1,311 @@
+"""
+Authenticated-user (principal) cache.
+
+Every authenticated HTTP request and WebSocket connect used to decode the JWT
+and then run ``select(User).where(User.email == ...)``. The principal cache
+serves the user row from two tiers instead:
+
+- an in-process LRU: token id (``jti``, or a hash of the token for tokens
+  issued before ``jti`` existed) -> user id, and user id -> user row with a
+  short TTL (``AUTH_PRINCIPAL_LOCAL_TTL_SECONDS``);
+- Redis, keyed by user id (``auth:principal:<user_id>``), shared by all
+  workers with a longer TTL.
+
+Identity writes (``IdentityRepository`` updates, billing tier changes,
+deactivation) call ``invalidate(user_id)``, which drops the local entry and
+the Redis row. Other workers hold a local copy for at most the local TTL, so
+tier and ``is_active`` changes reach every node within seconds.
+
+Callers get a fresh detached ``User`` per lookup, so mutating one request's
+user never leaks into another. Volatile counters (credits, last seen) are not
+authoritative on the cached principal — read them through their services.
+
+Only the columns in ``PRINCIPAL_USER_FIELDS`` are cached. Credentials and
+one-time codes (password hash, verification and reset codes, OAuth tokens,
+the deletion cancel token) never leave the database; they are unset on a
+cached principal, so code that needs them re-reads the user.
+"""
+
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.domains.identity.db_models import User, UserPreferences
+from src.shared.infrastructure import cache as redis_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(model: type, fields: tuple[str, ...] | None = None) -> list[tuple[str, bool]]:
+    """(attribute name, is datetime) for ``fields`` (default: every mapped column)."""
+    attrs = inspect(model).column_attrs
+    if fields is not None:
+        attrs = [attrs[name] for name in fields]
+    return [(attr.key, isinstance(attr.columns[0].type, DateTime)) for attr in attrs]
+
+
+# User attributes request handlers may read from the principal. Never add
+# credentials or one-time codes here: the rows live in Redis.
+PRINCIPAL_USER_FIELDS = (
+    "id",
+    "email",
+    "name",
+    "provider",
+    "provider_id",
+    "tier",
+    "role",
+    "admin_staff_role",
+    "is_active",
+    "is_onboarded",
+    "stripe_customer_id",
+    "stripe_subscription_id",
+    "stripe_subscription_status",
+    "stripe_price_id",
+    "subscription_current_period_start",
+    "subscription_current_period_end",
+    "paystack_customer_code",
+    "paystack_subscription_code",
+    "payment_provider",
+    "google_play_product_id",
+    "credits_used",
+    "credits_period_start",
+    "credits_period_end",
+    "credits_soft_cap",
+    "credits_hard_cap",
+    "purchased_credits_balance",
+    "credits_used_today",
+    "credits_daily_limit",
+    "last_daily_reset",
+    "file_uploads_count",
+    "file_uploads_period_start",
+    "summary_generations_count",
+    "summary_generations_period_start",
+    "google_calendar_token_expires_at",
+    "google_calendar_sync_enabled",
+    "google_calendar_id",
+    "referred_by_code",
+    "referral_code",
+    "account_deletion_requested_at",
+    "account_deletion_scheduled_for",
+    "account_deletion_reminder_30_sent_at",
+    "account_deletion_reminder_7_sent_at",
+    "account_deletion_last_cancelled_at",
+    "profile_image_url",
+    "profile_image_status",
+    "last_seen_at",
+    "last_seen_platform",
+    "created_at",
+    "updated_at",
+)
+
+_USER_COLUMNS = _columns(User, PRINCIPAL_USER_FIELDS)
+_PREFERENCES_COLUMNS = _columns(UserPreferences)
+
+
+def _dump(obj: Any, columns: list[tuple[str, bool]]) -> dict[str, Any]:
+    row = {}
+    for name, is_datetime in columns:
+        value = getattr(obj, name)
+        row[name] = value.isoformat() if is_datetime and value is not None else value
+    return row
+
+
+def _load(model: type, row: dict[str, Any], columns: list[tuple[str, bool]]) -> Any:
+    values = {}
+    for name, is_datetime in columns:
+        value = row.get(name)
+        if is_datetime and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        values[name] = value
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def principal_row(user: User) -> dict[str, Any]:
+    """JSON-safe snapshot of a user (and loaded preferences)."""
+    row = _dump(user, _USER_COLUMNS)
+    prefs = user.__dict__.get("preferences")  # Never trigger a lazy load
+    row["preferences"] = _dump(prefs, _PREFERENCES_COLUMNS) if prefs is not None else None
+    return row
+
+
+def principal_from_row(row: dict[str, Any]) -> User:
+    """Rebuild a detached ``User`` from ``principal_row`` output."""
+    user = _load(User, row, _USER_COLUMNS)
+    prefs = row.get("preferences")
+    user.__dict__["preferences"] = (
+        _load(UserPreferences, prefs, _PREFERENCES_COLUMNS) if prefs else None
+    )
+    return user
+
+
+_TOMBSTONE = {"invalidated": True}
+
+
+def token_key(payload: dict[str, Any], token: str) -> str:
+    """Stable id for one access token: its ``jti``, else a hash of the token."""
+    jti = payload.get("jti")
+    if jti:
+        return str(jti)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+
+class PrincipalCache:
+    """Two-tier (in-process LRU + Redis) cache of authenticated users."""
+
+    def __init__(
+        self,
+        *,
+        local_ttl: float = 5.0,
+        redis_ttl: int = 300,
+        max_size: int = 10000,
+    ):
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.max_size = max_size
+        # token id -> user id (immutable; the email check below catches changes)
+        self._tokens: OrderedDict[str, str] = OrderedDict()
+        # user id -> (expires_at, row)
+        self._rows: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.stats: dict[str, int] = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    def _redis_key(self, user_id: str) -> str:
+        return redis_cache.make_key(["auth", "principal", user_id])
+
+    @staticmethod
+    def _remember(store: OrderedDict, key: str, value: Any, max_size: int) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > max_size:
+            store.popitem(last=False)
+
+    async def get(self, payload: dict[str, Any], token: str) -> User | None:
+        """Cached principal for a decoded access token, or None on a miss."""
+        email = payload.get("sub")
+        user_id = self._tokens.get(token_key(payload, token))
+        user_id = user_id or payload.get("uid") or payload.get("user_id")
+        if not user_id:
+            self.stats["misses"] += 1
+            return None
+
+        row = None
+        entry = self._rows.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._rows.move_to_end(user_id)
+            row = entry[1]
+            self.stats["local_hits"] += 1
+        else:
+            row = await redis_cache.get(self._redis_key(user_id))
+            if isinstance(row, dict) and "email" in row:  # Not a tombstone
+                self.stats["redis_hits"] += 1
+                self._remember(
+                    self._rows, user_id, (time.monotonic() + self.local_ttl, row), self.max_size
+                )
+            else:
+                row = None
+
+        # The token's subject must still be this user's email
+        if row is None or row.get("email") != email:
+            self.stats["misses"] += 1
+            return None
+        return principal_from_row(row)
+
+    async def put(self, payload: dict[str, Any], token: str, user: User) -> None:
+        """Remember the principal resolved (from the database) for a token."""
+        row = principal_row(user)
+        self._remember(self._tokens, token_key(payload, token), user.id, self.max_size)
+        self._remember(self._rows, user.id, (time.monotonic() + self.local_ttl, row), self.max_size)
+        key = self._redis_key(user.id)
+        # Don't overwrite a tombstone: this row may predate the invalidating write.
+        if not await redis_cache.exists(key):
+            await redis_cache.set(key, row, expire=self.redis_ttl)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user's cached principal locally and in Redis.
+
+        The Redis row is replaced by a short-lived tombstone so that a request
+        which read the user just before the write cannot re-cache it.
+        """
+        self.stats["invalidations"] += 1
+        self._rows.pop(user_id, None)
+        await redis_cache.set(self._redis_key(user_id), _TOMBSTONE, expire=self._tombstone_ttl)
+
+    async def invalidate_many(self, user_ids: list[str]) -> None:
+        """Invalidate a batch of users, e.g. from a Celery task.
+
+        Celery tasks run on their own event loop without the shared Redis
+        connection, so a short-lived client is used when it isn't connected.
+        """
+        if not user_ids:
+            return
+        self.stats["invalidations"] += len(user_ids)
+        for user_id in user_ids:
+            self._rows.pop(user_id, None)
+
+        client = redis_cache.redis if redis_cache.is_connected else None
+        owned = client is None
+        try:
+            if owned:
+                import redis.asyncio as redis
+
+                from src.config import get_settings
+
+                client = redis.from_url(get_settings().REDIS_URL)
+            async with client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.set(
+                        self._redis_key(user_id), b'{"invalidated": true}', ex=self._tombstone_ttl
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Principal cache invalidation failed for {len(user_ids)} users: {e}")
+        finally:
+            if owned and client is not None:
+                await client.aclose()
+
+    @property
+    def _tombstone_ttl(self) -> int:
+        return max(1, math.ceil(self.local_ttl * 2))
+
+    def clear(self) -> None:
+        """Drop every in-process entry."""
+        self._tokens.clear()
+        self._rows.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit/miss counters and overall hit rate."""
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "local_entries": len(self._rows),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_cache() -> PrincipalCache:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return PrincipalCache(
+        local_ttl=settings.AUTH_PRINCIPAL_LOCAL_TTL_SECONDS,
+        redis_ttl=settings.AUTH_PRINCIPAL_REDIS_TTL_SECONDS,
+        max_size=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    )
+
+
+# Module-level singleton
+principal_cache = _build_cache()
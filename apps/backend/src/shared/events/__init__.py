@@ -1,6 +1,17 @@
 """Domain event bus — cross-domain communication without coupling."""
 
-from .bus import clear_handlers, emit, get_handler_count, listen
+from .bus import (
+    EventBackend,
+    InMemoryEventBackend,
+    Subscription,
+    clear_handlers,
+    emit,
+    get_backend,
+    get_handler_count,
+    listen,
+    set_backend,
+    subscriptions,
+)
 from .types import (
     BillingEvents,
     ClassroomEvents,
@@ -16,6 +27,12 @@ __all__ = [
     "listen",
     "clear_handlers",
     "get_handler_count",
+    "subscriptions",
+    "Subscription",
+    "EventBackend",
+    "InMemoryEventBackend",
+    "get_backend",
+    "set_backend",
     "IdentityEvents",
     "KnowledgeEvents",
     "LearningSpaceEvents",
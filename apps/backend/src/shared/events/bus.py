@@ -1,11 +1,19 @@
 """
-In-process domain event bus.
+Domain event bus.
 
 Allows domains to communicate through events without importing each other.
-Events are dispatched asynchronously within the same process.
+Handlers register with ``@listen``; ``emit`` hands the event to the active
+backend:
 
-Future: This can be backed by Redis pub/sub or a proper event store
-for multi-instance deployments.
+- ``InMemoryEventBackend`` (the default, and what tests use) dispatches to
+  this process's handlers inline, concurrently, before ``emit`` returns;
+- ``RedisStreamsEventBackend`` (``streams.py``, installed from the app
+  lifespan) appends the event to a Redis stream and returns. Handlers run
+  on whichever node picks the event up, with at-least-once delivery, retry
+  and a dead-letter stream.
+
+Payloads must be JSON-serialisable: with the Redis backend handlers receive
+the decoded JSON, not the original objects.
 
 Usage:
     # Publishing (from any domain):
@@ -18,28 +26,60 @@ Usage:
     @listen("topic.completed")
     async def handle_topic_completed(data: dict):
         await streak_service.record_activity(data["user_id"])
+
+    # Batched: the handler gets every payload read together (Redis backend)
+    @listen("flashcard.reviewed", batch=True)
+    async def handle_reviews(batch: list[dict]):
+        ...
 """
 
 import asyncio
 import logging
 from collections import defaultdict
 from collections.abc import Awaitable, Callable
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Protocol
 
 logger = logging.getLogger(__name__)
 
 # Type for event handlers
 EventHandler = Callable[[dict[str, Any]], Awaitable[None]]
+BatchEventHandler = Callable[[list[dict[str, Any]]], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    """One handler registered for one event."""
+
+    event_name: str
+    handler: Callable[[Any], Awaitable[None]]
+    batch: bool = False
 
-# Registry: event_name -> list of async handlers
-_handlers: dict[str, list[EventHandler]] = defaultdict(list)
+    @property
+    def name(self) -> str:
+        """Stable handler name (the consumer group with the Redis backend)."""
+        return f"{self.handler.__module__}.{self.handler.__qualname__}"
 
+    async def deliver(self, payloads: list[dict[str, Any]]) -> None:
+        """Invoke the handler for ``payloads``; exceptions propagate."""
+        if self.batch:
+            await self.handler(payloads)
+        else:
+            for payload in payloads:
+                await self.handler(payload)
 
-def listen(event_name: str):
+
+# Registry: event_name -> subscriptions
+_handlers: dict[str, list[Subscription]] = defaultdict(list)
+
+
+def listen(event_name: str, *, batch: bool = False):
     """Decorator to register an async handler for a domain event.
 
     Args:
         event_name: Dot-separated event name (e.g., "topic.completed").
+        batch: Call the handler once with a list of payloads instead of
+            once per event.
 
     Example:
         @listen("user.registered")
@@ -47,50 +87,91 @@ def listen(event_name: str):
             ...
     """
 
-    def decorator(func: EventHandler) -> EventHandler:
-        _handlers[event_name].append(func)
+    def decorator(func):
+        _handlers[event_name].append(Subscription(event_name, func, batch))
         logger.debug(f"Registered handler {func.__name__} for event '{event_name}'")
         return func
 
     return decorator
 
 
-async def emit(event_name: str, data: dict[str, Any] | None = None) -> None:
-    """Emit a domain event, dispatching to all registered handlers.
+def subscriptions(event_name: str | None = None) -> list[Subscription]:
+    """Registered subscriptions, for one event or all of them."""
+    if event_name is not None:
+        return list(_handlers.get(event_name, []))
+    return [sub for subs in _handlers.values() for sub in subs]
 
-    Handlers are executed concurrently. Failures in one handler do not
-    affect others — they are logged and reported to Sentry.
 
-    Args:
-        event_name: Dot-separated event name.
-        data: Event payload (arbitrary dict).
-    """
-    handlers = _handlers.get(event_name, [])
-    if not handlers:
-        return
+def report_handler_error(sub: Subscription, error: Exception) -> None:
+    """Log a failed handler and report it to Sentry."""
+    logger.error(
+        f"Event handler '{sub.handler.__name__}' failed for '{sub.event_name}': {error}",
+        exc_info=error,
+    )
+    try:
+        import sentry_sdk
 
-    payload = data or {}
-    logger.debug(f"Emitting event '{event_name}' to {len(handlers)} handler(s)")
+        sentry_sdk.capture_exception(error)
+    except ImportError:
+        pass
 
-    tasks = [_safe_dispatch(handler, event_name, payload) for handler in handlers]
-    await asyncio.gather(*tasks)
 
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
 
-async def _safe_dispatch(handler: EventHandler, event_name: str, data: dict[str, Any]) -> None:
-    """Execute a handler with error isolation."""
-    try:
-        await handler(data)
-    except Exception as e:
-        logger.error(
-            f"Event handler '{handler.__name__}' failed for '{event_name}': {e}",
-            exc_info=True,
-        )
+
+class EventBackend(Protocol):
+    async def publish(self, event_name: str, payload: dict[str, Any]) -> None: ...
+
+
+class InMemoryEventBackend:
+    """Dispatch to this process's handlers inline (no durability, no fan-out).
+
+    Handlers run concurrently. Failures in one handler do not affect
+    others: they are logged and reported to Sentry.
+    """
+
+    async def publish(self, event_name: str, payload: dict[str, Any]) -> None:
+        subs = _handlers.get(event_name, [])
+        logger.debug(f"Emitting event '{event_name}' to {len(subs)} handler(s)")
+        await asyncio.gather(*(self._safe_dispatch(sub, payload) for sub in subs))
+
+    async def _safe_dispatch(self, sub: Subscription, payload: dict[str, Any]) -> None:
+        """Execute a handler with error isolation."""
         try:
-            import sentry_sdk
+            await sub.deliver([payload])
+        except Exception as e:
+            report_handler_error(sub, e)
+
+
+in_memory_backend = InMemoryEventBackend()
+_backend: EventBackend = in_memory_backend
+
+
+def set_backend(backend: EventBackend | None) -> None:
+    """Route ``emit`` through ``backend`` (``None`` restores the in-memory one)."""
+    global _backend
+    _backend = backend or in_memory_backend
+
 
-            sentry_sdk.capture_exception(e)
-        except ImportError:
-            pass
+def get_backend() -> EventBackend:
+    return _backend
+
+
+async def emit(event_name: str, data: dict[str, Any] | None = None) -> None:
+    """Emit a domain event through the active backend.
+
+    With the in-memory backend handlers have run when this returns; with the
+    Redis backend the event has only been enqueued.
+
+    Args:
+        event_name: Dot-separated event name.
+        data: Event payload (JSON-serialisable dict).
+    """
+    if not _handlers.get(event_name):
+        return
+    await _backend.publish(event_name, data or {})
 
 
 def clear_handlers() -> None:
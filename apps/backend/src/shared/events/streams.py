@@ -0,0 +1,382 @@
+"""
+Redis Streams backend for the domain event bus.
+
+``emit`` used to await every handler inline in the request: slow listeners
+added straight to API latency, events died with the process, and other
+nodes never saw them. With this backend installed:
+
+- ``emit`` appends the event to ``<prefix>events:<event name>`` (one XADD,
+  trimmed to roughly ``EVENT_BUS_STREAM_MAXLEN``) and returns;
+- every subscription is a consumer group on its event's stream, named after
+  the handler, so each handler sees each event once across the cluster and
+  acknowledges independently of the other handlers;
+- one consumer task per node polls all groups in a single pipelined round
+  trip, up to ``EVENT_BUS_BATCH_SIZE`` events per group. ``batch=True``
+  handlers get them as one list; others are called per event, concurrently;
+- events are XACKed only after their handler succeeds. Unacknowledged events
+  idle for ``EVENT_BUS_RETRY_AFTER_SECONDS`` (failed, or owned by a node
+  that died) are claimed and delivered again; after
+  ``EVENT_BUS_MAX_DELIVERIES`` attempts they move to
+  ``<prefix>events:dead``, from where ``replay_dead_letters()`` re-runs them.
+
+Delivery is at-least-once, so handlers must tolerate repeats. If the XADD
+fails the event is dispatched in-process instead, as without Redis.
+``get_stats()`` reports stream length, pending count and lag per group.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+from uuid import uuid4
+
+from . import bus
+from .bus import Subscription, in_memory_backend, report_handler_error
+
+logger = logging.getLogger(__name__)
+
+
+def _str(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+class RedisStreamsEventBackend:
+    """Durable, cluster-wide event delivery over Redis Streams."""
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = 100,
+        poll_interval: float = 0.1,
+        retry_after: float = 30.0,
+        max_deliveries: int = 5,
+        stream_maxlen: int = 100_000,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_after = retry_after
+        self.max_deliveries = max_deliveries
+        self.stream_maxlen = stream_maxlen
+        self.consumer = uuid4().hex
+
+        self._redis: Any = None
+        self._prefix = ""
+        self._groups: set[tuple[str, str]] = set()
+        self._task: asyncio.Task | None = None
+        self.stats: dict[str, float] = {
+            "published": 0,
+            "publish_failures": 0,
+            "delivered": 0,
+            "acked": 0,
+            "handler_failures": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "replayed": 0,
+        }
+
+    @property
+    def started(self) -> bool:
+        return self._redis is not None
+
+    def _stream(self, event_name: str) -> str:
+        return f"{self._prefix}events:{event_name}"
+
+    @property
+    def _dead_stream(self) -> str:
+        return f"{self._prefix}events:dead"
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, redis_client: Any, *, key_prefix: str = "") -> None:
+        """Create consumer groups, start consuming and route ``emit`` here."""
+        if self.started:
+            return
+        self._redis = redis_client
+        self._prefix = key_prefix
+        await self._ensure_groups()
+        self._task = asyncio.create_task(self._consume_loop())
+        bus.set_backend(self)
+        logger.info("Event bus consuming from Redis streams")
+
+    async def stop(self) -> None:
+        """Stop consuming; ``emit`` falls back to in-process dispatch."""
+        if not self.started:
+            return
+        bus.set_backend(None)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._redis = None
+        self._groups.clear()
+        logger.info("Event bus stopped")
+
+    async def _ensure_groups(self) -> None:
+        """Create groups for subscriptions registered since the last check."""
+        for sub in bus.subscriptions():
+            group = (sub.event_name, sub.name)
+            if group in self._groups:
+                continue
+            try:
+                await self._redis.xgroup_create(
+                    self._stream(sub.event_name), sub.name, id="$", mkstream=True
+                )
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._groups.add(group)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def publish(self, event_name: str, payload: dict[str, Any]) -> None:
+        try:
+            await self._redis.xadd(
+                self._stream(event_name),
+                {"d": json.dumps(payload, default=str), "t": int(time.time() * 1000)},
+                maxlen=self.stream_maxlen,
+                approximate=True,
+            )
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["publish_failures"] += 1
+            logger.warning(f"Event '{event_name}' not enqueued ({e}); dispatching in-process")
+            await in_memory_backend.publish(event_name, payload)
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+
+    async def _consume_loop(self) -> None:
+        last_reclaim = time.monotonic()
+        while True:
+            delivered = 0
+            try:
+                await self._ensure_groups()
+                delivered = await self.poll()
+                if time.monotonic() - last_reclaim >= min(self.retry_after, 5.0):
+                    last_reclaim = time.monotonic()
+                    delivered += await self.reclaim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event bus consumer error: {e}")
+                await asyncio.sleep(1)
+            if not delivered:
+                await asyncio.sleep(self.poll_interval)
+
+    async def poll(self) -> int:
+        """Read new events for every group in one round trip and deliver them."""
+        subs = [s for s in bus.subscriptions() if (s.event_name, s.name) in self._groups]
+        if not subs:
+            return 0
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for sub in subs:
+                pipe.xreadgroup(
+                    sub.name,
+                    self.consumer,
+                    {self._stream(sub.event_name): ">"},
+                    count=self.batch_size,
+                )
+            results = await pipe.execute(raise_on_error=False)
+
+        work = []
+        for sub, result in zip(subs, results):
+            if isinstance(result, Exception):
+                if "NOGROUP" in str(result):
+                    self._groups.discard((sub.event_name, sub.name))  # Stream was deleted
+                else:
+                    logger.warning(f"Event read failed for {sub.name}: {result}")
+                continue
+            messages = result[0][1] if result else []
+            if messages:
+                work.append(self._deliver(sub, messages))
+        counts = await asyncio.gather(*work)
+        return sum(counts)
+
+    async def _deliver(self, sub: Subscription, messages: list) -> int:
+        """Run the handler and XACK what succeeded; the rest stays pending."""
+        stream = self._stream(sub.event_name)
+        ids: list[Any] = []
+        payloads: list[dict[str, Any]] = []
+        for message_id, fields in messages:
+            if fields is None:
+                # Trimmed away while pending: nothing left to deliver
+                await self._redis.xack(stream, sub.name, message_id)
+                continue
+            try:
+                payload = json.loads(_str(fields.get(b"d", fields.get("d", "{}"))))
+            except (TypeError, ValueError) as e:
+                await self._dead_letter(sub, message_id, fields, f"undecodable payload: {e}")
+                continue
+            ids.append(message_id)
+            payloads.append(payload)
+        if not ids:
+            return 0
+
+        self.stats["delivered"] += len(ids)
+        if sub.batch:
+            try:
+                await sub.deliver(payloads)
+                done = ids
+            except Exception as e:
+                self.stats["handler_failures"] += 1
+                report_handler_error(sub, e)
+                done = []
+        else:
+            outcomes = await asyncio.gather(
+                *(sub.deliver([p]) for p in payloads), return_exceptions=True
+            )
+            done = []
+            for message_id, outcome in zip(ids, outcomes):
+                if isinstance(outcome, Exception):
+                    self.stats["handler_failures"] += 1
+                    report_handler_error(sub, outcome)
+                else:
+                    done.append(message_id)
+        if done:
+            await self._redis.xack(stream, sub.name, *done)
+            self.stats["acked"] += len(done)
+        return len(ids)
+
+    async def reclaim(self) -> int:
+        """Redeliver events left pending too long; dead-letter exhausted ones."""
+        retry_ms = int(self.retry_after * 1000)
+        redelivered = 0
+        for sub in bus.subscriptions():
+            if (sub.event_name, sub.name) not in self._groups:
+                continue
+            stream = self._stream(sub.event_name)
+            pending = await self._redis.xpending_range(
+                stream, sub.name, min="-", max="+", count=self.batch_size
+            )
+            stale = [p for p in pending if p["time_since_delivered"] >= retry_ms]
+            if not stale:
+                continue
+            exhausted = {
+                _str(p["message_id"]) for p in stale if p["times_delivered"] >= self.max_deliveries
+            }
+            # XCLAIM with min_idle_time: if another node claimed first we get nothing
+            claimed = await self._redis.xclaim(
+                stream,
+                sub.name,
+                self.consumer,
+                min_idle_time=retry_ms,
+                message_ids=[p["message_id"] for p in stale],
+            )
+            retry = []
+            for message_id, fields in claimed:
+                if _str(message_id) in exhausted:
+                    await self._dead_letter(sub, message_id, fields, "max deliveries exceeded")
+                else:
+                    retry.append((message_id, fields))
+            if retry:
+                self.stats["retried"] += len(retry)
+                redelivered += await self._deliver(sub, retry)
+        return redelivered
+
+    async def _dead_letter(
+        self, sub: Subscription, message_id: Any, fields: dict | None, reason: str
+    ) -> None:
+        fields = fields or {}
+        data = fields.get(b"d", fields.get("d", b""))
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                self._dead_stream,
+                {
+                    "event": sub.event_name,
+                    "handler": sub.name,
+                    "id": _str(message_id),
+                    "d": data,
+                    "reason": reason,
+                },
+                maxlen=self.stream_maxlen,
+                approximate=True,
+            )
+            pipe.xack(self._stream(sub.event_name), sub.name, message_id)
+            await pipe.execute()
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Event {_str(message_id)} for {sub.name} dead-lettered: {reason}")
+
+    # ------------------------------------------------------------------
+    # Dead letters
+    # ------------------------------------------------------------------
+
+    async def replay_dead_letters(self, *, handler: str | None = None, limit: int = 100) -> int:
+        """Run dead-lettered events through their handler again.
+
+        Entries whose handler succeeds are removed from the dead-letter
+        stream; failures stay for a later replay. Returns how many succeeded.
+        """
+        by_name = {(s.event_name, s.name): s for s in bus.subscriptions()}
+        entries = await self._redis.xrange(self._dead_stream, count=limit)
+        replayed = 0
+        for entry_id, fields in entries:
+            fields = {_str(k): _str(v) for k, v in fields.items()}
+            if handler is not None and fields.get("handler") != handler:
+                continue
+            sub = by_name.get((fields.get("event"), fields.get("handler")))
+            if sub is None:
+                continue
+            try:
+                await sub.deliver([json.loads(fields.get("d") or "{}")])
+            except Exception as e:
+                report_handler_error(sub, e)
+                continue
+            await self._redis.xdel(self._dead_stream, entry_id)
+            replayed += 1
+        self.stats["replayed"] += replayed
+        return replayed
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Counters plus per-topic stream length and per-group pending/lag."""
+        topics: dict[str, Any] = {}
+        if self.started:
+            for event_name in sorted({s.event_name for s in bus.subscriptions()}):
+                stream = self._stream(event_name)
+                try:
+                    length = await self._redis.xlen(stream)
+                    groups = await self._redis.xinfo_groups(stream)
+                except Exception:
+                    continue
+                topics[event_name] = {
+                    "length": length,
+                    "groups": {
+                        _str(g["name"]): {"pending": g["pending"], "lag": g.get("lag")}
+                        for g in groups
+                    },
+                }
+            dead = await self._redis.xlen(self._dead_stream)
+        else:
+            dead = 0
+        return {**self.stats, "started": self.started, "dead_letters": dead, "topics": topics}
+
+
+def _build_event_stream() -> RedisStreamsEventBackend:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return RedisStreamsEventBackend(
+        batch_size=settings.EVENT_BUS_BATCH_SIZE,
+        poll_interval=settings.EVENT_BUS_POLL_INTERVAL_MS / 1000,
+        retry_after=settings.EVENT_BUS_RETRY_AFTER_SECONDS,
+        max_deliveries=settings.EVENT_BUS_MAX_DELIVERIES,
+        stream_maxlen=settings.EVENT_BUS_STREAM_MAXLEN,
+    )
+
+
+# Module-level singleton (started from the app lifespan)
+event_stream = _build_event_stream()
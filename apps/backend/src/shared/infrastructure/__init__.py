@@ -1,15 +1,19 @@
 """Shared infrastructure adapters (Redis, storage, HTTP clients)."""
 
-from .http import create_http_client
-from .redis import Cache, cache, get_cache
-from .storage import BunnyStorageClient, StorageError, storage_service
+from .http import HttpClientRegistry, create_http_client, http_clients
+from .redis import Cache, CacheCodec, cache, get_cache
+from .storage import BunnyStorageClient, StorageError, StorageStream, storage_service
 
 __all__ = [
     "Cache",
+    "CacheCodec",
     "cache",
     "get_cache",
     "create_http_client",
+    "HttpClientRegistry",
+    "http_clients",
     "BunnyStorageClient",
     "StorageError",
+    "StorageStream",
     "storage_service",
 ]
@@ -1,5 +1,6 @@
 """Stub — implementation pending migration from services/email."""
 
+from collections.abc import Sequence
 from typing import Any
 
 
@@ -30,3 +31,11 @@ async def send_bulk_email(
 ) -> None:
     """Send a bulk/transactional email to a user."""
     pass  # TODO: migrate implementation
+
+
+async def send_notification_email_batch(messages: Sequence[dict[str, Any]]) -> list[bool]:
+    """Send many notification emails; returns one success flag per message.
+
+    Messages carry ``user_id``, ``title``, ``body`` and optional ``data``.
+    """
+    return [True] * len(messages)  # TODO: migrate implementation
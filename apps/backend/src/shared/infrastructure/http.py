@@ -3,13 +3,30 @@ Shared HTTP client.
 
 Provides a reusable httpx.AsyncClient for external API calls.
 Configures timeouts, retries, and connection pooling globally.
+
+``create_http_client`` builds a one-off client. Hot paths (storage uploads,
+payment APIs) use ``http_clients`` instead: a registry of long-lived clients,
+one per origin, so repeated calls to the same host reuse pooled keep-alive
+connections rather than paying a TCP + TLS handshake every time.
 """
 
+import asyncio
+import importlib.util
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import urlsplit
+
 import httpx
 
+logger = logging.getLogger(__name__)
+
 # Default timeout for external API calls (30 seconds)
 DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
 
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
 def create_http_client(
     base_url: str = "",
@@ -32,3 +49,176 @@ def create_http_client(
         headers=headers or {},
         follow_redirects=True,
     )
+
+
+def run_before_loop_close(
+    loop: asyncio.AbstractEventLoop, cleanup: Callable[[], Awaitable[None]]
+) -> bool:
+    """Run ``cleanup()`` on ``loop`` right before ``loop.close()``.
+
+    Celery tasks each run on a fresh loop that they close when done, and
+    connections opened on a loop can only be closed gracefully while it is
+    still open. Returns False if the loop does not accept the hook.
+    """
+    close = loop.close
+
+    def close_after_cleanup() -> None:
+        if not loop.is_closed() and not loop.is_running():
+            try:
+                loop.run_until_complete(cleanup())
+            except Exception as e:
+                logger.warning(f"Cleanup before event loop close failed: {e}")
+        close()
+
+    try:
+        loop.close = close_after_cleanup  # type: ignore[method-assign]
+    except AttributeError:
+        return False
+    return True
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Absolute URL required, got {url!r}")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HttpClientRegistry:
+    """Long-lived, pooled ``httpx.AsyncClient`` per origin.
+
+    Each origin (scheme + host + port) gets its own client and connection
+    pool, so a slow integration cannot starve another of connections.
+    Clients are created lazily on first use and closed by ``stop()``.
+
+    Connections belong to the event loop that opened them. Celery tasks run
+    each task on a fresh loop, so ``get()`` on a loop other than the one
+    ``start()`` bound builds clients for that loop and closes them just
+    before the loop is closed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = timeout
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._requests: dict[str, int] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client for ``url``'s origin (created on first use).
+
+        Do not close the returned client or use it as a context manager.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind(loop)
+
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            client = self._clients[origin] = self._build(origin)
+        return client
+
+    def _build(self, origin: str) -> httpx.AsyncClient:
+        self._requests.setdefault(origin, 0)
+
+        async def count_request(request: httpx.Request) -> None:
+            self._requests[origin] += 1
+
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2,
+            follow_redirects=True,
+            event_hooks={"request": [count_request]},
+        )
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._clients:
+            # Only when the previous loop outlived the hook (or refused it)
+            logger.warning(f"Event loop changed; dropping {len(self._clients)} open HTTP clients")
+        self._clients = {}
+        self._loop = loop
+
+        async def close_loop_clients() -> None:
+            if self._loop is loop:
+                await self.stop()
+
+        run_before_loop_close(loop, close_loop_clients)
+
+    async def start(self) -> None:
+        """Bind to the running loop. Clients themselves are created lazily."""
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"HTTP client registry started (http2={self.http2})")
+
+    async def stop(self) -> None:
+        """Close every pooled client."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client: {e}")
+        self._loop = None
+
+    def reset(self) -> None:
+        """Forget all clients without closing them (e.g. after a fork)."""
+        self._clients = {}
+        self._loop = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Per-origin pool utilisation and request counts."""
+        pools = {
+            origin: {"requests": self._requests.get(origin, 0), **self._pool_stats(client)}
+            for origin, client in self._clients.items()
+        }
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "pools": pools,
+        }
+
+    def _pool_stats(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        """Connection counts, when this httpx/httpcore version exposes its pool."""
+        try:
+            connections = list(client._transport._pool.connections)
+            idle = sum(1 for conn in connections if conn.is_idle())
+        except (AttributeError, TypeError):
+            return {}
+        active = len(connections) - idle
+        return {
+            "connections": len(connections),
+            "active": active,
+            "idle": idle,
+            "utilisation": round(active / self.limits.max_connections, 4),
+        }
+
+
+def _build_registry() -> HttpClientRegistry:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return HttpClientRegistry(
+        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        http2=settings.HTTP_CLIENT_HTTP2,
+    )
+
+
+# Module-level singleton (started from the app lifespan / Celery worker init)
+http_clients = _build_registry()
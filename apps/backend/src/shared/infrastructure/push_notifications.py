@@ -1,5 +1,7 @@
 """Stub — implementation pending migration from services/push_notification_service."""
 
+import asyncio
+from collections.abc import Sequence
 from typing import Any
 
 
@@ -15,3 +17,18 @@ async def send_push_to_user(
 ) -> None:
     """Send a push notification to a user (alias)."""
     await send_push_notification(user_id, title, body, data)
+
+
+async def send_push_batch(messages: Sequence[dict[str, Any]]) -> list[bool]:
+    """Send many push notifications; returns one success flag per message.
+
+    Messages carry ``user_id``, ``title``, ``body`` and optional ``data``.
+    """
+    results = await asyncio.gather(
+        *(
+            send_push_notification(m["user_id"], m["title"], m["body"], m.get("data"))
+            for m in messages
+        ),
+        return_exceptions=True,
+    )
+    return [not isinstance(result, BaseException) for result in results]
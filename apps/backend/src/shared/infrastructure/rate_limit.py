@@ -1,6 +1,21 @@
-"""Simple Redis-based rate limiter for API endpoints.
+"""Redis-backed rate limiter for API endpoints.
+
+Policies are declared once (``RateLimitPolicy``: name, limit, window,
+algorithm, optional per-tier limits) and checked per identity, usually a
+user id. Each check is a single atomic Lua call that reads Redis' own clock,
+so every node agrees on the window:
+
+- ``gcra`` (default): generic cell rate algorithm, a token bucket stored as
+  one timestamp per key. Smooth, no 2x bursts at window edges.
+- ``sliding_log``: exact sliding window over a sorted set of request times;
+  costs memory per request, so keep it for small limits.
+
+Every answer carries the time until the next request would be allowed. The
+limiter remembers that deadline in-process, so a client hammering a limit it
+has already hit is rejected locally without touching Redis. Denied requests
+never consume capacity, so the local answer only differs from Redis' if the
+key is reset by hand; it expires on its own at the deadline.
 
-Uses a sliding window counter pattern with Redis INCR + EXPIRE.
 Degrades gracefully (allows requests) when Redis is unavailable.
 
 Copyright (C) 2025 Maigie
@@ -12,27 +27,276 @@ See LICENSE file in the repository root for details.
 from __future__ import annotations
 
 import logging
+import math
 import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
 
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, status
 
-from src.core.cache import cache
+from .redis import cache
 
 logger = logging.getLogger(__name__)
 
+# Both scripts return {allowed, remaining, retry_after_ms}, where
+# retry_after_ms is how long until the *next* request would be allowed
+# (0 if it would be allowed right away).
+
+# KEYS: bucket; ARGV: emission interval ms, limit
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = interval * tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = math.ceil(tat + interval)
+local allow_at = new_tat - tolerance
+if allow_at > now then
+  return {0, 0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+local remaining = math.floor((now - allow_at) / interval)
+local next_at = new_tat + interval - tolerance
+return {1, remaining, math.max(0, math.ceil(next_at - now))}
+"""
+
+# KEYS: log; ARGV: window ms, limit, unique member
+_SLIDING_LOG_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+  local oldest = redis.call('ZRANGE', KEYS[1], count - limit, count - limit, 'WITHSCORES')
+  return {0, 0, math.max(1, math.ceil(tonumber(oldest[2]) + window - now))}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+count = count + 1
+if count < limit then return {1, limit - count, 0} end
+local oldest = redis.call('ZRANGE', KEYS[1], count - limit, count - limit, 'WITHSCORES')
+return {1, 0, math.max(1, math.ceil(tonumber(oldest[2]) + window - now))}
+"""
+
+
+class GcraEngine:
+    """Token bucket as a theoretical arrival time (one string key)."""
+
+    name = "gcra"
+    script = _GCRA_SCRIPT
+
+    def args(self, limit: int, window_seconds: float) -> list[Any]:
+        return [window_seconds * 1000 / limit, limit]
+
+
+class SlidingLogEngine:
+    """Exact sliding window over a sorted set of request timestamps."""
+
+    name = "sliding_log"
+    script = _SLIDING_LOG_SCRIPT
+
+    def args(self, limit: int, window_seconds: float) -> list[Any]:
+        return [int(window_seconds * 1000), limit, uuid.uuid4().hex]
+
+
+ENGINES: dict[str, Any] = {}
+
+
+def register_engine(engine: Any) -> None:
+    """Make an algorithm available to policies by ``engine.name``.
+
+    An engine has a ``name``, a Lua ``script`` returning
+    ``{allowed, remaining, retry_after_ms}`` and ``args(limit, window_seconds)``.
+    """
+    ENGINES[engine.name] = engine
+    cache.register_script(f"rate_limit_{engine.name}", engine.script)
+
+
+register_engine(GcraEngine())
+register_engine(SlidingLogEngine())
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """A named limit, declared once and checked per identity.
+
+    ``tier_limits`` overrides ``limit`` for specific subscription tiers
+    (e.g. ``{"FREE": 5}``); the window is shared.
+    """
+
+    name: str
+    limit: int
+    window_seconds: float
+    algorithm: str = "gcra"
+    tier_limits: Mapping[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.algorithm not in ENGINES:
+            raise ValueError(f"Unknown rate limit algorithm: {self.algorithm!r}")
+        if self.limit < 1 or self.window_seconds <= 0:
+            raise ValueError("Rate limits need limit >= 1 and a positive window")
+
+    def limit_for(self, tier: str | None = None) -> int:
+        """The limit that applies to ``tier``."""
+        if tier is None:
+            return self.limit
+        return self.tier_limits.get(str(tier), self.limit)
+
+
+@dataclass(slots=True)
+class RateLimitResult:
+    """Outcome of one check; ``retry_after`` is in seconds."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimiter:
+    """Runs policy checks against Redis behind an in-process pre-check."""
+
+    def __init__(self, local_precheck: bool = True, max_local_keys: int = 10000):
+        self.local_precheck = local_precheck
+        self.max_local_keys = max_local_keys
+        # bucket key -> (monotonic time before which the next request is denied,
+        # limit that answer was computed for)
+        self._blocked: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self.stats = {
+            "checks": 0,
+            "redis_calls": 0,
+            "local_rejections": 0,
+            "denied": 0,
+            "degraded": 0,
+        }
+
+    async def check(
+        self,
+        policy: RateLimitPolicy,
+        identity: str,
+        tier: str | None = None,
+    ) -> RateLimitResult:
+        """Check (and on success consume) one request for ``identity``."""
+        self.stats["checks"] += 1
+        limit = policy.limit_for(tier)
+        key = cache.make_key(["rl", policy.algorithm, policy.name, identity])
+
+        blocked = self._blocked.get(key)
+        if blocked is not None:
+            blocked_until, blocked_limit = blocked
+            wait = blocked_until - time.monotonic()
+            # A block computed under another limit (e.g. the user just upgraded)
+            # says nothing about this one; let Redis decide
+            if wait > 0 and blocked_limit == limit:
+                self.stats["local_rejections"] += 1
+                self.stats["denied"] += 1
+                return RateLimitResult(False, limit, 0, wait)
+            del self._blocked[key]
+
+        if not cache.is_connected:
+            self.stats["degraded"] += 1
+            return RateLimitResult(True, limit, limit)
+
+        engine = ENGINES[policy.algorithm]
+        try:
+            self.stats["redis_calls"] += 1
+            reply = await cache.run_script(
+                f"rate_limit_{engine.name}",
+                keys=[key],
+                args=engine.args(limit, policy.window_seconds),
+            )
+        except Exception as e:
+            logger.warning("Rate limit check failed: %s", e)
+            reply = None
+        if reply is None:
+            # Redis error — degrade gracefully
+            self.stats["degraded"] += 1
+            return RateLimitResult(True, limit, limit)
+
+        allowed, remaining, retry_after_ms = (int(v) for v in reply)
+        if retry_after_ms > 0 and self.local_precheck:
+            self._block(key, retry_after_ms / 1000, limit)
+        if not allowed:
+            self.stats["denied"] += 1
+        return RateLimitResult(bool(allowed), limit, remaining, retry_after_ms / 1000)
+
+    def _block(self, key: str, seconds: float, limit: int) -> None:
+        self._blocked[key] = (time.monotonic() + seconds, limit)
+        self._blocked.move_to_end(key)
+        while len(self._blocked) > self.max_local_keys:
+            self._blocked.popitem(last=False)
+
+    def reset_local(self) -> None:
+        """Forget every locally remembered block (e.g. after a manual reset)."""
+        self._blocked.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        return {**self.stats, "locally_blocked": len(self._blocked)}
+
+
+def _build_rate_limiter() -> RateLimiter:
+    from src.config import get_settings
+
+    settings = get_settings()
+    return RateLimiter(
+        local_precheck=settings.RATE_LIMIT_LOCAL_PRECHECK,
+        max_local_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+    )
+
+
+# Module-level singleton (one pre-check table per process)
+rate_limiter = _build_rate_limiter()
+
+
+async def enforce_policy(
+    policy: RateLimitPolicy,
+    identity: str,
+    tier: str | None = None,
+) -> RateLimitResult:
+    """Check ``policy`` for ``identity``, raising HTTP 429 if it is exceeded.
+
+    Raises:
+        HTTPException: 429 Too Many Requests with an accurate Retry-After.
+    """
+    result = await rate_limiter.check(policy, identity, tier)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=(
+                f"Rate limit exceeded. Maximum {result.limit} requests "
+                f"per {policy.window_seconds:g} seconds. Please try again later."
+            ),
+            headers=result.headers(),
+        )
+    return result
+
 
 async def check_rate_limit(
     key: str,
     max_requests: int,
     window_seconds: int,
 ) -> tuple[bool, int]:
-    """Check if a request is within the rate limit.
+    """Check if a request is within an ad-hoc GCRA limit.
 
-    Uses Redis INCR with TTL for a simple fixed-window counter.
     Degrades gracefully — if Redis is unavailable, requests are allowed.
 
     Args:
-        key: Unique rate limit key (e.g. "rl:models:pref:{user_id}")
+        key: Unique rate limit key (e.g. "models:pref:{user_id}")
         max_requests: Maximum requests allowed in the window.
         window_seconds: Time window in seconds.
 
@@ -40,28 +304,12 @@ async def check_rate_limit(
         Tuple of (allowed: bool, remaining: int).
         If Redis is down, returns (True, max_requests).
     """
-    if not cache._connected or not cache.redis:
-        return True, max_requests
-
-    try:
-        full_key = cache.make_key(["rl", key])
-        current = await cache.increment(full_key, 1)
-
-        if current is None:
-            # Redis error — degrade gracefully
-            return True, max_requests
-
-        if current == 1:
-            # First request in this window — set expiry
-            await cache.expire(full_key, window_seconds)
-
-        remaining = max(0, max_requests - current)
-        allowed = current <= max_requests
-        return allowed, remaining
-
-    except Exception as e:
-        logger.warning("Rate limit check failed: %s", e)
-        return True, max_requests
+    name, _, identity = key.rpartition(":")
+    policy = RateLimitPolicy(
+        name=name or "adhoc", limit=max_requests, window_seconds=window_seconds
+    )
+    result = await rate_limiter.check(policy, identity)
+    return result.allowed, result.remaining
 
 
 async def enforce_rate_limit(
@@ -70,7 +318,9 @@ async def enforce_rate_limit(
     max_requests: int = 10,
     window_seconds: int = 60,
 ) -> None:
-    """Enforce a rate limit, raising HTTP 429 if exceeded.
+    """Enforce an ad-hoc per-user limit, raising HTTP 429 if exceeded.
+
+    Prefer declaring a ``RateLimitPolicy`` and calling ``enforce_policy``.
 
     Args:
         user_id: The user's unique identifier.
@@ -81,15 +331,5 @@ async def enforce_rate_limit(
     Raises:
         HTTPException: 429 Too Many Requests if limit exceeded.
     """
-    key = f"{endpoint}:{user_id}"
-    allowed, remaining = await check_rate_limit(key, max_requests, window_seconds)
-
-    if not allowed:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=(
-                f"Rate limit exceeded. Maximum {max_requests} requests "
-                f"per {window_seconds} seconds. Please try again later."
-            ),
-            headers={"Retry-After": str(window_seconds)},
-        )
+    policy = RateLimitPolicy(name=endpoint, limit=max_requests, window_seconds=window_seconds)
+    await enforce_policy(policy, user_id)
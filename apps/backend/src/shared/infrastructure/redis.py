@@ -4,10 +4,22 @@ Redis client for caching and pub/sub.
 Provides a production-ready Cache class with graceful degradation
 when Redis is unavailable. Used across all domains for caching,
 rate limiting, and real-time event forwarding.
+
+This is the process's single Redis connection pool (``src.core.cache``
+re-exports the same instance). Besides single-key operations it offers
+``get_many`` / ``set_many`` / ``delete_many`` (one round trip each), a
+``pipeline()`` context manager and server-side Lua scripts registered by
+name. Values go through one ``CacheCodec``: JSON by default, optionally
+orjson or msgpack (``REDIS_CACHE_CODEC``), with zlib compression above
+``REDIS_COMPRESS_THRESHOLD_BYTES``.
 """
 
+import importlib
 import json
 import logging
+import zlib
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager
 from typing import Any
 
 import redis.asyncio as redis
@@ -19,6 +31,76 @@ from src.config import Settings, get_settings
 logger = logging.getLogger(__name__)
 
 
+class CacheCodec:
+    """Serializes cache values, optionally with a binary codec and compression.
+
+    Plain JSON values are stored as-is, so entries written by older code
+    stay readable. msgpack and compressed values carry a short header
+    (``MAGIC`` + one flag byte).
+    """
+
+    MAGIC = b"\x00mc1"
+    _MSGPACK = 0x01
+    _COMPRESSED = 0x80
+
+    def __init__(self, codec: str = "json", compress_threshold: int = 0):
+        self.compress_threshold = compress_threshold
+        self._orjson = self._msgpack = None
+        if codec in ("orjson", "msgpack"):
+            try:
+                module = importlib.import_module(codec)
+            except ImportError:
+                logger.warning(f"Cache codec {codec!r} is not installed; using json")
+                codec = "json"
+            else:
+                setattr(self, f"_{codec}", module)
+        self.codec = codec
+
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, bytes | bytearray):
+            return bytes(value)
+        flags = 0
+        if self._msgpack is not None:
+            body = self._msgpack.packb(value, default=str, use_bin_type=True)
+            flags |= self._MSGPACK
+        elif self._orjson is not None:
+            body = self._orjson.dumps(
+                value,
+                default=str,
+                option=self._orjson.OPT_NON_STR_KEYS | self._orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        else:
+            body = json.dumps(value, default=str).encode("utf-8")
+
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            body = zlib.compress(body, 1)
+            flags |= self._COMPRESSED
+        if not flags:
+            return body
+        return self.MAGIC + bytes([flags]) + body
+
+    def loads(self, value: bytes | None) -> Any:
+        if value is None:
+            return None
+        if value.startswith(self.MAGIC) and len(value) > len(self.MAGIC):
+            flags = value[len(self.MAGIC)]
+            body = value[len(self.MAGIC) + 1 :]
+            if flags & self._COMPRESSED:
+                body = zlib.decompress(body)
+            if flags & self._MSGPACK:
+                msgpack = self._msgpack or importlib.import_module("msgpack")
+                return msgpack.unpackb(body, raw=False)
+            return json.loads(body)
+        try:
+            decoded = value.decode("utf-8")
+        except (UnicodeDecodeError, AttributeError):
+            return value
+        try:
+            return json.loads(decoded)
+        except ValueError:
+            return decoded
+
+
 class Cache:
     """Redis cache with automatic serialization and graceful degradation."""
 
@@ -29,6 +111,9 @@ class Cache:
         self.key_prefix = settings.REDIS_KEY_PREFIX
         self.redis: redis.Redis | None = None
         self._connected = False
+        self.codec = CacheCodec(settings.REDIS_CACHE_CODEC, settings.REDIS_COMPRESS_THRESHOLD_BYTES)
+        self._script_sources: dict[str, str] = {}
+        self._scripts: dict[str, Any] = {}
 
     @property
     def is_connected(self) -> bool:
@@ -41,6 +126,7 @@ class Cache:
                 self.settings.REDIS_URL,
                 socket_timeout=self.settings.REDIS_SOCKET_TIMEOUT,
                 socket_connect_timeout=self.settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                max_connections=self.settings.REDIS_MAX_CONNECTIONS,
                 decode_responses=False,
             )
             await self.redis.ping()
@@ -62,6 +148,7 @@ class Cache:
                 logger.error(f"Error disconnecting Redis: {e}")
             finally:
                 self.redis = None
+                self._scripts = {}
                 self._connected = False
                 logger.info("Redis disconnected")
 
@@ -150,6 +237,144 @@ class Cache:
         except Exception:
             return False
 
+    async def decrement(self, key: str, amount: int = 1) -> int | None:
+        """Atomically decrement a counter."""
+        return await self.increment(key, -amount)
+
+    async def ttl(self, key: str) -> int | None:
+        """Remaining TTL in seconds, or None if the key has none (or is missing)."""
+        if not self._connected or not self.redis:
+            return None
+        try:
+            result = await self.redis.ttl(key.encode("utf-8"))
+            return result if result > 0 else None
+        except Exception:
+            return None
+
+    async def keys(self, pattern: str) -> list[str]:
+        """Keys matching ``pattern`` (prefix stripped), found with SCAN.
+
+        SCAN walks the keyspace incrementally instead of blocking Redis the
+        way ``KEYS`` does, but it is still O(keyspace): keep it off hot paths.
+        """
+        if not self._connected or not self.redis:
+            return []
+        try:
+            found = [
+                key.decode("utf-8")
+                async for key in self.redis.scan_iter(match=pattern.encode("utf-8"), count=500)
+            ]
+        except (RedisConnectionError, RedisTimeoutError):
+            self._connected = False
+            return []
+        except Exception as e:
+            logger.error(f"Cache keys error: {e}")
+            return []
+        if self.key_prefix:
+            prefix_len = len(self.key_prefix)
+            found = [k[prefix_len:] if k.startswith(self.key_prefix) else k for k in found]
+        return found
+
+    # --- Multi-key operations (one round trip each) ---
+
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Get several keys with one MGET. Missing keys are left out."""
+        keys = list(keys)
+        if not keys or not self._connected or not self.redis:
+            return {}
+        try:
+            values = await self.redis.mget([k.encode("utf-8") for k in keys])
+        except (RedisConnectionError, RedisTimeoutError):
+            self._connected = False
+            return {}
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+            return {}
+        return {k: self._deserialize(v) for k, v in zip(keys, values) if v is not None}
+
+    async def set_many(self, items: Mapping[str, Any], expire: int | None = None) -> bool:
+        """Store several values (optionally with a shared TTL) in one round trip."""
+        if not items or not self._connected or not self.redis:
+            return False
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key.encode("utf-8"), self._serialize(value), ex=expire or None)
+                await pipe.execute()
+            return True
+        except (RedisConnectionError, RedisTimeoutError):
+            self._connected = False
+            return False
+        except Exception as e:
+            logger.error(f"Cache set_many error: {e}")
+            return False
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys with one DEL. Returns how many existed."""
+        keys = [k.encode("utf-8") for k in keys]
+        if not keys or not self._connected or not self.redis:
+            return 0
+        try:
+            return int(await self.redis.delete(*keys))
+        except (RedisConnectionError, RedisTimeoutError):
+            self._connected = False
+            return 0
+        except Exception as e:
+            logger.error(f"Cache delete_many error: {e}")
+            return 0
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Any]:
+        """Batch raw Redis commands into one round trip.
+
+        Queue commands on the yielded pipeline and ``await pipe.execute()``.
+        With ``transaction=True`` they run as MULTI/EXEC. Values are not
+        serialized for you; use ``encode()`` / ``decode()``.
+
+        Raises:
+            RedisError: If Redis is not connected (callers choose how to degrade).
+        """
+        if not self._connected or not self.redis:
+            raise RedisConnectionError("Redis is not connected")
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value the way ``set`` does (for pipelines and scripts)."""
+        return self._serialize(value)
+
+    def decode(self, value: bytes | None) -> Any:
+        """Deserialize a raw value the way ``get`` does."""
+        return self._deserialize(value)
+
+    # --- Server-side scripts ---
+
+    def register_script(self, name: str, source: str) -> None:
+        """Register a Lua script under ``name``; it is loaded on first use."""
+        self._script_sources[name] = source
+        self._scripts.pop(name, None)
+
+    async def run_script(
+        self, name: str, keys: list[str] | None = None, args: list[Any] | None = None
+    ) -> Any:
+        """Run a registered script (EVALSHA, reloading it if Redis lost it).
+
+        Returns None if Redis is unavailable or the script fails.
+        """
+        if not self._connected or not self.redis:
+            return None
+        script = self._scripts.get(name)
+        if script is None:
+            script = self._scripts[name] = self.redis.register_script(self._script_sources[name])
+        try:
+            return await script(keys=keys or [], args=args or [])
+        except (RedisConnectionError, RedisTimeoutError):
+            self._connected = False
+            return None
+        except RedisError as e:
+            logger.error(f"Cache script {name!r} failed: {e}")
+            return None
+
     async def health_check(self) -> dict[str, Any]:
         """Check Redis health."""
         if not self.redis:
@@ -170,20 +395,10 @@ class Cache:
     # --- Serialization ---
 
     def _serialize(self, value: Any) -> bytes:
-        if isinstance(value, bytes | bytearray):
-            return bytes(value)
-        return json.dumps(value, default=str).encode("utf-8")
+        return self.codec.dumps(value)
 
     def _deserialize(self, value: bytes | None) -> Any:
-        if value is None:
-            return None
-        try:
-            decoded = value.decode("utf-8")
-            return json.loads(decoded)
-        except (json.JSONDecodeError, ValueError):
-            return decoded
-        except (UnicodeDecodeError, AttributeError):
-            return value
+        return self.codec.loads(value)
 
 
 # Global instance
@@ -7,11 +7,20 @@ touching domain code.
 
 Config comes from ``src.config`` (``BUNNY_CDN_API_KEY``, ``BUNNY_STORAGE_ZONE``,
 ``BUNNY_CDN_HOSTNAME``, ``BUNNY_PUBLIC_URL_BASE``).
+
+Uploads stream from disk or the spooled ``UploadFile`` and downloads can be
+streamed (optionally by byte range) via ``open_stream``, so large files are
+never held in memory whole. ``STORAGE_MAX_IN_FLIGHT_BYTES`` caps how many
+bytes in-flight transfers may buffer per process.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 from urllib.parse import urlparse
 
@@ -19,6 +28,8 @@ import httpx
 
 from src.config import get_settings
 
+from .http import http_clients
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +37,106 @@ class StorageError(Exception):
     """Raised when a storage operation fails."""
 
 
+class ByteBudget:
+    """Caps the bytes storage transfers hold in memory at once, per process.
+
+    A reservation larger than the whole budget is shrunk to the budget, so
+    it waits for every other transfer to finish and then runs alone.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._cond: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _condition(self) -> asyncio.Condition:
+        # Celery runs each task on a new loop; primitives can't cross loops.
+        loop = asyncio.get_running_loop()
+        if self._cond is None or loop is not self._loop:
+            self._cond, self._loop = asyncio.Condition(), loop
+            self.in_flight = 0
+        return self._cond
+
+    def _clamp(self, size: int) -> int:
+        return min(max(size, 0), self.limit)
+
+    async def acquire(self, size: int) -> None:
+        size = self._clamp(size)
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight + size <= self.limit)
+            self.in_flight += size
+
+    async def release(self, size: int) -> None:
+        size = self._clamp(size)
+        cond = self._condition()
+        async with cond:
+            self.in_flight = max(0, self.in_flight - size)
+            cond.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, size: int) -> AsyncIterator[None]:
+        await self.acquire(size)
+        try:
+            yield
+        finally:
+            await self.release(size)
+
+
+class StorageStream:
+    """
+    A streaming download from storage.
+
+    Iterate ``chunks()`` (or ``read()`` to buffer) and close with
+    ``aclose()`` or ``async with``; either releases the connection and the
+    in-flight byte reservation.
+    """
+
+    def __init__(self, response: httpx.Response, chunk_size: int, budget: ByteBudget):
+        self._response = response
+        self._chunk_size = chunk_size
+        self._budget = budget
+        self._closed = False
+        self.status_code = response.status_code
+        self.content_type = response.headers.get("content-type", "application/octet-stream")
+        length = response.headers.get("content-length")
+        self.content_length = int(length) if length and length.isdigit() else None
+        self.content_range = response.headers.get("content-range")
+
+    @property
+    def is_partial(self) -> bool:
+        """True when storage answered a range request with 206."""
+        return self.status_code == 206
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yield the body in chunks, closing the stream when done."""
+        try:
+            async for chunk in self._response.aiter_bytes(self._chunk_size):
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def read(self) -> bytes:
+        """Buffer the remaining body."""
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self._response.aclose()
+        finally:
+            await self._budget.release(self._chunk_size)
+
+    async def __aenter__(self) -> "StorageStream":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+
 class BunnyStorageClient:
     """
     BunnyCDN Storage API client.
@@ -49,6 +160,8 @@ class BunnyStorageClient:
         "jh": "jh.storage.bunnycdn.com",
     }
 
+    _DEFAULT_MAX_IN_FLIGHT_BYTES = 64 * 1024 * 1024
+
     def __init__(self):
         self._initialized = False
         self.api_key: str | None = None
@@ -56,6 +169,7 @@ class BunnyStorageClient:
         self.cdn_hostname: str = ""
         self.public_url_base: str | None = None
         self.base_url: str = ""
+        self._budget = ByteBudget(self._DEFAULT_MAX_IN_FLIGHT_BYTES)
 
     # ------------------------------------------------------------------ setup
 
@@ -74,6 +188,10 @@ class BunnyStorageClient:
         host = self._REGION_HOSTS.get(region, self._REGION_HOSTS["uk"])
         if self.storage_zone:
             self.base_url = f"https://{host}/{self.storage_zone}"
+
+        max_in_flight = getattr(settings, "STORAGE_MAX_IN_FLIGHT_BYTES", None)
+        if isinstance(max_in_flight, int) and max_in_flight > 0:
+            self._budget.limit = max_in_flight
         self._initialized = True
 
     def _require_config(self) -> None:
@@ -92,6 +210,45 @@ class BunnyStorageClient:
 
     # ------------------------------------------------------------------ upload
 
+    async def _put(
+        self,
+        path: str,
+        body: bytes | AsyncIterator[bytes],
+        size: int,
+        *,
+        content_type: str,
+        reserve: int,
+    ) -> dict[str, Any]:
+        """PUT ``body`` to ``path`` holding ``reserve`` bytes of the in-flight budget."""
+        upload_url = f"{self.base_url}/{path}"
+        headers = {
+            "AccessKey": self.api_key or "",
+            "Content-Type": content_type,
+            # Explicit length keeps a streamed body a plain (non-chunked) PUT.
+            "Content-Length": str(size),
+        }
+
+        try:
+            async with self._budget.reserve(reserve):
+                client = http_clients.get(upload_url)
+                response = await client.put(upload_url, headers=headers, content=body, timeout=60.0)
+        except (httpx.HTTPError, OSError) as e:
+            logger.error(f"BunnyCDN upload transport error for {path}: {e}")
+            raise StorageError(f"Storage upload failed: {e}") from e
+
+        if response.status_code not in (200, 201):
+            logger.error(
+                f"BunnyCDN upload failed for {path}: {response.status_code} {response.text}"
+            )
+            raise StorageError(f"Storage upload failed: HTTP {response.status_code}")
+
+        return {
+            "filename": path.rsplit("/", 1)[-1],
+            "url": self._public_url(path),
+            "size": size,
+            "path": path,
+        }
+
     async def upload_bytes(
         self,
         content: bytes,
@@ -114,50 +271,78 @@ class BunnyStorageClient:
         """
         self._require_config()
         path = remote_path.lstrip("/")
-        upload_url = f"{self.base_url}/{path}"
+        return await self._put(
+            path, content, len(content), content_type=content_type, reserve=len(content)
+        )
 
-        headers = {
-            "AccessKey": self.api_key or "",
-            "Content-Type": content_type,
-        }
+    async def upload_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        *,
+        content_type: str = "application/octet-stream",
+        chunk_size: int = 1024 * 1024,
+    ) -> dict[str, Any]:
+        """
+        Stream a local file to storage without loading it into memory.
+
+        Args:
+            local_path: Path of the file on local disk.
+            remote_path: Destination path within the storage zone.
+            content_type: MIME type (see ``upload_bytes``).
+            chunk_size: Bytes read per chunk.
 
+        Returns:
+            ``{"filename": str, "url": str, "size": int}``.
+        """
+        self._require_config()
+        path = remote_path.lstrip("/")
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.put(upload_url, headers=headers, content=content)
-        except httpx.HTTPError as e:
-            logger.error(f"BunnyCDN upload transport error for {path}: {e}")
+            size = os.path.getsize(local_path)
+        except OSError as e:
             raise StorageError(f"Storage upload failed: {e}") from e
-
-        if response.status_code not in (200, 201):
-            logger.error(
-                f"BunnyCDN upload failed for {path}: {response.status_code} {response.text}"
-            )
-            raise StorageError(f"Storage upload failed: HTTP {response.status_code}")
-
-        return {
-            "filename": path.rsplit("/", 1)[-1],
-            "url": self._public_url(path),
-            "size": len(content),
-            "path": path,
-        }
-
-    async def upload_upload_file(self, file: Any, path_prefix: str = "") -> dict[str, Any]:
+        return await self._put(
+            path,
+            _iter_file(local_path, chunk_size),
+            size,
+            content_type=content_type,
+            reserve=min(size, chunk_size),
+        )
+
+    async def upload_upload_file(
+        self,
+        file: Any,
+        path_prefix: str = "",
+        *,
+        chunk_size: int = 1024 * 1024,
+    ) -> dict[str, Any]:
         """
-        Upload a FastAPI ``UploadFile`` to storage.
+        Stream a FastAPI ``UploadFile`` to storage.
+
+        The body is read from the spooled file in ``chunk_size`` pieces, so
+        large uploads are never held in memory whole.
 
         Args:
             file: A ``fastapi.UploadFile`` instance.
             path_prefix: Optional folder prefix (e.g., ``"notes/user123"``).
+            chunk_size: Bytes read per chunk.
 
         Returns:
             ``{"filename": str, "url": str, "size": int}``.
         """
+        self._require_config()
         filename = (file.filename or "upload.bin").replace(" ", "_")
         remote_path = f"{path_prefix.strip('/')}/{filename}" if path_prefix else filename
-        content = await file.read()
         try:
+            size = await _upload_size(file)
             content_type = getattr(file, "content_type", None) or "application/octet-stream"
-            return await self.upload_bytes(content, remote_path, content_type=content_type)
+            return await self._put(
+                remote_path.lstrip("/"),
+                _iter_upload(file, chunk_size),
+                size,
+                content_type=content_type,
+                reserve=min(size, chunk_size),
+            )
         finally:
             # Reset pointer in case the caller reads the file again.
             try:
@@ -186,8 +371,8 @@ class BunnyStorageClient:
         headers = {"AccessKey": self.api_key}
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.delete(delete_url, headers=headers)
+            client = http_clients.get(delete_url)
+            response = await client.delete(delete_url, headers=headers, timeout=30.0)
             # 200 = deleted, 404 = already gone (idempotent)
             return response.status_code in (200, 404)
         except httpx.HTTPError as e:
@@ -196,12 +381,20 @@ class BunnyStorageClient:
 
     # ------------------------------------------------------------------ fetch
 
-    async def fetch_bytes(self, url_or_path: str) -> tuple[bytes, str] | None:
+    async def open_stream(
+        self,
+        url_or_path: str,
+        *,
+        byte_range: tuple[int, int | None] | None = None,
+        chunk_size: int = 256 * 1024,
+    ) -> StorageStream | None:
         """
-        Download an object from storage. Useful when the public CDN
-        edge is misbehaving and we need to bypass it.
+        Open an object for streaming download, optionally a byte range.
 
-        Returns ``(content, content_type)`` or ``None`` on error.
+        ``byte_range`` is ``(start, end)`` with ``end`` inclusive, or
+        ``(start, None)`` for the rest of the object. The returned stream
+        must be consumed or closed (``async with stream:``) to release the
+        connection. Returns ``None`` if the object is missing or on error.
         """
         self._ensure_init()
         if not self.api_key or not self.storage_zone:
@@ -213,18 +406,47 @@ class BunnyStorageClient:
 
         get_url = f"{self.base_url}/{path}"
         headers = {"AccessKey": self.api_key}
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
 
+        await self._budget.acquire(chunk_size)
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(get_url, headers=headers)
-            if response.status_code != 200:
-                return None
-            ct = response.headers.get("content-type", "application/octet-stream")
-            return response.content, ct
+            client = http_clients.get(get_url)
+            request = client.build_request("GET", get_url, headers=headers, timeout=30.0)
+            response = await client.send(request, stream=True)
         except httpx.HTTPError as e:
+            await self._budget.release(chunk_size)
             logger.warning(f"Storage fetch failed for {path}: {e}")
             return None
 
+        if response.status_code not in (200, 206):
+            await response.aclose()
+            await self._budget.release(chunk_size)
+            return None
+        return StorageStream(response, chunk_size, self._budget)
+
+    async def fetch_bytes(self, url_or_path: str) -> tuple[bytes, str] | None:
+        """
+        Download an object from storage. Useful when the public CDN
+        edge is misbehaving and we need to bypass it.
+
+        Buffers the whole object; prefer ``open_stream`` for anything that
+        can be passed on in chunks.
+
+        Returns ``(content, content_type)`` or ``None`` on error.
+        """
+        stream = await self.open_stream(url_or_path)
+        if stream is None:
+            return None
+        try:
+            async with stream:
+                content = await stream.read()
+        except httpx.HTTPError as e:
+            logger.warning(f"Storage fetch failed for {url_or_path}: {e}")
+            return None
+        return content, stream.content_type
+
     # ---------------------------------------------------------------- helpers
 
     def _normalize_path(self, url_or_path: str) -> str:
@@ -250,6 +472,41 @@ class BunnyStorageClient:
             return None
         return await self.fetch_bytes(path)
 
+    async def open_public_chat_image_stream(
+        self, public_url: str, *, byte_range: tuple[int, int | None] | None = None
+    ) -> StorageStream | None:
+        """Streaming variant of ``fetch_public_chat_image_bytes``."""
+        path = self.chat_images_storage_path(public_url)
+        if not path:
+            return None
+        return await self.open_stream(path, byte_range=byte_range)
+
+
+async def _upload_size(file: Any) -> int:
+    """Size of an ``UploadFile``, measured on the spooled file if unknown."""
+    size = getattr(file, "size", None)
+    if isinstance(size, int):
+        return size
+    spooled = file.file
+    await asyncio.to_thread(spooled.seek, 0, os.SEEK_END)
+    size = await asyncio.to_thread(spooled.tell)
+    await asyncio.to_thread(spooled.seek, 0)
+    return size
+
+
+async def _iter_upload(file: Any, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield an ``UploadFile``'s contents in chunks from the start."""
+    await file.seek(0)
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def _iter_file(local_path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    """Yield a file's contents in chunks, reading off the event loop."""
+    with open(local_path, "rb") as fh:
+        while chunk := await asyncio.to_thread(fh.read, chunk_size):
+            yield chunk
+
 
 # Module-level singleton used across the app.
 storage_service = BunnyStorageClient()
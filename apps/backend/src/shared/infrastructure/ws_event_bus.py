@@ -1,7 +1,10 @@
-"""Stub — implementation pending migration from services/ws_event_bus."""
+"""Push real-time events to a user's WebSocket connections on any node."""
 
+import logging
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 
 async def publish_ws_event(
     user_id: str | None = None,
@@ -11,9 +14,20 @@ async def publish_ws_event(
 ) -> None:
     """Publish an event via WebSocket event bus.
 
+    Delivery goes through the core ``ConnectionManager``, which fans the
+    message out to other nodes over Redis when cross-node fan-out is enabled.
+
     Args:
         user_id: Target user for the event.
         event_type: Optional event type category.
         payload: Event payload data.
     """
-    pass  # TODO: migrate implementation
+    if not user_id:
+        return
+    from src.core.websocket import manager
+
+    message = dict(payload or {})
+    if event_type:
+        message.setdefault("type", event_type)
+    message.update(kwargs)
+    await manager.send_to_user(user_id, message)
@@ -21,7 +21,9 @@ def reset_credit_periods_task():
         from datetime import UTC, datetime
 
         from sqlalchemy import select, update
+        from src.domains.billing.services.credit_ledger import credit_ledger
         from src.domains.identity.db_models import User
+        from src.shared.auth.principal_cache import principal_cache
         from src.shared.database import get_session_factory
 
         now = datetime.now(UTC)
@@ -44,6 +46,10 @@ def reset_credit_periods_task():
 
             await session.commit()
 
+        user_ids = [user.id for user in users]
+        await credit_ledger.invalidate_many(user_ids)
+        await principal_cache.invalidate_many(user_ids)
+
         if users:
             logger.info(f"Reset credit periods for {len(users)} users")
 
@@ -63,7 +69,9 @@ def check_expired_trials_task():
         from datetime import UTC, datetime
 
         from sqlalchemy import select, update
+        from src.domains.billing.services.credit_ledger import credit_ledger
         from src.domains.identity.db_models import User
+        from src.shared.auth.principal_cache import principal_cache
         from src.shared.database import get_session_factory
 
         now = datetime.now(UTC)
@@ -88,6 +96,10 @@ def check_expired_trials_task():
 
             await session.commit()
 
+        user_ids = [user.id for user in expired]
+        await credit_ledger.invalidate_many(user_ids)
+        await principal_cache.invalidate_many(user_ids)
+
         if expired:
             logger.info(f"Downgraded {len(expired)} expired subscriptions to FREE")
 
@@ -108,6 +120,7 @@ def process_account_deletions_task():
 
         from sqlalchemy import select, update
         from src.domains.identity.db_models import User
+        from src.shared.auth.principal_cache import principal_cache
         from src.shared.database import get_session_factory
 
         now = datetime.now(UTC)
@@ -141,6 +154,8 @@ def process_account_deletions_task():
 
             await session.commit()
 
+        await principal_cache.invalidate_many([user.id for user in ready])
+
         if ready:
             logger.info(f"Processed {len(ready)} account deletions")
 
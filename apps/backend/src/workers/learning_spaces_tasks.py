@@ -0,0 +1,52 @@
+"""
+Learning Spaces background tasks.
+
+Large bulk imports into and exports out of a space run here, one
+transaction per page of ids, so the request returns at once and the
+client polls the job for progress. Routed to 'heavy' queue.
+"""
+
+import logging
+
+from src.core.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    name="learning_spaces.transfer",
+    queue="heavy",
+    time_limit=1800,
+    soft_time_limit=1740,
+    bind=True,
+)
+def space_transfer_task(
+    self, *, direction: str, space_id: str, user_id: str, ids: dict[str, list[str]]
+) -> dict[str, int]:
+    """Apply a queued space transfer; returns the count per type.
+
+    Progress is published as the custom ``PROGRESS`` state with
+    ``{"done", "total", "counts"}`` after every page.
+    """
+    import asyncio
+
+    from src.domains.learning_spaces.services.transfer_service import run_transfer
+    from src.shared.database.session import ensure_db
+
+    def report(done: int, total: int, counts: dict[str, int]) -> None:
+        self.update_state(
+            state="PROGRESS", meta={"done": done, "total": total, "counts": dict(counts)}
+        )
+
+    async def _run() -> dict[str, int]:
+        await ensure_db()
+        return await run_transfer(direction, space_id, user_id, ids, on_progress=report)
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_run())
+    except Exception as e:
+        logger.exception(f"Space {direction} failed for {user_id} / {space_id}: {e}")
+        raise
+    finally:
+        loop.close()
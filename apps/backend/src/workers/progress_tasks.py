@@ -1,7 +1,8 @@
 """
 Progress domain background tasks.
 
-Spaced repetition scheduling, streak maintenance, and achievement checks.
+Spaced repetition scheduling, streak maintenance (and the activity-day
+backfill), and achievement checks.
 Routed to 'default' queue (lightweight, frequent).
 """
 
@@ -70,6 +71,51 @@ def check_streaks_task():
         loop.close()
 
 
+@celery_app.task(
+    name="progress.backfill_activity_days",
+    queue="heavy",
+    time_limit=3600,
+    soft_time_limit=3500,
+)
+def backfill_activity_days_task(shard: int | None = None, shards: int = 1):
+    """Build the activity-day bitsets from existing history.
+
+    Run once after creating the UserActivityDays table; re-running only adds
+    days that are missing. A cohort job over all users (see
+    ``services/cohort_engine``), so it can be sharded like the nightly jobs.
+    """
+    import asyncio
+
+    from src.domains.personal_learning.services.cohort_engine import fan_out
+
+    if fan_out(backfill_activity_days_task, shard):
+        return None
+
+    async def _backfill() -> dict:
+        from sqlalchemy import select
+        from src.domains.identity.db_models import User
+        from src.domains.personal_learning.services.cohort_engine import run_cohort
+        from src.domains.progress.services.activity_days import backfill_activity_days
+        from src.shared.database.session import ensure_db
+
+        await ensure_db()
+        result = await run_cohort(
+            "activity_days_backfill",
+            select(User.id),
+            User.id,
+            backfill_activity_days,
+            shard=shard,
+            shards=shards,
+        )
+        return result.as_dict()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_backfill())
+    finally:
+        loop.close()
+
+
 @celery_app.task(name="progress.daily_credit_reset", queue="default", time_limit=30)
 def daily_credit_reset_task():
     """Reset daily credit counters for free tier users."""
@@ -0,0 +1,222 @@
+"""Activity-day bitsets: bit operations, day marking and the history backfill."""
+
+import os
+import warnings
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from src.domains.progress.repository import ProgressRepository
+from src.domains.progress.services import activity_days, activity_tracker
+from src.domains.progress.services.activity_days import (
+    ACTIVITY,
+    ACTIVITY_EPOCH,
+    REVIEW,
+    DayBitmap,
+    day_index,
+)
+
+TODAY = date(2026, 3, 4)  # A Wednesday
+
+
+def _days(count: int, *, start: date = TODAY) -> list[date]:
+    return [start - timedelta(days=i) for i in range(count)]
+
+
+class TestDayBitmap:
+    def test_bit_layout_matches_postgres_get_bit(self):
+        # get_bit(bits, n) reads bit n % 8 (least significant first) of byte n / 8
+        bits = DayBitmap.from_days([ACTIVITY_EPOCH + timedelta(days=10)]).bits
+
+        assert bits == bytes([0, 0b100])
+
+    def test_current_streak_counts_back_from_today(self):
+        assert DayBitmap.from_days(_days(3)).current_streak(TODAY) == 3
+
+    def test_today_not_yet_active_counts_from_yesterday(self):
+        days = DayBitmap.from_days(_days(2, start=TODAY - timedelta(days=1)))
+
+        assert days.current_streak(TODAY) == 2
+
+    def test_gap_breaks_streak(self):
+        assert DayBitmap.from_days([TODAY, TODAY - timedelta(days=2)]).current_streak(TODAY) == 1
+        assert DayBitmap().current_streak(TODAY) == 0
+        assert (
+            DayBitmap.from_days(_days(5, start=TODAY - timedelta(days=2))).current_streak(TODAY)
+            == 0
+        )
+
+    def test_long_streak_across_whole_bytes(self):
+        assert DayBitmap.from_days(_days(1000)).current_streak(TODAY) == 1000
+
+    def test_active_days_and_count_in_a_window(self):
+        days = DayBitmap.from_days([TODAY, TODAY - timedelta(days=2), TODAY - timedelta(days=9)])
+        week_start = TODAY - timedelta(days=TODAY.weekday())
+
+        assert days.active_days(week_start, TODAY) == [TODAY - timedelta(days=2), TODAY]
+        assert days.count(TODAY - timedelta(days=29), TODAY) == 3
+        assert days.count(TODAY + timedelta(days=1), TODAY + timedelta(days=30)) == 0
+
+    def test_window_before_the_epoch(self):
+        days = DayBitmap.from_days([ACTIVITY_EPOCH, ACTIVITY_EPOCH - timedelta(days=3)])
+
+        assert days.active_days(ACTIVITY_EPOCH - timedelta(days=5), ACTIVITY_EPOCH) == [
+            ACTIVITY_EPOCH
+        ]
+
+    def test_union(self):
+        merged = DayBitmap.from_days([TODAY]) | DayBitmap.from_days([ACTIVITY_EPOCH])
+
+        assert merged.is_active(TODAY) and merged.is_active(ACTIVITY_EPOCH)
+        assert merged.count(ACTIVITY_EPOCH, TODAY) == 2
+
+
+class TestRecordDay:
+    async def test_first_event_of_the_day_writes_once(self):
+        at = datetime(2026, 3, 4, 9, 30, tzinfo=timezone.utc)
+        bits = DayBitmap.from_days([TODAY]).bits
+        mark = AsyncMock(side_effect=[bits, None])
+
+        with (
+            patch.object(activity_days.progress_repo, "mark_activity_day", mark),
+            patch.object(activity_days, "_marked", activity_days.OrderedDict()),
+        ):
+            first = await activity_days.record_day("u1", REVIEW, at=at)
+            again = await activity_days.record_day("u1", REVIEW, at=at + timedelta(hours=1))
+
+        assert first.is_active(TODAY)
+        assert again is None
+        mark.assert_awaited_once_with("u1", REVIEW, day_index(TODAY))
+
+    async def test_streak_is_read_back_from_the_bitset(self):
+        at = datetime(2026, 3, 4, 9, 30, tzinfo=timezone.utc)
+        bitmap = DayBitmap.from_days(_days(4))
+        repo = MagicMock()
+        repo.get_streak = AsyncMock(
+            return_value=SimpleNamespace(current_streak=0, longest_streak=10, last_study_date=None)
+        )
+        repo.upsert_streak = AsyncMock()
+
+        with (
+            patch.object(activity_days, "record_day", AsyncMock(return_value=bitmap)),
+            patch.object(activity_tracker, "progress_repo", repo),
+        ):
+            assert await activity_tracker.record_activity("u1", at=at) == 4
+
+        data = repo.upsert_streak.await_args.args[1]
+        assert (data["currentStreak"], data["longestStreak"]) == (4, 10)
+        assert data["lastStudyDate"] == datetime(2026, 3, 4, tzinfo=timezone.utc)
+
+    async def test_running_streak_is_never_shortened(self):
+        """Before the backfill the bitset only knows today; the stored run continues."""
+        at = datetime(2026, 3, 4, 9, 30, tzinfo=timezone.utc)
+        repo = MagicMock()
+        repo.get_streak = AsyncMock(
+            return_value=SimpleNamespace(
+                current_streak=12,
+                longest_streak=12,
+                last_study_date=datetime(2026, 3, 3, tzinfo=timezone.utc),
+            )
+        )
+        repo.upsert_streak = AsyncMock()
+
+        with (
+            patch.object(
+                activity_days, "record_day", AsyncMock(return_value=DayBitmap.from_days([TODAY]))
+            ),
+            patch.object(activity_tracker, "progress_repo", repo),
+        ):
+            assert await activity_tracker.record_activity("u1", at=at) == 13
+
+        data = repo.upsert_streak.await_args.args[1]
+        assert (data["currentStreak"], data["longestStreak"]) == (13, 13)
+
+    async def test_broken_streak_restarts_from_the_bitset(self):
+        at = datetime(2026, 3, 4, 9, 30, tzinfo=timezone.utc)
+        repo = MagicMock()
+        repo.get_streak = AsyncMock(
+            return_value=SimpleNamespace(
+                current_streak=12,
+                longest_streak=12,
+                last_study_date=datetime(2026, 3, 1, tzinfo=timezone.utc),
+            )
+        )
+        repo.upsert_streak = AsyncMock()
+
+        with (
+            patch.object(
+                activity_days, "record_day", AsyncMock(return_value=DayBitmap.from_days([TODAY]))
+            ),
+            patch.object(activity_tracker, "progress_repo", repo),
+        ):
+            assert await activity_tracker.record_activity("u1", at=at) == 1
+
+    async def test_repeat_activity_leaves_the_streak_alone(self):
+        repo = MagicMock()
+
+        with (
+            patch.object(activity_days, "record_day", AsyncMock(return_value=None)),
+            patch.object(activity_tracker, "progress_repo", repo),
+        ):
+            assert await activity_tracker.record_activity("u1") is None
+
+        repo.upsert_streak.assert_not_called()
+
+
+class TestRepository:
+    async def test_mark_is_a_single_conditional_upsert(self):
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        session.execute = AsyncMock(
+            return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=b"\x01"))
+        )
+        session.commit = AsyncMock()
+        repo = ProgressRepository()
+
+        with patch.object(repo, "_session", AsyncMock(return_value=session)):
+            bits = await repo.mark_activity_day("u1", ACTIVITY, 2255)
+
+        assert bits == b"\x01"
+        session.commit.assert_awaited_once()
+
+        stmt = session.execute.await_args.args[0]
+        with warnings.catch_warnings():
+            # e.g. SAWarning for a SET key that matches no column
+            warnings.simplefilter("error")
+            sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert 'ON CONFLICT ("userId", kind) DO UPDATE' in sql
+        assert '"updatedAt" = now()' in sql
+        assert "set_bit(" in sql and "get_bit(" in sql
+        assert 'RETURNING "UserActivityDays".bits' in sql
+
+
+class TestBackfill:
+    async def test_rebuilt_days_are_merged_into_stored_bits(self):
+        stored = DayBitmap.from_days([TODAY]).bits
+        repo = MagicMock()
+        repo.load_activity_history = AsyncMock(
+            return_value={
+                ("u1", ACTIVITY): {TODAY - timedelta(days=1)},
+                ("u2", REVIEW): {TODAY},
+            }
+        )
+        repo.lock_activity_days = AsyncMock(
+            return_value={("u1", ACTIVITY): ("r1", stored), ("u2", REVIEW): ("r2", stored)}
+        )
+        repo.save_activity_days = AsyncMock()
+
+        with patch.object(activity_days, "progress_repo", repo):
+            updated = await activity_days.backfill_activity_days(
+                "s", [SimpleNamespace(id="u1"), SimpleNamespace(id="u2")], datetime.now()
+            )
+
+        assert updated == 1  # u2 already had its only day
+        saved = repo.save_activity_days.await_args.args[1]
+        assert list(saved) == ["r1"]
+        assert DayBitmap(saved["r1"]).current_streak(TODAY) == 2
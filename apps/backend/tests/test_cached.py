@@ -0,0 +1,175 @@
+"""Two-tier ``@cached`` decorator tests (L1, fake L2, single-flight, pub/sub)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.domains.personal_learning.services import cache as cache_mod
+from src.domains.personal_learning.services.cache import CacheInvalidationBus, cached
+
+_REDIS = "src.shared.infrastructure.cache"
+
+
+class FakeRedisCache:
+    """The shared cache surface ``@cached`` uses, backed by a dict."""
+
+    def __init__(self):
+        self.store: dict = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+        return True
+
+    async def delete(self, key):
+        return self.store.pop(key, None) is not None
+
+
+@pytest.fixture
+def l2():
+    fake = FakeRedisCache()
+    with (
+        patch(f"{_REDIS}.get", fake.get),
+        patch(f"{_REDIS}.set", fake.set),
+        patch(f"{_REDIS}.delete", fake.delete),
+    ):
+        yield fake
+
+
+def _counting(**options):
+    calls = []
+
+    @cached(**options)
+    async def load(*, user_id: str, course_id: str | None = None) -> dict:
+        calls.append((user_id, course_id))
+        await asyncio.sleep(0.01)
+        return {"user": user_id, "course": course_id, "n": len(calls)}
+
+    return load, calls
+
+
+class TestCached:
+    async def test_concurrent_misses_run_once(self, l2):
+        load, calls = _counting(ttl_seconds=60)
+
+        results = await asyncio.gather(*(load(user_id="u1") for _ in range(10)))
+
+        assert len(calls) == 1
+        assert all(r == results[0] for r in results)
+        assert load.get_stats()["coalesced"] == 9
+
+    async def test_cancelled_caller_does_not_fail_the_others(self, l2):
+        load, calls = _counting(ttl_seconds=60)
+
+        first = asyncio.create_task(load(user_id="u1"))
+        second = asyncio.create_task(load(user_id="u1"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert (await second)["user"] == "u1"
+        assert len(calls) == 1
+
+    async def test_key_from_several_arguments(self, l2):
+        load, calls = _counting(ttl_seconds=60, key_args=("user_id", "course_id"))
+
+        await load(user_id="u1", course_id="c1")
+        await load(user_id="u1", course_id="c2")
+        await load(user_id="u1", course_id="c1")
+        await load.invalidate(user_id="u1", course_id="c1")
+        await load(user_id="u1", course_id="c1")
+
+        assert calls == [("u1", "c1"), ("u1", "c2"), ("u1", "c1")]
+
+    async def test_l2_serves_other_nodes(self, l2):
+        load, calls = _counting(ttl_seconds=60)
+        await load(user_id="u1")
+
+        load.cache.drop_local(None)  # Another node: empty L1, same Redis
+        result = await load(user_id="u1")
+
+        assert result["n"] == 1
+        assert len(calls) == 1
+        assert load.get_stats()["l2_hits"] == 1
+
+    async def test_invalidate_clears_both_tiers(self, l2):
+        load, calls = _counting(ttl_seconds=60)
+        await load(user_id="u1")
+
+        await load.invalidate(user_id="u1")
+        load.cache.drop_local(None)
+        await load(user_id="u1")
+
+        assert len(calls) == 2
+
+    async def test_result_loaded_across_an_invalidation_is_not_cached(self, l2):
+        load, calls = _counting(ttl_seconds=60)
+
+        pending = asyncio.create_task(load(user_id="u1"))
+        await asyncio.sleep(0)
+        await load.invalidate(user_id="u1")  # Write lands mid-query
+        await pending
+        await load(user_id="u1")
+
+        assert len(calls) == 2
+
+    async def test_stale_entry_served_while_refreshing(self, l2):
+        load, calls = _counting(ttl_seconds=10, stale_seconds=30)
+        clock = [1000.0]
+        with patch.object(cache_mod.time, "time", lambda: clock[0]):
+            await load(user_id="u1")
+            clock[0] += 15  # Past TTL, inside the stale window
+
+            stale = await load(user_id="u1")
+            await asyncio.sleep(0.05)  # Let the background refresh finish
+            fresh = await load(user_id="u1")
+
+        assert (stale["n"], fresh["n"]) == (1, 2)
+        assert load.get_stats()["stale_served"] == 1
+
+    async def test_local_only_functions_skip_redis(self, l2):
+        load, calls = _counting(ttl_seconds=60, shared=False)
+
+        await load(user_id="u1")
+        await load(user_id="u1")
+
+        assert l2.store == {}
+        assert len(calls) == 1
+
+    async def test_missing_key_calls_through(self, l2):
+        @cached(ttl_seconds=60)
+        async def load(*, other: str) -> str:
+            return other
+
+        assert await load(other="x") == "x"
+        assert load.get_stats()["misses"] == 0
+
+
+class TestInvalidationBus:
+    async def test_broadcast_drops_other_nodes_l1(self, l2):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        load, calls = _counting(ttl_seconds=60)
+        await load(user_id="u1")
+
+        sender, receiver = CacheInvalidationBus(), CacheInvalidationBus()
+        await sender.start(fakeredis.aioredis.FakeRedis(server=server), key_prefix="t:")
+        await receiver.start(fakeredis.aioredis.FakeRedis(server=server), key_prefix="t:")
+        try:
+            await sender.publish(load.cache.name, "u1")
+            for _ in range(50):
+                if receiver.stats["received"]:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await sender.stop()
+            await receiver.stop()
+
+        assert receiver.stats["received"] == 1
+        assert load.get_stats()["entries"] == 0
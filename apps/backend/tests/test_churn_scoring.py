@@ -0,0 +1,155 @@
+"""Vectorised churn-risk scoring in the retention service."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from src.domains.personal_learning.services import retention_service
+from src.domains.personal_learning.services.retention_service import (
+    SIGNAL_NAMES,
+    ChurnInputs,
+    _scatter,
+    score_churn_risk,
+)
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def _inputs(**columns) -> ChurnInputs:
+    """One subscriber per column entry; unspecified columns use neutral values."""
+    n = len(next(iter(columns.values())))
+    defaults = {
+        "activity_recent": [5] * n,
+        "activity_previous": [5] * n,
+        "days_inactive": [0] * n,
+        "docs_recent": [2] * n,
+        "docs_previous": [2] * n,
+        "plus_features_used": [3] * n,
+        "dropout_risk": [0.0] * n,
+    }
+    defaults.update(columns)
+    return ChurnInputs(
+        user_ids=[f"u{i}" for i in range(n)],
+        **{name: np.array(values, dtype=float) for name, values in defaults.items()},
+    )
+
+
+def _signal(scores, name):
+    return scores.signals[:, SIGNAL_NAMES.index(name)].tolist()
+
+
+class TestScoreChurnRisk:
+    def test_decline_signals(self):
+        scores = score_churn_risk(
+            _inputs(
+                activity_recent=[2, 8, 3, 0],
+                activity_previous=[8, 4, 0, 0],
+                docs_recent=[1, 0, 0, 0],
+                docs_previous=[4, 0, 0, 0],
+            )
+        )
+
+        assert _signal(scores, "login_frequency_decline") == [0.75, 0.0, 0.0, 0.5]
+        assert _signal(scores, "feature_usage_decline") == [0.75, 0.3, 0.3, 0.3]
+
+    def test_plus_feature_and_dropout_signals(self):
+        scores = score_churn_risk(
+            _inputs(plus_features_used=[-1, 0, 1, 2], dropout_risk=[np.nan, 0.4, 1.5, -1])
+        )
+
+        assert _signal(scores, "plus_feature_absence") == [0.5, 1.0, 0.5, 0.0]
+        assert _signal(scores, "behaviour_dropout_risk") == [0.3, 0.4, 1.0, 0.0]
+
+    def test_inactivity_bands(self):
+        days = [np.nan, 2, 3, 5, 6, 10, 11, 14, 15]
+
+        scores = score_churn_risk(_inputs(days_inactive=days))
+
+        assert _signal(scores, "days_since_activity") == [
+            0.8,
+            0.0,
+            0.2,
+            0.2,
+            0.5,
+            0.5,
+            0.7,
+            0.7,
+            1.0,
+        ]
+
+    def test_weighted_score_and_primary_factor(self):
+        scores = score_churn_risk(
+            _inputs(
+                activity_recent=[5, 0],
+                activity_previous=[5, 10],
+                plus_features_used=[0, 0],
+                days_inactive=[0, 20],
+                dropout_risk=[0.0, 0.9],
+                docs_recent=[2, 0],
+                docs_previous=[2, 6],
+            )
+        )
+
+        assert scores.scores.tolist() == pytest.approx([0.20, 0.985])
+        assert [SIGNAL_NAMES[i] for i in scores.primary] == [
+            "plus_feature_absence",
+            "login_frequency_decline",
+        ]
+        profile = scores.profile(1)
+        assert profile.primary_risk_factor == "login_frequency_decline"
+        assert profile.signals["days_since_activity"] == 1.0
+        assert profile.recommendation
+
+    def test_empty_cohort(self):
+        scores = score_churn_risk(_inputs(activity_recent=[]))
+
+        assert scores.signals.shape == (0, len(SIGNAL_NAMES))
+        assert scores.scores.size == 0
+
+
+class TestScatter:
+    def test_missing_users_keep_fill_and_null_becomes_nan(self):
+        index = {"a": 0, "b": 1, "c": 2}
+
+        used, risk = _scatter([("c", 2, None), ("a", 0, 0.4)], index, fills=(-1, np.nan))
+
+        assert used.tolist() == [0, -1, 2]
+        assert risk[0] == 0.4 and np.isnan(risk[1]) and np.isnan(risk[2])
+
+
+class TestEvaluateInterventions:
+    async def test_only_at_risk_users_outside_cooldown_are_recorded(self):
+        inputs = _inputs(
+            activity_recent=[0, 0, 5],
+            activity_previous=[10, 10, 5],
+            docs_recent=[0, 0, 2],
+            docs_previous=[6, 6, 2],
+            plus_features_used=[0, 0, 3],
+            days_inactive=[20, 20, 0],
+            dropout_risk=[0.9, 0.9, 0.0],
+        )
+        session = AsyncMock()
+
+        with (
+            patch.object(retention_service, "load_churn_inputs", AsyncMock(return_value=inputs)),
+            patch.object(
+                retention_service, "_recently_intervened", AsyncMock(return_value={"u1"})
+            ) as cooldown,
+        ):
+            actions = await retention_service.evaluate_interventions(
+                session, inputs.user_ids, now=NOW
+            )
+
+        assert list(actions) == ["u0"]
+        assert cooldown.await_args.args[1] == ["u0", "u1"]
+        session.execute.assert_awaited_once()
+        records = session.execute.await_args.args[1]
+        assert [(r["user_id"], r["intervention_type"]) for r in records] == [
+            ("u0", actions["u0"].intervention_type)
+        ]
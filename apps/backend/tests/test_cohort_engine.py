@@ -0,0 +1,221 @@
+"""Cohort engine: keyset paging, sharding, batch isolation and set-based cohort jobs."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.domains.personal_learning.db_models import LearningProfile
+from src.domains.personal_learning.services import cohort_engine, notification_service
+from src.domains.personal_learning.services.cohort_engine import run_cohort, shard_filter
+from src.domains.personal_learning.tasks.daily_plan import _plan_body
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, db: "FakeDatabase"):
+        self.db = db
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.db.statements.append(stmt)
+        return FakeResult(self.db.pages.pop(0) if self.db.pages else [])
+
+    async def commit(self):
+        self.db.commits += 1
+
+    async def rollback(self):
+        self.db.rollbacks += 1
+
+
+class FakeDatabase:
+    """Serves one page of rows per cohort query."""
+
+    def __init__(self, pages):
+        self.pages = [list(page) for page in pages]
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def factory(self):
+        return FakeSession(self)
+
+
+def _users(*ids):
+    return [SimpleNamespace(user_id=user_id) for user_id in ids]
+
+
+async def _run(db: FakeDatabase, process, **options):
+    with patch.object(cohort_engine, "get_session_factory", return_value=db.factory):
+        return await run_cohort(
+            "test",
+            select(LearningProfile.user_id),
+            LearningProfile.user_id,
+            process,
+            now=NOW,
+            **options,
+        )
+
+
+class TestRunCohort:
+    async def test_walks_keyset_pages_until_a_short_one(self):
+        db = FakeDatabase([_users("a", "b"), _users("c", "d"), _users("e")])
+        seen = []
+
+        async def process(s, rows, now):
+            seen.append([r.user_id for r in rows])
+            return len(rows)
+
+        result = await _run(db, process, batch_size=2)
+
+        assert seen == [["a", "b"], ["c", "d"], ["e"]]
+        assert (result.scanned, result.processed, result.batches) == (5, 5, 3)
+        assert db.commits == 3
+        first, second = _sql(db.statements[0]), _sql(db.statements[1])
+        assert "OFFSET" not in first
+        assert 'ORDER BY "LearningProfile"."userId"' in first and "LIMIT" in first
+        assert '"LearningProfile"."userId" >' in second
+        assert "b" in db.statements[1].compile().params.values()
+
+    async def test_failed_batch_is_rolled_back_and_the_run_continues(self):
+        db = FakeDatabase([_users("a", "b"), _users("c")])
+
+        async def process(s, rows, now):
+            if rows[0].user_id == "a":
+                raise RuntimeError("boom")
+            return len(rows)
+
+        result = await _run(db, process, batch_size=2)
+
+        assert result.failed_batches == 1
+        assert (result.processed, result.failed, result.skipped) == (1, 2, 0)
+        assert (db.rollbacks, db.commits) == (1, 1)
+
+    async def test_every_batch_sees_the_same_now(self):
+        db = FakeDatabase([_users("a"), _users("b"), []])
+        nows = []
+
+        async def process(s, rows, now):
+            nows.append(now)
+            return 0
+
+        await _run(db, process, batch_size=1)
+
+        assert nows == [NOW, NOW]
+
+    async def test_shard_restricts_the_cohort(self):
+        db = FakeDatabase([_users("a")])
+
+        result = await _run(db, AsyncMock(return_value=1), batch_size=10, shard=1, shards=4)
+
+        assert "hashtext" in _sql(db.statements[0])
+        assert result.name == "test[1/4]"
+
+
+class TestSharding:
+    def test_shard_filter_folds_negative_hashes(self):
+        sql = _sql(shard_filter(LearningProfile.user_id, 2, 8))
+
+        assert sql.count("mod(") == 2
+        assert 'hashtext("LearningProfile"."userId")' in sql
+
+    def test_fan_out_dispatches_one_task_per_shard(self):
+        task = MagicMock()
+
+        assert cohort_engine.fan_out(task, None, 3) is True
+
+        kwargs = [c.kwargs["kwargs"] for c in task.apply_async.call_args_list]
+        assert kwargs == [{"shard": i, "shards": 3} for i in range(3)]
+
+    def test_fan_out_runs_inline_for_a_shard_or_a_single_shard(self):
+        task = MagicMock()
+
+        assert cohort_engine.fan_out(task, 0, 3) is False
+        assert cohort_engine.fan_out(task, None, 1) is False
+        task.apply_async.assert_not_called()
+
+
+def _profile(user_id, *, quiet=(None, None), max_daily=5):
+    return SimpleNamespace(
+        user_id=user_id,
+        quiet_hours_start=quiet[0],
+        quiet_hours_end=quiet[1],
+        max_daily_notifications=max_daily,
+        preferred_study_times=None,
+    )
+
+
+class TestCohortNotifications:
+    async def test_one_count_and_one_insert_for_the_page(self):
+        profiles = [
+            _profile("u1"),
+            _profile("u2", max_daily=1),  # already at its limit
+            _profile("u3", quiet=("11:00", "13:00")),
+        ]
+        repo = MagicMock()
+        repo.count_delivered_today_by_user = AsyncMock(return_value={"u2": 1})
+        repo.create_notifications = AsyncMock(side_effect=lambda rows, session: len(rows))
+
+        with (
+            patch.object(notification_service, "repo", repo),
+            patch.object(notification_service, "_compute_optimal_time", return_value=NOW),
+        ):
+            created = await notification_service.create_cohort_notifications(
+                profiles,
+                type="DAILY_PLAN",
+                title="Plan",
+                body={"u1": "one", "u2": "two", "u3": "three"},
+                now=NOW,
+                session="s",
+            )
+
+        assert created == 2
+        repo.count_delivered_today_by_user.assert_awaited_once()
+        rows = repo.create_notifications.await_args.args[0]
+        assert [(r["userId"], r["body"], r["status"]) for r in rows] == [
+            ("u1", "one", "PENDING"),
+            ("u3", "three", "QUEUED"),
+        ]
+
+    def test_plan_delivery_matches_create_notification_rules(self):
+        at = datetime(2026, 3, 2, 23, 0, tzinfo=timezone.utc)
+        quiet = _profile("u1", quiet=("22:00", "07:00"))
+
+        assert notification_service._plan_delivery(None, at, 0) == ("PENDING", at)
+        assert notification_service._plan_delivery(quiet, at, 5) is None
+        status, scheduled = notification_service._plan_delivery(quiet, at, 0)
+        assert status == "QUEUED"
+        assert scheduled == datetime(2026, 3, 3, 7, 0, tzinfo=timezone.utc)
+
+
+class TestDailyPlanBody:
+    def test_summarises_due_cards_and_plans(self):
+        assert _plan_body(3, 1) == (
+            "Today's focus: 3 flashcard(s) due for review; 1 active study plan(s)"
+        )
+        assert _plan_body(40, 0) == "Today's focus: 10 flashcard(s) due for review"
+        assert _plan_body(0, 0).startswith("No pending reviews today")
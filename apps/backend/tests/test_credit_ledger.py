@@ -0,0 +1,333 @@
+"""Credit ledger tests (Lua scripts on a fake Redis, write-behind to a fake repo)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it for EVALSHA
+
+from src.domains.billing.services import credit_consumption_service as ccs
+from src.domains.billing.services import credit_ledger as ledger_mod
+from src.domains.billing.services.credit_ledger import CreditLedger
+from src.shared.exceptions import SubscriptionLimitError
+
+_REPO = "src.domains.billing.repository.billing_repo.apply_credit_deltas"
+
+
+class FakeUserTable:
+    """Stands in for the ``User`` credit columns."""
+
+    def __init__(self):
+        self.rows: dict[str, dict[str, int]] = {}
+        self.statements = 0
+        self.fail = False
+
+    async def apply(self, deltas):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.statements += 1
+        for d in deltas:
+            row = self.rows.setdefault(d.user_id, {"used": 0, "purchased": 0, "used_today": 0})
+            row["used"] += d.used
+            row["purchased"] -= d.purchased
+            if d.free:
+                row["used_today"] = d.used_today
+
+
+async def _prime(
+    ledger,
+    user_id="u1",
+    *,
+    free=False,
+    used=0,
+    hard=1000,
+    soft=800,
+    purchased=0,
+    daily_limit=0,
+    used_today=0,
+    period_end=None,
+):
+    await ledger.prime(
+        user_id,
+        free=free,
+        credits_used=used,
+        hard_cap=hard,
+        soft_cap=soft,
+        purchased_balance=purchased,
+        daily_limit=daily_limit,
+        daily_bonus=0,
+        credits_used_today=used_today,
+        period_end=period_end or datetime.now(UTC) + timedelta(days=10),
+    )
+
+
+@pytest.fixture
+async def table():
+    fake = FakeUserTable()
+    with patch(_REPO, AsyncMock(side_effect=fake.apply)):
+        yield fake
+
+
+@pytest.fixture
+async def server():
+    return fakeredis.FakeServer()
+
+
+async def _started(server, **kwargs) -> CreditLedger:
+    ledger = CreditLedger(flush_interval=3600, **kwargs)
+    await ledger.start(fakeredis.aioredis.FakeRedis(server=server), key_prefix="test:")
+    return ledger
+
+
+class TestCreditLedger:
+    async def test_miss_until_primed(self, server, table):
+        ledger = await _started(server)
+        try:
+            assert (await ledger.consume("u1", 10)).status == ledger_mod.MISS
+            await _prime(ledger)
+            charge = await ledger.consume("u1", 10)
+        finally:
+            await ledger.stop()
+
+        assert charge.status == ledger_mod.SUBSCRIPTION
+        assert charge.credits_used == 10
+        assert table.rows["u1"]["used"] == 10  # Final flush on stop
+
+    async def test_split_then_purchased_then_denied(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger, used=95, hard=100, purchased=10)
+            both = await ledger.consume("u1", 8)
+            purchased = await ledger.consume("u1", 4)
+            denied = await ledger.consume("u1", 5)
+            await ledger.flush()
+        finally:
+            await ledger.stop()
+
+        assert (both.status, both.subscription_deducted, both.purchased_deducted) == ("both", 5, 3)
+        assert (purchased.status, purchased.purchased_balance) == ("purchased", 3)
+        assert denied.status == ledger_mod.DENIED
+        assert table.rows["u1"] == {"used": 5, "purchased": -7, "used_today": 0}
+
+    async def test_free_daily_limit_falls_back_to_purchased(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger, free=True, daily_limit=20, used_today=18, purchased=5)
+            charge = await ledger.consume("u1", 4)
+            denied = await ledger.consume("u1", 4)
+        finally:
+            await ledger.stop()
+
+        assert charge.status == ledger_mod.DAILY_PURCHASED
+        assert charge.credits_used_today == 18  # Paid from purchased, not the daily allowance
+        assert denied.status == ledger_mod.DAILY_DENIED
+
+    async def test_new_day_resets_daily_usage(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger, free=True, daily_limit=20, used_today=20)
+            await ledger._redis.hset("test:credits:u1", "day", "2000-01-01")
+            charge = await ledger.consume("u1", 5)
+        finally:
+            await ledger.stop()
+
+        assert charge.status == ledger_mod.SUBSCRIPTION
+        assert charge.credits_used_today == 5
+
+    async def test_expired_period_is_reported(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger, period_end=datetime.now(UTC) - timedelta(seconds=1))
+            assert (await ledger.consume("u1", 1)).status == ledger_mod.EXPIRED
+        finally:
+            await ledger.stop()
+
+    async def test_failed_flush_keeps_deltas(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger)
+            await ledger.consume("u1", 10)
+            table.fail = True
+            with pytest.raises(RuntimeError):
+                await ledger.flush()
+            table.fail = False
+            assert await ledger.flush() == 1
+        finally:
+            await ledger.stop()
+
+        assert table.rows["u1"]["used"] == 10
+        assert ledger.stats["flush_failures"] == 1
+
+    async def test_batches_many_users_into_one_statement(self, server, table):
+        ledger = await _started(server)
+        try:
+            for i in range(50):
+                await _prime(ledger, f"u{i}")
+                await ledger.consume(f"u{i}", 3)
+            await ledger.flush()
+        finally:
+            await ledger.stop()
+
+        assert table.statements == 1
+        assert sum(row["used"] for row in table.rows.values()) == 150
+
+    async def test_reconcile_on_start_flushes_leftovers_and_evicts(self, server, table):
+        crashed = await _started(server)
+        await _prime(crashed, "u1")
+        await _prime(crashed, "u2")
+        await crashed.consume("u1", 7)
+        crashed._flush_task.cancel()  # Process dies without its final flush
+
+        ledger = await _started(server)
+        try:
+            assert table.rows["u1"]["used"] == 7
+            assert await ledger._redis.exists("test:credits:u1", "test:credits:u2") == 0
+        finally:
+            await ledger.stop()
+
+    async def test_external_write_drops_cached_balances(self, server, table):
+        ledger = await _started(server)
+        try:
+            await _prime(ledger, purchased=5)
+            await ledger.consume("u1", 1)
+            async with ledger.external_write("u1"):
+                assert table.rows["u1"]["used"] == 1  # Flushed before the write
+            assert (await ledger.consume("u1", 1)).status == ledger_mod.MISS
+        finally:
+            await ledger.stop()
+
+    async def test_pending_charge_survives_expiry(self, server, table):
+        """A hash holding unflushed deltas never expires; the drain restores the TTL."""
+        ledger = await _started(server, ttl_seconds=100)
+        try:
+            await _prime(ledger)
+            await ledger._redis.expire("test:credits:u1", 1)
+            await ledger.consume("u1", 10)
+            assert await ledger._redis.ttl("test:credits:u1") == -1
+
+            await asyncio.sleep(1.2)  # Past the original expiry
+            table.fail = True
+            with pytest.raises(RuntimeError):
+                await ledger.flush()
+            assert await ledger._redis.ttl("test:credits:u1") == -1  # Restored and persisted
+
+            table.fail = False
+            assert await ledger.flush() == 1
+            assert 0 < await ledger._redis.ttl("test:credits:u1") <= 100
+        finally:
+            await ledger.stop()
+
+        assert table.rows["u1"]["used"] == 10
+
+    async def test_stale_entry_is_reported_expired(self, server, table):
+        """Charges do not extend freshness: past stale_at the caps are re-read."""
+        ledger = await _started(server)
+        try:
+            await _prime(ledger)
+            await ledger.consume("u1", 1)
+            await ledger._redis.hset("test:credits:u1", "stale_at", 0)
+            assert (await ledger.consume("u1", 1)).status == ledger_mod.EXPIRED
+        finally:
+            await ledger.stop()
+
+    async def test_invalidate_many_without_a_running_ledger(self, server, table):
+        """Celery marks entries stale over its own connection; the next charge re-primes."""
+        ledger = await _started(server)
+        settings = SimpleNamespace(REDIS_URL="redis://fake", REDIS_KEY_PREFIX="test:")
+        try:
+            await _prime(ledger)
+            await ledger.consume("u1", 1)
+            with (
+                patch("src.config.get_settings", return_value=settings),
+                patch(
+                    "redis.asyncio.from_url",
+                    return_value=fakeredis.aioredis.FakeRedis(server=server),
+                ),
+            ):
+                await CreditLedger().invalidate_many(["u1", "unknown"])
+            assert (await ledger.consume("u1", 1)).status == ledger_mod.EXPIRED
+            await ledger.invalidate("u1")
+            assert table.rows["u1"]["used"] == 1  # Pending charge flushed, not lost
+            assert await ledger._redis.exists("test:credits:u1") == 0
+        finally:
+            await ledger.stop()
+
+
+class TestConcurrentCharges:
+    async def test_no_double_spend_across_nodes(self, server, table):
+        """Many concurrent charges on two nodes never spend more than the balance."""
+        nodes = [await _started(server), await _started(server)]
+        try:
+            await _prime(nodes[0], hard=1000, soft=0, purchased=250)
+            charges = await asyncio.gather(*(nodes[i % 2].consume("u1", 7) for i in range(400)))
+            for node in nodes:
+                while await node.flush():
+                    pass
+        finally:
+            for node in nodes:
+                await node.stop()
+
+        allowed = [c for c in charges if c.allowed]
+        assert len(allowed) == 1250 // 7
+        assert sum(c.subscription_deducted for c in allowed) <= 1000
+        assert sum(c.purchased_deducted for c in allowed) <= 250
+        assert table.rows["u1"]["used"] == sum(c.subscription_deducted for c in allowed)
+        assert -table.rows["u1"]["purchased"] == sum(c.purchased_deducted for c in allowed)
+
+
+class TestConsumeCreditsViaLedger:
+    async def test_charge_skips_database_reads_and_writes(self, server, table):
+        ledger = await _started(server)
+        user = SimpleNamespace(
+            id="u1",
+            tier="PREMIUM_MONTHLY",
+            credits_used=0,
+            purchased_credits_balance=0,
+            credits_period_end=None,
+        )
+
+        async def prime(u):
+            await _prime(ledger, used=600, hard=1000, soft=800)
+
+        try:
+            with (
+                patch.object(ccs, "credit_ledger", ledger),
+                patch.object(ccs, "_prime_ledger", AsyncMock(side_effect=prime)) as primer,
+                patch.object(ccs, "IdentityRepository") as repo,
+            ):
+                first = await ccs.consume_credits(user, 500, operation="chat_message")
+                second = await ccs.consume_credits(user, 500, operation="chat_message")
+        finally:
+            await ledger.stop()
+
+        primer.assert_awaited_once()
+        repo.return_value.update.assert_not_called()
+        assert first.source == "subscription" and first.warning is None
+        assert second.warning and "80%" in second.warning
+        assert user.credits_used == 800
+        assert table.rows["u1"]["used"] == 200
+
+    async def test_exhausted_credits_raise(self, server, table):
+        ledger = await _started(server)
+        user = SimpleNamespace(id="u1", tier="PREMIUM_MONTHLY", credits_period_end=None)
+
+        async def prime(u):
+            await _prime(ledger, used=1000, hard=1000)
+
+        try:
+            with (
+                patch.object(ccs, "credit_ledger", ledger),
+                patch.object(ccs, "_prime_ledger", AsyncMock(side_effect=prime)),
+            ):
+                with pytest.raises(SubscriptionLimitError, match="Credit limit exceeded"):
+                    await ccs.consume_credits(user, 50)
+        finally:
+            await ledger.stop()
@@ -0,0 +1,236 @@
+"""Domain event bus: in-process dispatch and the Redis Streams backend."""
+
+import os
+from collections import defaultdict
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.shared.events import bus, emit, listen
+from src.shared.events.streams import RedisStreamsEventBackend
+
+
+@pytest.fixture(autouse=True)
+def handlers():
+    """Each test registers into an empty registry."""
+    with patch.object(bus, "_handlers", defaultdict(list)):
+        yield
+    bus.set_backend(None)
+
+
+@pytest.fixture
+async def redis():
+    r = fakeredis.aioredis.FakeRedis()
+    yield r
+    await r.aclose()
+
+
+async def _started(redis, **options) -> RedisStreamsEventBackend:
+    backend = RedisStreamsEventBackend(**{"poll_interval": 60, **options})
+    await backend.start(redis, key_prefix="test:")
+    # Tests drive poll()/reclaim() themselves
+    backend._task.cancel()
+    return backend
+
+
+class TestInMemory:
+    async def test_handlers_run_before_emit_returns(self):
+        seen = []
+
+        @listen("topic.completed")
+        async def first(data):
+            seen.append(("first", data["topic_id"]))
+
+        @listen("topic.completed")
+        async def second(data):
+            seen.append(("second", data["topic_id"]))
+
+        await emit("topic.completed", {"topic_id": "t1"})
+
+        assert sorted(seen) == [("first", "t1"), ("second", "t1")]
+
+    async def test_failing_handler_does_not_affect_others(self):
+        seen = []
+
+        @listen("topic.completed")
+        async def broken(data):
+            raise RuntimeError("boom")
+
+        @listen("topic.completed")
+        async def working(data):
+            seen.append(data)
+
+        await emit("topic.completed", {"topic_id": "t1"})
+
+        assert seen == [{"topic_id": "t1"}]
+
+    async def test_batch_handler_gets_a_list(self):
+        seen = []
+
+        @listen("flashcard.reviewed", batch=True)
+        async def reviews(batch):
+            seen.append(batch)
+
+        await emit("flashcard.reviewed", {"card": 1})
+
+        assert seen == [[{"card": 1}]]
+
+
+class TestRedisStreams:
+    async def test_emit_enqueues_without_running_handlers(self, redis):
+        seen = []
+
+        @listen("topic.completed")
+        async def handler(data):
+            seen.append(data)
+
+        backend = await _started(redis)
+
+        await emit("topic.completed", {"topic_id": "t1"})
+
+        assert seen == []
+        assert await redis.xlen("test:events:topic.completed") == 1
+        assert backend.stats["published"] == 1
+        await backend.stop()
+
+    async def test_poll_delivers_and_acks(self, redis):
+        seen = []
+
+        @listen("topic.completed")
+        async def handler(data):
+            seen.append(data["topic_id"])
+
+        backend = await _started(redis)
+        for i in range(3):
+            await emit("topic.completed", {"topic_id": f"t{i}"})
+
+        assert await backend.poll() == 3
+        assert sorted(seen) == ["t0", "t1", "t2"]
+        assert backend.stats["acked"] == 3
+        assert await backend.poll() == 0
+        stats = await backend.get_stats()
+        group = stats["topics"]["topic.completed"]["groups"][bus.subscriptions()[0].name]
+        assert group["pending"] == 0
+        await backend.stop()
+
+    async def test_batch_handler_gets_one_call_per_read(self, redis):
+        calls = []
+
+        @listen("flashcard.reviewed", batch=True)
+        async def reviews(batch):
+            calls.append([p["card"] for p in batch])
+
+        backend = await _started(redis, batch_size=10)
+        for i in range(25):
+            await emit("flashcard.reviewed", {"card": i})
+
+        while await backend.poll():
+            pass
+
+        assert [len(c) for c in calls] == [10, 10, 5]
+        assert [card for c in calls for card in c] == list(range(25))
+        await backend.stop()
+
+    async def test_each_handler_has_its_own_group(self, redis):
+        seen = []
+
+        @listen("topic.completed")
+        async def fast(data):
+            seen.append(data)
+
+        @listen("topic.completed")
+        async def slow(data):
+            raise RuntimeError("down")
+
+        backend = await _started(redis)
+
+        await emit("topic.completed", {"topic_id": "t1"})
+        await backend.poll()
+
+        assert seen == [{"topic_id": "t1"}]
+        groups = (await backend.get_stats())["topics"]["topic.completed"]["groups"]
+        pending = {name.rsplit(".", 1)[-1]: g["pending"] for name, g in groups.items()}
+        assert pending == {"fast": 0, "slow": 1}
+        await backend.stop()
+
+    async def test_failed_event_is_retried_then_dead_lettered(self, redis):
+        attempts = []
+
+        @listen("topic.completed")
+        async def flaky(data):
+            attempts.append(data["topic_id"])
+            raise RuntimeError("boom")
+
+        backend = await _started(redis, retry_after=0, max_deliveries=3)
+        await emit("topic.completed", {"topic_id": "t1"})
+
+        await backend.poll()
+        for _ in range(3):
+            await backend.reclaim()
+
+        assert attempts == ["t1", "t1", "t1"]
+        assert backend.stats["retried"] == 2
+        assert backend.stats["dead_lettered"] == 1
+        stats = await backend.get_stats()
+        assert stats["dead_letters"] == 1
+        group = stats["topics"]["topic.completed"]["groups"][bus.subscriptions()[0].name]
+        assert group["pending"] == 0
+        await backend.stop()
+
+    async def test_replay_dead_letters(self, redis):
+        fail = True
+        seen = []
+
+        @listen("topic.completed")
+        async def handler(data):
+            if fail:
+                raise RuntimeError("boom")
+            seen.append(data["topic_id"])
+
+        backend = await _started(redis, retry_after=0, max_deliveries=1)
+        await emit("topic.completed", {"topic_id": "t1"})
+        await backend.poll()
+        await backend.reclaim()
+        assert await redis.xlen("test:events:dead") == 1
+
+        fail = False
+        assert await backend.replay_dead_letters() == 1
+        assert seen == ["t1"]
+        assert await redis.xlen("test:events:dead") == 0
+        await backend.stop()
+
+    async def test_publish_failure_falls_back_to_in_process(self, redis):
+        seen = []
+
+        @listen("topic.completed")
+        async def handler(data):
+            seen.append(data)
+
+        backend = await _started(redis)
+
+        with patch.object(redis, "xadd", AsyncMock(side_effect=ConnectionError("down"))):
+            await emit("topic.completed", {"topic_id": "t1"})
+
+        assert seen == [{"topic_id": "t1"}]
+        assert backend.stats["publish_failures"] == 1
+        await backend.stop()
+
+    async def test_stop_restores_in_memory_dispatch(self, redis):
+        seen = []
+
+        @listen("topic.completed")
+        async def handler(data):
+            seen.append(data)
+
+        backend = await _started(redis)
+        await backend.stop()
+
+        await emit("topic.completed", {"topic_id": "t1"})
+
+        assert seen == [{"topic_id": "t1"}]
+        assert bus.get_backend() is bus.in_memory_backend
@@ -0,0 +1,94 @@
+"""Flashcard statistics: single aggregate query with the review-day bitset."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy.dialects import postgresql
+
+from src.domains.personal_learning.repository import PersonalLearningRepository
+from src.domains.progress.services.activity_days import DayBitmap
+
+TODAY = datetime.now(timezone.utc).date()
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def one(self):
+        return self.row
+
+
+class FakeSession:
+    """Answers the aggregate statement."""
+
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.row)
+
+
+async def _stats(session: FakeSession) -> dict:
+    repo = PersonalLearningRepository()
+
+    @asynccontextmanager
+    async def use_session(_session):
+        yield session
+
+    with patch.object(repo, "_use_session", use_session):
+        return await repo.get_flashcard_stats("u1")
+
+
+def _days(count: int, *, start: date = TODAY) -> list[date]:
+    return [start - timedelta(days=i) for i in range(count)]
+
+
+class TestGetFlashcardStats:
+    async def test_one_statement_with_filtered_aggregates(self):
+        bits = DayBitmap.from_days(_days(3)).bits
+        session = FakeSession((120, 7, 30, 2.4567, 90, 12, bits))
+
+        stats = await _stats(session)
+
+        assert len(session.statements) == 1
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert sql.count("FILTER (WHERE") == 3
+        assert '(SELECT "UserActivityDays".bits' in sql
+        assert "array_agg" not in sql
+        assert stats["total"] == 120
+        assert stats["due_today"] == 7
+        assert stats["mastered_count"] == 30
+        assert stats["avg_ease_factor"] == 2.46
+        assert stats["reviewed_total"] == 90
+        assert stats["reviewed_this_week"] == 12
+        assert stats["current_streak"] == 3
+        week_start = TODAY - timedelta(days=TODAY.weekday())
+        assert stats["active_days_this_week"] == sorted(
+            d.isoformat() for d in _days(3) if d >= week_start
+        )
+
+    async def test_user_without_cards(self):
+        session = FakeSession((0, 0, 0, None, 0, 0, None))
+
+        stats = await _stats(session)
+
+        assert stats["avg_ease_factor"] == 2.5
+        assert stats["current_streak"] == 0
+        assert stats["active_days_this_week"] == []
+
+    async def test_long_streak_needs_no_second_query(self):
+        bits = DayBitmap.from_days(_days(400)).bits
+        session = FakeSession((500, 0, 0, 2.5, 500, 7, bits))
+
+        stats = await _stats(session)
+
+        assert len(session.statements) == 1
+        assert stats["current_streak"] == 400
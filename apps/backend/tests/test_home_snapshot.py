@@ -0,0 +1,182 @@
+"""Home snapshots: single-read serving, event-driven rebuilds, freshness bounds."""
+
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.config import get_settings
+from src.domains.personal_learning.services import home_snapshot
+from src.domains.personal_learning.services.home_snapshot import HomeSnapshotStore
+from src.shared.events import emit
+from src.shared.infrastructure.redis import Cache
+
+
+@pytest.fixture
+async def cache():
+    c = Cache(get_settings())
+    c.redis = fakeredis.aioredis.FakeRedis()
+    c._connected = True
+    with patch.object(home_snapshot, "cache", c):
+        yield c
+    await c.redis.aclose()
+
+
+class FakeBuilder:
+    """Counts builds; each home carries the build number."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, user_id: str) -> dict:
+        self.calls += 1
+        build = self.calls
+        await asyncio.sleep(self.delay)
+        return {"user": user_id, "build": build}
+
+
+def _store(builder, **options) -> HomeSnapshotStore:
+    options = {"refresh_after": 300, "max_age": 3600, "debounce": 0.01, **options}
+    return HomeSnapshotStore(builder, **options)
+
+
+class TestServing:
+    async def test_miss_builds_then_hits(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder)
+
+        assert await store.get("u1") == {"user": "u1", "build": 1}
+        assert await store.get("u1") == {"user": "u1", "build": 1}
+
+        assert builder.calls == 1
+        assert store.stats["misses"] == 1
+        assert store.stats["hits"] == 1
+
+    async def test_concurrent_misses_share_one_build(self, cache):
+        builder = FakeBuilder(delay=0.02)
+        store = _store(builder)
+
+        homes = await asyncio.gather(*(store.get("u1") for _ in range(5)))
+
+        assert builder.calls == 1
+        assert all(home["build"] == 1 for home in homes)
+
+    async def test_past_refresh_serves_snapshot_and_rebuilds_in_background(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder, refresh_after=0)
+        await store.get("u1")
+
+        assert (await store.get("u1"))["build"] == 1
+        await asyncio.sleep(0.02)
+
+        assert builder.calls == 2
+        assert (await store.get("u1"))["build"] == 2
+        assert store.stats["stale_served"] >= 1
+
+    async def test_past_max_age_rebuilds_before_answering(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder, max_age=60)
+        await store.get("u1")
+
+        later = time.time() + 120
+        with patch.object(home_snapshot.time, "time", return_value=later):
+            assert (await store.get("u1"))["build"] == 2
+
+    async def test_snapshot_from_another_day_is_not_served(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder, max_age=3 * 86400, refresh_after=3 * 86400)
+        await store.get("u1")
+
+        tomorrow = time.time() + 86400
+        with patch.object(home_snapshot.time, "time", return_value=tomorrow):
+            assert (await store.get("u1"))["build"] == 2
+
+    async def test_without_redis_every_request_builds(self):
+        builder = FakeBuilder()
+        store = _store(builder)
+        with patch.object(home_snapshot, "cache", Cache(get_settings())):
+            await store.get("u1")
+            await store.get("u1")
+            await store.invalidate("u1")
+
+        assert builder.calls == 2
+        assert store.stats["bypassed"] == 2
+
+
+class TestInvalidation:
+    async def test_burst_of_events_causes_one_rebuild(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder, debounce=0.02)
+        await store.get("u1")
+
+        for _ in range(5):
+            await store.invalidate("u1")
+        await asyncio.sleep(0.06)
+
+        assert builder.calls == 2
+        assert (await store.get("u1"))["build"] == 2
+        assert store.stats["hits"] == 1
+
+    async def test_dirty_snapshot_is_served_while_rebuilding(self, cache):
+        builder = FakeBuilder(delay=0.05)
+        store = _store(builder, debounce=0)
+        await store.get("u1")
+
+        await store.invalidate("u1")
+        await asyncio.sleep(0.01)  # rebuild in flight
+
+        assert (await store.get("u1"))["build"] == 1
+        await asyncio.sleep(0.08)
+        assert (await store.get("u1"))["build"] == 2
+
+    async def test_event_during_rebuild_triggers_another(self, cache):
+        builder = FakeBuilder(delay=0.03)
+        store = _store(builder, debounce=0)
+        await store.get("u1")
+
+        await store.invalidate("u1")
+        await asyncio.sleep(0.01)
+        await store.invalidate("u1")  # lands while build 2 is running
+        await asyncio.sleep(0.1)
+
+        assert builder.calls == 3
+        assert store.stats["rebuilds"] == 3
+
+    async def test_stop_cancels_pending_rebuilds(self, cache):
+        builder = FakeBuilder()
+        store = _store(builder, debounce=10)
+
+        await store.invalidate("u1")
+        await store.stop()
+
+        assert store.get_stats()["pending_rebuilds"] == 0
+        assert builder.calls == 0
+
+
+class TestEvents:
+    @pytest.mark.parametrize(
+        "event",
+        [
+            "personal_learning.flashcard_reviewed",
+            "personal_learning.note_created",
+            "personal_learning.study_plan_item_completed",
+            "personal_learning.profile_updated",
+            "knowledge.topic_completed",
+        ],
+    )
+    async def test_learner_events_invalidate_the_snapshot(self, event):
+        import src.domains.personal_learning.events  # noqa: F401  (registers listeners)
+
+        invalidate = AsyncMock()
+        with patch.object(home_snapshot.home_snapshots, "invalidate", invalidate):
+            await emit(event, {"user_id": "u1"})
+
+        invalidate.assert_awaited_once_with("u1")
@@ -0,0 +1,111 @@
+"""Pooled outbound HTTP client registry tests."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.shared.infrastructure.http import HttpClientRegistry
+
+
+@pytest.fixture
+async def stub_server():
+    """Minimal keep-alive HTTP/1.1 server; yields (base_url, accepted connections)."""
+    accepted = []
+
+    async def handle(reader, writer):
+        accepted.append(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                if length:
+                    await reader.readexactly(length)
+                writer.write(b"HTTP/1.1 201 Created\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}", accepted
+    finally:
+        server.close()
+
+
+class TestHttpClientRegistry:
+    async def test_one_client_per_origin(self):
+        registry = HttpClientRegistry()
+        try:
+            a = registry.get("https://storage.example.com/zone/a.png")
+            b = registry.get("https://storage.example.com/zone/b.png")
+            other = registry.get("https://api.paystack.co/transaction/verify/x")
+        finally:
+            await registry.stop()
+
+        assert a is b
+        assert a is not other
+        assert a.is_closed and other.is_closed
+
+    async def test_relative_url_is_rejected(self):
+        with pytest.raises(ValueError, match="Absolute URL"):
+            HttpClientRegistry().get("/zone/a.png")
+
+    def test_new_event_loop_gets_fresh_clients(self):
+        """Celery runs every task on its own loop; clients must not cross loops."""
+        registry = HttpClientRegistry()
+
+        async def task():
+            return registry.get("https://storage.example.com"), registry.get(
+                "https://storage.example.com"
+            )
+
+        clients = []
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                clients.append(loop.run_until_complete(task()))
+            finally:
+                loop.close()
+
+        (a1, a2), (b1, b2) = clients
+        assert a1 is a2  # Reused within a task
+        assert b1 is not a1
+        # Closed with their loop rather than leaked with their sockets
+        assert a1.is_closed and b1.is_closed
+
+    async def test_stats_without_pool_internals(self):
+        registry = HttpClientRegistry()
+        try:
+            client = registry.get("https://storage.example.com")
+            with patch.object(client, "_transport", object()):
+                stats = registry.get_stats()
+        finally:
+            await registry.stop()
+
+        assert stats["pools"]["https://storage.example.com"] == {"requests": 0}
+
+    async def test_connections_are_reused(self, stub_server):
+        base_url, accepted = stub_server
+        registry = HttpClientRegistry(max_connections=10)
+        try:
+            for i in range(5):
+                client = registry.get(base_url)
+                response = await client.put(f"{base_url}/f{i}", content=b"x" * 1024)
+                assert response.status_code == 201
+            stats = registry.get_stats()
+        finally:
+            await registry.stop()
+
+        assert len(accepted) == 1
+        pool = stats["pools"][base_url]
+        assert (pool["requests"], pool["connections"], pool["idle"]) == (5, 1, 1)
+        assert pool["utilisation"] == 0.0
@@ -0,0 +1,79 @@
+"""Batched last-seen tracker tests."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.shared.auth.last_seen import LastSeenTracker
+
+_REPO = "src.domains.identity.repository.IdentityRepository.update_last_seen_many"
+
+
+class TestLastSeenTracker:
+    def test_throttles_repeat_visits(self):
+        tracker = LastSeenTracker(throttle_seconds=300)
+
+        assert tracker.record("u1", "web") is True
+        assert tracker.record("u1", "ios") is False
+        assert tracker.get_stats()["pending"] == 1
+        assert tracker.stats["throttled"] == 1
+
+    def test_throttle_window_expires(self):
+        tracker = LastSeenTracker(throttle_seconds=300)
+        with patch("src.shared.auth.last_seen.time.monotonic", return_value=1000.0):
+            tracker.record("u1", "web")
+        with patch("src.shared.auth.last_seen.time.monotonic", return_value=1301.0):
+            assert tracker.record("u2", "web") is True  # Expires u1 on the way in
+            assert tracker.get_stats()["tracked"] == 1
+            assert tracker.record("u1", "android") is True
+
+    def test_memory_is_bounded(self):
+        tracker = LastSeenTracker(max_pending=100, max_tracked=150)
+        for i in range(1000):
+            tracker.record(f"u{i}", "web")
+
+        stats = tracker.get_stats()
+        assert stats["pending"] == 100
+        assert stats["tracked"] == 150
+        assert stats["dropped"] == 900
+        assert stats["memory_bytes"] > 0
+
+    async def test_flush_writes_one_batch(self):
+        tracker = LastSeenTracker()
+        for i in range(50):
+            tracker.record(f"u{i}", "android" if i % 2 else "web")
+
+        with patch(_REPO, AsyncMock()) as write:
+            assert await tracker.flush() == 50
+            assert await tracker.flush() == 0
+
+        write.assert_awaited_once()
+        (entries,) = write.await_args.args
+        assert [e[0] for e in entries[:2]] == ["u0", "u1"]
+        assert [e[2] for e in entries[:2]] == ["web", "android"]
+        stats = tracker.get_stats()
+        assert (stats["last_flush_size"], stats["pending"], stats["lag_seconds"]) == (50, 0, 0.0)
+
+    async def test_failed_flush_requeues_without_overwriting_newer(self):
+        tracker = LastSeenTracker(throttle_seconds=0)
+        tracker.record("u1", "web")
+        tracker.record("u2", "web")
+
+        async def fail(entries):
+            tracker.record("u1", "ios")  # Arrives mid-flush
+            raise RuntimeError("database unavailable")
+
+        with patch(_REPO, AsyncMock(side_effect=fail)):
+            with pytest.raises(RuntimeError):
+                await tracker.flush()
+
+        with patch(_REPO, AsyncMock()) as write:
+            await tracker.stop()
+
+        (entries,) = write.await_args.args
+        assert sorted((e[0], e[2]) for e in entries) == [("u1", "ios"), ("u2", "web")]
+        assert tracker.stats["flush_failures"] == 1
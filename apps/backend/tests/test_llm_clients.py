@@ -0,0 +1,203 @@
+"""Pooled LLM provider clients: reuse, priority queueing, token budgets."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.domains.intelligence.reasoning.llm.clients import LlmClientManager, Priority
+
+
+class FakeProvider:
+    """Stands in for a provider SDK client; calls block until released."""
+
+    instances: list["FakeProvider"] = []
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.served: list[str] = []
+        self.closed = False
+        FakeProvider.instances.append(self)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def complete(self, prompt: str, total_tokens: int = 10) -> SimpleNamespace:
+        await self.gate.wait()
+        self.served.append(prompt)
+        return SimpleNamespace(text=prompt, usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+@pytest.fixture
+def manager():
+    FakeProvider.instances.clear()
+
+    def build(**options) -> LlmClientManager:
+        m = LlmClientManager(**options)
+        m.register_provider("fake", FakeProvider)
+        return m
+
+    return build
+
+
+async def _complete(manager, prompt, priority=Priority.NORMAL, tokens=0):
+    async with manager.slot("fake", priority=priority, tokens=tokens) as slot:
+        response = await slot.client.complete(prompt)
+        slot.report_usage(response.usage.total_tokens)
+        return response
+
+
+class TestLlmClientManager:
+    async def test_client_is_reused(self, manager):
+        m = manager()
+
+        for i in range(5):
+            await _complete(m, f"p{i}")
+
+        assert len(FakeProvider.instances) == 1
+        assert m.get_stats()["fake"]["calls"] == 5
+
+    async def test_unknown_provider(self, manager):
+        with pytest.raises(ValueError, match="Unknown LLM provider"):
+            manager().client("nope")
+
+    async def test_interactive_jumps_background_queue(self, manager):
+        m = manager(max_concurrency=1)
+        client = m.client("fake")
+        client.gate.clear()
+
+        first = asyncio.create_task(_complete(m, "running"))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(_complete(m, f"summary-{i}", Priority.BACKGROUND)) for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(_complete(m, "chat", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        stats = m.get_stats()["fake"]
+        assert (stats["in_flight"], stats["queue_depth"]) == (1, 4)
+
+        client.gate.set()
+        await asyncio.gather(first, chat, *queued)
+
+        assert client.served == ["running", "chat", "summary-0", "summary-1", "summary-2"]
+        assert m.get_stats()["fake"]["max_queue_depth"] == 4
+
+    async def test_concurrency_is_bounded(self, manager):
+        m = manager(max_concurrency=3)
+        peak = running = 0
+
+        async def call(client):
+            nonlocal peak, running
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(*(m.run("fake", call) for _ in range(12)))
+
+        assert peak == 3
+        assert m.get_stats()["fake"]["in_flight"] == 0
+
+    async def test_cancelled_waiter_gives_up_its_place(self, manager):
+        m = manager(max_concurrency=1)
+        client = m.client("fake")
+        client.gate.clear()
+
+        first = asyncio.create_task(_complete(m, "a"))
+        await asyncio.sleep(0)
+        doomed = asyncio.create_task(_complete(m, "b"))
+        last = asyncio.create_task(_complete(m, "c"))
+        await asyncio.sleep(0)
+        doomed.cancel()
+        client.gate.set()
+        await asyncio.gather(first, last)
+
+        assert client.served == ["a", "c"]
+        assert m.get_stats()["fake"]["in_flight"] == 0
+
+    async def test_errors_release_the_slot(self, manager):
+        m = manager(max_concurrency=1)
+
+        async def boom(client):
+            raise RuntimeError("provider down")
+
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                await m.run("fake", boom)
+
+        stats = m.get_stats()["fake"]
+        assert (stats["errors"], stats["in_flight"]) == (3, 0)
+
+    async def test_token_budget_waits_for_refill(self, manager):
+        m = manager(tokens_per_minute={"fake": 600})  # 10 tokens a second
+        clock = [1000.0]
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+            clock[0] += seconds
+
+        with (
+            patch(
+                "src.domains.intelligence.reasoning.llm.clients.time.monotonic", lambda: clock[0]
+            ),
+            patch("src.domains.intelligence.reasoning.llm.clients.asyncio.sleep", fake_sleep),
+        ):
+            await _complete(m, "estimate", tokens=590)  # Only 10 used: 580 handed back
+            await _complete(m, "full budget", tokens=600)  # 590 left: waits 1s for 10 more
+
+        assert slept == [pytest.approx(1.0)]
+        assert m.get_stats()["fake"]["budget_waits"] == 1
+        assert m.get_stats()["fake"]["tokens"] == 20
+
+    def test_new_event_loop_gets_fresh_clients(self, manager):
+        m = manager()
+
+        async def task():
+            return m.client("fake")
+
+        clients = []
+        for _ in range(2):
+            loop = asyncio.new_event_loop()
+            try:
+                clients.append(loop.run_until_complete(task()))
+            finally:
+                loop.close()
+
+        assert clients[0] is not clients[1]
+        # Each task's client is closed with its loop, not orphaned
+        assert clients[0].closed and clients[1].closed
+
+
+async def test_generate_content_uses_the_shared_client():
+    from src.domains.intelligence.reasoning import llm
+
+    calls = []
+
+    class FakeGemini:
+        def __init__(self, api_key):
+            self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate))
+
+        async def generate(self, **kwargs):
+            calls.append(kwargs["model"])
+            return SimpleNamespace(
+                text="hello", usage_metadata=SimpleNamespace(total_token_count=7)
+            )
+
+    m = LlmClientManager()
+    m.register_provider("gemini", FakeGemini)
+    with patch.object(llm, "llm_clients", m):
+        assert await llm.generate_content("hi", priority=llm.Priority.INTERACTIVE) == "hello"
+        assert await llm.generate_content("again") == "hello"
+
+    assert len(calls) == 2
+    assert m.get_stats()["gemini"]["tokens"] == 14
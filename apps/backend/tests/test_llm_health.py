@@ -0,0 +1,176 @@
+"""Shared LLM provider health: cluster-wide breaker, probing, latency ranking."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from src.config import get_settings
+from src.domains.intelligence.reasoning.llm import health
+from src.domains.intelligence.reasoning.llm.health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ProviderHealthRegistry,
+)
+from src.shared.infrastructure.redis import Cache
+
+
+@pytest.fixture
+async def cache():
+    c = Cache(get_settings())
+    c.redis = fakeredis.aioredis.FakeRedis()
+    c._connected = True
+    c.register_script("llm_health_allow", health._ALLOW_SCRIPT)
+    c.register_script("llm_health_record", health._RECORD_SCRIPT)
+    with patch.object(health, "cache", c):
+        yield c
+    await c.redis.aclose()
+
+
+def _workers(n: int, **options) -> list[ProviderHealthRegistry]:
+    """Registries standing in for separate worker processes."""
+    options = {"failure_threshold": 3, "recovery_timeout": 60.0, "snapshot_ttl": 0, **options}
+    return [ProviderHealthRegistry(**options) for _ in range(n)]
+
+
+async def _trip(registry, provider="openai", times=3):
+    for _ in range(times):
+        await registry.record(provider, ok=False, latency=1.0)
+
+
+class TestSharedBreaker:
+    async def test_failures_from_all_workers_open_the_circuit(self, cache):
+        a, b, c = _workers(3)
+
+        await a.record("openai", ok=False, latency=1.0)
+        await b.record("openai", ok=False, latency=1.0)
+        state = await c.record("openai", ok=False, latency=1.0)
+
+        assert state == OPEN
+        for worker in (a, b, c):
+            assert await worker.allow("openai") is False
+
+    async def test_uncounted_failures_do_not_move_the_breaker(self, cache):
+        (a,) = _workers(1)
+
+        for _ in range(5):
+            await a.record("openai", ok=False, latency=1.0, count_failure=False)
+
+        assert await a.allow("openai") is True
+        snapshot = await a.snapshot(["openai"])
+        assert snapshot["openai"].error_rate == 1.0
+        assert snapshot["openai"].failures == 0
+
+    async def test_success_resets_failures(self, cache):
+        (a,) = _workers(1)
+        await _trip(a, times=2)
+        await a.record("openai", ok=True, latency=0.2)
+        await _trip(a, times=2)
+
+        assert await a.allow("openai") is True
+
+    async def test_open_worker_skips_redis_until_deadline(self, cache):
+        (a,) = _workers(1)
+        await _trip(a)
+
+        calls = a.stats["redis_calls"]
+        for _ in range(5):
+            assert await a.allow("openai") is False
+
+        assert a.stats["redis_calls"] == calls
+        assert a.stats["local_skips"] == 5
+
+
+class TestHalfOpenProbe:
+    async def test_only_one_worker_probes(self, cache):
+        workers = _workers(4, recovery_timeout=0.0)
+        await _trip(workers[0])
+
+        allowed = [await w.allow("openai") for w in workers]
+
+        assert allowed.count(True) == 1
+        state = await cache.redis.hget(cache.make_key(["llm", "health", "openai"]), "state")
+        assert state == HALF_OPEN.encode()
+
+    async def test_probe_success_closes_for_everyone(self, cache):
+        a, b = _workers(2, recovery_timeout=0.0)
+        await _trip(a)
+        assert await a.allow("openai") is True
+        assert await b.allow("openai") is False
+
+        assert await a.record("openai", ok=True, latency=0.1) == CLOSED
+        b.reset_local()
+        assert await b.allow("openai") is True
+
+    async def test_probe_failure_reopens(self, cache):
+        a, b = _workers(2, recovery_timeout=0.0)
+        await _trip(a)
+        assert await a.allow("openai") is True
+
+        assert await a.record("openai", ok=False, latency=1.0) == OPEN
+
+    async def test_expired_probe_lock_lets_another_worker_probe(self, cache):
+        a, b = _workers(2, recovery_timeout=0.0, probe_timeout=0.001)
+        await _trip(a)
+        assert await a.allow("openai") is True
+
+        await cache.redis.delete(cache.make_key(["llm", "health", "openai", "probe"]))
+        assert await b.allow("openai") is True
+
+
+class TestRanking:
+    async def test_rank_by_p95_latency(self, cache):
+        (a,) = _workers(1)
+        for _ in range(10):
+            await a.record("gemini", ok=True, latency=2.0)
+            await a.record("openai", ok=True, latency=0.5)
+            await a.record("anthropic", ok=True, latency=1.0)
+
+        assert await a.rank(["gemini", "openai", "anthropic"]) == [
+            "openai",
+            "anthropic",
+            "gemini",
+        ]
+
+    async def test_erroring_and_unmeasured_providers_go_last(self, cache):
+        (a,) = _workers(1)
+        for _ in range(4):
+            await a.record("openai", ok=False, latency=0.1, count_failure=False)
+        await a.record("anthropic", ok=True, latency=3.0)
+
+        assert await a.rank(["openai", "gemini", "anthropic"]) == [
+            "anthropic",
+            "gemini",
+            "openai",
+        ]
+
+    async def test_workers_share_latency_samples(self, cache):
+        a, b = _workers(2)
+        await a.record("openai", ok=True, latency=0.25)
+
+        snapshot = await b.snapshot(["openai"])
+
+        assert snapshot["openai"].samples == 1
+        assert snapshot["openai"].latency_ms_p95 == 250.0
+
+
+class TestDegradedMode:
+    async def test_local_breaker_without_redis(self):
+        c = Cache(get_settings())
+        with patch.object(health, "cache", c):
+            (a,) = _workers(1, recovery_timeout=0.0)
+            await _trip(a)
+            a._open_until.clear()
+
+            assert await a.allow("openai") is True  # half-open probe
+            assert await a.allow("openai") is False
+            await a.record("openai", ok=True, latency=0.1)
+            assert await a.allow("openai") is True
+            assert a.stats["degraded"] > 0
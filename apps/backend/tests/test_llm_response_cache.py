@@ -0,0 +1,192 @@
+"""LLM response cache: keys, per-task policies, eviction, near duplicates, stats."""
+
+import asyncio
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from src.config import get_settings
+from src.domains.intelligence.reasoning.llm import response_cache
+from src.domains.intelligence.reasoning.llm.registry import LlmTask
+from src.domains.intelligence.reasoning.llm.response_cache import (
+    LlmResponseCache,
+    ResponseCachePolicy,
+    normalize_prompt,
+    response_key,
+)
+from src.domains.personal_learning.services import llm_resilient
+from src.shared.infrastructure.redis import Cache
+
+MODEL = "gemini-3.5-flash"
+
+
+@pytest.fixture
+async def cache():
+    c = Cache(get_settings())
+    c.redis = fakeredis.aioredis.FakeRedis()
+    c._connected = True
+    c.register_script("llm_response_get", response_cache._GET_SCRIPT)
+    c.register_script("llm_response_put", response_cache._PUT_SCRIPT)
+    with patch.object(response_cache, "cache", c):
+        yield c
+    await c.redis.aclose()
+
+
+class FakeEmbedder:
+    """Maps prompts to fixed vectors; unknown prompts get an orthogonal one."""
+
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+        self.calls = 0
+
+    async def __call__(self, text: str) -> list[float]:
+        self.calls += 1
+        return self.vectors.get(text, [0.0, 0.0, 1.0])
+
+
+class TestKeys:
+    def test_whitespace_differences_share_a_key(self):
+        a = response_key(LlmTask.GUIDANCE, MODEL, "Hello   world\r\n\n\n\nBye ", 0.7)
+        b = response_key(LlmTask.GUIDANCE, MODEL, "Hello world\n\nBye", 0.7)
+        assert a == b
+        assert normalize_prompt("  a \t b \n\n\n c ") == "a b\n\nc"
+
+    def test_task_model_and_temperature_bucket_are_part_of_the_key(self):
+        base = response_key(LlmTask.GUIDANCE, MODEL, "p", 0.7)
+        assert base == response_key(LlmTask.GUIDANCE, MODEL, "p", 0.72)
+        assert base != response_key(LlmTask.GUIDANCE, MODEL, "p", 0.3)
+        assert base != response_key(LlmTask.GUIDANCE, "other-model", "p", 0.7)
+        assert base != response_key(LlmTask.TOPIC_EXTRACTION, MODEL, "p", 0.7)
+
+
+class TestLlmResponseCache:
+    async def test_round_trip_and_stats(self, cache):
+        c = LlmResponseCache()
+
+        assert await c.get(LlmTask.GUIDANCE, MODEL, "prompt", 0.7) is None
+        await c.put(LlmTask.GUIDANCE, MODEL, "prompt", 0.7, "answer", latency=2.0, tokens=500)
+        hit = await c.get(LlmTask.GUIDANCE, MODEL, "prompt ", 0.7)
+
+        assert hit.text == "answer"
+        assert hit.similar is False
+        stats = c.get_stats()["guidance"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["saved_tokens"] == 500
+        assert 0 < stats["saved_latency_ms"] <= 2000
+        assert stats["hit_rate"] == 0.5
+
+    async def test_tasks_without_policy_are_not_cached(self, cache):
+        c = LlmResponseCache()
+
+        await c.put(LlmTask.CHAT_DEFAULT, MODEL, "prompt", 0.7, "answer", latency=1.0)
+
+        assert await c.get(LlmTask.CHAT_DEFAULT, MODEL, "prompt", 0.7) is None
+        assert await cache.redis.keys("*") == []
+
+    async def test_expired_entries_miss(self, cache):
+        c = LlmResponseCache(policies={LlmTask.GUIDANCE: ResponseCachePolicy(ttl_seconds=60)})
+        await c.put(LlmTask.GUIDANCE, MODEL, "prompt", 0.7, "answer", latency=1.0)
+
+        with patch.object(response_cache.time, "time", return_value=10**12):
+            assert await c.get(LlmTask.GUIDANCE, MODEL, "prompt", 0.7) is None
+
+    async def test_least_recently_used_entries_are_evicted(self, cache):
+        c = LlmResponseCache(max_entries=2)
+        await c.put(LlmTask.GUIDANCE, MODEL, "a", 0.7, "A", latency=1.0)
+        await asyncio.sleep(0.005)  # LRU scores are Redis milliseconds
+        await c.put(LlmTask.GUIDANCE, MODEL, "b", 0.7, "B", latency=1.0)
+        await asyncio.sleep(0.005)
+        await c.get(LlmTask.GUIDANCE, MODEL, "a", 0.7)  # "b" is now least recent
+        await asyncio.sleep(0.005)
+        await c.put(LlmTask.GUIDANCE, MODEL, "c", 0.7, "C", latency=1.0)
+
+        assert await c.get(LlmTask.GUIDANCE, MODEL, "b", 0.7) is None
+        assert (await c.get(LlmTask.GUIDANCE, MODEL, "a", 0.7)).text == "A"
+        assert c.get_stats()["guidance"]["evictions"] == 1
+
+    async def test_discard(self, cache):
+        c = LlmResponseCache()
+        await c.put(LlmTask.TOPIC_EXTRACTION, MODEL, "p", 0.7, "not json", latency=1.0)
+
+        await c.discard(LlmTask.TOPIC_EXTRACTION, MODEL, "p", 0.7)
+
+        assert await c.get(LlmTask.TOPIC_EXTRACTION, MODEL, "p", 0.7) is None
+
+    async def test_degrades_without_redis(self):
+        c = LlmResponseCache()
+        with patch.object(response_cache, "cache", Cache(get_settings())):
+            await c.put(LlmTask.GUIDANCE, MODEL, "p", 0.7, "answer", latency=1.0)
+            assert await c.get(LlmTask.GUIDANCE, MODEL, "p", 0.7) is None
+
+
+class TestNearDuplicates:
+    def _cache(self, embedder):
+        return LlmResponseCache(
+            policies={LlmTask.RESOURCE_RECOMMENDATION: ResponseCachePolicy(3600, similarity=0.95)},
+            embedder=embedder,
+        )
+
+    async def test_similar_prompt_hits(self, cache):
+        embedder = FakeEmbedder({"python basics": [1.0, 0.0, 0.0], "Python basic": [0.99, 0.05, 0]})
+        c = self._cache(embedder)
+        task = LlmTask.RESOURCE_RECOMMENDATION
+        await c.put(task, MODEL, "python basics", 0.3, "[...]", latency=1.0, scope="u1")
+
+        hit = await c.get(task, MODEL, "Python basic", 0.3, scope="u1")
+
+        assert hit is not None and hit.similar is True
+        assert c.get_stats()[str(task)]["similar_hits"] == 1
+
+    async def test_dissimilar_prompt_misses(self, cache):
+        c = self._cache(FakeEmbedder({"python basics": [1.0, 0.0, 0.0]}))
+        task = LlmTask.RESOURCE_RECOMMENDATION
+        await c.put(task, MODEL, "python basics", 0.3, "[...]", latency=1.0, scope="u1")
+
+        assert await c.get(task, MODEL, "organic chemistry", 0.3, scope="u1") is None
+
+    async def test_near_duplicates_do_not_cross_scopes(self, cache):
+        embedder = FakeEmbedder({"python basics": [1.0, 0.0, 0.0], "Python basic": [0.99, 0.05, 0]})
+        c = self._cache(embedder)
+        task = LlmTask.RESOURCE_RECOMMENDATION
+        await c.put(task, MODEL, "python basics", 0.3, "[...]", latency=1.0, scope="u1")
+
+        assert await c.get(task, MODEL, "Python basic", 0.3, scope="u2") is None
+        # No candidates in scope u2, so no embedding call for the lookup
+        assert embedder.calls == 1
+
+
+class TestResilientCaching:
+    async def test_fallback_answer_is_keyed_by_its_own_model(self, cache):
+        c = LlmResponseCache()
+        calls = {
+            "gemini": AsyncMock(side_effect=RuntimeError("gemini down")),
+            "openai": AsyncMock(return_value="from openai"),
+        }
+        health = AsyncMock()
+        health.allow.return_value = True
+        with (
+            patch.object(llm_resilient, "llm_response_cache", c),
+            patch.object(llm_resilient, "provider_health", health),
+            patch.object(llm_resilient, "_PROVIDER_CALLABLES", calls),
+            patch.object(llm_resilient, "_resolve_provider", AsyncMock(return_value="gemini")),
+            patch.object(
+                llm_resilient, "_get_fallback_providers", AsyncMock(return_value=["openai"])
+            ),
+        ):
+            text = await llm_resilient.generate_content(
+                "prompt", max_retries=0, task=LlmTask.GUIDANCE
+            )
+
+        assert text == "from openai"
+        primary = llm_resilient._provider_model("gemini")
+        fallback = llm_resilient._provider_model("openai")
+        assert await c.get(LlmTask.GUIDANCE, primary, "prompt", 0.7) is None
+        assert (await c.get(LlmTask.GUIDANCE, fallback, "prompt", 0.7)).text == "from openai"
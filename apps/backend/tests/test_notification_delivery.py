@@ -0,0 +1,152 @@
+"""Notification delivery pipeline: claiming, quiet hours, batched sends and bulk updates."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from src.config import get_settings
+from src.domains.personal_learning.repository import PersonalLearningRepository
+from src.domains.personal_learning.services import notification_service
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return MagicMock(all=MagicMock(return_value=[]))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _due(id, *, type="DAILY_PLAN", quiet=(None, None)):
+    return SimpleNamespace(
+        id=id,
+        user_id=f"user-{id}",
+        type=type,
+        title="Title",
+        body="Body",
+        action_data=None,
+        quiet_hours_start=quiet[0],
+        quiet_hours_end=quiet[1],
+    )
+
+
+def _repo(claimed):
+    repo = MagicMock()
+    repo.claim_due_notifications = AsyncMock(return_value=claimed)
+    repo.mark_notifications_delivered = AsyncMock()
+    repo.reschedule_notifications = AsyncMock()
+    return repo
+
+
+async def _deliver(repo, session, *, push=None, email=None):
+    push = push or AsyncMock(side_effect=lambda messages: [True] * len(messages))
+    email = email or AsyncMock(side_effect=lambda messages: [True] * len(messages))
+    with (
+        patch.object(notification_service, "repo", repo),
+        patch.object(notification_service, "get_session_factory", return_value=lambda: session),
+        patch("src.shared.infrastructure.push_notifications.send_push_batch", push),
+        patch("src.shared.infrastructure.email.send_notification_email_batch", email),
+    ):
+        result = await notification_service.deliver_due(batch_size=10, now=NOW)
+    return result, push, email
+
+
+class TestDeliverDue:
+    async def test_sends_per_channel_and_records_in_bulk(self):
+        repo = _repo([_due("a"), _due("b", type="WEEKLY"), _due("c")])
+        session = FakeSession()
+
+        result, push, email = await _deliver(repo, session)
+
+        assert (result.claimed, result.delivered, result.deferred, result.failed) == (3, 3, 0, 0)
+        assert [m["user_id"] for m in push.await_args.args[0]] == ["user-a", "user-c"]
+        assert [m["user_id"] for m in email.await_args.args[0]] == ["user-b"]
+        repo.mark_notifications_delivered.assert_awaited_once()
+        assert sorted(repo.mark_notifications_delivered.await_args.args[0]) == ["a", "b", "c"]
+        assert repo.mark_notifications_delivered.await_args.kwargs["delivered_at"] == NOW
+        assert session.commits == 1
+
+    async def test_quiet_hours_are_deferred_to_their_end(self):
+        repo = _repo([_due("a", quiet=("11:00", "13:00")), _due("b")])
+
+        result, push, _ = await _deliver(repo, FakeSession())
+
+        assert (result.delivered, result.deferred) == (1, 1)
+        assert [m["user_id"] for m in push.await_args.args[0]] == ["user-b"]
+        schedule = repo.reschedule_notifications.await_args.args[0]
+        assert schedule == {"a": ("QUEUED", NOW.replace(hour=13))}
+
+    async def test_failed_sends_are_retried_later(self):
+        repo = _repo([_due("a"), _due("b")])
+        push = AsyncMock(return_value=[True, False])
+
+        result, _, _ = await _deliver(repo, FakeSession(), push=push)
+
+        assert (result.delivered, result.failed) == (1, 1)
+        assert repo.mark_notifications_delivered.await_args.args[0] == ["a"]
+        delay = get_settings().NOTIFICATION_RETRY_DELAY_SECONDS
+        schedule = repo.reschedule_notifications.await_args.args[0]
+        assert schedule == {"b": ("PENDING", NOW + timedelta(seconds=delay))}
+
+    async def test_a_raising_channel_fails_only_its_batch(self):
+        repo = _repo([_due("a"), _due("b", type="WEEKLY")])
+
+        result, _, _ = await _deliver(
+            repo, FakeSession(), email=AsyncMock(side_effect=ConnectionError("down"))
+        )
+
+        assert (result.delivered, result.failed) == (1, 1)
+
+    async def test_empty_queue_writes_nothing(self):
+        repo = _repo([])
+        session = FakeSession()
+
+        result, push, _ = await _deliver(repo, session)
+
+        assert result.claimed == 0
+        push.assert_not_awaited()
+        repo.mark_notifications_delivered.assert_not_awaited()
+        assert session.commits == 0
+
+    async def test_deliver_pending_runs_passes_until_a_short_one(self):
+        passes = [
+            notification_service.DeliveryResult(claimed=200, delivered=190),
+            notification_service.DeliveryResult(claimed=20, delivered=20),
+        ]
+
+        with patch.object(notification_service, "deliver_due", AsyncMock(side_effect=passes)):
+            assert await notification_service.deliver_pending() == 210
+
+
+class TestRepository:
+    async def test_claim_locks_only_notifications_and_skips_locked_rows(self):
+        session = FakeSession()
+
+        await PersonalLearningRepository().claim_due_notifications(
+            now=NOW, limit=50, session=session
+        )
+
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert 'LEFT OUTER JOIN "LearningProfile"' in sql
+        assert 'FOR UPDATE OF "Notification" SKIP LOCKED' in sql
+        assert '"Notification".status IN' in sql
+        assert 'ORDER BY "Notification"."scheduledAt"' in sql
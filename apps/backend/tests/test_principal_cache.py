@@ -0,0 +1,196 @@
+"""Authenticated-user (principal) cache tests."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.domains.identity.db_models import User, UserPreferences
+from src.shared.auth import dependencies
+from src.shared.auth.jwt import create_access_token, decode_access_token
+from src.shared.auth.principal_cache import (
+    PRINCIPAL_USER_FIELDS,
+    PrincipalCache,
+    principal_from_row,
+    principal_row,
+    token_key,
+)
+
+_REDIS = "src.shared.infrastructure.cache"
+
+
+def _user(**overrides) -> User:
+    values = dict(
+        id="u1",
+        email="ada@example.com",
+        tier="FREE",
+        role="USER",
+        is_active=True,
+        subscription_current_period_end=datetime(2026, 1, 31, tzinfo=UTC),
+    )
+    values.update(overrides)
+    user = User(**values)
+    user.preferences = UserPreferences(id="p1", user_id="u1", timezone="Africa/Lagos")
+    return user
+
+
+class FakeRedisCache:
+    """The shared cache surface the principal cache uses, backed by a dict."""
+
+    def __init__(self):
+        self.store: dict = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, expire=None):
+        self.store[key] = value
+        return True
+
+    async def exists(self, key):
+        return key in self.store
+
+
+@pytest.fixture
+def redis_store():
+    fake = FakeRedisCache()
+    with (
+        patch(f"{_REDIS}.get", fake.get),
+        patch(f"{_REDIS}.set", fake.set),
+        patch(f"{_REDIS}.exists", fake.exists),
+    ):
+        yield fake
+
+
+class TestPrincipalRows:
+    def test_round_trip_keeps_types_and_preferences(self):
+        restored = principal_from_row(principal_row(_user()))
+
+        assert restored.email == "ada@example.com"
+        assert restored.subscription_current_period_end == datetime(2026, 1, 31, tzinfo=UTC)
+        assert restored.preferences.timezone == "Africa/Lagos"
+
+    def test_secrets_are_not_cached(self):
+        user = _user(
+            password_hash="$2b$12$hash",
+            verification_code="123456",
+            password_reset_code="654321",
+            google_calendar_refresh_token="refresh",
+            account_deletion_cancel_token="cancel",
+        )
+
+        row = principal_row(user)
+        restored = principal_from_row(row)
+
+        secrets = ("$2b$12$hash", "123456", "654321", "refresh", "cancel")
+        assert not set(secrets) & {str(v) for v in row.values()}
+        for name in ("password_hash", "verification_code", "password_reset_code"):
+            assert name not in restored.__dict__
+            assert name not in PRINCIPAL_USER_FIELDS
+
+    def test_token_key_prefers_jti(self):
+        token = create_access_token({"sub": "ada@example.com", "uid": "u1"})
+        payload = decode_access_token(token)
+
+        assert payload["uid"] == "u1"
+        assert token_key(payload, token) == payload["jti"]
+        assert token_key({"sub": "x"}, "legacy-token") != token_key({"sub": "x"}, "other-token")
+
+
+class TestPrincipalCache:
+    async def test_token_with_uid_hits_redis_then_local(self, redis_store):
+        writer, reader = PrincipalCache(), PrincipalCache()
+        payload = {"sub": "ada@example.com", "uid": "u1", "jti": "t1"}
+        await writer.put(payload, "token", _user())
+
+        first = await reader.get(payload, "token")
+        second = await reader.get(payload, "token")
+
+        assert first.id == second.id == "u1"
+        assert first is not second  # Fresh object per request
+        assert reader.stats["redis_hits"] == 1
+        assert reader.stats["local_hits"] == 1
+
+    async def test_legacy_token_without_uid_misses_until_put(self, redis_store):
+        cache = PrincipalCache()
+        payload = {"sub": "ada@example.com"}
+
+        assert await cache.get(payload, "legacy") is None
+        await cache.put(payload, "legacy", _user())
+        assert (await cache.get(payload, "legacy")).id == "u1"
+
+    async def test_changed_email_is_a_miss(self, redis_store):
+        cache = PrincipalCache()
+        await cache.put({"sub": "ada@example.com", "uid": "u1"}, "t", _user())
+
+        assert await cache.get({"sub": "old@example.com", "uid": "u1"}, "t") is None
+
+    async def test_invalidate_tombstones_redis_and_blocks_stale_put(self, redis_store):
+        cache, other_node = PrincipalCache(), PrincipalCache()
+        payload = {"sub": "ada@example.com", "uid": "u1"}
+        stale = _user()  # Read before the tier change...
+        await cache.put(payload, "t", stale)
+
+        await cache.invalidate("u1")
+        await other_node.put(payload, "t", stale)  # ...and cached after it
+
+        assert await PrincipalCache().get(payload, "t") is None
+
+    async def test_invalidate_many_uses_shared_connection(self):
+        cache = PrincipalCache()
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        client = MagicMock()
+        client.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+        client.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+        with (
+            patch(f"{_REDIS}.redis", client),
+            patch(f"{_REDIS}._connected", True),
+        ):
+            await cache.invalidate_many(["u1", "u2"])
+
+        assert pipe.set.call_count == 2
+        pipe.execute.assert_awaited_once()
+
+
+class TestGetCurrentUser:
+    async def test_second_request_skips_the_database(self, redis_store):
+        token = create_access_token({"sub": "ada@example.com", "uid": "u1"})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        request = MagicMock(headers={"user-agent": "test"})
+
+        session = AsyncMock()
+        session.execute.return_value.scalar_one_or_none = MagicMock(return_value=_user())
+        factory = MagicMock()
+        factory.return_value.__aenter__ = AsyncMock(return_value=session)
+        factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        with (
+            patch.object(dependencies, "principal_cache", PrincipalCache()),
+            patch.object(dependencies, "get_session_factory", return_value=factory),
+            patch.object(dependencies, "last_seen_tracker"),
+        ):
+            first = await dependencies.get_current_user(credentials, request)
+            second = await dependencies.get_current_user(credentials, request)
+
+        assert first.id == second.id == "u1"
+        session.execute.assert_awaited_once()
+
+    async def test_cached_inactive_user_is_rejected(self, redis_store):
+        token = create_access_token({"sub": "ada@example.com", "uid": "u1"})
+        payload = decode_access_token(token)
+        cache = PrincipalCache()
+        await cache.put(payload, token, _user(is_active=False))
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with patch.object(dependencies, "principal_cache", cache):
+            with pytest.raises(HTTPException) as exc:
+                await dependencies.get_current_user(credentials, MagicMock())
+
+        assert exc.value.status_code == 400
@@ -0,0 +1,171 @@
+"""Rate limiter engine tests (GCRA, sliding log, local pre-check, policies)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from src.config import get_settings
+from src.shared.infrastructure import rate_limit
+from src.shared.infrastructure.rate_limit import RateLimiter, RateLimitPolicy
+from src.shared.infrastructure.redis import Cache
+
+
+@pytest.fixture
+async def cache():
+    c = Cache(get_settings())
+    c.redis = fakeredis.aioredis.FakeRedis()
+    c._connected = True
+    for engine in rate_limit.ENGINES.values():
+        c.register_script(f"rate_limit_{engine.name}", engine.script)
+    with patch.object(rate_limit, "cache", c):
+        yield c
+    await c.redis.aclose()
+
+
+@pytest.fixture
+def count_commands(cache):
+    """Counts round trips sent to (fake) Redis."""
+    sent = []
+    execute = cache.redis.execute_command
+
+    async def counting(*args, **kwargs):
+        sent.append(args[0])
+        return await execute(*args, **kwargs)
+
+    cache.redis.execute_command = counting
+    return sent
+
+
+class TestEngines:
+    @pytest.mark.parametrize("algorithm", ["gcra", "sliding_log"])
+    async def test_limit_and_retry_after(self, cache, algorithm):
+        policy = RateLimitPolicy("t", limit=3, window_seconds=60, algorithm=algorithm)
+        limiter = RateLimiter(local_precheck=False)
+
+        results = [await limiter.check(policy, "u1") for _ in range(4)]
+
+        assert [(r.allowed, r.remaining) for r in results] == [
+            (True, 2),
+            (True, 1),
+            (True, 0),
+            (False, 0),
+        ]
+        # GCRA frees one slot every window / limit; the log waits for the oldest entry
+        expected = 20 if algorithm == "gcra" else 60
+        assert expected - 1 < results[-1].retry_after <= expected
+        assert results[-1].headers()["Retry-After"] == str(expected)
+
+    async def test_gcra_refills_smoothly(self, cache):
+        policy = RateLimitPolicy("t", limit=10, window_seconds=60)
+        limiter = RateLimiter(local_precheck=False)
+        for _ in range(10):
+            await limiter.check(policy, "u1")
+
+        result = await limiter.check(policy, "u1")
+
+        # One slot back every 6s, instead of the whole quota at a window edge
+        assert not result.allowed
+        assert 5 < result.retry_after <= 6
+
+    async def test_identities_are_independent(self, cache):
+        policy = RateLimitPolicy("t", limit=1, window_seconds=60)
+        limiter = RateLimiter(local_precheck=False)
+
+        assert (await limiter.check(policy, "u1")).allowed
+        assert not (await limiter.check(policy, "u1")).allowed
+        assert (await limiter.check(policy, "u2")).allowed
+
+
+class TestLocalPrecheck:
+    async def test_blocked_client_skips_redis(self, cache, count_commands):
+        policy = RateLimitPolicy("t", limit=2, window_seconds=60)
+        limiter = RateLimiter()
+        await limiter.check(policy, "warm-up")  # Loads the script
+        count_commands.clear()
+
+        results = [await limiter.check(policy, "u1") for _ in range(50)]
+
+        assert [r.allowed for r in results[:3]] == [True, True, False]
+        assert count_commands == ["EVALSHA", "EVALSHA"]  # The second answer said "wait"
+        assert limiter.get_stats()["local_rejections"] == 48
+        assert 0 < results[-1].retry_after <= 30
+
+    async def test_block_expires(self, cache):
+        policy = RateLimitPolicy("t", limit=1, window_seconds=60)
+        limiter = RateLimiter()
+        await limiter.check(policy, "u1")
+
+        with patch.object(rate_limit.time, "monotonic", return_value=10**9):
+            await limiter.check(policy, "u1")
+
+        assert limiter.stats["redis_calls"] == 2
+
+    async def test_block_is_ignored_after_a_limit_change(self, cache):
+        policy = RateLimitPolicy(
+            "t",
+            limit=1,
+            window_seconds=60,
+            algorithm="sliding_log",
+            tier_limits={"PREMIUM_MONTHLY": 5},
+        )
+        limiter = RateLimiter()
+        await limiter.check(policy, "u1", tier="FREE")
+        assert not (await limiter.check(policy, "u1", tier="FREE")).allowed  # Local block
+
+        # The user upgraded: the block was computed for limit 1, so Redis decides
+        upgraded = await limiter.check(policy, "u1", tier="PREMIUM_MONTHLY")
+
+        assert (upgraded.allowed, upgraded.limit, upgraded.remaining) == (True, 5, 3)
+        assert limiter.stats["local_rejections"] == 1
+        assert limiter.stats["redis_calls"] == 2
+
+    async def test_local_table_is_bounded(self, cache):
+        policy = RateLimitPolicy("t", limit=1, window_seconds=60)
+        limiter = RateLimiter(max_local_keys=10)
+        for i in range(25):
+            await limiter.check(policy, f"u{i}")
+
+        assert limiter.get_stats()["locally_blocked"] == 10
+
+
+class TestPolicies:
+    def test_tier_overrides(self):
+        policy = RateLimitPolicy(
+            "t", limit=5, window_seconds=60, tier_limits={"PREMIUM_MONTHLY": 20}
+        )
+
+        assert policy.limit_for("FREE") == 5
+        assert policy.limit_for("PREMIUM_MONTHLY") == 20
+        assert policy.limit_for(None) == 5
+
+    def test_unknown_algorithm_is_rejected(self):
+        with pytest.raises(ValueError, match="algorithm"):
+            RateLimitPolicy("t", limit=5, window_seconds=60, algorithm="leaky")
+
+    async def test_enforce_raises_429_with_headers(self, cache):
+        policy = RateLimitPolicy("t", limit=1, window_seconds=30, tier_limits={"FREE": 1})
+        with patch.object(rate_limit, "rate_limiter", RateLimiter()):
+            await rate_limit.enforce_policy(policy, "u1", tier="FREE")
+            with pytest.raises(HTTPException) as exc:
+                await rate_limit.enforce_policy(policy, "u1", tier="FREE")
+
+        assert exc.value.status_code == 429
+        assert exc.value.headers["Retry-After"] == "30"
+        assert exc.value.headers["X-RateLimit-Remaining"] == "0"
+
+    async def test_degrades_when_redis_is_down(self):
+        policy = RateLimitPolicy("t", limit=1, window_seconds=60)
+        limiter = RateLimiter()
+        with patch.object(rate_limit, "cache", Cache(get_settings())):
+            results = [await limiter.check(policy, "u1") for _ in range(3)]
+
+        assert all(r.allowed for r in results)
+        assert limiter.stats["degraded"] == 3
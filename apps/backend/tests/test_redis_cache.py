@@ -0,0 +1,145 @@
+"""Shared Redis cache tests: multi-key ops, pipelines, scripts and codecs."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from src.config import get_settings
+from src.shared.infrastructure import rate_limit
+from src.shared.infrastructure.redis import Cache, CacheCodec
+
+
+@pytest.fixture
+async def cache():
+    c = Cache(get_settings())
+    c.redis = fakeredis.aioredis.FakeRedis()
+    c._connected = True
+    yield c
+    await c.redis.aclose()
+
+
+class TestMultiKey:
+    async def test_get_set_delete_many(self, cache):
+        await cache.set_many({"a": {"n": 1}, "b": [1, 2], "c": "text"}, expire=60)
+
+        assert await cache.get_many(["a", "b", "c", "missing"]) == {
+            "a": {"n": 1},
+            "b": [1, 2],
+            "c": "text",
+        }
+        assert 0 < await cache.ttl("a") <= 60
+        assert await cache.delete_many(["a", "b", "missing"]) == 2
+        assert await cache.get_many(["a", "b", "c"]) == {"c": "text"}
+
+    async def test_degrades_when_disconnected(self):
+        c = Cache(get_settings())
+
+        assert await c.get_many(["a"]) == {}
+        assert await c.set_many({"a": 1}) is False
+        assert await c.delete_many(["a"]) == 0
+        assert await c.run_script("anything") is None
+
+    async def test_pipeline_batches_raw_commands(self, cache):
+        async with cache.pipeline(transaction=True) as pipe:
+            pipe.set("x", cache.encode({"v": 1}))
+            pipe.incrby("counter", 5)
+            pipe.get("x")
+            _, counter, raw = await pipe.execute()
+
+        assert counter == 5
+        assert cache.decode(raw) == {"v": 1}
+
+    async def test_keys_uses_scan_and_strips_prefix(self, cache):
+        await cache.set_many({cache.make_key(["user", str(i)]): i for i in range(5)})
+
+        assert sorted(await cache.keys(f"{cache.key_prefix}user:*")) == [
+            f"user:{i}" for i in range(5)
+        ]
+
+
+class TestScripts:
+    async def test_registered_script_runs_and_survives_script_flush(self, cache):
+        pytest.importorskip("lupa")
+        cache.register_script("double", "return tonumber(ARGV[1]) * 2")
+
+        assert await cache.run_script("double", args=[21]) == 42
+        await cache.redis.script_flush()
+        assert await cache.run_script("double", args=[4]) == 8
+
+    async def test_rate_limit_is_one_scripted_round_trip(self, cache):
+        pytest.importorskip("lupa")
+        limiter = rate_limit.RateLimiter(local_precheck=False)
+        cache.register_script("rate_limit_gcra", rate_limit._GCRA_SCRIPT)
+        with (
+            patch.object(rate_limit, "cache", cache),
+            patch.object(rate_limit, "rate_limiter", limiter),
+        ):
+            results = [await rate_limit.check_rate_limit("u1", 3, 60) for _ in range(4)]
+
+        assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+        assert limiter.stats["redis_calls"] == 4
+        assert 0 < await cache.redis.pttl(cache.make_key(["rl", "gcra", "adhoc", "u1"])) <= 60_000
+
+
+class TestCacheCodec:
+    VALUE = {"when": datetime(2026, 1, 1, tzinfo=UTC), "ids": [1, 2], "n": None}
+    EXPECTED = {"when": "2026-01-01 00:00:00+00:00", "ids": [1, 2], "n": None}
+
+    def test_json_output_stays_plain(self):
+        codec = CacheCodec("json")
+        raw = codec.dumps(self.VALUE)
+
+        assert not raw.startswith(CacheCodec.MAGIC)
+        assert codec.loads(raw) == self.EXPECTED
+
+    def test_orjson_matches_json(self):
+        pytest.importorskip("orjson")
+        codec = CacheCodec("orjson")
+
+        assert codec.loads(codec.dumps(self.VALUE)) == self.EXPECTED
+        assert CacheCodec("json").loads(codec.dumps(self.VALUE)) == self.EXPECTED
+
+    def test_msgpack_round_trip(self):
+        pytest.importorskip("msgpack")
+        codec = CacheCodec("msgpack")
+        raw = codec.dumps(self.VALUE)
+
+        assert raw.startswith(CacheCodec.MAGIC)
+        assert CacheCodec("json").loads(raw) == self.EXPECTED
+
+    def test_missing_codec_falls_back_to_json(self):
+        with patch("importlib.import_module", side_effect=ImportError):
+            assert CacheCodec("msgpack").codec == "json"
+
+    def test_compression_above_threshold(self):
+        codec = CacheCodec("json", compress_threshold=1024)
+        big = {"text": "spaced repetition " * 500}
+
+        small_raw, big_raw = codec.dumps({"a": 1}), codec.dumps(big)
+
+        assert not small_raw.startswith(CacheCodec.MAGIC)
+        assert big_raw.startswith(CacheCodec.MAGIC)
+        assert len(big_raw) < len(str(big)) / 10
+        assert CacheCodec("json").loads(big_raw) == big  # Readable without compression on
+
+    def test_legacy_values_still_decode(self):
+        codec = CacheCodec("orjson")
+
+        assert codec.loads(b'{"a": 1}') == {"a": 1}
+        assert codec.loads(b"plain text") == "plain text"
+        assert codec.loads(b"\xff\xfe") == b"\xff\xfe"
+        assert codec.dumps(b"raw") == b"raw"
+
+
+def test_core_cache_is_the_shared_instance():
+    from src.core.cache import cache as core_cache
+    from src.shared.infrastructure import cache as shared_cache
+
+    assert core_cache is shared_cache
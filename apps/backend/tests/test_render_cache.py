@@ -0,0 +1,91 @@
+"""Content-addressed render cache tests."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from unittest.mock import AsyncMock, patch
+
+from src.domains.personal_learning.services import render_pool as rp
+from src.domains.personal_learning.services.document_impl import DocumentGenerationService
+from src.domains.personal_learning.services.render_cache import RenderCache, render_key
+
+_DOC_IMPL = "src.domains.personal_learning.services.document_impl"
+
+
+def _key(content="<p>Hello</p>", style="academic", user_id="u1", fmt="pdf"):
+    args = {"title": "Notes", "content": content, "style": style}
+    return render_key(user_id=user_id, kind=rp.PDF, fmt=fmt, args=args)
+
+
+class TestRenderKey:
+    def test_insignificant_whitespace_is_normalised(self):
+        assert _key("<p>Hello</p>\r\n<p>World</p>  \n") == _key("<p>Hello</p>\n<p>World</p>")
+
+    def test_output_affecting_inputs_change_the_key(self):
+        base = _key()
+        assert _key(style="report") != base
+        assert _key(fmt="docx") != base
+        assert _key(content="<p>Hello!</p>") != base
+
+    def test_keys_are_scoped_per_user(self):
+        assert _key(user_id="u1") != _key(user_id="u2")
+
+
+class TestRenderCache:
+    async def test_hit_rate_counts_local_and_miss(self):
+        cache = RenderCache(ttl_seconds=60, max_size=10)
+        with (
+            patch("src.shared.infrastructure.cache.get", AsyncMock(return_value=None)),
+            patch("src.shared.infrastructure.cache.set", AsyncMock(return_value=True)),
+        ):
+            assert await cache.get("k") is None
+            await cache.put("k", {"url": "https://cdn/a.pdf"})
+            assert await cache.get("k") == {"url": "https://cdn/a.pdf"}
+
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["local_hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    async def test_redis_hit_populates_local_tier(self):
+        cache = RenderCache(ttl_seconds=60, max_size=10)
+        stored = {"url": "https://cdn/a.pdf"}
+        with patch("src.shared.infrastructure.cache.get", AsyncMock(return_value=stored)) as get:
+            assert await cache.get("k") == stored
+            assert await cache.get("k") == stored
+
+        get.assert_awaited_once()
+        assert cache.stats["redis_hits"] == 1
+        assert cache.stats["local_hits"] == 1
+
+
+class TestGenerateDocumentCache:
+    async def test_second_identical_request_skips_render_and_upload(self, tmp_path):
+        cache = RenderCache(ttl_seconds=60, max_size=10)
+        storage = AsyncMock()
+        storage.upload_file.return_value = {"url": "https://cdn/doc.pdf", "size": 8}
+        storage.upload_bytes.return_value = {"url": "https://cdn/doc.html", "size": 10}
+
+        async def fake_render(kind, **args):
+            spooled = tmp_path / "render.pdf"
+            spooled.write_bytes(b"%PDF-1.7")
+            return rp.RenderResult(str(spooled), 8, 1.0)
+
+        with (
+            patch(f"{_DOC_IMPL}.render_cache", cache),
+            patch("src.shared.infrastructure.cache.get", AsyncMock(return_value=None)),
+            patch("src.shared.infrastructure.cache.set", AsyncMock(return_value=True)),
+            patch(f"{_DOC_IMPL}.render_pool.render", AsyncMock(side_effect=fake_render)) as render,
+            patch("src.shared.infrastructure.storage_service.storage_service", storage),
+        ):
+            service = DocumentGenerationService()
+            kwargs = dict(format="pdf", title="Notes", content="# Notes\n\nBody", user_id="u1")
+            first = await service.generate_document(**kwargs)
+            second = await service.generate_document(**kwargs)
+
+        assert render.await_count == 1
+        assert storage.upload_file.await_count == 1
+        assert storage.upload_bytes.await_count == 1
+        assert second == first
+        assert second["content_type"] == "application/pdf"
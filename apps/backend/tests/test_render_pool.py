@@ -0,0 +1,174 @@
+"""Document render pool tests (thread-backed executor, no worker processes)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.domains.personal_learning.services import render_pool as rp
+from src.domains.personal_learning.services.document_impl import DocumentGenerationService
+from src.domains.personal_learning.services.render_cache import RenderCache
+
+_MODULE = "src.domains.personal_learning.services.render_pool"
+
+
+class _ThreadRenderPool(rp.RenderPool):
+    """Same queueing and dispatch, with threads standing in for processes."""
+
+    def _new_executor(self):
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+
+def _fake_render(calls: list, gate: threading.Event | None = None, delay: float = 0.0):
+    def render(kind, args):
+        if gate is not None and args.get("title") == "blocker":
+            gate.wait(2)
+        if delay:
+            time.sleep(delay)
+        calls.append(args["title"])
+        return f"{kind}:{args['title']}".encode()
+
+    return render
+
+
+class TestRenderPool:
+    async def test_inline_render_spools_to_disk(self, tmp_path):
+        pool = rp.RenderPool(workers=0, spool_dir=str(tmp_path))
+        with patch(f"{_MODULE}.render_bytes", _fake_render([])):
+            result = await pool.render(rp.PDF, title="Notes", content="<p>x</p>", style="minimal")
+
+        assert result.read_bytes() == b"pdf:Notes"
+        assert result.size == len(b"pdf:Notes")
+        result.cleanup()
+        assert not os.path.exists(result.path)
+
+    async def test_paid_tier_jobs_run_first(self, tmp_path):
+        calls: list[str] = []
+        gate = threading.Event()
+        pool = _ThreadRenderPool(workers=1, spool_dir=str(tmp_path))
+        await pool.start()
+        try:
+            with patch(f"{_MODULE}.render_bytes", _fake_render(calls, gate)):
+                blocker = asyncio.create_task(pool.render(rp.PDF, title="blocker"))
+                await asyncio.sleep(0.05)  # blocker occupies the only worker
+                free = asyncio.create_task(
+                    pool.render(rp.PDF, title="free", priority=rp.priority_for_tier("free"))
+                )
+                plus = asyncio.create_task(
+                    pool.render(rp.PDF, title="plus", priority=rp.priority_for_tier("plus"))
+                )
+                await asyncio.sleep(0.05)
+                gate.set()
+                results = await asyncio.gather(blocker, free, plus)
+        finally:
+            await pool.stop()
+
+        assert calls == ["blocker", "plus", "free"]
+        for result in results:
+            result.cleanup()
+        assert pool.get_stats()["completed"] == 3
+
+    async def test_stuck_job_times_out_and_recycles_pool(self, tmp_path):
+        pool = _ThreadRenderPool(workers=1, timeout=0.05, spool_dir=str(tmp_path))
+        await pool.start()
+        try:
+            with (
+                patch(f"{_MODULE}._BACKSTOP_GRACE_SECONDS", 0.0),
+                patch(f"{_MODULE}.render_bytes", _fake_render([], delay=0.3)),
+            ):
+                with pytest.raises(rp.RenderTimeoutError):
+                    await pool.render(rp.DOCX, title="slow", content="", style="academic")
+        finally:
+            await pool.stop()
+
+        stats = pool.get_stats()
+        assert stats["timeouts"] == 1
+        assert stats["recycles"] == 1
+
+    async def test_jobs_failing_on_the_same_pool_recycle_it_once(self, tmp_path):
+        pool = _ThreadRenderPool(workers=2, timeout=0.05, spool_dir=str(tmp_path))
+        await pool.start()
+        try:
+            with (
+                patch(f"{_MODULE}._BACKSTOP_GRACE_SECONDS", 0.0),
+                patch(f"{_MODULE}.render_bytes", _fake_render([], delay=0.3)),
+            ):
+                results = await asyncio.gather(
+                    pool.render(rp.DOCX, title="a", content="", style="academic"),
+                    pool.render(rp.DOCX, title="b", content="", style="academic"),
+                    return_exceptions=True,
+                )
+        finally:
+            await pool.stop()
+
+        assert all(isinstance(r, rp.RenderTimeoutError) for r in results)
+        stats = pool.get_stats()
+        assert stats["timeouts"] == 2
+        assert stats["recycles"] == 1
+
+    async def test_recycle_ignores_a_replaced_pool(self, tmp_path):
+        pool = _ThreadRenderPool(workers=1, spool_dir=str(tmp_path))
+        await pool.start()
+        try:
+            old = pool._executor
+            assert pool._recycle(old) is True
+            assert pool._recycle(old) is False
+            assert pool._executor is not old
+        finally:
+            await pool.stop()
+
+        assert pool.get_stats()["recycles"] == 1
+
+    async def test_full_queue_is_rejected(self, tmp_path):
+        pool = _ThreadRenderPool(workers=1, max_queue=0, spool_dir=str(tmp_path))
+        await pool.start()
+        try:
+            with pytest.raises(rp.RenderError, match="queue is full"):
+                await pool.render(rp.PDF, title="x", content="", style="academic")
+        finally:
+            await pool.stop()
+
+
+class TestGenerateDocumentUsesPool:
+    async def test_rendered_file_is_streamed_to_storage_and_removed(self, tmp_path):
+        spooled = tmp_path / "render.pdf"
+        spooled.write_bytes(b"%PDF-1.7")
+        rendered = rp.RenderResult(str(spooled), 8, 1.0)
+        storage = AsyncMock()
+        storage.upload_file.return_value = {"url": "https://cdn/x.pdf", "size": 8}
+        storage.upload_bytes.return_value = {"url": "https://cdn/x.html", "size": 10}
+
+        with (
+            patch(
+                "src.domains.personal_learning.services.document_impl.render_pool.render",
+                AsyncMock(return_value=rendered),
+            ) as render,
+            patch("src.shared.infrastructure.storage_service.storage_service", storage),
+            patch(
+                "src.domains.personal_learning.services.document_impl.render_cache",
+                RenderCache(),
+            ),
+        ):
+            result = await DocumentGenerationService().generate_document(
+                format="pdf",
+                title="My Notes",
+                content="# Heading\n\nBody",
+                style="report",
+                user_id="u1",
+                priority=rp.PRIORITY_PLUS,
+            )
+
+        kind = render.await_args.args[0]
+        assert kind == rp.PDF
+        assert render.await_args.kwargs["priority"] == rp.PRIORITY_PLUS
+        assert storage.upload_file.await_args.args[0] == str(spooled)
+        assert not spooled.exists()
+        assert result["url"] == "https://cdn/x.pdf"
+        assert result["preview_url"] == "https://cdn/x.html"
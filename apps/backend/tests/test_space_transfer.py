@@ -0,0 +1,186 @@
+"""Learning Space transfers: set-based import/export statements, paging and job queueing."""
+
+import hashlib
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.config import get_settings
+from src.domains.learning_spaces.models import ImportRequest
+from src.domains.learning_spaces.repository import LearningSpaceRepository, copy_id
+from src.domains.learning_spaces.services import transfer_service
+from src.shared.exceptions import NotFoundError
+
+
+class FakeSession:
+    def __init__(self, rows=None):
+        self.statements = []
+        self.commits = 0
+        self.rows = rows or []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return MagicMock(rowcount=2, all=MagicMock(return_value=self.rows))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestStatements:
+    async def test_import_checks_ownership_in_one_update(self):
+        session = FakeSession()
+
+        moved = await LearningSpaceRepository().import_into_space(
+            session, "courses", "space-1", "u1", ["c1", "c2", "c3"]
+        )
+
+        assert moved == 2
+        (stmt,) = session.statements
+        sql = _sql(stmt)
+        assert sql.startswith('UPDATE "Course" SET')
+        assert '"Course".id = ANY (' in sql
+        assert '"Course"."userId" = ' in sql
+        assert '"Course"."spaceId" IS NULL' in sql
+
+    async def test_course_export_copies_modules_and_topics(self):
+        session = FakeSession(rows=[SimpleNamespace(id="new", title="Algebra")])
+
+        copies = await LearningSpaceRepository().copy_from_space(
+            session, "courses", "space-1", "u1", ["c1"], "salt"
+        )
+
+        assert [c.title for c in copies] == ["Algebra"]
+        course, module, topic = (_sql(stmt) for stmt in session.statements)
+        assert course.startswith('INSERT INTO "Course" (id, "userId", title')
+        assert "substr(md5(" in course and 'RETURNING "Course".id, "Course".title' in course
+        assert module.startswith('INSERT INTO "Module" (id, "courseId"')
+        assert 'JOIN "Course" ON "Course".id = "Module"."courseId"' in module
+        assert topic.startswith('INSERT INTO "Topic" (id, "moduleId"')
+        assert '"Course"."spaceId" = ' in topic
+
+    async def test_note_export_copies_tags_and_attachments(self):
+        session = FakeSession()
+
+        await LearningSpaceRepository().copy_from_space(
+            session, "notes", "space-1", "u1", ["n1"], "salt"
+        )
+
+        tables = [_sql(stmt).split(" (")[0] for stmt in session.statements]
+        assert tables == [
+            'INSERT INTO "Note"',
+            'INSERT INTO "NoteTag"',
+            'INSERT INTO "NoteAttachment"',
+        ]
+
+    def test_copy_id_matches_the_sql_expression(self):
+        # substr(md5(salt || id), 1, 25)
+        assert copy_id("salt", "n1") == hashlib.md5(b"saltn1").hexdigest()[:25]
+        assert copy_id("salt", "n1") != copy_id("other", "n1")
+
+
+def _repo():
+    repo = MagicMock()
+    repo.import_into_space = AsyncMock(side_effect=lambda s, kind, space, user, ids: len(ids))
+    repo.copy_from_space = AsyncMock(
+        side_effect=lambda s, kind, space, user, ids, salt: [SimpleNamespace(id=i) for i in ids]
+    )
+    return repo
+
+
+class TestTransfer:
+    def test_request_ids_are_grouped_and_deduplicated(self):
+        data = ImportRequest(noteIds=["n1", "n2", "n1"], goalIds=["g1"])
+
+        assert transfer_service.ids_by_type(data) == {
+            "notes": ["n1", "n2"],
+            "courses": [],
+            "resources": [],
+            "goals": ["g1"],
+        }
+
+    async def test_small_transfer_is_one_transaction(self):
+        repo, session = _repo(), FakeSession()
+
+        with (
+            patch.object(transfer_service, "space_repo", repo),
+            patch.object(transfer_service, "get_session_factory", return_value=lambda: session),
+        ):
+            counts = await transfer_service.transfer(
+                transfer_service.IMPORT, "space-1", "u1", {"notes": ["n1", "n2"], "goals": ["g1"]}
+            )
+
+        assert counts == {"notes": 2, "courses": 0, "resources": 0, "goals": 1}
+        assert repo.import_into_space.await_count == 2
+        assert session.commits == 1
+
+    async def test_large_transfer_pages_and_reports_progress(self):
+        repo, session = _repo(), FakeSession()
+        progress = []
+
+        with (
+            patch.object(transfer_service, "space_repo", repo),
+            patch.object(transfer_service, "get_session_factory", return_value=lambda: session),
+        ):
+            counts = await transfer_service.run_transfer(
+                transfer_service.EXPORT,
+                "space-1",
+                "u1",
+                {"courses": [f"c{i}" for i in range(5)], "goals": ["g1"]},
+                batch_size=2,
+                on_progress=lambda done, total, counts: progress.append((done, total)),
+            )
+
+        assert counts["courses"] == 5 and counts["goals"] == 1
+        assert progress == [(2, 6), (4, 6), (5, 6), (6, 6)]
+        assert session.commits == 4
+        # One salt per job, so every page maps children to the same copied parents
+        assert len({call.args[5] for call in repo.copy_from_space.await_args_list}) == 1
+
+    async def test_start_transfer_queues_large_transfers(self):
+        ids = {"notes": [f"n{i}" for i in range(get_settings().SPACE_TRANSFER_ASYNC_THRESHOLD + 1)]}
+        cache = MagicMock(set=AsyncMock(return_value=True))
+        apply_async = MagicMock()
+
+        with (
+            patch(
+                "src.domains.learning_spaces.services.space_impl._verify_membership", AsyncMock()
+            ),
+            patch("src.shared.infrastructure.cache", cache),
+            patch("src.workers.learning_spaces_tasks.space_transfer_task.apply_async", apply_async),
+            patch.object(transfer_service, "transfer", AsyncMock()) as run_now,
+        ):
+            result = await transfer_service.start_transfer(
+                transfer_service.IMPORT, space_id="space-1", user_id="u1", ids=ids
+            )
+
+        assert result["status"] == "queued"
+        run_now.assert_not_awaited()
+        assert cache.set.await_args.args[1] == {"userId": "u1", "spaceId": "space-1"}
+        assert apply_async.call_args.kwargs["task_id"] == result["taskId"]
+        assert apply_async.call_args.kwargs["kwargs"]["ids"] == ids
+
+    async def test_polling_checks_owner_and_space(self):
+        cache = MagicMock(get=AsyncMock(return_value={"userId": "u1", "spaceId": "space-1"}))
+
+        with patch("src.shared.infrastructure.cache", cache):
+            for space_id, user_id in (("space-2", "u1"), ("space-1", "u2")):
+                with pytest.raises(NotFoundError):
+                    await transfer_service.get_transfer_job(
+                        "t1", space_id=space_id, user_id=user_id
+                    )
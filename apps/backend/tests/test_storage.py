@@ -1,12 +1,16 @@
 """Tests for the BunnyCDN storage client."""
 
+import asyncio
+import io
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from fastapi import UploadFile
 
 from src.shared.infrastructure.storage import (
     BunnyStorageClient,
+    ByteBudget,
     StorageError,
     storage_service,
 )
@@ -40,10 +44,10 @@ def _fresh_client(settings: MagicMock) -> BunnyStorageClient:
 async def test_upload_bytes_success():
     client = _fresh_client(_mock_settings())
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.put.return_value = MagicMock(status_code=201)
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         result = await client.upload_bytes(b"hello", "notes/hello.txt")
 
@@ -57,10 +61,10 @@ async def test_upload_bytes_success():
 async def test_upload_bytes_uses_public_base_when_set():
     client = _fresh_client(_mock_settings(public_base="https://pull.example.net"))
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.put.return_value = MagicMock(status_code=201)
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         result = await client.upload_bytes(b"x", "chat-images/a.png")
 
@@ -79,15 +83,42 @@ async def test_upload_bytes_missing_config_raises():
 async def test_upload_bytes_api_error_raises():
     client = _fresh_client(_mock_settings())
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.put.return_value = MagicMock(status_code=401, text="Unauthorized")
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         with pytest.raises(StorageError, match="HTTP 401"):
             await client.upload_bytes(b"x", "a.txt")
 
 
+@pytest.mark.asyncio
+async def test_upload_file_streams_from_disk(tmp_path):
+    client = _fresh_client(_mock_settings())
+    local = tmp_path / "report.pdf"
+    local.write_bytes(b"%PDF" * 1000)
+    received = bytearray()
+
+    async def fake_put(url, headers, content, **kwargs):
+        async for chunk in content:
+            received.extend(chunk)
+        return MagicMock(status_code=201)
+
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
+        http = AsyncMock()
+        http.put.side_effect = fake_put
+        registry.get.return_value = http
+
+        result = await client.upload_file(
+            str(local), "generated-docs/u1/report.pdf", chunk_size=1024
+        )
+
+    assert bytes(received) == local.read_bytes()
+    assert result["size"] == 4000
+    assert result["url"] == "https://cdn.test.com/generated-docs/u1/report.pdf"
+    assert http.put.call_args.kwargs["headers"]["Content-Length"] == "4000"
+
+
 @pytest.mark.asyncio
 async def test_upload_upload_file_delegates_to_upload_bytes():
     client = _fresh_client(_mock_settings())
@@ -95,13 +126,14 @@ async def test_upload_upload_file_delegates_to_upload_bytes():
     file = MagicMock(spec=UploadFile)
     file.filename = "test image.png"
     file.content_type = "image/png"
+    file.size = 8
     file.read = AsyncMock(return_value=b"pngbytes")
     file.seek = AsyncMock()
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.put.return_value = MagicMock(status_code=201)
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         result = await client.upload_upload_file(file, path_prefix="uploads")
 
@@ -114,10 +146,10 @@ async def test_upload_upload_file_delegates_to_upload_bytes():
 async def test_delete_by_public_url():
     client = _fresh_client(_mock_settings())
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.delete.return_value = MagicMock(status_code=200)
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         ok = await client.delete("https://cdn.test.com/notes/hello.txt")
 
@@ -131,30 +163,104 @@ async def test_delete_by_public_url():
 async def test_delete_returns_true_on_404():
     client = _fresh_client(_mock_settings())
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
         http = AsyncMock()
         http.delete.return_value = MagicMock(status_code=404)
-        mock_client_cls.return_value.__aenter__.return_value = http
+        registry.get.return_value = http
 
         assert await client.delete("notes/missing.txt") is True
 
 
+def _storage_transport(objects: dict[str, bytes], seen: list[httpx.Request] | None = None):
+    """A real httpx client whose transport serves ``objects`` (with Range support)."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if seen is not None:
+            seen.append(request)
+        if request.method == "PUT":
+            return httpx.Response(201)
+        body = objects.get(request.url.path)
+        if body is None:
+            return httpx.Response(404)
+        headers = {"content-type": "image/png"}
+        range_header = request.headers.get("range")
+        if range_header:
+            start, _, end = range_header.removeprefix("bytes=").partition("-")
+            last = int(end) if end else len(body) - 1
+            headers["content-range"] = f"bytes {start}-{last}/{len(body)}"
+            return httpx.Response(206, content=body[int(start) : last + 1], headers=headers)
+        return httpx.Response(200, content=body, headers=headers)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
 @pytest.mark.asyncio
 async def test_fetch_bytes_returns_content_and_type():
     client = _fresh_client(_mock_settings())
+    http = _storage_transport({"/test-zone/chat-images/a.png": b"png-bytes"})
 
-    with patch("httpx.AsyncClient") as mock_client_cls:
-        http = AsyncMock()
-        http.get.return_value = MagicMock(
-            status_code=200,
-            content=b"png-bytes",
-            headers={"content-type": "image/png"},
-        )
-        mock_client_cls.return_value.__aenter__.return_value = http
-
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
+        registry.get.return_value = http
         result = await client.fetch_bytes("chat-images/a.png")
+        missing = await client.fetch_bytes("chat-images/missing.png")
 
     assert result == (b"png-bytes", "image/png")
+    assert missing is None
+    assert client._budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_open_stream_serves_byte_ranges_in_chunks():
+    client = _fresh_client(_mock_settings())
+    body = bytes(range(256)) * 40
+    http = _storage_transport({"/test-zone/audio/a.mp3": body})
+
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
+        registry.get.return_value = http
+        stream = await client.open_stream("audio/a.mp3", byte_range=(1000, None), chunk_size=512)
+        chunks = [chunk async for chunk in stream.chunks()]
+
+    assert stream.is_partial
+    assert stream.content_range == f"bytes 1000-{len(body) - 1}/{len(body)}"
+    assert b"".join(chunks) == body[1000:]
+    assert max(len(c) for c in chunks) <= 512
+    assert client._budget.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_upload_file_streams_spooled_file():
+    client = _fresh_client(_mock_settings())
+    payload = b"%PDF" * 5000
+    file = UploadFile(file=io.BytesIO(payload), filename="big.pdf")
+    seen: list[httpx.Request] = []
+    http = _storage_transport({}, seen)
+
+    with patch("src.shared.infrastructure.storage.http_clients") as registry:
+        registry.get.return_value = http
+        with patch.object(file, "read", wraps=file.read) as read:
+            result = await client.upload_upload_file(file, "notes/u1", chunk_size=4096)
+
+    assert result["size"] == len(payload)
+    assert seen[0].headers["Content-Length"] == str(len(payload))
+    assert all(call.args == (4096,) for call in read.call_args_list)
+    assert await file.read() == payload  # Rewound for the caller
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_caps_concurrent_transfers():
+    budget = ByteBudget(100)
+    peak = 0
+
+    async def transfer(size):
+        nonlocal peak
+        async with budget.reserve(size):
+            peak = max(peak, budget.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(transfer(40) for _ in range(6)), transfer(500))
+
+    assert peak <= 100
+    assert budget.in_flight == 0
 
 
 def test_singleton_instance_exists():
@@ -0,0 +1,173 @@
+"""Map-reduce topic extraction: structural chunking, bounded fan-out, merging."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.domains.personal_learning.services import topic_extraction
+from src.domains.personal_learning.services.topic_extraction import (
+    chunk_materials,
+    merge_topics,
+    parse_topics,
+)
+
+SYLLABUS = "\n".join(
+    [
+        "# Algorithms",
+        "Course overview.",
+        "",
+        "## Chapter 1 Graphs",
+        "Breadth-first search. " * 60,
+        "",
+        "CHAPTER 2: TREES",
+        "Binary trees and heaps. " * 60,
+        "",
+        "3. Sorting",
+        "Quick sort and merge sort. " * 60,
+    ]
+)
+
+
+class TestChunking:
+    def test_small_material_is_one_chunk(self):
+        chunks = chunk_materials([("a.pdf", "Short notes on graphs.")], 1000)
+        assert [(c.index, c.source, c.text) for c in chunks] == [
+            (0, "a.pdf", "Short notes on graphs.")
+        ]
+
+    def test_chunks_follow_headings_and_keep_everything(self):
+        chunks = chunk_materials([("syllabus.pdf", SYLLABUS)], 2000)
+
+        assert len(chunks) == 3
+        assert all(len(c.text) <= 2000 for c in chunks)
+        # Small sections are packed together, but chunks only break at headings
+        assert [c.text.split("\n", 1)[0] for c in chunks] == [
+            "# Algorithms",
+            "CHAPTER 2: TREES",
+            "3. Sorting",
+        ]
+        joined = " ".join(c.text for c in chunks)
+        assert joined.count("Quick sort") == 60  # nothing truncated
+
+    def test_oversized_paragraph_is_split_by_sentence(self):
+        text = "A sentence about heaps. " * 500
+        chunks = chunk_materials([("a.pdf", text)], 1000)
+
+        assert len(chunks) > 1
+        assert all(len(c.text) <= 1000 for c in chunks)
+
+    def test_materials_are_chunked_separately(self):
+        chunks = chunk_materials([("a.pdf", "Alpha."), ("b.pdf", "Beta."), ("c.pdf", "")], 1000)
+        assert [(c.index, c.source) for c in chunks] == [(0, "a.pdf"), (1, "b.pdf")]
+
+
+class TestParseAndMerge:
+    def test_parse_tolerates_fences_and_drops_untitled(self):
+        response = '```json\n[{"title": "Graphs"}, {"description": "no title"}]\n```'
+        assert parse_topics(response) == [{"title": "Graphs"}]
+
+    def test_parse_raises_without_json(self):
+        with pytest.raises(json.JSONDecodeError):
+            parse_topics("I could not find any topics.")
+
+    def test_merge_folds_duplicates_across_chunks(self):
+        intro = {"title": "Introduction to Graphs", "description": "Short", "estimatedMinutes": 40}
+        merged = merge_topics(
+            [
+                [intro],
+                [
+                    {"title": "Graphs", "description": "A longer one", "estimatedMinutes": 60},
+                    {"title": "Binary Trees", "estimatedMinutes": "lots"},
+                ],
+            ],
+            max_topics=10,
+        )
+
+        assert merged == [
+            {
+                "title": "Introduction to Graphs",
+                "description": "A longer one",
+                "estimatedMinutes": 60,
+            },
+            {"title": "Binary Trees", "description": None, "estimatedMinutes": 30},
+        ]
+
+    def test_merge_caps_topics_and_minutes(self):
+        merged = merge_topics(
+            [[{"title": f"Topic {i}", "estimatedMinutes": 500} for i in range(10)]],
+            max_topics=3,
+        )
+        assert [t["title"] for t in merged] == ["Topic 0", "Topic 1", "Topic 2"]
+        assert {t["estimatedMinutes"] for t in merged} == {120}
+
+
+class TestExtract:
+    async def test_fans_out_with_bounded_concurrency_and_reports_progress(self):
+        in_flight = peak = 0
+        progress = []
+
+        async def fake_extract_chunk(subject, chunk, total, user_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [{"title": f"Topic {chunk.index}"}, {"title": "Shared topic"}]
+
+        async def on_progress(completed, total):
+            progress.append((completed, total))
+
+        materials = [
+            SimpleNamespace(filename=f"{i}.pdf", extracted_text=f"Material {i}.") for i in range(6)
+        ]
+        with patch.object(topic_extraction, "_extract_chunk", fake_extract_chunk):
+            topics = await topic_extraction.extract(
+                user_id="u1",
+                subject="Algorithms",
+                materials=materials,
+                fallback_text="unused",
+                chunk_chars=1000,
+                concurrency=2,
+                max_topics=50,
+                on_progress=on_progress,
+            )
+
+        assert peak == 2
+        assert progress[0] == (0, 6) and progress[-1] == (6, 6)
+        assert [t["title"] for t in topics] == [
+            "Topic 0",
+            "Shared topic",
+            "Topic 1",
+            "Topic 2",
+            "Topic 3",
+            "Topic 4",
+            "Topic 5",
+        ]
+
+    async def test_falls_back_to_subject_without_material_text(self):
+        seen = []
+
+        async def fake_extract_chunk(subject, chunk, total, user_id):
+            seen.append(chunk.text)
+            return []
+
+        with patch.object(topic_extraction, "_extract_chunk", fake_extract_chunk):
+            topics = await topic_extraction.extract(
+                user_id="u1",
+                subject="Algorithms",
+                materials=[SimpleNamespace(filename="a.pdf", extracted_text=None)],
+                fallback_text="Subject: Algorithms",
+                chunk_chars=1000,
+                concurrency=2,
+                max_topics=50,
+            )
+
+        assert topics == []
+        assert seen == ["Subject: Algorithms"]
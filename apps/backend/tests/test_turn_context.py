@@ -0,0 +1,159 @@
+"""Unit tests for the chat turn context loader (no database)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.domains.intelligence.conversation.turn_context import (
+    TurnContext,
+    TurnTimings,
+    _resolve_session,
+    _turn_snapshot_stmt,
+    format_history,
+)
+from src.domains.intelligence.memory.memory_impl import format_memory_context
+
+_MODULE = "src.domains.intelligence.conversation.turn_context"
+
+
+def _compile(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestSnapshotStatement:
+    """The per-turn reads collapse into one SELECT of scalar subqueries."""
+
+    def test_personal_turn_includes_memory_and_history(self):
+        sql = _compile(
+            _turn_snapshot_stmt(
+                user_id="u1",
+                session_id="s1",
+                review_item_id=None,
+                history_user_id="u1",
+                history_take=11,
+                include_memory=True,
+            )
+        )
+        assert sql.count("SELECT") >= 7
+        for label in ("is_onboarded", "pref_provider", "pref_model", "history"):
+            assert f"AS {label}" in sql
+        for table in ('"ConversationSummary"', '"LearningInsight"', '"UserFact"'):
+            assert table in sql
+        assert '"ChatMessage"."reviewItemId" IS NULL' in sql
+
+    def test_circle_turn_skips_memory_tables(self):
+        sql = _compile(
+            _turn_snapshot_stmt(
+                user_id="u1",
+                session_id="s1",
+                review_item_id="r1",
+                history_user_id=None,
+                history_take=11,
+                include_memory=False,
+            )
+        )
+        assert '"ConversationSummary"' not in sql
+        assert '"UserFact"' not in sql
+        assert "AS summaries" in sql
+        assert '"ChatMessage"."reviewItemId" = ' in sql
+
+
+class TestHistory:
+    def test_history_with_appends_current_message_and_trims(self):
+        turn = TurnContext(
+            session=SimpleNamespace(id="s1"),
+            history=[{"role": "USER", "content": f"m{i}"} for i in range(11)],
+        )
+        message = SimpleNamespace(role="USER", content="now", image_url=None, image_urls=None)
+        rows = turn.history_with(message, take=5)
+        assert [r["content"] for r in rows] == ["m7", "m8", "m9", "m10", "now"]
+
+    def test_format_history_maps_roles_and_images(self):
+        rows = [
+            {"role": "USER", "content": "hi", "image_urls": ["a.png", "b.png"]},
+            {"role": "ASSISTANT", "content": "hello", "image_url": "c.png"},
+        ]
+        assert format_history(rows) == [
+            {"role": "user", "parts": ["hi", "a.png", "b.png"]},
+            {"role": "model", "parts": ["hello", "c.png"]},
+        ]
+
+
+class TestTimings:
+    async def test_timed_records_stage(self):
+        timings = TurnTimings()
+
+        async def work():
+            return 42
+
+        assert await timings.timed("stage_a", work()) == 42
+        breakdown = timings.as_dict()
+        assert "stage_a" in breakdown
+        assert breakdown["total"] >= breakdown["stage_a"]
+
+
+class TestResolveSession:
+    async def test_pinned_session_owned_by_other_user_is_rejected(self):
+        current = SimpleNamespace(id="s1", user_id="u1")
+        pinned = SimpleNamespace(id="s2", user_id="someone-else")
+        with (
+            patch(f"{_MODULE}.intelligence_repo.find_chat_session", AsyncMock(return_value=pinned)),
+            patch(f"{_MODULE}._get_circle_group_for_session", AsyncMock(return_value=None)),
+        ):
+            session, group, error = await _resolve_session(
+                object(), SimpleNamespace(id="u1"), current, {"sessionId": "s2"}, TurnTimings()
+            )
+        assert session is current
+        assert error == "You are not allowed to access this chat session."
+
+    async def test_pinned_session_owned_by_user_is_used(self):
+        current = SimpleNamespace(id="s1", user_id="u1")
+        pinned = SimpleNamespace(id="s2", user_id="u1")
+        with (
+            patch(f"{_MODULE}.intelligence_repo.find_chat_session", AsyncMock(return_value=pinned)),
+            patch(f"{_MODULE}._get_circle_group_for_session", AsyncMock(return_value=None)),
+        ):
+            session, group, error = await _resolve_session(
+                object(), SimpleNamespace(id="u1"), current, {"sessionId": "s2"}, TurnTimings()
+            )
+        assert session is pinned
+        assert error is None
+
+    async def test_non_member_of_current_room_is_rejected(self):
+        current = SimpleNamespace(id="s1", user_id="u2")
+        group = SimpleNamespace(id="g1", space_id="sp1")
+        with (
+            patch(f"{_MODULE}._get_circle_group_for_session", AsyncMock(return_value=group)),
+            patch(f"{_MODULE}._is_circle_member", MagicMock(return_value=False)),
+        ):
+            _, _, error = await _resolve_session(
+                object(), SimpleNamespace(id="u1"), current, None, TurnTimings()
+            )
+        assert error == "You are not a member of this space room."
+
+
+class TestFormatMemoryContext:
+    def test_renders_all_sections(self):
+        text = format_memory_context(
+            [
+                {
+                    "summary": "Talked calculus",
+                    "key_topics": ["limits"],
+                    "created_at": "2024-06-15T08:00:00+00:00",
+                }
+            ],
+            [{"insight_type": "pace", "content": "Studies at night", "confidence": 0.5}],
+            [{"category": "goal", "content": "Pass the exam"}],
+        )
+        assert "- [Jun 15] Talked calculus (Topics: limits)" in text
+        assert "- [pace] Studies at night (50% confident)" in text
+        assert "- [goal] Pass the exam" in text
+
+    def test_empty_snapshot_is_blank(self):
+        assert format_memory_context([], [], []) == ""
@@ -0,0 +1,183 @@
+"""Cross-node WebSocket fan-out tests (two managers sharing a fake Redis)."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.exceptions import RedisError
+
+from src.core.websocket import ConnectionManager
+from src.core.websocket_fanout import USER
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+        self.sent: list[dict] = []
+
+    async def send_text(self, frame):
+        self.sent.append(json.loads(frame))
+
+    def payloads(self, kind):
+        return [m for m in self.sent if m.get("type") == kind]
+
+
+async def _eventually(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def cluster():
+    server = fakeredis.FakeServer()
+    nodes = []
+    for node_id in ("node-a", "node-b"):
+        manager = ConnectionManager()
+        client = fakeredis.aioredis.FakeRedis(server=server)
+        await manager.enable_fanout(client, node_id=node_id, flush_interval=0.005)
+        nodes.append(manager)
+    yield nodes
+    for manager in nodes:
+        await manager.disable_fanout()
+        await _disconnect_all(manager)
+
+
+async def _disconnect_all(manager):
+    for connection_id in list(manager.active_connections):
+        await manager.disconnect(connection_id)
+
+
+class TestClusterFanout:
+    """Messages reach sockets held by another node."""
+
+    async def test_send_to_user_reaches_remote_node(self, cluster):
+        node_a, node_b = cluster
+        ws = FakeWebSocket()
+        await node_b.connect(ws, user_id="u1")
+        await node_b.fanout.flush()
+
+        await node_a.send_to_user("u1", {"type": "credit_balance_update", "balance": 5})
+
+        await _eventually(lambda: ws.payloads("credit_balance_update"))
+        assert ws.payloads("credit_balance_update") == [
+            {"type": "credit_balance_update", "balance": 5}
+        ]
+
+    async def test_channel_broadcast_reaches_remote_subscribers(self, cluster):
+        node_a, node_b = cluster
+        local_ws, remote_ws = FakeWebSocket(), FakeWebSocket()
+        local_id = await node_a.connect(local_ws, user_id="u1")
+        remote_id = await node_b.connect(remote_ws, user_id="u2")
+        node_a.subscribe_to_channel(local_id, "room:s1")
+        node_b.subscribe_to_channel(remote_id, "room:s1")
+        await node_a.fanout.flush()
+        await node_b.fanout.flush()
+
+        await node_a.broadcast_to_channel("room:s1", {"type": "stream", "delta": "hi"})
+
+        await _eventually(lambda: remote_ws.payloads("stream") and local_ws.payloads("stream"))
+        assert local_ws.payloads("stream") == [{"type": "stream", "delta": "hi"}]
+        assert remote_ws.payloads("stream") == [{"type": "stream", "delta": "hi"}]
+
+    async def test_local_only_target_is_not_published(self, cluster):
+        node_a, node_b = cluster
+        ws = FakeWebSocket()
+        await node_a.connect(ws, user_id="u1")
+        await node_a.fanout.flush()
+
+        await node_a.send_to_user("u1", {"type": "ping"})
+        await node_a.fanout.flush()
+
+        await _eventually(lambda: ws.payloads("ping"))
+        assert ws.payloads("ping") == [{"type": "ping"}]
+        assert node_a.fanout.stats["local_only"] == 1
+        assert node_a.fanout.stats["published_messages"] == 0
+
+    async def test_messages_to_same_node_are_coalesced(self, cluster):
+        node_a, node_b = cluster
+        ws = FakeWebSocket()
+        await node_b.connect(ws, user_id="u1")
+        await node_b.fanout.flush()
+        await node_a.fanout.flush()
+        batches_before = node_a.fanout.stats["published_batches"]
+
+        for i in range(5):
+            node_a.fanout.publish(USER, "u1", {"type": "token", "i": i})
+        await node_a.fanout.flush()
+
+        assert node_a.fanout.stats["published_batches"] == batches_before + 1
+        await _eventually(lambda: len(ws.payloads("token")) == 5)
+        assert [m["i"] for m in ws.payloads("token")] == [0, 1, 2, 3, 4]
+
+    async def test_failed_flush_is_retried(self, cluster):
+        node_a, node_b = cluster
+        ws = FakeWebSocket()
+        await node_b.connect(ws, user_id="u1")
+        await node_b.fanout.flush()
+        await node_a.fanout.flush()
+
+        node_a.fanout.publish(USER, "u1", {"type": "token", "i": 0})
+        with patch.object(node_a.fanout.redis, "pipeline", side_effect=RedisError("down")):
+            with pytest.raises(RedisError):
+                await node_a.fanout.flush()
+        assert len(node_a.fanout._pending) == 1  # Re-queued, not lost
+        await node_a.fanout.flush()
+
+        await _eventually(lambda: ws.payloads("token"))
+        assert ws.payloads("token") == [{"type": "token", "i": 0}]
+
+    async def test_room_messages_reach_members_on_every_node(self, cluster):
+        node_a, node_b = cluster
+        local_ws, remote_ws = FakeWebSocket(), FakeWebSocket()
+        node_a.join_room(await node_a.connect(local_ws, user_id="u1"), "s1")
+        node_b.join_room(await node_b.connect(remote_ws, user_id="u2"), "s1")
+        await node_a.fanout.flush()
+        await node_b.fanout.flush()
+
+        await node_a.send_room_json({"type": "stream", "chunk": "hi"}, "s1")
+
+        await _eventually(lambda: remote_ws.payloads("stream") and local_ws.payloads("stream"))
+        assert remote_ws.payloads("stream") == [{"type": "stream", "chunk": "hi"}]
+
+
+class TestPresence:
+    """Connection counts are cluster-wide and follow disconnects."""
+
+    async def test_user_connection_count_spans_nodes(self, cluster):
+        node_a, node_b = cluster
+        await node_a.connect(FakeWebSocket(), user_id="u1")
+        conn_b = await node_b.connect(FakeWebSocket(), user_id="u1")
+        await node_b.fanout.flush()
+
+        assert await node_a.get_user_connection_count("u1") == 2
+
+        await node_b.disconnect(conn_b)
+        await node_b.fanout.flush()
+        assert await node_a.get_user_connection_count("u1") == 1
+
+    async def test_stopped_node_withdraws_presence(self, cluster):
+        node_a, node_b = cluster
+        await node_b.connect(FakeWebSocket(), user_id="u1")
+        await node_b.fanout.flush()
+
+        await node_b.disable_fanout()
+
+        assert await node_a.get_user_connection_count("u1") == 0
+
+    async def test_count_without_fanout_is_local(self):
+        manager = ConnectionManager()
+        await manager.connect(FakeWebSocket(), user_id="u1")
+        assert await manager.get_user_connection_count("u1") == 1
+        await _disconnect_all(manager)
@@ -0,0 +1,160 @@
+"""Outbound WebSocket queue and stream coalescing tests."""
+
+import os
+
+os.environ.setdefault("SKIP_DB_FIXTURE", "1")
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+from src.core.websocket import ConnectionManager
+from src.core.websocket_stream import DROP, StreamCoalescer
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+        self.delay = delay
+        self.sent: list[dict] = []
+
+    async def send_text(self, frame):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(frame))
+
+
+async def _settle(manager: ConnectionManager):
+    for queue in list(manager.outbound.values()):
+        await queue.drain()
+
+
+async def _disconnect_all(manager: ConnectionManager):
+    for connection_id in list(manager.active_connections):
+        await manager.disconnect(connection_id)
+
+
+class TestStreamCoalescer:
+    """Chunks are merged by size and time, and the final frame always goes out."""
+
+    async def test_size_bound_flushes_merged_text(self):
+        frames = []
+
+        async def emit(text, is_final):
+            frames.append((text, is_final))
+
+        stream = StreamCoalescer(emit, flush_interval=10, flush_bytes=8)
+        for chunk in ("abc", "def", "gh", "i"):
+            await stream.push(chunk)
+        await stream.push("", is_final=True)
+
+        assert frames == [("abcdefgh", False), ("i", True)]
+        assert stream.chunks_in == 5
+        assert stream.frames_out == 2
+
+    async def test_time_bound_flushes_pending_chunks(self):
+        frames = []
+
+        async def emit(text, is_final):
+            frames.append((text, is_final))
+
+        stream = StreamCoalescer(emit, flush_interval=0.01, flush_bytes=1024)
+        await stream.push("Hel")
+        await stream.push("lo")
+        assert frames == []
+
+        await asyncio.sleep(0.05)
+        assert frames == [("Hello", False)]
+
+    async def test_final_frame_emitted_when_buffer_empty(self):
+        frames = []
+
+        async def emit(text, is_final):
+            frames.append((text, is_final))
+
+        stream = StreamCoalescer(emit)
+        await stream.push("", is_final=True)
+        await stream.flush()
+        assert frames == [("", True)]
+
+    async def test_room_stream_is_coalesced_through_the_manager(self):
+        """The chat handler's path: coalescer -> send_room_json -> member queues."""
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        for ws in sockets:
+            manager.join_room(await manager.connect(ws, user_id="u1"), "s1")
+
+        async def emit(text, is_final):
+            await manager.send_room_json(
+                {"type": "stream", "payload": {"chunk": text, "is_final": is_final}}, "s1"
+            )
+
+        stream = StreamCoalescer(emit, flush_interval=10, flush_bytes=512)
+        for _ in range(100):
+            await stream.push("tok ")
+        await stream.push("", is_final=True)
+        await _settle(manager)
+
+        for ws in sockets:
+            frames = [m["payload"] for m in ws.sent if m["type"] == "stream"]
+            assert len(frames) == 1
+            assert frames[0] == {"chunk": "tok " * 100, "is_final": True}
+        await _disconnect_all(manager)
+
+
+class TestOutboundQueue:
+    """Sends are queued per connection and bounded."""
+
+    async def test_channel_frame_is_serialised_once_and_delivered(self):
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        for ws in sockets:
+            cid = await manager.connect(ws, user_id="u1")
+            manager.subscribe_to_channel(cid, "room:s1")
+
+        await manager.broadcast_to_channel("room:s1", {"type": "stream", "chunk": "hi"})
+        await _settle(manager)
+
+        for ws in sockets:
+            assert ws.sent[-1] == {"type": "stream", "chunk": "hi"}
+        assert manager.get_stream_metrics()["frames_sent"] == 4  # welcome + stream each
+        await _disconnect_all(manager)
+
+    async def test_slow_consumer_is_closed_on_overflow(self):
+        manager = ConnectionManager(outbound_max_frames=3)
+        slow = FakeWebSocket(delay=0.2)
+        cid = await manager.connect(slow, user_id="u1")
+
+        for i in range(10):
+            await manager.send_personal_message(cid, {"type": "stream", "i": i})
+        await asyncio.sleep(0.01)
+
+        assert cid not in manager.active_connections
+        slow.close.assert_awaited()
+        assert manager.get_stream_metrics()["slow_consumers_closed"] == 1
+
+    async def test_drop_policy_keeps_connection(self):
+        manager = ConnectionManager(outbound_max_frames=2, outbound_overflow=DROP)
+        slow = FakeWebSocket(delay=0.01)
+        cid = await manager.connect(slow, user_id="u1")
+
+        for i in range(5):
+            await manager.send_personal_message(cid, {"type": "stream", "i": i})
+        await _settle(manager)
+
+        assert cid in manager.active_connections
+        metrics = manager.get_stream_metrics()
+        assert metrics["frames_dropped"] > 0
+        assert metrics["max_queue_depth"] == 0
+        await _disconnect_all(manager)
+
+    async def test_send_error_disconnects(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        ws.send_text = AsyncMock(side_effect=RuntimeError("socket gone"))
+        cid = await manager.connect(ws, user_id="u1")
+        await asyncio.sleep(0.01)
+
+        assert cid not in manager.active_connections
+        assert "u1" not in manager.user_connections